@@ -23,17 +23,23 @@ from klaude_code.config.config import Config
 from klaude_code.config.list_model import display_models_and_providers
 from klaude_code.config.select_model import select_model_from_config
 from klaude_code.core.agent import AgentLLMClients
+from klaude_code.core.compaction import CompactionPolicy
 from klaude_code.core.executor import Executor
 from klaude_code.core.subagent import iter_sub_agent_profiles
 from klaude_code.core.tool.skill_loader import SkillLoader
 from klaude_code.core.tool.skill_tool import SkillTool
 from klaude_code.core.tool.tool_context import set_unrestricted_mode
-from klaude_code.llm import LLMClientABC, create_llm_client
+from klaude_code.llm import LLMClientABC
+from klaude_code.llm.prefix_analysis import PrefixHashAnalyzer
+from klaude_code.llm.transport import http_pool_stats, preconnect
 from klaude_code.protocol import op
 from klaude_code.protocol.events import EndEvent, Event
 from klaude_code.protocol.llm_parameter import LLMConfigParameter
 from klaude_code.protocol.model import ResponseMetadataItem
-from klaude_code.session import Session, resume_select_session
+from klaude_code.session import Session, resume_select_session, search_select_session
+from klaude_code.session.cache_report import display_cache_report
+from klaude_code.session.gc import collect_garbage, run_scheduled_gc
+from klaude_code.session.journal import set_durability_policy
 from klaude_code.trace import log, log_debug
 from klaude_code.ui.base.progress_bar import OSC94States, emit_osc94
 from klaude_code.ui.base.terminal_color import is_light_terminal_background
@@ -117,6 +123,7 @@ class AppInitConfig:
     unrestricted: bool
     vanilla: bool
     is_exec_mode: bool = False
+    cache_analysis: bool = False
 
 
 @dataclass
@@ -142,6 +149,7 @@ async def initialize_app_components(init_config: AppInitConfig) -> AppComponents
     config = load_config()
     if config is None:
         raise typer.Exit(1)
+    set_durability_policy(config.session_durability)
 
     # Initialize skills
     skill_loader = SkillLoader(
@@ -170,10 +178,14 @@ async def initialize_app_components(init_config: AppInitConfig) -> AppComponents
         else:
             log((f"Error: failed to load the default model configuration: {exc}", "red"))
         raise typer.Exit(2) from None
-    llm_client: LLMClientABC = create_llm_client(llm_config)
+    llm_client: LLMClientABC = config.create_llm_client(init_config.model or config.main_model)
     if init_config.debug:
         log_debug("➡️ llm [Model Config]", llm_config.model_dump_json(exclude_none=True), style="yellow")
         llm_client.enable_debug_mode()
+    # Shared by all clients so a model switch shows up as a prefix break
+    prefix_analyzer = PrefixHashAnalyzer() if init_config.cache_analysis else None
+    if prefix_analyzer is not None:
+        llm_client.enable_cache_analysis(prefix_analyzer)
 
     llm_clients = AgentLLMClients(main=llm_client)
 
@@ -184,8 +196,10 @@ async def initialize_app_components(init_config: AppInitConfig) -> AppComponents
         if not profile.enabled_for_model(llm_client.model_name):
             continue
         sub_llm_config = config.get_model_config(model_name)
-        sub_llm_client = create_llm_client(sub_llm_config)
+        sub_llm_client = config.create_llm_client(model_name)
         llm_clients.set_sub_agent_client(profile.type, sub_llm_client)
+        if prefix_analyzer is not None:
+            sub_llm_client.enable_cache_analysis(prefix_analyzer)
         if init_config.debug:
             log_debug(
                 f"➡️ llm [{profile.type.value} Model Config]",
@@ -198,7 +212,21 @@ async def initialize_app_components(init_config: AppInitConfig) -> AppComponents
     event_queue: asyncio.Queue[Event] = asyncio.Queue()
 
     # Create executor with the LLM client
-    executor = Executor(event_queue, llm_clients, llm_config, debug_mode=init_config.debug, vanilla=init_config.vanilla)
+    executor = Executor(
+        event_queue,
+        llm_clients,
+        llm_config,
+        debug_mode=init_config.debug,
+        vanilla=init_config.vanilla,
+        max_concurrent_tool_calls=config.max_concurrent_tool_calls,
+        stream_tool_dispatch=config.stream_tool_dispatch,
+        prompt_cache_warming=config.prompt_cache_warming,
+        max_concurrent_sub_agents=config.max_concurrent_sub_agents,
+        compaction_policy=CompactionPolicy(
+            auto_threshold_percent=config.auto_compact_threshold_percent,
+            keep_recent_turns=config.compact_keep_recent_turns,
+        ),
+    )
 
     # Start executor in background
     executor_task = asyncio.create_task(executor.start())
@@ -280,7 +308,61 @@ async def run_exec(init_config: AppInitConfig, input_content: str) -> None:
         await cleanup_app_components(components)
 
 
-async def run_interactive(init_config: AppInitConfig, session_id: str | None = None) -> None:
+_background_tasks: set[asyncio.Task[None]] = set()
+
+
+async def _run_background_gc(config: Config, session_id: str | None) -> None:
+    try:
+        report = await asyncio.to_thread(
+            run_scheduled_gc,
+            Session.storage_dir(),
+            config.session_archive_after_days,
+            config.session_quota_mb,
+            {session_id} if session_id else (),
+        )
+    except OSError as e:
+        log_debug(f"Session gc failed: {e}", style="red")
+        return
+    if report is not None:
+        log_debug(f"Session gc: {report}", style="cyan")
+
+
+def start_background_gc(config: Config, session_id: str | None) -> None:
+    """Archive stale sessions off the event loop, at most once a day, never the current one."""
+    task = asyncio.create_task(_run_background_gc(config, session_id))
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+
+async def _preconnect_llm_endpoints(llm_clients: AgentLLMClients, debug: bool) -> None:
+    clients = [llm_clients.main, *(client for client in llm_clients.sub_clients.values() if client is not None)]
+    await preconnect(endpoint for client in clients for endpoint in client.endpoints)
+    if debug:
+        log_debug("🔌 http pools", "\n".join(str(stats) for stats in http_pool_stats()), style="cyan")
+
+
+def start_preconnect(llm_clients: AgentLLMClients, debug: bool) -> None:
+    """Open connections to the LLM endpoints in the background, while the prompt waits for input."""
+    task = asyncio.create_task(_preconnect_llm_endpoints(llm_clients, debug))
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+
+async def _submit_cache_warm(executor: Executor, session_id: str | None) -> None:
+    submission_id = await executor.submit(op.WarmCacheOperation(session_id=session_id))
+    await executor.wait_for_completion(submission_id)
+
+
+def start_cache_warm(executor: Executor, session_id: str | None) -> None:
+    """Prime the session's prompt cache while the user types, see `Config.prompt_cache_warming`."""
+    task = asyncio.create_task(_submit_cache_warm(executor, session_id))
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+
+async def run_interactive(
+    init_config: AppInitConfig, session_id: str | None = None, replay_turns: int | None = None
+) -> None:
     """Run the interactive REPL using the provided configuration."""
 
     components = await initialize_app_components(init_config)
@@ -327,7 +409,12 @@ async def run_interactive(init_config: AppInitConfig, session_id: str | None = N
         )
 
     # Set up input provider for interactive mode
-    input_provider: ui.InputProviderABC = ui.PromptToolkitInput(status_provider=_status_provider)
+    input_provider: ui.InputProviderABC = ui.PromptToolkitInput(
+        status_provider=_status_provider,
+        on_first_keystroke=(lambda: start_cache_warm(components.executor, session_id))
+        if components.config.prompt_cache_warming
+        else None,
+    )
 
     # --- Custom Ctrl+C handler: double-press within 2s to exit, single press shows toast ---
     last_sigint_time: float = 0.0
@@ -368,10 +455,15 @@ async def run_interactive(init_config: AppInitConfig, session_id: str | None = N
     signal.signal(signal.SIGINT, _sigint_handler)  # type: ignore[assignment]
 
     try:
+        # Warm up while the session loads and the user types the first message
+        start_preconnect(components.llm_clients, init_config.debug)
         # Init Agent
-        init_id = await components.executor.submit(op.InitAgentOperation(session_id=session_id))
+        init_id = await components.executor.submit(
+            op.InitAgentOperation(session_id=session_id, replay_turns=replay_turns)
+        )
         await components.executor.wait_for_completion(init_id)
         await components.event_queue.join()
+        start_background_gc(components.config, session_id)
         # Input
         await input_provider.start()
         async for user_input in input_provider.iter_inputs():
@@ -401,6 +493,8 @@ async def run_interactive(init_config: AppInitConfig, session_id: str | None = N
                         await esc_task
                     except Exception:
                         pass
+            # Idle connections may have expired since the last prompt, or `/model` switched endpoints
+            start_preconnect(components.llm_clients, init_config.debug)
 
     except KeyboardInterrupt:
         log("Bye!")
@@ -486,6 +580,86 @@ def edit_config():
         raise typer.Exit(1)
 
 
+@app.command("cache-report")
+def cache_report(
+    session_id: str | None = typer.Argument(None, help="Session id (defaults to the latest session)"),
+):
+    """Show the prompt-cache hit ratio per request and what broke the cached prefix"""
+    if session_id is None:
+        session_id = Session.most_recent_session_id()
+        if session_id is None:
+            log(("Error: no session found for this project", "red"))
+            raise typer.Exit(1)
+    display_cache_report(Session.load(session_id))
+
+
+@app.command("search")
+def search(
+    query: list[str] = typer.Argument(..., help="Words to look for, the last one also matches as a prefix"),
+    all_projects: bool = typer.Option(False, "--all", "-a", help="Search the sessions of every project"),
+    limit: int = typer.Option(20, "--limit", "-n", help="Number of sessions to show"),
+):
+    """Search the messages and tool calls of past sessions, and resume one at the matching turn"""
+    hit = search_select_session(" ".join(query), all_projects=all_projects, limit=limit)
+    if hit is None:
+        return
+    # Sessions are stored per project directory, resume from the one of the session
+    if all_projects and os.path.realpath(hit.work_dir) != os.getcwd():
+        if not os.path.isdir(hit.work_dir):
+            log(f"Project directory {hit.work_dir} of session {hit.session_id} no longer exists.")
+            raise typer.Exit(1)
+        os.chdir(hit.work_dir)
+    init_config = AppInitConfig(model=None, debug=False, unrestricted=False, vanilla=False)
+    asyncio.run(run_interactive(init_config, session_id=hit.session_id, replay_turns=hit.replay_turns))
+
+
+def fork_session(spec: str) -> str | None:
+    """Fork the session given as `<session>[@<n>]`, returning the id of the fork."""
+    session_id, _, items = spec.partition("@")
+    if session_id not in {s.id for s in Session.list_sessions()}:
+        log(f"Session {session_id} not found for this project.")
+        return None
+    try:
+        forked = Session.load(session_id).fork(int(items) if items else None)
+    except ValueError as e:
+        log(f"Cannot fork {spec}: {e}")
+        return None
+    return forked.id
+
+
+sessions_app = typer.Typer(help="Manage the stored sessions of this project")
+app.add_typer(sessions_app, name="sessions")
+
+
+@sessions_app.command("gc")
+def sessions_gc(
+    days: float | None = typer.Option(
+        None, "--days", help="Archive sessions not updated for this many days (default: session_archive_after_days)"
+    ),
+    quota_mb: float | None = typer.Option(
+        None, "--quota-mb", help="Delete the oldest archived sessions beyond this size (default: session_quota_mb)"
+    ),
+):
+    """Archive stale sessions, enforce the size quota and remove unreferenced blobs"""
+    config = load_config()
+    if config is None:
+        raise typer.Exit(1)
+    storage_dir = Session.storage_dir()
+    if not storage_dir.is_dir():
+        log("No sessions found for this project.")
+        return
+    report = collect_garbage(
+        storage_dir,
+        archive_after_days=days if days is not None else config.session_archive_after_days,
+        quota_mb=quota_mb if quota_mb is not None else config.session_quota_mb,
+    )
+    mb = 1024 * 1024
+    log(
+        f"Archived {report.archived} sessions, deleted {report.evicted} archived sessions, "
+        f"removed {report.blobs_removed} blobs: {report.bytes_before / mb:.1f} MB -> {report.bytes_after / mb:.1f} MB"
+    )
+
+
 @app.command("exec")
 def exec_command(
     input_content: str = typer.Argument("", help="Input message to execute"),
@@ -511,6 +685,11 @@ def exec_command(
         help="Disable safety guardrails for file reads and shell command validation (use with caution)",
     ),
     vanilla: bool = typer.Option(False, "--vanilla", help="Use vanilla model with no system prompt and reminders"),
+    cache_analysis: bool = typer.Option(
+        False,
+        "--cache-analysis",
+        help="Record where each request's prompt-cache prefix breaks, see `klaude cache-report`",
+    ),
 ):
     """Execute non-interactively with provided input."""
 
@@ -554,6 +733,7 @@ def exec_command(
         unrestricted=unrestricted,
         vanilla=vanilla,
         is_exec_mode=True,
+        cache_analysis=cache_analysis,
     )
 
     asyncio.run(
@@ -576,6 +756,12 @@ def main_callback(
     ),
     continue_: bool = typer.Option(False, "--continue", "-c", help="Continue from latest session"),
     resume: bool = typer.Option(False, "--resume", "-r", help="Select a session to resume for this project"),
+    fork: str | None = typer.Option(
+        None,
+        "--fork",
+        metavar="SESSION[@N]",
+        help="Continue in a fork of SESSION keeping its first N history items (default: all)",
+    ),
     select_model: bool = typer.Option(
         False,
         "--select-model",
@@ -591,6 +777,11 @@ def main_callback(
         help="Disable safety guardrails for file reads and shell command validation (use with caution)",
     ),
     vanilla: bool = typer.Option(False, "--vanilla", help="Use vanilla model with no system prompt and reminders"),
+    cache_analysis: bool = typer.Option(
+        False,
+        "--cache-analysis",
+        help="Record where each request's prompt-cache prefix breaks, see `klaude cache-report`",
+    ),
 ):
     """Codex CLI Minimal"""
     # Only run interactive mode when no subcommand is invoked
@@ -607,10 +798,16 @@ def main_callback(
 
         # Resolve session id before entering asyncio loop
         session_id: str | None = None
-        if resume:
-            session_id = resume_select_session()
+        replay_turns: int | None = None
+        if fork is not None:
+            session_id = fork_session(fork)
             if session_id is None:
+                raise typer.Exit(1)
+        if session_id is None and resume:
+            selection = resume_select_session()
+            if selection is None:
                 return
+            session_id, replay_turns = selection
         # If user didn't pick, allow fallback to --continue
         if session_id is None and continue_:
             session_id = Session.most_recent_session_id()
@@ -623,11 +820,13 @@ def main_callback(
             debug=debug,
             unrestricted=unrestricted,
             vanilla=vanilla,
+            cache_analysis=cache_analysis,
         )
 
         asyncio.run(
             run_interactive(
                 init_config=init_config,
                 session_id=session_id,
+                replay_turns=replay_turns,
             )
         )
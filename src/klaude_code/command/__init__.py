@@ -1,8 +1,13 @@
 from .clear_cmd import ClearCommand
 from .command_abc import CommandABC, CommandResult
+from .compact_cmd import CompactCommand
+from .continue_cmd import ContinueCommand
 from .diff_cmd import DiffCommand
+from .expand_cmd import ExpandCommand
 from .export_cmd import ExportCommand
+from .fork_cmd import ForkCommand
 from .help_cmd import HelpCommand
+from .history_cmd import HistoryCommand
 
 # InitCommand is now dynamically loaded via prompt_init.md
 # from .init_cmd import InitCommand
@@ -23,10 +28,15 @@ load_prompt_commands()
 
 __all__ = [
     "ClearCommand",
+    "CompactCommand",
+    "ContinueCommand",
     "DiffCommand",
     "HelpCommand",
+    "HistoryCommand",
     "ModelCommand",
+    "ExpandCommand",
     "ExportCommand",
+    "ForkCommand",
     "RefreshTerminalCommand",
     "TerminalSetupCommand",
     "register_command",
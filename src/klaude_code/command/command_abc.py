@@ -11,6 +11,7 @@ class CommandResult(BaseModel):
     """Result of a command execution."""
 
     agent_input: str | None = None  # Input to be submitted to agent, or None if no input needed
+    resume_task: bool = False  # Continue the task a crash interrupted instead, see `Agent.resume_task`
     events: list[DeveloperMessageEvent | WelcomeEvent | ReplayHistoryEvent] | None = (
         None  # List of UI events to display immediately
     )
@@ -0,0 +1,37 @@
+from klaude_code.command.command_abc import CommandABC, CommandResult
+from klaude_code.command.registry import register_command
+from klaude_code.core import Agent
+from klaude_code.core.compaction import CompactionError
+from klaude_code.protocol.commands import CommandName
+from klaude_code.protocol.events import DeveloperMessageEvent
+from klaude_code.protocol.model import CommandOutput, DeveloperMessageItem
+
+
+@register_command
+class CompactCommand(CommandABC):
+    """Summarize older conversation turns to free up context"""
+
+    @property
+    def name(self) -> CommandName:
+        return CommandName.COMPACT
+
+    @property
+    def summary(self) -> str:
+        return "Summarize conversation history to free up context"
+
+    @property
+    def support_addition_params(self) -> bool:
+        return True
+
+    async def run(self, raw: str, agent: Agent) -> CommandResult:
+        try:
+            event = await agent.compact(instructions=raw.strip() or None)
+        except CompactionError as e:
+            event = DeveloperMessageEvent(
+                session_id=agent.session.id,
+                item=DeveloperMessageItem(
+                    content=str(e),
+                    command_output=CommandOutput(command_name=self.name, is_error=True),
+                ),
+            )
+        return CommandResult(events=[event])
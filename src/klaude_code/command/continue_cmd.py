@@ -0,0 +1,34 @@
+from klaude_code.command.command_abc import CommandABC, CommandResult
+from klaude_code.command.registry import register_command
+from klaude_code.core import Agent
+from klaude_code.protocol.commands import CommandName
+from klaude_code.protocol.events import DeveloperMessageEvent
+from klaude_code.protocol.model import CommandOutput, DeveloperMessageItem
+
+
+@register_command
+class ContinueCommand(CommandABC):
+    """Resume the task that was running when the previous process died"""
+
+    @property
+    def name(self) -> CommandName:
+        return CommandName.CONTINUE
+
+    @property
+    def summary(self) -> str:
+        return "Continue an interrupted task, reusing its finished tool calls"
+
+    async def run(self, raw: str, agent: Agent) -> CommandResult:
+        if agent.session.interrupted_task() is not None:
+            return CommandResult(resume_task=True)
+        return CommandResult(
+            events=[
+                DeveloperMessageEvent(
+                    session_id=agent.session.id,
+                    item=DeveloperMessageItem(
+                        content="(no interrupted task to continue)",
+                        command_output=CommandOutput(command_name=self.name),
+                    ),
+                )
+            ]
+        )
@@ -0,0 +1,65 @@
+from klaude_code.command.command_abc import CommandABC, CommandResult
+from klaude_code.command.registry import register_command
+from klaude_code.core import Agent
+from klaude_code.protocol.commands import CommandName
+from klaude_code.protocol.events import DeveloperMessageEvent, ReplayHistoryEvent
+from klaude_code.protocol.model import CommandOutput, DeveloperMessageItem
+from klaude_code.session.session import Session
+
+
+@register_command
+class ExpandCommand(CommandABC):
+    """Replay the history of sub-agent runs, collapsed when a session is resumed"""
+
+    @property
+    def name(self) -> CommandName:
+        return CommandName.EXPAND
+
+    @property
+    def summary(self) -> str:
+        return "Show the history of sub-agent run [n] (default: all)"
+
+    @property
+    def support_addition_params(self) -> bool:
+        return True
+
+    async def run(self, raw: str, agent: Agent) -> CommandResult:
+        child_ids = agent.session.child_session_ids
+        arg = raw.strip()
+        if arg in ("", "all"):
+            selected = child_ids
+        elif arg.isdigit() and 1 <= int(arg) <= len(child_ids):
+            selected = [child_ids[int(arg) - 1]]
+        else:
+            return self._message(
+                agent, f"Usage: /expand [n|all], this session has {len(child_ids)} sub-agent runs", True
+            )
+
+        children = [child for child in await Session.load_sessions(selected) if child.conversation_history]
+        if not children:
+            return self._message(agent, "(no sub-agent history)")
+        return CommandResult(
+            events=[
+                ReplayHistoryEvent(
+                    session_id=child.id,
+                    events=list(child.get_history_item()),
+                    updated_at=child.updated_at,
+                    is_load=False,
+                    sub_agent_type=child.sub_agent_type,
+                )
+                for child in children
+            ]
+        )
+
+    def _message(self, agent: Agent, content: str, is_error: bool = False) -> CommandResult:
+        return CommandResult(
+            events=[
+                DeveloperMessageEvent(
+                    session_id=agent.session.id,
+                    item=DeveloperMessageItem(
+                        content=content,
+                        command_output=CommandOutput(command_name=self.name, is_error=is_error),
+                    ),
+                )
+            ]
+        )
@@ -0,0 +1,65 @@
+from klaude_code.command.command_abc import CommandABC, CommandResult
+from klaude_code.command.registry import register_command
+from klaude_code.core import Agent
+from klaude_code.protocol.commands import CommandName
+from klaude_code.protocol.events import DeveloperMessageEvent
+from klaude_code.protocol.model import CommandOutput, DeveloperMessageItem
+
+
+@register_command
+class ForkCommand(CommandABC):
+    """Continue in a new session branched off the current history"""
+
+    @property
+    def name(self) -> CommandName:
+        return CommandName.FORK
+
+    @property
+    def summary(self) -> str:
+        return "Branch the conversation, keeping the first [n] history items (default: all)"
+
+    @property
+    def support_addition_params(self) -> bool:
+        return True
+
+    async def run(self, raw: str, agent: Agent) -> CommandResult:
+        parent = agent.session
+        try:
+            items = int(raw) if raw.strip() else None
+        except ValueError:
+            return self._error(parent.id, "Usage: /fork [n], n is the number of history items to keep")
+        try:
+            forked = parent.fork(items)
+        except ValueError as e:
+            return self._error(parent.id, str(e))
+
+        # Continue in the fork, the original session stays as it is and can be resumed
+        agent.session = forked
+
+        return CommandResult(
+            events=[
+                DeveloperMessageEvent(
+                    session_id=forked.id,
+                    item=DeveloperMessageItem(
+                        content=(
+                            f"forked session {parent.id} at item {forked.messages_count} of {parent.messages_count}, "
+                            f"now in session {forked.id}"
+                        ),
+                        command_output=CommandOutput(command_name=self.name),
+                    ),
+                ),
+            ]
+        )
+
+    def _error(self, session_id: str, message: str) -> CommandResult:
+        return CommandResult(
+            events=[
+                DeveloperMessageEvent(
+                    session_id=session_id,
+                    item=DeveloperMessageItem(
+                        content=message,
+                        command_output=CommandOutput(command_name=self.name, is_error=True),
+                    ),
+                )
+            ]
+        )
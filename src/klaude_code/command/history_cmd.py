@@ -0,0 +1,48 @@
+from klaude_code.command.command_abc import CommandABC, CommandResult
+from klaude_code.command.registry import register_command
+from klaude_code.core import Agent
+from klaude_code.protocol.commands import CommandName
+from klaude_code.protocol.events import DeveloperMessageEvent
+from klaude_code.protocol.model import CommandOutput, DeveloperMessageItem
+from klaude_code.session.session import REPLAY_PAGE_TURNS
+
+
+@register_command
+class HistoryCommand(CommandABC):
+    """Page through the history of a session, only the last turns are replayed on resume"""
+
+    @property
+    def name(self) -> CommandName:
+        return CommandName.HISTORY
+
+    @property
+    def summary(self) -> str:
+        return "Show older turns with `more`, or the latest ones again"
+
+    @property
+    def support_addition_params(self) -> bool:
+        return True
+
+    async def run(self, raw: str, agent: Agent) -> CommandResult:
+        session = agent.session
+        arg = raw.strip()
+        if arg not in ("", "more"):
+            return self._message(agent, "Usage: /history [more]", is_error=True)
+        before_turn = session.replay_start_turn if arg == "more" else None
+        replay = session.replay_page(REPLAY_PAGE_TURNS, before_turn, is_load=False)
+        if replay is None:
+            return self._message(agent, "(start of the session reached)")
+        return CommandResult(events=[replay])
+
+    def _message(self, agent: Agent, content: str, is_error: bool = False) -> CommandResult:
+        return CommandResult(
+            events=[
+                DeveloperMessageEvent(
+                    session_id=agent.session.id,
+                    item=DeveloperMessageItem(
+                        content=content,
+                        command_output=CommandOutput(command_name=self.name, is_error=is_error),
+                    ),
+                )
+            ]
+        )
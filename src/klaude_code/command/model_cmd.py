@@ -5,7 +5,6 @@ from klaude_code.command.registry import register_command
 from klaude_code.config import load_config
 from klaude_code.config.select_model import select_model_from_config
 from klaude_code.core import Agent
-from klaude_code.llm.registry import create_llm_client
 from klaude_code.protocol.commands import CommandName
 from klaude_code.protocol.events import DeveloperMessageEvent, WelcomeEvent
 from klaude_code.protocol.model import CommandOutput, DeveloperMessageItem
@@ -50,7 +49,10 @@ class ModelCommand(CommandABC):
         if agent.debug_mode:
             log_debug("➡️ llm [Model Config]", llm_config.model_dump_json(exclude_none=True), style="yellow")
 
-        llm_client = create_llm_client(llm_config)
+        llm_client = config.create_llm_client(selected_model)
+        prefix_analyzer = agent.get_llm_client().prefix_analyzer
+        if prefix_analyzer is not None:
+            llm_client.enable_cache_analysis(prefix_analyzer)
         agent.set_llm_client(llm_client)
 
         return CommandResult(
@@ -3,6 +3,7 @@ from klaude_code.command.registry import register_command
 from klaude_code.core import Agent
 from klaude_code.protocol import events
 from klaude_code.protocol.commands import CommandName
+from klaude_code.session.session import REPLAY_PAGE_TURNS
 
 
 @register_command
@@ -26,19 +27,15 @@ class RefreshTerminalCommand(CommandABC):
 
         os.system("cls" if os.name == "nt" else "clear")
 
-        result = CommandResult(
-            events=[
-                events.WelcomeEvent(
-                    work_dir=str(agent.session.work_dir),
-                    llm_config=agent.get_llm_client().get_llm_config(),
-                ),
-                events.ReplayHistoryEvent(
-                    session_id=agent.session.id,
-                    events=list(agent.session.get_history_item()),
-                    updated_at=agent.session.updated_at,
-                    is_load=False,
-                ),
-            ]
-        )
-
-        return result
+        result_events: list[events.DeveloperMessageEvent | events.WelcomeEvent | events.ReplayHistoryEvent] = [
+            events.WelcomeEvent(
+                work_dir=str(agent.session.work_dir),
+                llm_config=agent.get_llm_client().get_llm_config(),
+            )
+        ]
+        # The last page only, `/history more` shows the older turns
+        replay = agent.session.replay_page(REPLAY_PAGE_TURNS, is_load=False)
+        if replay is not None:
+            result_events.append(replay)
+
+        return CommandResult(events=result_events)
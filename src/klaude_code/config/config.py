@@ -6,7 +6,12 @@ from typing import Any, cast
 import yaml
 from pydantic import BaseModel, Field, ValidationError, model_validator
 
-from klaude_code.core.subagent import iter_sub_agent_profiles
+from klaude_code.core.compaction import DEFAULT_AUTO_COMPACT_THRESHOLD_PERCENT, DEFAULT_COMPACT_KEEP_RECENT_TURNS
+from klaude_code.core.subagent import DEFAULT_MAX_CONCURRENT_SUB_AGENTS, iter_sub_agent_profiles
+from klaude_code.core.tool.tool_scheduler import DEFAULT_MAX_CONCURRENT_TOOL_CALLS
+from klaude_code.llm.client import LLMClientABC
+from klaude_code.llm.failover import DEFAULT_FIRST_TOKEN_TIMEOUT_S, FailoverClient
+from klaude_code.llm.registry import create_llm_client
 from klaude_code.protocol.llm_parameter import (
     LLMClientProtocol,
     LLMConfigModelParameter,
@@ -15,6 +20,8 @@ from klaude_code.protocol.llm_parameter import (
     OpenRouterProviderRouting,
     Thinking,
 )
+from klaude_code.session.gc import DEFAULT_ARCHIVE_AFTER_DAYS
+from klaude_code.session.journal import DurabilityPolicy
 from klaude_code.trace import log
 
 config_path = Path.home() / ".klaude" / "klaude-config.yaml"
@@ -24,6 +31,8 @@ class ModelConfig(BaseModel):
     model_name: str
     provider: str
     model_params: LLMConfigModelParameter
+    # Models a request is re-issued on, in order, when this one fails or stalls before its first token
+    fallback_models: list[str] = Field(default_factory=list)
 
 
 class Config(BaseModel):
@@ -34,6 +43,30 @@ class Config(BaseModel):
     theme: str | None = None
     user_skills_dir: str = "~/.claude/skills"
     project_skills_dir: str = "./.claude/skills"
+    # Maximum number of read-only tool calls (Read, read-only Bash, Explore...) run concurrently in one turn
+    max_concurrent_tool_calls: int = DEFAULT_MAX_CONCURRENT_TOOL_CALLS
+    # Start read-only tool calls while the model response is still streaming
+    stream_tool_dispatch: bool = True
+    # Maximum number of sub agents (Task, Explore, Oracle) running at once against each provider
+    max_concurrent_sub_agents: int = DEFAULT_MAX_CONCURRENT_SUB_AGENTS
+    # Compact the conversation once context usage reaches this percentage; null disables auto compaction
+    auto_compact_threshold_percent: float | None = DEFAULT_AUTO_COMPACT_THRESHOLD_PERCENT
+    # Number of most recent turns kept verbatim when compacting
+    compact_keep_recent_turns: int = DEFAULT_COMPACT_KEEP_RECENT_TURNS
+    # Fail over to the next fallback model when no token arrived after this many seconds
+    first_token_timeout_s: float | None = DEFAULT_FIRST_TOKEN_TIMEOUT_S
+    # Also ask the next fallback model once a request is slower than this percentile (e.g. 95) of recent
+    # first-token latencies; the first to answer wins. Null disables hedging.
+    hedge_percentile: float | None = None
+    # Send a minimal request to prime the prompt cache when a session is resumed and when typing starts,
+    # so the first turn reads the prefix from the cache (Anthropic models)
+    prompt_cache_warming: bool = False
+    # When session writes are fsynced: at the end of each task, of each turn, or never (left to the OS)
+    session_durability: DurabilityPolicy = "task"
+    # Sessions not updated for this many days are compressed into the archive tier; null disables archival
+    session_archive_after_days: float | None = DEFAULT_ARCHIVE_AFTER_DAYS
+    # Size limit of the sessions of each project; the oldest archived sessions are deleted beyond it
+    session_quota_mb: float | None = None
 
     @model_validator(mode="before")
     @classmethod
@@ -71,6 +104,23 @@ class Config(BaseModel):
             **model.model_params.model_dump(),
         )
 
+    def get_model_chain(self, model_name: str) -> list[LLMConfigParameter]:
+        """The model followed by its fallback models."""
+        names = [model_name]
+        model = next((model for model in self.model_list if model.model_name == model_name), None)
+        if model is not None:
+            names.extend(name for name in model.fallback_models if name not in names)
+        return [self.get_model_config(name) for name in names]
+
+    def create_llm_client(self, model_name: str) -> LLMClientABC:
+        """Create the client of a model, failing over to its fallback models if it has any."""
+        clients = [create_llm_client(llm_config) for llm_config in self.get_model_chain(model_name)]
+        if len(clients) == 1:
+            return clients[0]
+        return FailoverClient(
+            clients, first_token_timeout_s=self.first_token_timeout_s, hedge_percentile=self.hedge_percentile
+        )
+
     async def save(self) -> None:
         """
         Save config to file.
@@ -6,22 +6,44 @@ from collections.abc import AsyncGenerator, Iterable
 from dataclasses import dataclass, field
 from typing import Literal, cast
 
+from klaude_code.core.compaction import (
+    CompactionError,
+    CompactionPolicy,
+    compact_session,
+    latest_context_usage_percent,
+)
 from klaude_code.core.prompt import get_system_prompt
 from klaude_code.core.reminders import Reminder, get_main_agent_reminders, get_sub_agent_reminders
 from klaude_code.core.subagent import get_sub_agent_profile
-from klaude_code.core.tool.tool_context import current_session_var
-from klaude_code.core.tool.tool_registry import get_main_agent_tools, get_sub_agent_tools, run_tool
-from klaude_code.llm.client import LLMClientABC
+from klaude_code.core.tool.image_preprocess import DEFAULT_IMAGE_LIMITS, PROVIDER_IMAGE_LIMITS
+from klaude_code.core.tool.tool_context import current_image_limits_var
+from klaude_code.core.tool.tool_registry import get_main_agent_tools, get_sub_agent_tools
+from klaude_code.core.tool.tool_scheduler import (
+    DEFAULT_MAX_CONCURRENT_TOOL_CALLS,
+    ToolCallFinished,
+    ToolCallStarted,
+    ToolScheduler,
+    is_read_only_tool_call,
+)
+from klaude_code.llm.client import CacheWarmResult, LLMClientABC
+from klaude_code.llm.retry import RetryPolicy
 from klaude_code.protocol import events, llm_parameter, model, tools
+from klaude_code.protocol.commands import CommandName
 from klaude_code.session import Session
+from klaude_code.session.session import REPLAY_PAGE_TURNS, InterruptedTask
 from klaude_code.trace import log_debug
 
 # Constant for cancellation message
 CANCEL_OUTPUT = "[Request interrupted by user for tool use]"
+# Result of a tool call that was running when the process died, see `Agent.resume_task`
+INTERRUPTED_OUTPUT = "[Tool call interrupted before it finished; it was not run again and may have partially completed]"
 FIRST_EVENT_TIMEOUT_S = 200.0
 MAX_FAILED_TURN_RETRIES = 10
 INITIAL_RETRY_DELAY_S = 1.0
 MAX_RETRY_DELAY_S = 30.0
+_TURN_RETRY_POLICY = RetryPolicy(
+    max_attempts=MAX_FAILED_TURN_RETRIES + 1, initial_delay_s=INITIAL_RETRY_DELAY_S, max_delay_s=MAX_RETRY_DELAY_S
+)
 
 
 @dataclass
@@ -63,6 +85,9 @@ class Agent:
         debug_mode: bool = False,
         reminders: list[Reminder] | None = None,
         vanilla: bool = False,
+        max_concurrent_tool_calls: int = DEFAULT_MAX_CONCURRENT_TOOL_CALLS,
+        stream_tool_dispatch: bool = True,
+        compaction_policy: CompactionPolicy | None = None,
     ):
         self.session: Session = session
         self.tools: list[llm_parameter.ToolSchema] | None = tools
@@ -70,6 +95,11 @@ class Agent:
         self.reminders: list[Reminder] | None = reminders
         self.llm_clients = llm_clients
         self.vanilla = vanilla
+        # Upper bound on read-only tool calls executed concurrently within a turn
+        self.max_concurrent_tool_calls = max_concurrent_tool_calls
+        # Start read-only tool calls as soon as their arguments are complete, before the response ends
+        self.stream_tool_dispatch = stream_tool_dispatch
+        self.compaction_policy = compaction_policy or CompactionPolicy()
         # Track tool calls that are pending or in-progress within the current turn
         # Keyed by tool_call_id
         self.turn_inflight_tool_calls: dict[str, UnfinishedToolCallItem] = {}
@@ -90,13 +120,7 @@ class Agent:
             for _, unfinished in list(self.turn_inflight_tool_calls.items()):
                 # Create synthetic error result for cancellation
                 tc = unfinished.tool_call_item
-                cancel_result = model.ToolResultItem(
-                    call_id=tc.call_id,
-                    output=CANCEL_OUTPUT,
-                    status="error",
-                    tool_name=tc.name,
-                    ui_extra=None,
-                )
+                cancel_result = self._error_result(tc, CANCEL_OUTPUT)
                 if unfinished.status == "pending":
                     # Emit ToolCallEvent for pending calls before error result
                     yield events.ToolCallEvent(
@@ -124,6 +148,20 @@ class Agent:
             log_debug(f"Session {self.session.id} interrupted", style="yellow")
 
     async def run_task(self, user_input: str) -> AsyncGenerator[events.Event, None]:
+        async for event in self._run_task(user_input):
+            yield event
+
+    async def resume_task(self) -> AsyncGenerator[events.Event, None]:
+        """Continue the task that was running when the process died, see `Session.interrupted_task`.
+
+        Tool calls that have a result are not run again. Unfinished calls run again if they never
+        started or are read-only; the first one that may have partially run and every call after it
+        get an error result instead, then the turn loop goes on.
+        """
+        async for event in self._run_task(None):
+            yield event
+
+    async def _run_task(self, user_input: str | None) -> AsyncGenerator[events.Event, None]:
         task_started_at = time.perf_counter()
         yield events.TaskStartEvent(
             session_id=self.session.id,
@@ -131,28 +169,124 @@ class Agent:
             sub_agent_type=self.session.sub_agent_type,
         )
 
-        self.session.append_history([model.UserMessageItem(content=user_input)])
+        await self.session.load_full_history()
+        interrupted = self.session.interrupted_task()
+        if user_input is not None:
+            if interrupted is not None:
+                self._abandon_interrupted_task(interrupted)
+            self.session.append_history([model.UserMessageItem(content=user_input)])
+        self.session.set_task_running(True)
+        # Images read during the task are scaled to what this agent's provider processes
+        image_limits_token = current_image_limits_var.set(
+            PROVIDER_IMAGE_LIMITS.get(self.get_llm_client().get_llm_config().protocol, DEFAULT_IMAGE_LIMITS)
+        )
+        try:
+            if user_input is None and interrupted is not None:
+                async for event in self._finish_interrupted_tool_calls(interrupted):
+                    yield event
+            async for event in self._run_turns(task_started_at):
+                yield event
+        finally:
+            current_image_limits_var.reset(image_limits_token)
+            # Finished, failed or cancelled: only a crash leaves the task marked as running
+            self.session.set_task_running(False)
+
+    def _abandon_interrupted_task(self, interrupted: InterruptedTask) -> None:
+        # A new task starts instead, the unfinished calls still need a result
+        for tool_call, _ in interrupted.unfinished_tool_calls:
+            self.session.append_history([self._error_result(tool_call, INTERRUPTED_OUTPUT)])
+        self.session.append_history([model.InterruptItem()])
+
+    async def _finish_interrupted_tool_calls(self, interrupted: InterruptedTask) -> AsyncGenerator[events.Event, None]:
+        rerun: list[model.ToolCallItem] = []
+        abandoned: list[model.ToolCallItem] = []
+        for tool_call, state in interrupted.unfinished_tool_calls:
+            # Later calls may depend on the effects of one that did not finish
+            if abandoned or (state == "in_progress" and not is_read_only_tool_call(tool_call)):
+                abandoned.append(tool_call)
+            else:
+                rerun.append(tool_call)
+        yield events.TurnStartEvent(session_id=self.session.id)
+        self.turn_inflight_tool_calls.clear()
+        for tool_call in rerun:
+            self.turn_inflight_tool_calls[tool_call.call_id] = UnfinishedToolCallItem(
+                tool_call_item=tool_call, status="pending"
+            )
+        scheduler = ToolScheduler(self.session, max_concurrency=self.max_concurrent_tool_calls)
+        try:
+            async for event in self._run_tool_calls(scheduler, rerun):
+                yield event
+        finally:
+            scheduler.cancel()
+        for tool_call in abandoned:
+            yield events.ToolCallEvent(
+                session_id=self.session.id,
+                response_id=tool_call.response_id,
+                tool_call_id=tool_call.call_id,
+                tool_name=tool_call.name,
+                arguments=tool_call.arguments,
+            )
+            yield events.ToolResultEvent(
+                session_id=self.session.id,
+                response_id=tool_call.response_id,
+                tool_call_id=tool_call.call_id,
+                tool_name=tool_call.name,
+                result=INTERRUPTED_OUTPUT,
+                status="error",
+            )
+            self.session.append_history([self._error_result(tool_call, INTERRUPTED_OUTPUT)])
+            self.session.set_tool_call_state(tool_call.call_id, None)
+        yield events.TurnEndEvent(session_id=self.session.id)
+        await self.session.flush("turn")
+
+    @staticmethod
+    def _error_result(tool_call: model.ToolCallItem, output: str) -> model.ToolResultItem:
+        return model.ToolResultItem(
+            call_id=tool_call.call_id,
+            output=output,
+            status="error",
+            tool_name=tool_call.name,
+            ui_extra=None,
+        )
 
+    async def _run_turns(self, task_started_at: float) -> AsyncGenerator[events.Event, None]:
         metadata_merge_state = _MetadataMergeState(
             accumulated=model.ResponseMetadataItem(model_name=self.get_llm_client().model_name)
         )
         last_assistant_message: events.AssistantMessageEvent | None = None
+        context_usage_percent = latest_context_usage_percent(self.session.conversation_history)
+        auto_compact_failed = False
 
         while True:
-            # Each outer loop is a new turn. Process reminders at the start of each turn.
+            # Each outer loop is a new turn. Compact first if the last response filled up the context window.
+            if not auto_compact_failed and self.compaction_policy.should_auto_compact(context_usage_percent):
+                try:
+                    yield await self.compact()
+                except CompactionError as e:
+                    # Do not retry on every turn of this task; the next request will fail loudly if really too long
+                    auto_compact_failed = True
+                    yield events.ErrorEvent(error_message=f"Auto compaction failed: {e}")
+                context_usage_percent = None
+
+            # Process reminders at the start of each turn.
             async for event in self.process_reminders():
                 yield event
 
             failed_turn_attempts = 0
             last_turn_error_message: str | None = None
+            last_turn_error: events.ErrorEvent | None = None
+            overflow_compacted = False
             while failed_turn_attempts <= MAX_FAILED_TURN_RETRIES:
                 # The inner loop handles the execution and potential retries of a single turn.
                 turn_has_tool_call = False
                 turn_failed = False
                 last_turn_error_message = None
+                last_turn_error = None
 
                 def handle_turn_event(turn_event: events.Event) -> events.Event | None:
                     nonlocal turn_has_tool_call, turn_failed, last_assistant_message, last_turn_error_message
+                    nonlocal last_turn_error
+                    nonlocal context_usage_percent
                     match turn_event:
                         case events.ToolCallEvent() as tc:
                             turn_has_tool_call = True
@@ -166,12 +300,15 @@ class Agent:
                         case events.ErrorEvent() as err:
                             turn_failed = True
                             last_turn_error_message = err.error_message
+                            last_turn_error = err
                             return None
                         case events.ResponseMetadataEvent() as e:
                             self._merge_turn_metadata(
                                 metadata_merge_state,
                                 e.metadata,
                             )
+                            if e.metadata.usage is not None and e.metadata.usage.context_usage_percent is not None:
+                                context_usage_percent = e.metadata.usage.context_usage_percent
                             status = e.metadata.status
                             if status is not None and status != "completed":
                                 turn_failed = True
@@ -219,11 +356,40 @@ class Agent:
 
                 # If the turn failed, increment the attempt counter and the inner loop will continue.
                 failed_turn_attempts += 1
+                # Assigned in handle_turn_event, not narrowed to None
+                turn_error = cast(events.ErrorEvent | None, last_turn_error)
+                error_kind = turn_error.error_kind if turn_error is not None else None
+                if error_kind == "fatal":
+                    # Retrying an invalid request fails the same way
+                    yield events.ErrorEvent(error_message=last_turn_error_message or "LLM request failed")
+                    return
+                if error_kind == "context_overflow":
+                    if auto_compact_failed or overflow_compacted:
+                        yield events.ErrorEvent(error_message=last_turn_error_message or "Context window exceeded")
+                        return
+                    overflow_compacted = True
+                    try:
+                        yield await self.compact()
+                    except CompactionError as e:
+                        auto_compact_failed = True
+                        yield events.ErrorEvent(error_message=f"Context window exceeded, compaction failed: {e}")
+                        return
+                    context_usage_percent = None
+                    continue
                 if failed_turn_attempts > MAX_FAILED_TURN_RETRIES:
                     # Retry budget exhausted; let the loop terminate and emit final error below
                     continue
-
-                retry_delay = self._retry_delay_seconds(failed_turn_attempts)
+                if not self.get_llm_client().retry_budget.try_spend():
+                    # Other agents on this provider are failing too, stop adding load
+                    final_error_message = "Retry budget of the provider exhausted."
+                    if last_turn_error_message:
+                        final_error_message = f"{last_turn_error_message}\n{final_error_message}"
+                    yield events.ErrorEvent(error_message=final_error_message)
+                    return
+
+                retry_delay = self._retry_delay_seconds(
+                    failed_turn_attempts, turn_error.retry_after_s if turn_error is not None else None
+                )
                 if turn_timed_out:
                     error_message = (
                         f"Turn timed out after {FIRST_EVENT_TIMEOUT_S} seconds. "
@@ -251,6 +417,7 @@ class Agent:
                 yield events.ErrorEvent(error_message=final_error_message)
                 return  # Exit the entire run_task method
 
+            await self.session.flush("turn")
             if not turn_has_tool_call:
                 break
 
@@ -268,6 +435,7 @@ class Agent:
 
         yield events.ResponseMetadataEvent(metadata=accumulated_metadata, session_id=self.session.id)
         self.session.append_history([accumulated_metadata])
+        await self.session.flush("task")
         yield events.TaskFinishEvent(
             session_id=self.session.id,
             task_result=last_assistant_message.content if last_assistant_message else "",
@@ -317,16 +485,22 @@ class Agent:
             accumulated_metadata.status = turn_metadata.status
         if turn_metadata.error_reason is not None:
             accumulated_metadata.error_reason = turn_metadata.error_reason
-
-    async def replay_history(self) -> AsyncGenerator[events.Event, None]:
-        """Yield UI events reconstructed from saved conversation history."""
-
-        if len(self.session.conversation_history) == 0:
-            return
-
-        yield events.ReplayHistoryEvent(
-            events=list(self.session.get_history_item()), updated_at=self.session.updated_at, session_id=self.session.id
-        )
+        if turn_metadata.cache_analysis:
+            if accumulated_metadata.cache_analysis is None:
+                accumulated_metadata.cache_analysis = []
+            for analysis in turn_metadata.cache_analysis:
+                if usage is not None:
+                    # Providers disagree on whether input_tokens includes cache reads
+                    analysis.input_tokens = usage.total_tokens - usage.output_tokens
+                    analysis.cached_tokens = usage.cached_tokens
+                accumulated_metadata.cache_analysis.append(analysis)
+
+    async def replay_history(self, turns: int = REPLAY_PAGE_TURNS) -> AsyncGenerator[events.Event, None]:
+        """Yield UI events reconstructed from the last `turns` user turns of the saved history."""
+
+        replay = self.session.replay_page(turns)
+        if replay is not None:
+            yield replay
 
     async def run_turn(self) -> AsyncGenerator[events.Event, None]:
         yield events.TurnStartEvent(
@@ -334,6 +508,15 @@ class Agent:
         )
         # Clear pending map for new turn
         self.turn_inflight_tool_calls.clear()
+        scheduler = ToolScheduler(self.session, max_concurrency=self.max_concurrent_tool_calls)
+        try:
+            async for event in self._run_turn_with_scheduler(scheduler):
+                yield event
+        finally:
+            # Discard prefetched results if the turn is aborted (stream error, timeout or interrupt)
+            scheduler.cancel()
+
+    async def _run_turn_with_scheduler(self, scheduler: ToolScheduler) -> AsyncGenerator[events.Event, None]:
         # TODO: If LLM API error occurred, we will discard (not append to history) and retry
         turn_reasoning_items: list[model.ReasoningTextItem | model.ReasoningEncryptedItem] = []
         turn_assistant_message: model.AssistantMessageItem | None = None
@@ -347,6 +530,7 @@ class Agent:
                 system=self.session.system_prompt,
                 tools=self.tools,
                 store=False,
+                previous_response_id=self.session.last_response_id,
                 session_id=self.session.id,
             )
         ):
@@ -388,11 +572,25 @@ class Agent:
                     )
                 case model.StreamErrorItem() as item:
                     response_failed = True
+                    # Drop results of tool calls that already started during the stream
+                    scheduler.cancel()
                     if self.debug_mode:
                         log_debug("📁 response [StreamError]", item.error, style="red")
-                    yield events.ErrorEvent(error_message=item.error)
+                    yield events.ErrorEvent(
+                        error_message=item.error, error_kind=item.kind, retry_after_s=item.retry_after_s
+                    )
+                case model.ToolCallStartItem() as item:
+                    yield events.TurnToolCallStartEvent(
+                        session_id=self.session.id,
+                        response_id=item.response_id,
+                        tool_call_id=item.call_id,
+                        tool_name=item.name,
+                        arguments=item.arguments,
+                    )
                 case model.ToolCallItem() as item:
                     turn_tool_calls.append(item)
+                    if self.stream_tool_dispatch and not response_failed:
+                        scheduler.prefetch(item)
                 case _:
                     pass
         if not response_failed:
@@ -407,44 +605,96 @@ class Agent:
                     self.turn_inflight_tool_calls[item.call_id] = UnfinishedToolCallItem(
                         tool_call_item=item, status="pending"
                     )
+                    self.session.set_tool_call_state(item.call_id, "pending")
         if current_response_id is not None and not response_failed:
             self.session.last_response_id = current_response_id
         if response_failed:
             # Clear any pending tool calls when the response failed before execution
             self.turn_inflight_tool_calls.clear()
         if turn_tool_calls and not response_failed:
-            for tool_call in turn_tool_calls:
-                yield events.ToolCallEvent(
-                    tool_call_id=tool_call.call_id,
-                    tool_name=tool_call.name,
-                    arguments=tool_call.arguments,
-                    response_id=tool_call.response_id,
-                    session_id=self.session.id,
-                )
-                session_token = current_session_var.set(self.session)
-                try:
+            async for event in self._run_tool_calls(scheduler, turn_tool_calls):
+                yield event
+        yield events.TurnEndEvent(session_id=self.session.id)
+
+    async def _run_tool_calls(
+        self, scheduler: ToolScheduler, tool_calls: list[model.ToolCallItem]
+    ) -> AsyncGenerator[events.Event, None]:
+        # Each state change is written before the next call starts, so `resume_task` knows which
+        # calls finished, and never runs one that may have had effects again
+        await self.session.flush("tool")
+        async for schedule_event in scheduler.run(tool_calls):
+            tool_call = schedule_event.tool_call
+            match schedule_event:
+                case ToolCallStarted():
+                    yield events.ToolCallEvent(
+                        tool_call_id=tool_call.call_id,
+                        tool_name=tool_call.name,
+                        arguments=tool_call.arguments,
+                        response_id=tool_call.response_id,
+                        session_id=self.session.id,
+                    )
                     self.turn_inflight_tool_calls[tool_call.call_id].status = "in_progress"
-                    tool_result: model.ToolResultItem = await run_tool(tool_call)
-                finally:
-                    current_session_var.reset(session_token)
-                self.session.append_history([tool_result])
-                yield events.ToolResultEvent(
-                    tool_call_id=tool_call.call_id,
-                    tool_name=tool_call.name,
-                    result=tool_result.output or "",
-                    ui_extra=tool_result.ui_extra,
-                    response_id=tool_call.response_id,
-                    session_id=self.session.id,
-                    status=tool_result.status,
-                )
-                if tool_call.name in (tools.TODO_WRITE, tools.UPDATE_PLAN):
-                    yield events.TodoChangeEvent(
+                    if not is_read_only_tool_call(tool_call):
+                        # Read-only calls run again anyway
+                        self.session.set_tool_call_state(tool_call.call_id, "in_progress")
+                        await self.session.flush("tool")
+                case ToolCallFinished(result=tool_result):
+                    self.session.append_history([tool_result])
+                    self.session.set_tool_call_state(tool_call.call_id, None)
+                    await self.session.flush("tool")
+                    yield events.ToolResultEvent(
+                        tool_call_id=tool_call.call_id,
+                        tool_name=tool_call.name,
+                        result=tool_result.output or "",
+                        ui_extra=tool_result.ui_extra,
+                        response_id=tool_call.response_id,
                         session_id=self.session.id,
-                        todos=self.session.todos,
+                        status=tool_result.status,
                     )
-                # Remove from pending after result is produced
-                self.turn_inflight_tool_calls.pop(tool_call.call_id, None)
-        yield events.TurnEndEvent(session_id=self.session.id)
+                    if tool_call.name in (tools.TODO_WRITE, tools.UPDATE_PLAN):
+                        yield events.TodoChangeEvent(
+                            session_id=self.session.id,
+                            todos=self.session.todos,
+                        )
+                    # Remove from pending after result is produced
+                    self.turn_inflight_tool_calls.pop(tool_call.call_id, None)
+
+    async def compact(self, instructions: str | None = None) -> events.DeveloperMessageEvent:
+        """Summarize older turns into a single message to free up context.
+
+        Raises CompactionError if there is not enough history or the summary request fails.
+        """
+        history_size = len(self.session.conversation_history)
+        item = await compact_session(
+            self.session,
+            self.get_llm_client(),
+            self.tools,
+            keep_recent_turns=self.compaction_policy.keep_recent_turns,
+            instructions=instructions,
+        )
+        if self.debug_mode:
+            log_debug(f"Session {self.session.id} compacted", item.model_dump_json(), style="yellow")
+        return events.DeveloperMessageEvent(
+            session_id=self.session.id,
+            item=model.DeveloperMessageItem(
+                content=f"compacted {history_size - item.kept_items} history items into a summary",
+                command_output=model.CommandOutput(command_name=CommandName.COMPACT),
+            ),
+        )
+
+    async def warm_prompt_cache(self) -> CacheWarmResult | None:
+        """Prime the prompt cache with the prefix of the next turn's request, see `LLMClientABC.warm_cache`."""
+        # The next request sends the whole history, not just the replayed tail
+        await self.session.load_full_history()
+        return await self.get_llm_client().warm_cache(
+            llm_parameter.LLMCallParameter(
+                input=self.session.conversation_history,
+                system=self.session.system_prompt,
+                tools=self.tools,
+                store=False,
+                session_id=self.session.id,
+            )
+        )
 
     async def process_reminders(self) -> AsyncGenerator[events.DeveloperMessageEvent, None]:
         if self.reminders is None:
@@ -455,10 +705,8 @@ class Agent:
                 self.session.append_history([item])
                 yield events.DeveloperMessageEvent(session_id=self.session.id, item=item)
 
-    def _retry_delay_seconds(self, attempt: int) -> float:
-        capped_attempt = max(1, attempt)
-        delay = INITIAL_RETRY_DELAY_S * (2 ** (capped_attempt - 1))
-        return min(delay, MAX_RETRY_DELAY_S)
+    def _retry_delay_seconds(self, attempt: int, retry_after_s: float | None = None) -> float:
+        return _TURN_RETRY_POLICY.delay(attempt, retry_after_s)
 
     def refresh_model_profile(self, sub_agent_type: tools.SubAgentType | None = None) -> None:
         """Refresh system prompt, tools, and reminders for the active model."""
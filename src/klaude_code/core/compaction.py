@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from importlib.resources import files
+
+from klaude_code.llm.client import LLMClientABC
+from klaude_code.protocol import llm_parameter, model
+from klaude_code.session import Session
+
+DEFAULT_AUTO_COMPACT_THRESHOLD_PERCENT = 80.0
+DEFAULT_COMPACT_KEEP_RECENT_TURNS = 4
+
+_ASSISTANT_ITEM_TYPES = (
+    model.ReasoningTextItem,
+    model.ReasoningEncryptedItem,
+    model.AssistantMessageItem,
+    model.ToolCallItem,
+)
+
+
+class CompactionError(Exception):
+    """Raised when the conversation cannot be compacted."""
+
+
+@dataclass(frozen=True)
+class CompactionPolicy:
+    # Compact automatically once the last response used this share of the context window; None disables it
+    auto_threshold_percent: float | None = DEFAULT_AUTO_COMPACT_THRESHOLD_PERCENT
+    # Number of most recent turns (user messages or LLM responses with their tool results) kept verbatim
+    keep_recent_turns: int = DEFAULT_COMPACT_KEEP_RECENT_TURNS
+
+    def should_auto_compact(self, context_usage_percent: float | None) -> bool:
+        if self.auto_threshold_percent is None or context_usage_percent is None:
+            return False
+        return context_usage_percent >= self.auto_threshold_percent
+
+
+def _is_turn_start(prev_item: model.ConversationItem | None, item: model.ConversationItem) -> bool:
+    if isinstance(item, model.CompactionItem):
+        return False
+    if isinstance(item, model.UserMessageItem):
+        return True
+    return isinstance(item, _ASSISTANT_ITEM_TYPES) and not isinstance(prev_item, _ASSISTANT_ITEM_TYPES)
+
+
+def find_compaction_boundary(history: list[model.ConversationItem], keep_recent_turns: int) -> int | None:
+    """Index of the first history item kept verbatim, or None if there is nothing to compact.
+
+    Boundaries only fall on turn starts, so a tool call is never separated from its result.
+    """
+    turn_starts = [
+        index for index, item in enumerate(history) if _is_turn_start(history[index - 1] if index > 0 else None, item)
+    ]
+    if len(turn_starts) <= keep_recent_turns:
+        return None
+    boundary = turn_starts[-keep_recent_turns] if keep_recent_turns > 0 else len(history)
+    # A previous summary alone is not worth summarizing again
+    first_compactable = 1 if history and isinstance(history[0], model.CompactionItem) else 0
+    if boundary <= first_compactable:
+        return None
+    return boundary
+
+
+def latest_context_usage_percent(history: list[model.ConversationItem]) -> float | None:
+    """Context usage reported by the most recent persisted response metadata."""
+    for item in reversed(history):
+        if isinstance(item, model.ResponseMetadataItem) and item.usage is not None:
+            return item.usage.context_usage_percent
+    return None
+
+
+def _render_todos(todos: list[model.TodoItem]) -> str:
+    return "\n".join(f"- [{todo.status}] {todo.content}" for todo in todos)
+
+
+def build_compaction_item(summary: str, todos: list[model.TodoItem], kept_items: int) -> model.CompactionItem:
+    parts = [
+        "This session is being continued from an earlier conversation that was compacted to save context. "
+        "Summary of the earlier conversation:",
+        f"<summary>\n{summary.strip()}\n</summary>",
+    ]
+    if todos:
+        parts.append(f"Current todo list:\n{_render_todos(todos)}")
+    return model.CompactionItem(content="\n\n".join(parts), kept_items=kept_items)
+
+
+async def summarize_history(
+    llm_client: LLMClientABC,
+    history: list[model.ConversationItem],
+    system: str | None,
+    tools: list[llm_parameter.ToolSchema] | None,
+    instructions: str | None = None,
+) -> str:
+    """Ask the LLM to summarize `history`.
+
+    The system prompt and tools are sent unchanged (providers reject tool calls in the
+    history without tool definitions) which also lets the request reuse the prompt cache.
+    """
+    prompt = files(__package__).joinpath("prompt_compact.md").read_text(encoding="utf-8")
+    if instructions:
+        prompt = f"{prompt}\nAdditional instructions from the user: {instructions}"
+    summary = ""
+    async for item in llm_client.call(
+        llm_parameter.LLMCallParameter(
+            input=[*history, model.UserMessageItem(content=prompt)],
+            system=system,
+            tools=tools,
+            store=False,
+        )
+    ):
+        match item:
+            case model.AssistantMessageItem() as message:
+                summary = message.content or ""
+            case model.StreamErrorItem() as error:
+                raise CompactionError(f"Failed to summarize conversation: {error.error}")
+            case _:
+                pass
+    if not summary.strip():
+        raise CompactionError("Failed to summarize conversation: empty summary")
+    return summary
+
+
+async def compact_session(
+    session: Session,
+    llm_client: LLMClientABC,
+    tools: list[llm_parameter.ToolSchema] | None,
+    keep_recent_turns: int = DEFAULT_COMPACT_KEEP_RECENT_TURNS,
+    instructions: str | None = None,
+) -> model.CompactionItem:
+    """Summarize older turns of the session and replace them with a `CompactionItem`.
+
+    The most recent `keep_recent_turns` turns and the todo list are kept verbatim.
+    """
+    history = session.conversation_history
+    boundary = find_compaction_boundary(history, keep_recent_turns)
+    if boundary is None:
+        raise CompactionError("Not enough conversation history to compact")
+    summary = await summarize_history(llm_client, history[:boundary], session.system_prompt, tools, instructions)
+    # Measure the kept tail after summarizing so items appended meanwhile are kept too
+    item = build_compaction_item(summary, session.todos, kept_items=len(session.conversation_history) - boundary)
+    session.apply_compaction(item)
+    return item
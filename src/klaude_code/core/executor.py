@@ -6,13 +6,20 @@ handling operations submitted from the CLI and coordinating with agents.
 """
 
 import asyncio
+from collections.abc import AsyncGenerator, Iterable
+from contextlib import asynccontextmanager
 from dataclasses import dataclass
 from uuid import uuid4
 
 from klaude_code.command import dispatch_command
 from klaude_code.core.agent import Agent, AgentLLMClients
-from klaude_code.core.tool.tool_context import SubAgentResult, current_run_subtask_callback
+from klaude_code.core.compaction import CompactionPolicy
+from klaude_code.core.subagent import DEFAULT_MAX_CONCURRENT_SUB_AGENTS
+from klaude_code.core.tool.tool_context import SubAgentResult, current_run_subtask_callback, current_tool_call_id_var
+from klaude_code.core.tool.tool_scheduler import DEFAULT_MAX_CONCURRENT_TOOL_CALLS
+from klaude_code.llm.client import LLMClientABC
 from klaude_code.protocol import events, llm_parameter, model
+from klaude_code.protocol.commands import CommandName
 from klaude_code.protocol.op import (
     EndOperation,
     InitAgentOperation,
@@ -20,9 +27,11 @@ from klaude_code.protocol.op import (
     Operation,
     Submission,
     UserInputOperation,
+    WarmCacheOperation,
 )
 from klaude_code.protocol.tools import SubAgentType
-from klaude_code.session.session import Session
+from klaude_code.session.journal import flush_journals
+from klaude_code.session.session import REPLAY_PAGE_TURNS, InterruptedTask, Session
 from klaude_code.trace import log_debug
 
 
@@ -32,6 +41,58 @@ class ActiveTask:
     session_id: str
 
 
+@dataclass
+class RunningSubAgent:
+    agent: Agent
+    parent_session_id: str
+    task: asyncio.Task[object] | None
+
+
+class SubAgentScheduler:
+    """
+    Limit how many sub agents run at once and track them for group cancellation.
+
+    Sub agents launched in the same turn run concurrently; each provider gets its own
+    limit so a slow or rate-limited provider does not hold back the others.
+    """
+
+    def __init__(self, max_concurrent_per_provider: int = DEFAULT_MAX_CONCURRENT_SUB_AGENTS):
+        self.max_concurrent_per_provider = max(1, max_concurrent_per_provider)
+        self._semaphores: dict[str, asyncio.Semaphore] = {}
+        # Running sub agents keyed by child session ID
+        self._running: dict[str, RunningSubAgent] = {}
+
+    @staticmethod
+    def provider_key(llm_client: LLMClientABC) -> str:
+        config = llm_client.get_llm_config()
+        return config.provider_name or config.protocol.value
+
+    @asynccontextmanager
+    async def slot(self, child_agent: Agent, parent_session_id: str) -> AsyncGenerator[None, None]:
+        """Wait for a free slot on the child's provider and register it as running."""
+        key = self.provider_key(child_agent.get_llm_client())
+        semaphore = self._semaphores.setdefault(key, asyncio.Semaphore(self.max_concurrent_per_provider))
+        async with semaphore:
+            child_session_id = child_agent.session.id
+            self._running[child_session_id] = RunningSubAgent(
+                agent=child_agent, parent_session_id=parent_session_id, task=asyncio.current_task()
+            )
+            try:
+                yield
+            finally:
+                self._running.pop(child_session_id, None)
+
+    def cancel(self, parent_session_id: str | None = None) -> Iterable[events.Event]:
+        """Cancel running sub agents (of one parent session, or all) and persist their interrupts."""
+        for child_session_id, running in list(self._running.items()):
+            if parent_session_id is not None and running.parent_session_id != parent_session_id:
+                continue
+            self._running.pop(child_session_id, None)
+            if running.task is not None and not running.task.done():
+                running.task.cancel()
+            yield from running.agent.cancel()
+
+
 class ExecutorContext:
     """
     Context object providing shared state and operations for the executor.
@@ -47,17 +108,29 @@ class ExecutorContext:
         llm_config: llm_parameter.LLMConfigParameter,
         debug_mode: bool = False,
         vanilla: bool = False,
+        max_concurrent_tool_calls: int = DEFAULT_MAX_CONCURRENT_TOOL_CALLS,
+        stream_tool_dispatch: bool = True,
+        max_concurrent_sub_agents: int = DEFAULT_MAX_CONCURRENT_SUB_AGENTS,
+        compaction_policy: CompactionPolicy | None = None,
+        prompt_cache_warming: bool = False,
     ):
         self.event_queue = event_queue
         self.llm_clients = llm_clients
         self.llm_config = llm_config
         self.debug_mode = debug_mode
         self.vanilla = vanilla
+        self.max_concurrent_tool_calls = max_concurrent_tool_calls
+        self.stream_tool_dispatch = stream_tool_dispatch
+        self.subagent_scheduler = SubAgentScheduler(max_concurrent_sub_agents)
+        self.compaction_policy = compaction_policy
+        self.prompt_cache_warming = prompt_cache_warming
 
         # Track active agents by session ID
         self.active_agents: dict[str, Agent] = {}
         # Track active tasks by submission ID, retaining owning session for filtering/cancellation
         self.active_tasks: dict[str, ActiveTask] = {}
+        # Prompt-cache warm-ups by session ID
+        self.cache_warm_tasks: dict[str, asyncio.Task[None]] = {}
 
     async def emit_event(self, event: events.Event) -> None:
         """Emit an event to the UI display system."""
@@ -68,8 +141,10 @@ class ExecutorContext:
         if operation.session_id is None:
             raise ValueError("session_id cannot be None")
 
-        # Load or create session first
-        session = Session.load(operation.session_id)
+        # Load or create session first, only the replayed turns are needed to show the prompt,
+        # the older ones load in the background
+        replay_turns = operation.replay_turns or REPLAY_PAGE_TURNS
+        session = Session.load(operation.session_id, tail_turns=replay_turns)
 
         # Create agent if not exists
         if operation.session_id not in self.active_agents:
@@ -78,10 +153,16 @@ class ExecutorContext:
                 session=session,
                 debug_mode=self.debug_mode,
                 vanilla=self.vanilla,
+                max_concurrent_tool_calls=self.max_concurrent_tool_calls,
+                stream_tool_dispatch=self.stream_tool_dispatch,
+                compaction_policy=self.compaction_policy,
             )
             agent.refresh_model_profile()
-            async for evt in agent.replay_history():
+            async for evt in agent.replay_history(replay_turns):
                 await self.emit_event(evt)
+            interrupted = session.interrupted_task()
+            if interrupted is not None:
+                await self.emit_event(self._interrupted_task_notice(session.id, interrupted))
             await self.emit_event(
                 events.WelcomeEvent(
                     work_dir=str(session.work_dir),
@@ -89,6 +170,9 @@ class ExecutorContext:
                 )
             )
             self.active_agents[operation.session_id] = agent
+            session.start_full_history_load()
+            if session.conversation_history:
+                self._start_cache_warm(agent)
             if self.debug_mode:
                 log_debug(f"Initialized agent for session: {operation.session_id}", style="cyan")
 
@@ -103,12 +187,14 @@ class ExecutorContext:
             await self.handle_init_agent(InitAgentOperation(id=str(uuid4()), session_id=operation.session_id))
 
         agent = self.active_agents[operation.session_id]
+        # Commands and the agent need the whole history
+        await agent.session.load_full_history()
 
         # emit user input event
         await self.emit_event(events.UserMessageEvent(content=operation.content, session_id=operation.session_id))
 
         result = await dispatch_command(operation.content, agent)
-        if not result.agent_input:
+        if not result.agent_input and not result.resume_task:
             # If this command do not need run agent, we should append user message to session history here
             agent.session.append_history([model.UserMessageItem(content=operation.content)])
 
@@ -119,7 +205,7 @@ class ExecutorContext:
             for evt in result.events:
                 await self.emit_event(evt)
 
-        if result.agent_input:
+        if result.agent_input or result.resume_task:
             # Start task to process user input (do NOT await here so the executor loop stays responsive)
             task: asyncio.Task[None] = asyncio.create_task(
                 self._run_agent_task(agent, result.agent_input, operation.id, operation.session_id)
@@ -136,6 +222,10 @@ class ExecutorContext:
         else:
             session_ids = list(self.active_agents.keys())
 
+        # Cancel running sub agents first so they stop emitting events, then persist their interrupts
+        for evt in self.subagent_scheduler.cancel(operation.target_session_id):
+            await self.emit_event(evt)
+
         # Call cancel() on each affected agent to persist an interrupt marker
         for sid in session_ids:
             agent = self.active_agents.get(sid)
@@ -168,12 +258,59 @@ class ExecutorContext:
             # Remove from active tasks immediately
             self.active_tasks.pop(task_id, None)
 
-    async def _run_agent_task(self, agent: Agent, user_input: str, task_id: str, session_id: str) -> None:
+    async def handle_warm_cache(self, operation: WarmCacheOperation) -> None:
+        """Prime the prompt cache of an idle session in the background."""
+        agent = self.active_agents.get(operation.session_id or "")
+        if agent is not None:
+            self._start_cache_warm(agent)
+
+    def _start_cache_warm(self, agent: Agent) -> None:
+        if not self.prompt_cache_warming:
+            return
+        session_id = agent.session.id
+        # A running task keeps the cache warm by itself
+        if any(active.session_id == session_id and not active.task.done() for active in self.active_tasks.values()):
+            return
+        running = self.cache_warm_tasks.get(session_id)
+        if running is not None and not running.done():
+            return
+        self.cache_warm_tasks[session_id] = asyncio.create_task(self._warm_cache(agent))
+
+    async def _warm_cache(self, agent: Agent) -> None:
+        try:
+            result = await agent.warm_prompt_cache()
+        except Exception as e:
+            # Only a head start for the next turn, which reports any real problem
+            if self.debug_mode:
+                log_debug(f"Prompt cache warm-up failed: {e.__class__.__name__} {e}", style="red")
+            return
+        if self.debug_mode and result is not None:
+            log_debug(
+                f"Prompt cache warm-up for session {agent.session.id}: {'hit' if result.hit else 'miss'}, "
+                f"{result.cached_tokens} tokens read, {result.written_tokens} written",
+                style="cyan",
+            )
+
+    @staticmethod
+    def _interrupted_task_notice(session_id: str, interrupted: InterruptedTask) -> events.DeveloperMessageEvent:
+        unfinished = len(interrupted.unfinished_tool_calls)
+        return events.DeveloperMessageEvent(
+            session_id=session_id,
+            item=model.DeveloperMessageItem(
+                content=(
+                    f"The last task was interrupted ({interrupted.completed_tool_calls} tool calls finished, "
+                    f"{unfinished} unfinished). /continue resumes it without running the finished calls again."
+                ),
+                command_output=model.CommandOutput(command_name=CommandName.CONTINUE),
+            ),
+        )
+
+    async def _run_agent_task(self, agent: Agent, user_input: str | None, task_id: str, session_id: str) -> None:
         """
         Run an agent task and forward all events to the UI.
 
-        This method wraps the agent's run_task method and handles any exceptions
-        that might occur during execution.
+        This method wraps the agent's run_task method, or resume_task without `user_input`,
+        and handles any exceptions that might occur during execution.
         """
         try:
             if self.debug_mode:
@@ -186,7 +323,8 @@ class ExecutorContext:
             token = current_run_subtask_callback.set(_runner)
             try:
                 # Forward all events from the agent to the UI
-                async for event in agent.run_task(user_input):
+                task_events = agent.run_task(user_input) if user_input is not None else agent.resume_task()
+                async for event in task_events:
                     await self.emit_event(event)
             finally:
                 current_run_subtask_callback.reset(token)
@@ -209,6 +347,8 @@ class ExecutorContext:
             )
 
         finally:
+            # Interrupted and failed tasks end here too
+            await agent.session.flush("task")
             # Clean up the task from active tasks
             self.active_tasks.pop(task_id, None)
             if self.debug_mode:
@@ -220,7 +360,9 @@ class ExecutorContext:
         """Run a nested sub-agent task and return the final task_result text.
 
         - Creates a child session linked to the parent session
-        - Streams the child agent's events to the same event queue
+        - Waits for a free slot in the sub-agent scheduler, so sibling sub agents run concurrently
+        - Streams the child agent's events to the same event queue, tagging its TaskStartEvent
+          with the spawning tool call so the UI can tell interleaved sub agents apart
         - Returns the last assistant message content as the result
         """
         # Create a child session under the same workdir
@@ -244,21 +386,28 @@ class ExecutorContext:
             session=child_session,
             debug_mode=self.debug_mode,
             vanilla=self.vanilla,
+            max_concurrent_tool_calls=self.max_concurrent_tool_calls,
+            stream_tool_dispatch=self.stream_tool_dispatch,
+            compaction_policy=self.compaction_policy,
         )
         child_agent.refresh_model_profile(sub_agent_type)
 
         if self.debug_mode:
             log_debug(f"Running sub-agent {sub_agent_type} in session {child_session.id}", style="cyan")
 
+        parent_tool_call_id = current_tool_call_id_var.get()
         try:
-            # Not emit the subtask's user input since task tool call is already rendered
-            result: str = ""
-            async for event in child_agent.run_task(prompt):
-                # Capture TaskFinishEvent content for return
-                if isinstance(event, events.TaskFinishEvent):
-                    result = event.task_result
-                    break  # Subagent cannot nested
-                await self.emit_event(event)
+            async with self.subagent_scheduler.slot(child_agent, parent_session.id):
+                # Not emit the subtask's user input since task tool call is already rendered
+                result: str = ""
+                async for event in child_agent.run_task(prompt):
+                    # Capture TaskFinishEvent content for return
+                    if isinstance(event, events.TaskFinishEvent):
+                        result = event.task_result
+                        break  # Subagent cannot nested
+                    if isinstance(event, events.TaskStartEvent):
+                        event = event.model_copy(update={"parent_tool_call_id": parent_tool_call_id})
+                    await self.emit_event(event)
             return SubAgentResult(task_result=result, session_id=child_session.id)
         except Exception as e:
             log_debug(f"Subagent task failed: [{e.__class__.__name__}] {str(e)}", style="red")
@@ -282,8 +431,24 @@ class Executor:
         llm_config: llm_parameter.LLMConfigParameter,
         debug_mode: bool = False,
         vanilla: bool = False,
+        max_concurrent_tool_calls: int = DEFAULT_MAX_CONCURRENT_TOOL_CALLS,
+        stream_tool_dispatch: bool = True,
+        max_concurrent_sub_agents: int = DEFAULT_MAX_CONCURRENT_SUB_AGENTS,
+        compaction_policy: CompactionPolicy | None = None,
+        prompt_cache_warming: bool = False,
     ):
-        self.context = ExecutorContext(event_queue, llm_clients, llm_config, debug_mode, vanilla)
+        self.context = ExecutorContext(
+            event_queue,
+            llm_clients,
+            llm_config,
+            debug_mode,
+            vanilla,
+            max_concurrent_tool_calls,
+            stream_tool_dispatch,
+            max_concurrent_sub_agents,
+            compaction_policy,
+            prompt_cache_warming,
+        )
         self.submission_queue: asyncio.Queue[Submission] = asyncio.Queue()
         self.running = False
         self.debug_mode = debug_mode
@@ -365,6 +530,10 @@ class Executor:
             task = active.task
             if not task.done():
                 task.cancel()
+        for task in self.context.cache_warm_tasks.values():
+            task.cancel()
+
+        await flush_journals()
 
         # Send EndOperation to wake up the start() loop
         try:
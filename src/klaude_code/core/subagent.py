@@ -7,6 +7,9 @@ from klaude_code.protocol import tools
 
 AvailabilityPredicate = Callable[[str], bool]
 
+# Sub agents allowed to run at once against a single provider
+DEFAULT_MAX_CONCURRENT_SUB_AGENTS = 3
+
 
 @dataclass(frozen=True)
 class SubAgentProfile:
@@ -19,6 +22,8 @@ class SubAgentProfile:
     tool_set: tuple[str, ...]
     enabled_by_default: bool = True
     show_in_main_agent: bool = True
+    # Read-only sub agents never modify the workspace, so they may run alongside other read-only tool calls
+    read_only: bool = False
     target_model_filter: AvailabilityPredicate | None = None
 
     def enabled_for_model(self, model_name: str | None) -> bool:
@@ -86,6 +91,7 @@ register_sub_agent(
         prompt_key="oracle",
         config_key="Oracle",
         tool_set=(tools.READ, tools.BASH),
+        read_only=True,
         target_model_filter=lambda model: ("gpt-5" not in model) and ("gemini-3" not in model),
     )
 )
@@ -96,6 +102,7 @@ register_sub_agent(
         prompt_key="subagent_explore",
         config_key="Explore",
         tool_set=(tools.BASH, tools.READ),
+        read_only=True,
         target_model_filter=lambda model: True,
     )
 )
@@ -629,3 +629,115 @@ def is_safe_command(command: str) -> SafetyCheckResult:
         # We have argv but it failed safety check earlier
         return _is_safe_argv(argv)
     return SafetyCheckResult(False, "Failed to parse command")
+
+
+# Commands that only inspect the filesystem or repository state.
+# Used to decide whether a Bash call may run concurrently with other tool calls.
+_READ_ONLY_COMMANDS = {
+    "basename",
+    "cat",
+    "cut",
+    "date",
+    "diff",
+    "dirname",
+    "du",
+    "echo",
+    "fd",
+    "file",
+    "grep",
+    "head",
+    "ls",
+    "nl",
+    "pwd",
+    "readlink",
+    "realpath",
+    "rg",
+    "sort",
+    "stat",
+    "tail",
+    "tr",
+    "tree",
+    "uniq",
+    "wc",
+    "which",
+}
+
+_READ_ONLY_GIT_SUBCOMMANDS = {"blame", "diff", "grep", "log", "ls-files", "rev-parse", "show", "status"}
+
+_FIND_WRITE_OPTIONS = {"-exec", "-execdir", "-ok", "-okdir", "-delete", "-fls", "-fprint", "-fprint0", "-fprintf"}
+
+# Options that make an otherwise read-only command write a file or run another program
+_READ_ONLY_COMMAND_WRITE_OPTIONS = {
+    "date": ("-s", "--set"),
+    "fd": ("-x", "-X", "--exec", "--exec-batch"),
+    "rg": ("--pre",),
+    "sort": ("-o", "--output", "--compress-program"),
+    "tree": ("-o",),
+}
+_READ_ONLY_GIT_WRITE_OPTIONS = ("--output", "-O", "--open-files-in-pager")
+
+
+def _has_option(args: list[str], options: tuple[str, ...]) -> bool:
+    for arg in args:
+        if arg == "--":
+            return False
+        name = arg.split("=", 1)[0]
+        for option in options:
+            if option.startswith("--"):
+                # GNU tools accept any unambiguous prefix of a long option (`--out=FILE`)
+                if len(name) > 2 and name.startswith("--") and option.startswith(name):
+                    return True
+            elif arg.startswith("-") and not arg.startswith("--") and option[1] in arg[1:]:
+                # Short options may be clustered (`-no FILE`) or take an attached value (`-oFILE`)
+                return True
+    return False
+
+
+def _is_read_only_argv(argv: list[str]) -> bool:
+    if not argv:
+        return False
+
+    cmd0 = argv[0]
+    if cmd0 in _READ_ONLY_COMMANDS:
+        return not _has_option(argv[1:], _READ_ONLY_COMMAND_WRITE_OPTIONS.get(cmd0, ()))
+    if cmd0 == "find":
+        return not any(arg in _FIND_WRITE_OPTIONS for arg in argv[1:])
+    if cmd0 == "git":
+        return (
+            len(argv) > 1
+            and argv[1] in _READ_ONLY_GIT_SUBCOMMANDS
+            and not _has_option(argv[2:], _READ_ONLY_GIT_WRITE_OPTIONS)
+        )
+    if cmd0 == "sed":
+        return len(argv) >= 3 and argv[1] == "-n" and _is_valid_sed_n_arg(argv[2])
+    return False
+
+
+def is_read_only_command(command: str) -> bool:
+    """Conservatively determine if a command only reads state and never writes it.
+
+    Every command in a `|`, `&&`, `||` or `;` sequence must be read-only, and any
+    redirection, background job, command substitution or line break disqualifies the
+    whole script.
+    """
+    command = strip_bash_lc(command)
+    # shlex treats a line break as plain whitespace, which would merge the lines into one argv
+    if "`" in command or "$(" in command or "\n" in command or "\r" in command:
+        return False
+    try:
+        lexer = shlex.shlex(command, posix=True, punctuation_chars="|;&<>")
+        lexer.whitespace_split = True
+        tokens = list(lexer)
+    except ValueError:
+        return False
+
+    commands: list[list[str]] = [[]]
+    for token in tokens:
+        if token in {"|", "||", "&&", ";"}:
+            commands.append([])
+        elif token and all(ch in "|;&<>" for ch in token):
+            # Redirections (`>`, `>>`, `<`, `2>&1`) and background jobs (`&`)
+            return False
+        else:
+            commands[-1].append(token)
+    return all(_is_read_only_argv(argv) for argv in commands)
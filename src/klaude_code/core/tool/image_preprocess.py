@@ -0,0 +1,130 @@
+"""
+Downscaling and recompression of images before they enter the history.
+
+Providers scale large images down on their side anyway, and the history resends every image on
+each turn, so the Read tool (which also serves clipboard pastes and `@file` images) uploads an
+image at most at the resolution the current provider uses, re-encoded as PNG or JPEG, whichever
+is smaller. Results are cached by content hash and limits.
+"""
+
+import hashlib
+import io
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from PIL import Image, ImageOps
+
+from klaude_code.protocol.llm_parameter import LLMClientProtocol
+
+JPEG_QUALITY = 85
+_CACHE_SIZE = 32
+_ENCODABLE_MODES = ("L", "LA", "P", "RGB", "RGBA")
+# An image within the limits is only re-encoded, losing quality, if that saves at least a quarter
+_MIN_REENCODE_RATIO = 0.75
+
+
+@dataclass(frozen=True)
+class ImageLimits:
+    """The largest image a provider processes without scaling it down."""
+
+    max_long_edge: int
+    max_short_edge: int | None = None
+    max_pixels: int | None = None
+
+
+# Anthropic scales images beyond 1568 px or about 1.15 megapixels down. OpenAI models fit high-detail
+# images into 2048x2048 and then the short side into 768 px; OpenRouter models are assumed to match.
+PROVIDER_IMAGE_LIMITS: dict[LLMClientProtocol, ImageLimits] = {
+    LLMClientProtocol.ANTHROPIC: ImageLimits(max_long_edge=1568, max_pixels=1_150_000),
+    LLMClientProtocol.OPENAI: ImageLimits(max_long_edge=2048, max_short_edge=768),
+    LLMClientProtocol.RESPONSES: ImageLimits(max_long_edge=2048, max_short_edge=768),
+    LLMClientProtocol.OPENROUTER: ImageLimits(max_long_edge=2048, max_short_edge=768),
+}
+DEFAULT_IMAGE_LIMITS = PROVIDER_IMAGE_LIMITS[LLMClientProtocol.ANTHROPIC]
+
+
+@dataclass(frozen=True)
+class PreparedImage:
+    data: bytes
+    mime_type: str
+    width: int
+    height: int
+    original_width: int
+    original_height: int
+
+    @property
+    def resized(self) -> bool:
+        return (self.width, self.height) != (self.original_width, self.original_height)
+
+
+def target_size(width: int, height: int, limits: ImageLimits) -> tuple[int, int]:
+    scale = min(1.0, limits.max_long_edge / max(width, height))
+    if limits.max_short_edge is not None:
+        scale = min(scale, limits.max_short_edge / min(width, height))
+    if limits.max_pixels is not None:
+        scale = min(scale, (limits.max_pixels / (width * height)) ** 0.5)
+    if scale >= 1.0:
+        return width, height
+    return max(1, int(width * scale)), max(1, int(height * scale))
+
+
+def _has_alpha(image: Image.Image) -> bool:
+    return "A" in image.mode or "transparency" in image.info
+
+
+def _encode(image: Image.Image) -> tuple[bytes, str]:
+    """The smaller of a PNG and, for opaque images, a JPEG encoding."""
+    has_alpha = _has_alpha(image)
+    png = io.BytesIO()
+    image.save(png, "PNG", optimize=True)
+    if has_alpha:
+        return png.getvalue(), "image/png"
+    jpeg = io.BytesIO()
+    image.convert("RGB").save(jpeg, "JPEG", quality=JPEG_QUALITY, optimize=True)
+    if jpeg.tell() < png.tell():
+        return jpeg.getvalue(), "image/jpeg"
+    return png.getvalue(), "image/png"
+
+
+def _prepare(data: bytes, mime_type: str, limits: ImageLimits) -> PreparedImage:
+    with Image.open(io.BytesIO(data)) as opened:
+        original_size = opened.size
+        if getattr(opened, "is_animated", False):
+            # Re-encoding would keep only the first frame
+            return PreparedImage(data, mime_type, *original_size, *original_size)
+        image = ImageOps.exif_transpose(opened)
+        width, height = target_size(*image.size, limits)
+        resizing = (width, height) != image.size
+        if resizing or image.mode not in _ENCODABLE_MODES:
+            # Palette images would be resized without filtering, CMYK or 16-bit ones cannot be saved as is
+            image = image.convert("RGBA" if _has_alpha(image) else "RGB")
+        if resizing:
+            image = image.resize((width, height), Image.Resampling.LANCZOS)  # pyright: ignore[reportUnknownMemberType]
+        encoded, encoded_mime_type = _encode(image)
+    if (width, height) == original_size and len(encoded) > len(data) * _MIN_REENCODE_RATIO:
+        return PreparedImage(data, mime_type, width, height, *original_size)
+    return PreparedImage(encoded, encoded_mime_type, width, height, *original_size)
+
+
+_cache: OrderedDict[tuple[str, ImageLimits], PreparedImage] = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def prepare_image(data: bytes, mime_type: str, limits: ImageLimits = DEFAULT_IMAGE_LIMITS) -> PreparedImage:
+    """Scale `data` down to `limits` and re-encode it if that makes it notably smaller.
+
+    Raises `PIL.UnidentifiedImageError` or `OSError` if the image cannot be decoded.
+    """
+    key = (hashlib.sha256(data).hexdigest(), limits)
+    with _cache_lock:
+        cached = _cache.get(key)
+        if cached is not None:
+            _cache.move_to_end(key)
+            return cached
+    prepared = _prepare(data, mime_type, limits)
+    with _cache_lock:
+        _cache[key] = prepared
+        if len(_cache) > _CACHE_SIZE:
+            _cache.popitem(last=False)
+    return prepared
@@ -8,8 +8,14 @@ from pathlib import Path
 
 from pydantic import BaseModel, Field
 
+from klaude_code.core.tool.image_preprocess import DEFAULT_IMAGE_LIMITS, ImageLimits, PreparedImage, prepare_image
 from klaude_code.core.tool.tool_abc import ToolABC
-from klaude_code.core.tool.tool_context import current_session_var, get_tool_policy
+from klaude_code.core.tool.tool_context import (
+    current_file_reads_var,
+    current_image_limits_var,
+    current_session_var,
+    get_tool_policy,
+)
 from klaude_code.core.tool.tool_registry import register
 from klaude_code.protocol.llm_parameter import ToolSchema
 from klaude_code.protocol.model import ImageURLPart, ToolResultItem
@@ -26,6 +32,8 @@ GLOBAL_LINE_CAP = 2000
 MAX_CHARS = 60000
 MAX_KB = 256
 MAX_IMAGE_BYTES = 4 * 1024 * 1024
+# Larger images are accepted if scaling them down brings them under MAX_IMAGE_BYTES
+MAX_SOURCE_IMAGE_BYTES = 32 * 1024 * 1024
 
 _IMAGE_MIME_TYPES: dict[str, str] = {
     ".png": "image/png",
@@ -110,8 +118,10 @@ def _track_file_access(file_path: str) -> None:
     session = current_session_var.get()
     if session is None or not _file_exists(file_path) or _is_directory(file_path):
         return
+    file_reads = current_file_reads_var.get()
+    tracker = file_reads if file_reads is not None else session.file_tracker
     try:
-        session.file_tracker[file_path] = Path(file_path).stat().st_mtime
+        tracker[file_path] = Path(file_path).stat().st_mtime
     except Exception:
         pass
 
@@ -128,10 +138,14 @@ def _image_mime_type(file_path: str) -> str:
     return mime_type
 
 
-def _encode_image_to_data_url(file_path: str, mime_type: str) -> str:
+def _prepare_image_file(file_path: str, mime_type: str, limits: ImageLimits) -> PreparedImage:
     with open(file_path, "rb") as image_file:
-        encoded = b64encode(image_file.read()).decode("ascii")
-    return f"data:{mime_type};base64,{encoded}"
+        return prepare_image(image_file.read(), mime_type, limits)
+
+
+def _encode_image_to_data_url(image: PreparedImage) -> str:
+    encoded = b64encode(image.data).decode("ascii")
+    return f"data:{image.mime_type};base64,{encoded}"
 
 
 @register(READ)
@@ -221,26 +235,40 @@ class ReadTool(ToolABC):
 
         is_image_file = _is_supported_image_file(file_path)
         if is_image_file:
-            if size_bytes > MAX_IMAGE_BYTES:
+            if size_bytes > MAX_SOURCE_IMAGE_BYTES:
                 size_mb = size_bytes / (1024 * 1024)
                 return ToolResultItem(
                     status="error",
                     output=(
-                        f"<tool_use_error>Image size ({size_mb:.2f}MB) exceeds maximum supported size (4.00MB) for inline transfer.</tool_use_error>"
+                        f"<tool_use_error>Image size ({size_mb:.2f}MB) exceeds maximum supported size ({MAX_SOURCE_IMAGE_BYTES / (1024 * 1024):.2f}MB) for inline transfer.</tool_use_error>"
                     ),
                 )
             try:
                 mime_type = _image_mime_type(file_path)
-                data_url = _encode_image_to_data_url(file_path, mime_type)
+                limits = current_image_limits_var.get() or DEFAULT_IMAGE_LIMITS
+                image = await asyncio.to_thread(_prepare_image_file, file_path, mime_type, limits)
             except Exception as exc:
                 return ToolResultItem(
                     status="error",
                     output=f"<tool_use_error>Failed to read image file: {exc}</tool_use_error>",
                 )
+            if len(image.data) > MAX_IMAGE_BYTES:
+                size_mb = len(image.data) / (1024 * 1024)
+                return ToolResultItem(
+                    status="error",
+                    output=(
+                        f"<tool_use_error>Image size ({size_mb:.2f}MB) exceeds maximum supported size (4.00MB) for inline transfer.</tool_use_error>"
+                    ),
+                )
+            data_url = _encode_image_to_data_url(image)
 
             _track_file_access(file_path)
             size_kb = size_bytes / 1024.0 if size_bytes else 0.0
             output_text = f"[image] {Path(file_path).name} ({size_kb:.1f}KB)"
+            if image.resized:
+                output_text += (
+                    f", scaled from {image.original_width}x{image.original_height} to {image.width}x{image.height}"
+                )
             image_part = ImageURLPart(image_url=ImageURLPart.ImageURL(url=data_url, id=None))
             return ToolResultItem(status="success", output=output_text, images=[image_part])
 
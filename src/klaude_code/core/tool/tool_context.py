@@ -4,6 +4,7 @@ from collections.abc import Awaitable, Callable
 from contextvars import ContextVar
 from dataclasses import dataclass
 
+from klaude_code.core.tool.image_preprocess import ImageLimits
 from klaude_code.protocol.tools import SubAgentType
 from klaude_code.session.session import Session
 
@@ -11,6 +12,19 @@ from klaude_code.session.session import Session
 # Set by Agent/Reminder right before invoking a tool.
 current_session_var: ContextVar[Session | None] = ContextVar("current_session", default=None)
 
+# Holds the call_id of the tool call being executed.
+# Set by ToolScheduler so nested sub-agents can be linked to the call that spawned them.
+current_tool_call_id_var: ContextVar[str | None] = ContextVar("current_tool_call_id", default=None)
+
+# Collects the files read by a prefetched tool call instead of the session's file tracker.
+# Set by ToolScheduler, the reads are only recorded once the call's result is committed.
+current_file_reads_var: ContextVar[dict[str, float] | None] = ContextVar("current_file_reads", default=None)
+
+
+# Holds the image limits of the provider the current agent talks to.
+# Set by Agent at the start of each task, images read by tools are scaled down to them.
+current_image_limits_var: ContextVar[ImageLimits | None] = ContextVar("current_image_limits", default=None)
+
 
 @dataclass
 class SubAgentResult:
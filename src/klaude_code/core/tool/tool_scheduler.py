@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+import asyncio
+import json
+from collections.abc import AsyncGenerator, Sequence
+from dataclasses import dataclass
+
+from klaude_code.core.subagent import get_sub_agent_profile_by_tool
+from klaude_code.core.tool.command_safety import is_read_only_command
+from klaude_code.core.tool.tool_context import current_file_reads_var, current_session_var, current_tool_call_id_var
+from klaude_code.core.tool.tool_registry import run_tool
+from klaude_code.protocol import model, tools
+from klaude_code.session.session import Session
+
+DEFAULT_MAX_CONCURRENT_TOOL_CALLS = 8
+
+# Tools that never modify the workspace or session state
+_READ_ONLY_TOOLS = {tools.READ, tools.SKILL}
+
+
+def is_read_only_tool_call(tool_call: model.ToolCallItem) -> bool:
+    """Whether a tool call can safely run concurrently with other read-only calls."""
+    if tool_call.name in _READ_ONLY_TOOLS:
+        return True
+    if tool_call.name == tools.BASH:
+        try:
+            command = json.loads(tool_call.arguments).get("command", "")
+        except (json.JSONDecodeError, AttributeError):
+            return False
+        return isinstance(command, str) and is_read_only_command(command)
+    profile = get_sub_agent_profile_by_tool(tool_call.name)
+    return profile is not None and profile.read_only
+
+
+def is_prefetchable_tool_call(tool_call: model.ToolCallItem) -> bool:
+    """Whether a tool call may start while the LLM response is still streaming.
+
+    Sub-agents are excluded even when read-only: they emit their own events to the UI
+    and are far too expensive to throw away if the response later fails.
+    """
+    return get_sub_agent_profile_by_tool(tool_call.name) is None and is_read_only_tool_call(tool_call)
+
+
+def plan_tool_batches(tool_calls: Sequence[model.ToolCallItem]) -> list[list[model.ToolCallItem]]:
+    """Split tool calls into ordered batches.
+
+    Consecutive read-only calls share a batch, and so do consecutive sub-agents: the model
+    is told to launch several agents in one message precisely so that they run in parallel.
+    A read-only sub-agent may join either kind. Every other call gets a batch of its own, and
+    a mutating sub-agent never shares one with other tools, so a call that may mutate observes
+    the effects of all calls before it and is observed by every call after it.
+    """
+    batches: list[list[model.ToolCallItem]] = []
+    # What every call of the last batch is
+    batch_read_only = batch_sub_agent = False
+    for tool_call in tool_calls:
+        read_only = is_read_only_tool_call(tool_call)
+        sub_agent = get_sub_agent_profile_by_tool(tool_call.name) is not None
+        if batches and ((batch_read_only and read_only) or (batch_sub_agent and sub_agent)):
+            batches[-1].append(tool_call)
+            batch_read_only = batch_read_only and read_only
+            batch_sub_agent = batch_sub_agent and sub_agent
+        else:
+            batches.append([tool_call])
+            batch_read_only, batch_sub_agent = read_only, sub_agent
+    return batches
+
+
+@dataclass
+class ToolCallStarted:
+    tool_call: model.ToolCallItem
+
+
+@dataclass
+class ToolCallFinished:
+    tool_call: model.ToolCallItem
+    result: model.ToolResultItem
+
+
+ToolScheduleEvent = ToolCallStarted | ToolCallFinished
+
+
+class ToolScheduler:
+    """Execute a turn's tool calls, overlapping independent read-only calls.
+
+    Events are always yielded in the model's order: every call in a batch is reported
+    as started before any of them is awaited, and results are reported one by one in
+    the original order regardless of which finished first.
+    """
+
+    def __init__(self, session: Session, max_concurrency: int = DEFAULT_MAX_CONCURRENT_TOOL_CALLS):
+        self.session = session
+        self._semaphore = asyncio.Semaphore(max(1, max_concurrency))
+        self._tasks: dict[str, asyncio.Task[model.ToolResultItem]] = {}
+        # Prefetching stops at the first call that must wait for the response to complete,
+        # so every later call still observes that call's effects.
+        self._prefetch_open = True
+        # Files read by prefetched calls, added to the file tracker only once `run` commits the result
+        self._prefetched_reads: dict[str, dict[str, float]] = {}
+
+    async def _run_one(
+        self, tool_call: model.ToolCallItem, file_reads: dict[str, float] | None = None
+    ) -> model.ToolResultItem:
+        async with self._semaphore:
+            session_token = current_session_var.set(self.session)
+            tool_call_token = current_tool_call_id_var.set(tool_call.call_id)
+            file_reads_token = current_file_reads_var.set(file_reads)
+            try:
+                return await run_tool(tool_call)
+            finally:
+                current_file_reads_var.reset(file_reads_token)
+                current_tool_call_id_var.reset(tool_call_token)
+                current_session_var.reset(session_token)
+
+    def _start(self, tool_call: model.ToolCallItem, file_reads: dict[str, float] | None = None) -> None:
+        if tool_call.call_id not in self._tasks:
+            self._tasks[tool_call.call_id] = asyncio.create_task(self._run_one(tool_call, file_reads))
+
+    def prefetch(self, tool_call: model.ToolCallItem) -> bool:
+        """Start a tool call whose arguments are complete while the response is still streaming.
+
+        Only leading read-only calls are started; their results are held until `run` is
+        called with the final tool call list. Returns whether the call was started.
+        """
+        if not self._prefetch_open or not is_prefetchable_tool_call(tool_call):
+            self._prefetch_open = False
+            return False
+        file_reads: dict[str, float] = {}
+        self._prefetched_reads[tool_call.call_id] = file_reads
+        self._start(tool_call, file_reads)
+        return True
+
+    async def run(self, tool_calls: Sequence[model.ToolCallItem]) -> AsyncGenerator[ToolScheduleEvent, None]:
+        """Run the tool calls, reusing any that were already started by `prefetch`."""
+        try:
+            for batch in plan_tool_batches(tool_calls):
+                for tool_call in batch:
+                    yield ToolCallStarted(tool_call)
+                    self._start(tool_call)
+                for tool_call in batch:
+                    result = await self._tasks.pop(tool_call.call_id)
+                    self.session.file_tracker.update(self._prefetched_reads.pop(tool_call.call_id, {}))
+                    yield ToolCallFinished(tool_call, result)
+        finally:
+            self.cancel()
+
+    def cancel(self) -> None:
+        """Cancel every tool call that is still running and discard held results."""
+        for task in self._tasks.values():
+            if not task.done():
+                task.cancel()
+        self._tasks.clear()
+        self._prefetched_reads.clear()
+        self._prefetch_open = False
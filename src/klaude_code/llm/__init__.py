@@ -6,6 +6,7 @@ and they become available via the registry.
 
 from .anthropic import AnthropicClient
 from .client import LLMClientABC
+from .failover import FailoverClient
 from .openai_compatible import OpenAICompatibleClient
 from .openrouter import OpenRouterClient
 from .registry import create_llm_client
@@ -13,6 +14,7 @@ from .responses import ResponsesClient
 
 __all__ = [
     "LLMClientABC",
+    "FailoverClient",
     "ResponsesClient",
     "OpenAICompatibleClient",
     "OpenRouterClient",
@@ -0,0 +1,138 @@
+# pyright: reportReturnType=false
+# pyright: reportArgumentType=false
+# pyright: reportUnknownMemberType=false
+# pyright: reportUnknownVariableType=false
+
+"""
+Placement of Anthropic prompt-cache breakpoints.
+
+A request may carry at most four `cache_control` breakpoints. They are used for:
+
+1. Tools: the last tool schema, survives system prompt and history changes.
+2. System: the system prompt, survives any history change including compaction.
+3. Anchor: a message the previous request already cached. Reading from it does not depend on
+   the 20-block lookback of the tail breakpoint, so it keeps hitting however many blocks
+   (tool results, reminders) were appended since.
+4. Tail: the last message, written for the next request to read.
+"""
+
+from dataclasses import dataclass, field
+from typing import Any
+
+from anthropic.types.beta.beta_message_param import BetaMessageParam
+from anthropic.types.beta.beta_text_block_param import BetaTextBlockParam
+from anthropic.types.beta.beta_tool_param import BetaToolParam
+
+from klaude_code.llm.input_cache import ConvertedPrefix
+
+_CACHEABLE_BLOCK_TYPES = ("text", "image", "tool_result", "tool_use")
+_EPHEMERAL = {"type": "ephemeral"}
+
+
+@dataclass
+class CacheBreakpointState:
+    """The breakpoints of the previous request of a session."""
+
+    tools: list[BetaToolParam] | None = None
+    system: list[BetaTextBlockParam] | None = None
+    tail_index: int | None = None
+    tail_message: BetaMessageParam | None = None
+
+
+@dataclass
+class AnthropicInputCache:
+    """Per-session conversion cache and breakpoint state of the Anthropic client."""
+
+    messages: ConvertedPrefix[BetaMessageParam] = field(default_factory=lambda: ConvertedPrefix())
+    breakpoints: CacheBreakpointState = field(default_factory=CacheBreakpointState)
+    # `time.monotonic()` of the last request or warm-up that sent the prefix
+    last_sent_at: float | None = None
+
+
+@dataclass(frozen=True)
+class CachePlan:
+    tools_cached: bool
+    system_cached: bool
+    anchor_index: int | None
+    tail_index: int | None
+    # Messages expected to be read from the cache, assuming it has not expired
+    expected_hit_messages: int
+
+    def describe(self) -> str:
+        parts = [name for name, cached in (("tools", self.tools_cached), ("system", self.system_cached)) if cached]
+        parts.append(f"{self.expected_hit_messages} messages")
+        return f"expected cache hit: {', '.join(parts)} (anchor={self.anchor_index}, tail={self.tail_index})"
+
+
+def _mark_message(messages: list[BetaMessageParam], index: int) -> bool:
+    """Set a breakpoint on the last cacheable block of `messages[index]`.
+
+    The message is copied, the original may be shared with the conversion cache.
+    """
+    message = messages[index]
+    content = message.get("content")
+    if not isinstance(content, list):
+        return False
+    for block_index in range(len(content) - 1, -1, -1):
+        block: Any = content[block_index]
+        if isinstance(block, dict) and block.get("type") in _CACHEABLE_BLOCK_TYPES:
+            marked_content = list(content)
+            marked_content[block_index] = {**block, "cache_control": _EPHEMERAL}  # type: ignore
+            messages[index] = {**message, "content": marked_content}
+            return True
+    return False
+
+
+def plan_cache_breakpoints(
+    messages: list[BetaMessageParam],
+    system: list[BetaTextBlockParam],
+    tools: list[BetaToolParam],
+    state: CacheBreakpointState | None = None,
+) -> CachePlan:
+    """Place the breakpoints into the request lists in place and record them in `state`.
+
+    The anchor is the previous request's tail if that message is unchanged, otherwise the last
+    message before the tail, which can no longer change once more items are appended.
+    """
+    if state is None:
+        state = CacheBreakpointState()
+    tools_unchanged = state.tools == tools
+    prefix_unchanged = tools_unchanged and state.system == system
+    tools_hit = bool(tools) and tools_unchanged
+    system_hit = bool(system) and prefix_unchanged
+    state.tools, state.system = list(tools), list(system)
+    if tools:
+        tools[-1] = {**tools[-1], "cache_control": _EPHEMERAL}  # type: ignore
+    if system:
+        system[-1] = {**system[-1], "cache_control": _EPHEMERAL}  # type: ignore
+
+    tail_index = len(messages) - 1 if messages else None
+    anchor_index: int | None = None
+    expected_hit_messages = 0
+    previous_index = state.tail_index
+    if (
+        prefix_unchanged
+        and previous_index is not None
+        and tail_index is not None
+        and previous_index < tail_index
+        and messages[previous_index] == state.tail_message
+    ):
+        anchor_index = previous_index
+        expected_hit_messages = previous_index + 1
+    elif tail_index is not None and tail_index > 0:
+        anchor_index = tail_index - 1
+
+    state.tail_index = tail_index
+    state.tail_message = messages[tail_index] if tail_index is not None else None
+    if anchor_index is not None and not _mark_message(messages, anchor_index):
+        anchor_index = None
+        expected_hit_messages = 0
+    if tail_index is not None and not _mark_message(messages, tail_index):
+        tail_index = None
+    return CachePlan(
+        tools_cached=tools_hit,
+        system_cached=system_hit,
+        anchor_index=anchor_index,
+        tail_index=tail_index,
+        expected_hit_messages=expected_hit_messages,
+    )
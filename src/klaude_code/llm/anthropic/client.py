@@ -1,25 +1,35 @@
 import json
 import time
-from collections.abc import AsyncGenerator
+from collections.abc import AsyncGenerator, Awaitable
 from typing import override
 
 import anthropic
 import httpx
-from anthropic import RateLimitError
+from anthropic import AsyncStream
 from anthropic.types.beta.beta_input_json_delta import BetaInputJSONDelta
+from anthropic.types.beta.beta_message_param import BetaMessageParam
 from anthropic.types.beta.beta_raw_content_block_delta_event import BetaRawContentBlockDeltaEvent
 from anthropic.types.beta.beta_raw_content_block_start_event import BetaRawContentBlockStartEvent
 from anthropic.types.beta.beta_raw_content_block_stop_event import BetaRawContentBlockStopEvent
 from anthropic.types.beta.beta_raw_message_delta_event import BetaRawMessageDeltaEvent
 from anthropic.types.beta.beta_raw_message_start_event import BetaRawMessageStartEvent
+from anthropic.types.beta.beta_raw_message_stream_event import BetaRawMessageStreamEvent
 from anthropic.types.beta.beta_signature_delta import BetaSignatureDelta
+from anthropic.types.beta.beta_text_block_param import BetaTextBlockParam
 from anthropic.types.beta.beta_text_delta import BetaTextDelta
 from anthropic.types.beta.beta_thinking_delta import BetaThinkingDelta
+from anthropic.types.beta.beta_tool_param import BetaToolParam
 from anthropic.types.beta.beta_tool_use_block import BetaToolUseBlock
 
+from klaude_code.llm.anthropic.cache_plan import AnthropicInputCache, plan_cache_breakpoints
 from klaude_code.llm.anthropic.input import convert_history_to_input, convert_system_to_input, convert_tool_schema
-from klaude_code.llm.client import LLMClientABC
+from klaude_code.llm.client import CacheWarmResult, LLMClientABC
+from klaude_code.llm.input_cache import SessionInputCaches
+from klaude_code.llm.partial_json import PartialJSONFields
 from klaude_code.llm.registry import register
+from klaude_code.llm.retry import stream_error_item
+from klaude_code.llm.streaming import DeltaCoalescer, StreamTimer
+from klaude_code.llm.transport import get_http_client
 from klaude_code.protocol import llm_parameter, model
 from klaude_code.protocol.llm_parameter import (
     LLMCallParameter,
@@ -27,9 +37,13 @@ from klaude_code.protocol.llm_parameter import (
     LLMConfigParameter,
     apply_config_defaults,
 )
-from klaude_code.protocol.model import StreamErrorItem
 from klaude_code.trace import log_debug
 
+# The prompt cache lives 5 minutes from its last use, a warm-up within this window is wasted
+CACHE_WARM_MIN_INTERVAL_S = 240.0
+# Stands in for the user's next message, which is not part of the cached prefix
+CACHE_WARM_PROMPT = "."
+
 
 @register(LLMClientProtocol.ANTHROPIC)
 class AnthropicClient(LLMClientABC):
@@ -39,25 +53,108 @@ class AnthropicClient(LLMClientABC):
             api_key=config.api_key,
             base_url=config.base_url,
             timeout=httpx.Timeout(300.0, connect=15.0, read=285.0),
+            max_retries=0,
+            http_client=get_http_client(),
         )
         self.client: anthropic.AsyncAnthropic = client
+        self._input_caches: SessionInputCaches[AnthropicInputCache] = SessionInputCaches(AnthropicInputCache)
 
     @classmethod
     @override
     def create(cls, config: LLMConfigParameter) -> "LLMClientABC":
         return cls(config)
 
+    @property
+    @override
+    def endpoints(self) -> list[str]:
+        return [str(self.client.base_url)]
+
+    def _create_stream(
+        self,
+        param: LLMCallParameter,
+        messages: list[BetaMessageParam],
+        system: list[BetaTextBlockParam],
+        tools: list[BetaToolParam],
+        max_tokens: int,
+    ) -> Awaitable[AsyncStream[BetaRawMessageStreamEvent]]:
+        return self.client.beta.messages.create(
+            model=str(param.model),
+            tool_choice={
+                "type": "auto",
+                "disable_parallel_tool_use": False,
+            },
+            stream=True,
+            max_tokens=max_tokens,
+            temperature=param.temperature or llm_parameter.DEFAULT_TEMPERATURE,
+            messages=messages,
+            system=system,
+            tools=tools,
+            betas=["interleaved-thinking-2025-05-14", "context-1m-2025-08-07"],
+            thinking=anthropic.types.ThinkingConfigEnabledParam(
+                type=param.thinking.thinking_type,
+                budget_tokens=param.thinking.thinking_budget or llm_parameter.DEFAULT_ANTHROPIC_THINKING_BUDGET_TOKENS,
+            )
+            if param.thinking and param.thinking.thinking_type == "enabled"
+            else anthropic.types.ThinkingConfigDisabledParam(
+                type="disabled",
+            ),
+            extra_headers={"extra": json.dumps({"session_id": param.session_id})},
+        )
+
+    @override
+    async def warm_cache(self, param: LLMCallParameter) -> CacheWarmResult | None:
+        param = apply_config_defaults(param, self.get_llm_config())
+        cache = self._input_caches.get(param.session_id)
+        if cache is None:
+            return None
+        now = time.monotonic()
+        if cache.last_sent_at is not None and now - cache.last_sent_at < CACHE_WARM_MIN_INTERVAL_S:
+            return None
+        cache.last_sent_at = now
+
+        # Planned with the session's breakpoint state, so the next request anchors on the warmed tail
+        messages = convert_history_to_input(param.input, param.model, cache.messages)
+        tools = convert_tool_schema(param.tools)
+        system = convert_system_to_input(param.system)
+        cache_plan = plan_cache_breakpoints(messages, system, tools, cache.breakpoints)
+        messages.append({"role": "user", "content": [{"type": "text", "text": CACHE_WARM_PROMPT}]})
+        thinking = param.thinking is not None and param.thinking.thinking_type == "enabled"
+        # With thinking, `max_tokens` must exceed the thinking budget; the stream is closed
+        # after `message_start` anyway, by then the prefix has been written to the cache
+        max_tokens = (param.max_tokens or llm_parameter.DEFAULT_MAX_TOKENS) if thinking else 1
+        if self.is_debug_mode():
+            log_debug("➡️ llm [Cache Warm-up]", cache_plan.describe(), style="yellow")
+
+        try:
+            stream = await self._create_stream(param, messages, system, tools, max_tokens)
+            try:
+                async for event in stream:
+                    if isinstance(event, BetaRawMessageStartEvent):
+                        usage = event.message.usage
+                        return CacheWarmResult(
+                            cached_tokens=usage.cache_read_input_tokens or 0,
+                            written_tokens=usage.cache_creation_input_tokens or 0,
+                        )
+            finally:
+                await stream.close()
+        except (anthropic.AnthropicError, httpx.HTTPError) as e:
+            if self.is_debug_mode():
+                log_debug("⚠️ llm [Cache Warm-up failed]", f"{e.__class__.__name__} {e}", style="red")
+        return None
+
     @override
     async def call(self, param: LLMCallParameter) -> AsyncGenerator[model.ConversationItem, None]:
         param = apply_config_defaults(param, self.get_llm_config())
 
-        request_start_time = time.time()
-        first_token_time: float | None = None
-        last_token_time: float | None = None
+        timer = StreamTimer()
+        coalescer = DeltaCoalescer()
 
-        messages = convert_history_to_input(param.input, param.model)
+        cache = self._input_caches.get(param.session_id)
+        messages = convert_history_to_input(param.input, param.model, cache.messages if cache is not None else None)
         tools = convert_tool_schema(param.tools)
         system = convert_system_to_input(param.system)
+        cache_analysis = self.analyze_prefix(param, system, tools, messages)
+        cache_plan = plan_cache_breakpoints(messages, system, tools, cache.breakpoints if cache is not None else None)
 
         if self.is_debug_mode():
             thinking_config_dict = (
@@ -89,29 +186,14 @@ class AnthropicClient(LLMClientABC):
             payload = {k: v for k, v in payload.items() if v is not None}
 
             log_debug("➡️ llm [Complete Payload]", json.dumps(payload, ensure_ascii=False), style="yellow")
+            log_debug("➡️ llm [Cache Plan]", cache_plan.describe(), style="yellow")
 
-        stream = self.client.beta.messages.create(
-            model=str(param.model),
-            tool_choice={
-                "type": "auto",
-                "disable_parallel_tool_use": False,
-            },
-            stream=True,
-            max_tokens=param.max_tokens or llm_parameter.DEFAULT_MAX_TOKENS,
-            temperature=param.temperature or llm_parameter.DEFAULT_TEMPERATURE,
-            messages=messages,
-            system=system,
-            tools=tools,
-            betas=["interleaved-thinking-2025-05-14", "context-1m-2025-08-07"],
-            thinking=anthropic.types.ThinkingConfigEnabledParam(
-                type=param.thinking.thinking_type,
-                budget_tokens=param.thinking.thinking_budget or llm_parameter.DEFAULT_ANTHROPIC_THINKING_BUDGET_TOKENS,
+        if cache is not None:
+            cache.last_sent_at = time.monotonic()
+        stream = self.send(
+            lambda: self._create_stream(
+                param, messages, system, tools, param.max_tokens or llm_parameter.DEFAULT_MAX_TOKENS
             )
-            if param.thinking and param.thinking.thinking_type == "enabled"
-            else anthropic.types.ThinkingConfigDisabledParam(
-                type="disabled",
-            ),
-            extra_headers={"extra": json.dumps({"session_id": param.session_id})},
         )
 
         accumulated_thinking: list[str] = []
@@ -121,14 +203,17 @@ class AnthropicClient(LLMClientABC):
         current_tool_name: str | None = None
         current_tool_call_id: str | None = None
         current_tool_inputs: list[str] | None = None
+        # Parsed until the first argument is known, for the tool call preview
+        current_tool_partial: PartialJSONFields | None = None
 
         input_tokens = 0
         cached_tokens = 0
         output_tokens = 0
 
+        debug = self.is_debug_mode()
         try:
             async for event in await stream:
-                if self.is_debug_mode():
+                if debug:
                     log_debug(f"📥 stream [SSE {event.type}]", str(event), style="blue")
                 match event:
                     case BetaRawMessageStartEvent() as event:
@@ -142,14 +227,10 @@ class AnthropicClient(LLMClientABC):
                     case BetaRawContentBlockDeltaEvent() as event:
                         match event.delta:
                             case BetaThinkingDelta() as delta:
-                                if first_token_time is None:
-                                    first_token_time = time.time()
-                                last_token_time = time.time()
+                                timer.mark()
                                 accumulated_thinking.append(delta.thinking)
                             case BetaSignatureDelta() as delta:
-                                if first_token_time is None:
-                                    first_token_time = time.time()
-                                last_token_time = time.time()
+                                timer.mark()
                                 full_thinking = "".join(accumulated_thinking)
                                 accumulated_thinking.clear()
                                 yield model.ReasoningTextItem(
@@ -162,20 +243,21 @@ class AnthropicClient(LLMClientABC):
                                     model=str(param.model),
                                 )
                             case BetaTextDelta() as delta:
-                                if first_token_time is None:
-                                    first_token_time = time.time()
-                                last_token_time = time.time()
                                 accumulated_content.append(delta.text)
-                                yield model.AssistantMessageDelta(
-                                    content=delta.text,
-                                    response_id=response_id,
-                                )
+                                if (chunk := coalescer.add(delta.text, timer.mark())) is not None:
+                                    yield model.AssistantMessageDelta(content=chunk, response_id=response_id)
                             case BetaInputJSONDelta() as delta:
-                                if first_token_time is None:
-                                    first_token_time = time.time()
-                                last_token_time = time.time()
+                                timer.mark()
                                 if current_tool_inputs is not None:
                                     current_tool_inputs.append(delta.partial_json)
+                                if current_tool_partial is not None and current_tool_partial.feed(delta.partial_json):
+                                    yield model.ToolCallStartItem(
+                                        response_id=response_id,
+                                        call_id=current_tool_call_id or "",
+                                        name=current_tool_name or "",
+                                        arguments=json.dumps(current_tool_partial.fields, ensure_ascii=False),
+                                    )
+                                    current_tool_partial = None
                             case _:
                                 pass
                     case BetaRawContentBlockStartEvent() as event:
@@ -184,9 +266,12 @@ class AnthropicClient(LLMClientABC):
                                 current_tool_name = block.name
                                 current_tool_call_id = block.id
                                 current_tool_inputs = []
+                                current_tool_partial = PartialJSONFields()
                             case _:
                                 pass
                     case BetaRawContentBlockStopEvent() as event:
+                        if (chunk := coalescer.flush()) is not None:
+                            yield model.AssistantMessageDelta(content=chunk, response_id=response_id)
                         if len(accumulated_content) > 0:
                             yield model.AssistantMessageItem(
                                 content="".join(accumulated_content),
@@ -203,6 +288,7 @@ class AnthropicClient(LLMClientABC):
                             current_tool_name = None
                             current_tool_call_id = None
                             current_tool_inputs = None
+                            current_tool_partial = None
                     case BetaRawMessageDeltaEvent() as event:
                         input_tokens += (event.usage.input_tokens or 0) + (event.usage.cache_creation_input_tokens or 0)
                         output_tokens += event.usage.output_tokens or 0
@@ -212,17 +298,6 @@ class AnthropicClient(LLMClientABC):
                             (total_tokens / param.context_limit) * 100 if param.context_limit else None
                         )
 
-                        throughput_tps: float | None = None
-                        first_token_latency_ms: float | None = None
-
-                        if first_token_time is not None:
-                            first_token_latency_ms = (first_token_time - request_start_time) * 1000
-
-                        if first_token_time is not None and last_token_time is not None and output_tokens > 0:
-                            time_duration = last_token_time - first_token_time
-                            if time_duration >= 0.15:
-                                throughput_tps = output_tokens / time_duration
-
                         yield model.ResponseMetadataItem(
                             usage=model.Usage(
                                 input_tokens=input_tokens,
@@ -230,13 +305,16 @@ class AnthropicClient(LLMClientABC):
                                 cached_tokens=cached_tokens,
                                 total_tokens=total_tokens,
                                 context_usage_percent=context_usage_percent,
-                                throughput_tps=throughput_tps,
-                                first_token_latency_ms=first_token_latency_ms,
+                                throughput_tps=timer.throughput_tps(output_tokens),
+                                first_token_latency_ms=timer.first_token_latency_ms,
                             ),
                             response_id=response_id,
                             model_name=str(param.model),
+                            cache_analysis=cache_analysis,
                         )
                     case _:
                         pass
-        except RateLimitError as e:
-            yield StreamErrorItem(error=f"{e.__class__.__name__} {str(e)}")
+        except (anthropic.AnthropicError, httpx.HTTPError) as e:
+            if (chunk := coalescer.flush()) is not None:
+                yield model.AssistantMessageDelta(content=chunk, response_id=response_id)
+            yield stream_error_item(e)
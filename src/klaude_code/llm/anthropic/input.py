@@ -17,8 +17,10 @@ from anthropic.types.beta.beta_text_block_param import BetaTextBlockParam
 from anthropic.types.beta.beta_tool_param import BetaToolParam
 from anthropic.types.beta.beta_url_image_source_param import BetaURLImageSourceParam
 
+from klaude_code.llm.input_cache import ConvertedPrefix, GroupKind, convert_groups_incrementally
 from klaude_code.protocol import llm_parameter, model
 from klaude_code.protocol.model import ReasoningEncryptedItem, ReasoningTextItem
+from klaude_code.session.blobs import missing_image_text, resolve_image_url
 
 AllowedMediaType = Literal["image/png", "image/jpeg", "image/gif", "image/webp"]
 _INLINE_IMAGE_MEDIA_TYPES: tuple[AllowedMediaType, ...] = (
@@ -29,8 +31,10 @@ _INLINE_IMAGE_MEDIA_TYPES: tuple[AllowedMediaType, ...] = (
 )
 
 
-def _image_part_to_block(image: model.ImageURLPart) -> BetaImageBlockParam:
-    url = image.image_url.url
+def _image_part_to_block(image: model.ImageURLPart) -> BetaImageBlockParam | BetaTextBlockParam:
+    url = resolve_image_url(image.image_url.url)
+    if url is None:
+        return {"type": "text", "text": missing_image_text(image.image_url.url)}
     if url.startswith("data:"):
         header_and_media = url.split(",", 1)
         if len(header_and_media) != 2:
@@ -78,9 +82,96 @@ def _append_user_content_blocks(
             blocks.append(_image_part_to_block(image))
 
 
+def _convert_group(
+    group_kind: GroupKind,
+    group: list[model.ConversationItem],
+    model_name: str | None,
+) -> BetaMessageParam | None:
+    match group_kind:
+        case "user":
+            content_blocks: list[BetaTextBlockParam | BetaImageBlockParam] = []
+            for item in group:
+                _append_user_content_blocks(content_blocks, item)
+            if not content_blocks:
+                content_blocks.append({"type": "text", "text": ""})
+            return {"role": "user", "content": content_blocks}
+        case "tool":
+            if len(group) == 0 or not isinstance(group[0], model.ToolResultItem):
+                return None
+            tool_result = group[0]
+            reminders: list[model.DeveloperMessageItem] = [
+                i for i in group if isinstance(i, model.DeveloperMessageItem)
+            ]
+            reminders_str = "\n" + "\n".join(i.content for i in reminders if i.content)
+            tool_content: list[BetaTextBlockParam | BetaImageBlockParam] = []
+            tool_text = (tool_result.output or "") + reminders_str
+            tool_content.append({"type": "text", "text": tool_text})
+            for image in tool_result.images or []:
+                tool_content.append(_image_part_to_block(image))
+            for reminder in reminders:
+                for image in reminder.images or []:
+                    tool_content.append(_image_part_to_block(image))
+
+            return {
+                "role": "user",
+                "content": [
+                    {
+                        "type": "tool_result",
+                        "tool_use_id": tool_result.call_id,
+                        "is_error": tool_result.status == "error",
+                        "content": tool_content,
+                    }
+                ],
+            }
+        case "assistant":
+            assistant_message = {
+                "role": "assistant",
+                "content": [],
+            }
+            current_reasoning_content: str | None = None
+
+            for item in group:
+                match item:
+                    case model.AssistantMessageItem() as a:
+                        assistant_message["content"].append(
+                            {
+                                "type": "text",
+                                "text": a.content,
+                            }
+                        )
+                    case model.ToolCallItem() as t:
+                        assistant_message["content"].append(
+                            {
+                                "type": "tool_use",
+                                "id": t.call_id,
+                                "name": t.name,
+                                "input": json.loads(t.arguments) if t.arguments else None,
+                            }
+                        )
+                    case ReasoningEncryptedItem() as r:
+                        if r.encrypted_content and len(r.encrypted_content) > 0 and model_name == r.model:
+                            assistant_message["content"].append(
+                                {
+                                    "type": "thinking",
+                                    "thinking": current_reasoning_content or "",
+                                    "signature": r.encrypted_content,
+                                }
+                            )
+                            current_reasoning_content = None
+                    case ReasoningTextItem() as r:
+                        current_reasoning_content = r.content
+                    case _:
+                        pass
+
+            return assistant_message
+        case "other":
+            return None
+
+
 def convert_history_to_input(
     history: list[model.ConversationItem],
     model_name: str | None,
+    cache: ConvertedPrefix[BetaMessageParam] | None = None,
 ) -> list[BetaMessageParam]:
     """
     Convert a list of conversation items to a list of beta message params.
@@ -88,106 +179,20 @@ def convert_history_to_input(
     Args:
         history: List of conversation items.
         model_name: Model name. Used to verify that signatures are valid for the same model
+        cache: Per-session cache of the converted history prefix, only new items are converted
     """
-    messages: list[BetaMessageParam] = []
-    for group_kind, group in model.group_response_items_gen(history):
-        match group_kind:
-            case "user":
-                content_blocks: list[BetaTextBlockParam | BetaImageBlockParam] = []
-                for item in group:
-                    _append_user_content_blocks(content_blocks, item)
-                if not content_blocks:
-                    content_blocks.append({"type": "text", "text": ""})
-                messages.append({"role": "user", "content": content_blocks})
-            case "tool":
-                if len(group) == 0 or not isinstance(group[0], model.ToolResultItem):
-                    continue
-                tool_result = group[0]
-                reminders: list[model.DeveloperMessageItem] = [
-                    i for i in group if isinstance(i, model.DeveloperMessageItem)
-                ]
-                reminders_str = "\n" + "\n".join(i.content for i in reminders if i.content)
-                tool_content: list[BetaTextBlockParam | BetaImageBlockParam] = []
-                tool_text = (tool_result.output or "") + reminders_str
-                tool_content.append({"type": "text", "text": tool_text})
-                for image in tool_result.images or []:
-                    tool_content.append(_image_part_to_block(image))
-                for reminder in reminders:
-                    for image in reminder.images or []:
-                        tool_content.append(_image_part_to_block(image))
-
-                messages.append(
-                    {
-                        "role": "user",
-                        "content": [
-                            {
-                                "type": "tool_result",
-                                "tool_use_id": tool_result.call_id,
-                                "is_error": tool_result.status == "error",
-                                "content": tool_content,
-                            }
-                        ],
-                    }
-                )
-            case "assistant":
-                assistant_message = {
-                    "role": "assistant",
-                    "content": [],
-                }
-                current_reasoning_content: str | None = None
-
-                for item in group:
-                    match item:
-                        case model.AssistantMessageItem() as a:
-                            assistant_message["content"].append(
-                                {
-                                    "type": "text",
-                                    "text": a.content,
-                                }
-                            )
-                        case model.ToolCallItem() as t:
-                            assistant_message["content"].append(
-                                {
-                                    "type": "tool_use",
-                                    "id": t.call_id,
-                                    "name": t.name,
-                                    "input": json.loads(t.arguments) if t.arguments else None,
-                                }
-                            )
-                        case ReasoningEncryptedItem() as r:
-                            if r.encrypted_content and len(r.encrypted_content) > 0 and model_name == r.model:
-                                assistant_message["content"].append(
-                                    {
-                                        "type": "thinking",
-                                        "thinking": current_reasoning_content or "",
-                                        "signature": r.encrypted_content,
-                                    }
-                                )
-                                current_reasoning_content = None
-                        case ReasoningTextItem() as r:
-                            current_reasoning_content = r.content
-                        case _:
-                            pass
-
-                messages.append(assistant_message)
-            case "other":
-                pass
-
-    # Cache control
-    if len(messages) > 0:
-        last_message = messages[-1]
-        content_list = list(last_message.get("content", []))
-        if content_list:
-            last_content_part = content_list[-1]
-            if last_content_part.get("type", "") in ["text", "tool_result", "tool_use"]:
-                last_content_part["cache_control"] = {"type": "ephemeral"}  # type: ignore
-    return messages
+    return convert_groups_incrementally(
+        history,
+        lambda group_kind, group: _convert_group(group_kind, group, model_name),
+        cache,
+        key=model_name,
+    )
 
 
 def convert_system_to_input(system: str | None) -> list[BetaTextBlockParam]:
     if system is None:
         return []
-    return [{"type": "text", "text": system, "cache_control": {"type": "ephemeral"}}]
+    return [{"type": "text", "text": system}]
 
 
 def convert_tool_schema(
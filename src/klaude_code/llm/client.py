@@ -1,14 +1,42 @@
 from abc import ABC, abstractmethod
-from collections.abc import AsyncGenerator
-from typing import cast
+from collections.abc import AsyncGenerator, Awaitable, Callable, Sequence
+from dataclasses import dataclass
+from typing import Any, TypeVar, cast
 
+from klaude_code.llm.prefix_analysis import PrefixHashAnalyzer
+from klaude_code.llm.retry import (
+    DEFAULT_RETRY_POLICY,
+    ClassifiedError,
+    RetryBudget,
+    RetryPolicy,
+    get_retry_budget,
+    send_with_retry,
+)
 from klaude_code.protocol.llm_parameter import LLMCallParameter, LLMConfigParameter
-from klaude_code.protocol.model import ConversationItem
+from klaude_code.protocol.model import ConversationItem, PrefixCacheAnalysis
+from klaude_code.trace import log_debug
+
+T = TypeVar("T")
+
+
+@dataclass(frozen=True)
+class CacheWarmResult:
+    """Prompt-cache usage reported for a warm-up request."""
+
+    cached_tokens: int
+    written_tokens: int
+
+    @property
+    def hit(self) -> bool:
+        return self.cached_tokens > 0
 
 
 class LLMClientABC(ABC):
     def __init__(self, config: LLMConfigParameter) -> None:
         self.debug_mode: bool = False
+        self.prefix_analyzer: PrefixHashAnalyzer | None = None
+        self.retry_policy: RetryPolicy = DEFAULT_RETRY_POLICY
+        self.retry_budget: RetryBudget = get_retry_budget(config.provider_name or config.protocol.value)
         self._config = config
 
     @classmethod
@@ -21,6 +49,18 @@ class LLMClientABC(ABC):
         raise NotImplementedError
         yield cast(ConversationItem, None)  # pyright: ignore[reportUnreachable]
 
+    @property
+    def endpoints(self) -> list[str]:
+        """Base URLs the client sends requests to, see `transport.preconnect`."""
+        return []
+
+    async def warm_cache(self, param: LLMCallParameter) -> CacheWarmResult | None:
+        """Prime the provider's prompt cache with the prefix `call(param)` would send.
+
+        None when the provider has no prompt cache to warm or the warm-up was skipped.
+        """
+        return None
+
     def enable_debug_mode(self) -> None:
         self.debug_mode = True
 
@@ -30,6 +70,34 @@ class LLMClientABC(ABC):
     def is_debug_mode(self) -> bool:
         return self.debug_mode
 
+    def enable_cache_analysis(self, analyzer: PrefixHashAnalyzer) -> None:
+        """Record prompt-cache prefix analysis; share `analyzer` between clients to detect model switches."""
+        self.prefix_analyzer = analyzer
+
+    def analyze_prefix(
+        self, param: LLMCallParameter, system: Any, tools: Any, messages: Sequence[Any]
+    ) -> list[PrefixCacheAnalysis] | None:
+        """Analyze the serialized request, for `ResponseMetadataItem.cache_analysis`."""
+        if self.prefix_analyzer is None:
+            return None
+        return [self.prefix_analyzer.analyze(param.session_id, str(param.model), system, tools, messages)]
+
+    async def send(self, request: Callable[[], Awaitable[T]]) -> T:
+        """Send a request through the provider's shared retry budget, see llm/retry.py.
+
+        SDK clients are created with `max_retries=0`, retries happen here only.
+        """
+
+        def on_retry(attempt: int, classified: ClassifiedError, delay: float, error: BaseException) -> None:
+            if self.is_debug_mode():
+                log_debug(
+                    f"🔁 retry [{classified.kind}] {attempt}/{self.retry_policy.max_attempts - 1} in {delay:.1f}s",
+                    f"{error.__class__.__name__} {error}",
+                    style="red",
+                )
+
+        return await send_with_retry(request, self.retry_budget, self.retry_policy, on_retry)
+
     def get_llm_config(self) -> LLMConfigParameter:
         return self._config
 
@@ -0,0 +1,233 @@
+"""
+Failover across a chain of models for a single logical request.
+
+Nothing of a request is committed before its first meaningful item (anything but `StartItem`),
+so until then it can be abandoned and re-issued on the next model of the chain:
+
+- on a rate-limit, overload or network error, including 5xx;
+- when the first item does not arrive within `first_token_timeout_s`;
+- optionally hedged: once the request is slower than the primary model's recent first-token
+  latency percentile, the next model is asked as well and the first to answer wins.
+
+Only the winning stream is yielded, the others are cancelled, so the agent commits each turn once.
+"""
+
+import asyncio
+import math
+import time
+from collections import deque
+from collections.abc import AsyncGenerator
+from dataclasses import dataclass, field
+from typing import override
+
+from klaude_code.llm.client import CacheWarmResult, LLMClientABC
+from klaude_code.llm.prefix_analysis import PrefixHashAnalyzer
+from klaude_code.llm.retry import RETRYABLE_KINDS, RetryPolicy
+from klaude_code.protocol.llm_parameter import LLMCallParameter, LLMConfigParameter
+from klaude_code.protocol.model import ConversationItem, StartItem, StreamErrorItem
+from klaude_code.trace import log_debug
+
+DEFAULT_FIRST_TOKEN_TIMEOUT_S = 60.0
+# First-token latencies kept per model for the hedging percentile
+LATENCY_WINDOW = 50
+MIN_HEDGE_SAMPLES = 10
+MIN_HEDGE_DELAY_S = 1.0
+
+# A failing model is not retried by its client when another model can take over
+_NO_RETRY_POLICY = RetryPolicy(max_attempts=1)
+
+
+def latency_percentile(samples: deque[float] | list[float], percentile: float) -> float | None:
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    index = max(0, math.ceil(percentile / 100 * len(ordered)) - 1)
+    return ordered[min(index, len(ordered) - 1)]
+
+
+@dataclass
+class _Attempt:
+    client: LLMClientABC
+    stream: AsyncGenerator[ConversationItem, None]
+    started: float = field(default_factory=time.monotonic)
+    first_item_at: float | None = None
+    buffered: list[ConversationItem] = field(default_factory=lambda: list[ConversationItem]())
+    task: asyncio.Task[None] = field(init=False)
+
+    def __post_init__(self) -> None:
+        self.task = asyncio.create_task(self._prime())
+
+    async def _prime(self) -> None:
+        """Buffer items up to the first meaningful one, or the end of the stream."""
+        async for item in self.stream:
+            self.buffered.append(item)
+            if not isinstance(item, StartItem):
+                self.first_item_at = time.monotonic()
+                return
+
+    @property
+    def failed_over(self) -> bool:
+        last = self.buffered[-1] if self.buffered else None
+        return isinstance(last, StreamErrorItem) and last.kind in RETRYABLE_KINDS
+
+    async def discard(self) -> None:
+        if not self.task.done():
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+        await self.stream.aclose()
+
+
+class FailoverClient(LLMClientABC):
+    """Sends each request to the first healthy model of `clients`, failing over to the next ones.
+
+    The wrapped clients must not be shared, all but the last stop retrying on their own.
+    """
+
+    def __init__(
+        self,
+        clients: list[LLMClientABC],
+        first_token_timeout_s: float | None = DEFAULT_FIRST_TOKEN_TIMEOUT_S,
+        hedge_percentile: float | None = None,
+    ):
+        if not clients:
+            raise ValueError("FailoverClient needs at least one client")
+        super().__init__(clients[0].get_llm_config())
+        self.clients = clients
+        self.first_token_timeout_s = first_token_timeout_s
+        self.hedge_percentile = hedge_percentile
+        self.retry_budget = clients[0].retry_budget
+        self._latencies: dict[int, deque[float]] = {id(client): deque(maxlen=LATENCY_WINDOW) for client in clients}
+        for client in clients[:-1]:
+            client.retry_policy = _NO_RETRY_POLICY
+
+    @classmethod
+    @override
+    def create(cls, config: LLMConfigParameter) -> "LLMClientABC":
+        raise TypeError("FailoverClient wraps existing clients, see Config.create_llm_client")
+
+    @property
+    @override
+    def endpoints(self) -> list[str]:
+        return [endpoint for client in self.clients for endpoint in client.endpoints]
+
+    @override
+    async def warm_cache(self, param: LLMCallParameter) -> CacheWarmResult | None:
+        # The cache is per model, only the primary one answers unless it fails
+        return await self.clients[0].warm_cache(param)
+
+    @override
+    def enable_debug_mode(self) -> None:
+        super().enable_debug_mode()
+        for client in self.clients:
+            client.enable_debug_mode()
+
+    @override
+    def disable_debug_mode(self) -> None:
+        super().disable_debug_mode()
+        for client in self.clients:
+            client.disable_debug_mode()
+
+    @override
+    def enable_cache_analysis(self, analyzer: PrefixHashAnalyzer) -> None:
+        super().enable_cache_analysis(analyzer)
+        for client in self.clients:
+            client.enable_cache_analysis(analyzer)
+
+    def hedge_delay(self, client: LLMClientABC) -> float | None:
+        """Delay after which a request to `client` is hedged, None until enough latencies are known."""
+        if self.hedge_percentile is None:
+            return None
+        samples = self._latencies[id(client)]
+        if len(samples) < MIN_HEDGE_SAMPLES:
+            return None
+        delay = latency_percentile(samples, self.hedge_percentile)
+        return max(MIN_HEDGE_DELAY_S, delay) if delay is not None else None
+
+    def _ordered_clients(self) -> list[LLMClientABC]:
+        # Providers cooling down after a 429 or out of retry tokens are left out while another one
+        # is available: the chain must not end on a client that can only fail
+        available = [
+            client
+            for client in self.clients
+            if client.retry_budget.cooldown_remaining() == 0 and not client.retry_budget.exhausted
+        ]
+        if available:
+            return available
+        return sorted(self.clients, key=lambda client: client.retry_budget.cooldown_remaining())
+
+    def _start(self, client: LLMClientABC, param: LLMCallParameter) -> _Attempt:
+        # Clients fill in their model defaults in place
+        return _Attempt(client=client, stream=client.call(param.model_copy()))
+
+    def _log(self, message: str, attempt: _Attempt) -> None:
+        if self.is_debug_mode():
+            log_debug(f"🔀 failover [{message}]", attempt.client.model_name, style="red")
+
+    @override
+    async def call(self, param: LLMCallParameter) -> AsyncGenerator[ConversationItem, None]:
+        candidates = deque(self._ordered_clients())
+        hedge_delay = self.hedge_delay(candidates[0])
+        running: list[_Attempt] = [self._start(candidates.popleft(), param)]
+        hedged = False
+        winner: _Attempt | None = None
+        try:
+            while winner is None:
+                now = time.monotonic()
+                deadlines: list[float] = []
+                if candidates:
+                    if hedge_delay is not None and not hedged:
+                        deadlines.append(running[0].started + hedge_delay)
+                    if self.first_token_timeout_s is not None:
+                        deadlines.extend(attempt.started + self.first_token_timeout_s for attempt in running)
+                timeout = max(0.0, min(deadlines) - now) if deadlines else None
+                done, _ = await asyncio.wait(
+                    [attempt.task for attempt in running], timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+                )
+
+                if not done:
+                    now = time.monotonic()
+                    stalled = [
+                        attempt
+                        for attempt in running
+                        if self.first_token_timeout_s is not None
+                        and now - attempt.started >= self.first_token_timeout_s
+                    ]
+                    for attempt in stalled:
+                        self._log("first token timeout", attempt)
+                        running.remove(attempt)
+                        await attempt.discard()
+                    if candidates and (stalled or not running):
+                        running.append(self._start(candidates.popleft(), param))
+                    elif candidates and hedge_delay is not None and not hedged:
+                        hedged = True
+                        self._log("hedge", running[0])
+                        running.append(self._start(candidates.popleft(), param))
+                    continue
+
+                for attempt in list(running):
+                    if attempt.task not in done:
+                        continue
+                    attempt.task.result()
+                    if attempt.failed_over and (candidates or len(running) > 1):
+                        self._log("error", attempt)
+                        running.remove(attempt)
+                        await attempt.discard()
+                        continue
+                    winner = attempt
+                    break
+                if winner is None and not running:
+                    running.append(self._start(candidates.popleft(), param))
+
+            running.remove(winner)
+            for attempt in running:
+                await attempt.discard()
+            running.clear()
+            if winner.first_item_at is not None and not winner.failed_over:
+                self._latencies[id(winner.client)].append(winner.first_item_at - winner.started)
+            for item in winner.buffered:
+                yield item
+            async for item in winner.stream:
+                yield item
+        finally:
+            for attempt in running:
+                await attempt.discard()
@@ -0,0 +1,116 @@
+"""
+Prefix memoization for converting conversation history into provider input.
+
+Session history is append-only (compaction and /clear replace it wholesale), so the
+converted form of its older part never changes between turns. The caches here keep that
+converted prefix and let the `convert_history_to_input` functions only convert newly
+appended items. A cached prefix is reused only while the history still holds the very
+same item objects at its boundaries; anything else falls back to a full conversion.
+"""
+
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from dataclasses import dataclass, field
+from typing import Any, Generic, Literal, TypeVar
+
+from klaude_code.protocol.model import ConversationItem, group_response_items_gen
+
+T = TypeVar("T")
+C = TypeVar("C")
+
+GroupKind = Literal["assistant", "user", "tool", "other"]
+
+DEFAULT_MAX_CACHED_SESSIONS = 32
+
+
+@dataclass
+class ConvertedPrefix(Generic[T]):
+    """Converted outputs for `history[start:end]`, plus any converter state at `end`."""
+
+    key: Hashable = None
+    start: int = 0
+    end: int = 0
+    first: ConversationItem | None = None
+    last: ConversationItem | None = None
+    outputs: list[T] = field(default_factory=lambda: [])
+    state: Any = None
+
+    def reusable_end(self, history: list[ConversationItem], key: Hashable, start: int = 0) -> int:
+        """End index of the cached conversion if it still applies to `history`, otherwise `start`."""
+        if (
+            self.end > self.start
+            and self.key == key
+            and self.start == start
+            and self.end <= len(history)
+            and history[self.start] is self.first
+            and history[self.end - 1] is self.last
+        ):
+            return self.end
+        self.reset(key, start)
+        return start
+
+    def reset(self, key: Hashable, start: int = 0) -> None:
+        self.key = key
+        self.start = self.end = start
+        self.first = self.last = None
+        self.outputs = []
+        self.state = None
+
+    def store(self, history: list[ConversationItem], end: int, outputs: list[T], state: Any = None) -> None:
+        self.end = end
+        self.first = history[self.start] if end > self.start else None
+        self.last = history[end - 1] if end > self.start else None
+        self.outputs = outputs
+        self.state = state
+
+
+def convert_groups_incrementally(
+    history: list[ConversationItem],
+    convert_group: Callable[[GroupKind, list[ConversationItem]], T | None],
+    prefix: ConvertedPrefix[T] | None = None,
+    key: Hashable = None,
+) -> list[T]:
+    """Convert `group_response_items_gen(history)` group by group, reusing `prefix`.
+
+    Only groups before the last one are cached: the last group can still grow (consecutive
+    user messages, reminders attached to a tool result) when more items are appended.
+    """
+    start = prefix.reusable_end(history, key) if prefix is not None else 0
+    outputs: list[T] = list(prefix.outputs) if prefix is not None else []
+    stable_outputs = len(outputs)
+    last_group_first: ConversationItem | None = None
+    for group_kind, group in group_response_items_gen(history[start:]):
+        stable_outputs = len(outputs)
+        last_group_first = group[0]
+        converted = convert_group(group_kind, group)
+        if converted is not None:
+            outputs.append(converted)
+
+    if prefix is not None and last_group_first is not None:
+        stable_end = len(history) - 1
+        while history[stable_end] is not last_group_first:
+            stable_end -= 1
+        prefix.store(history, stable_end, outputs[:stable_outputs])
+    return outputs
+
+
+class SessionInputCaches(Generic[C]):
+    """Per-session conversion caches, keeping the most recently used sessions only."""
+
+    def __init__(self, factory: Callable[[], C], max_sessions: int = DEFAULT_MAX_CACHED_SESSIONS):
+        self._factory = factory
+        self._max_sessions = max_sessions
+        self._caches: OrderedDict[str, C] = OrderedDict()
+
+    def get(self, session_id: str | None) -> C | None:
+        if session_id is None:
+            return None
+        cache = self._caches.get(session_id)
+        if cache is None:
+            cache = self._factory()
+            self._caches[session_id] = cache
+            if len(self._caches) > self._max_sessions:
+                self._caches.popitem(last=False)
+        else:
+            self._caches.move_to_end(session_id)
+        return cache
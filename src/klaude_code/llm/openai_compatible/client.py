@@ -1,16 +1,19 @@
 import json
-import time
 from collections.abc import AsyncGenerator
 from typing import Literal, override
 
 import httpx
 import openai
-from openai import APIError, RateLimitError
+from openai.types import chat
 
 from klaude_code.llm.client import LLMClientABC
+from klaude_code.llm.input_cache import ConvertedPrefix, SessionInputCaches
 from klaude_code.llm.openai_compatible.input import convert_history_to_input, convert_tool_schema
 from klaude_code.llm.openai_compatible.tool_call_accumulator import BasicToolCallAccumulator, ToolCallAccumulatorABC
 from klaude_code.llm.registry import register
+from klaude_code.llm.retry import stream_error_item
+from klaude_code.llm.streaming import DeltaCoalescer, StreamTimer
+from klaude_code.llm.transport import get_http_client
 from klaude_code.protocol import model
 from klaude_code.protocol.llm_parameter import (
     LLMCallParameter,
@@ -18,7 +21,6 @@ from klaude_code.protocol.llm_parameter import (
     LLMConfigParameter,
     apply_config_defaults,
 )
-from klaude_code.protocol.model import StreamErrorItem
 from klaude_code.trace import log_debug
 
 
@@ -34,29 +36,43 @@ class OpenAICompatibleClient(LLMClientABC):
                 azure_endpoint=str(config.base_url),
                 api_version=config.azure_api_version,
                 timeout=httpx.Timeout(300.0, connect=15.0, read=285.0),
+                max_retries=0,
+                http_client=get_http_client(),
             )
         else:
             client = openai.AsyncOpenAI(
                 api_key=config.api_key,
                 base_url=config.base_url,
                 timeout=httpx.Timeout(300.0, connect=15.0, read=285.0),
+                max_retries=0,
+                http_client=get_http_client(),
             )
         self.client: openai.AsyncAzureOpenAI | openai.AsyncOpenAI = client
+        self._input_caches: SessionInputCaches[ConvertedPrefix[chat.ChatCompletionMessageParam]] = SessionInputCaches(
+            ConvertedPrefix
+        )
 
     @classmethod
     @override
     def create(cls, config: LLMConfigParameter) -> "LLMClientABC":
         return cls(config)
 
+    @property
+    @override
+    def endpoints(self) -> list[str]:
+        return [str(self.client.base_url)]
+
     @override
     async def call(self, param: LLMCallParameter) -> AsyncGenerator[model.ConversationItem, None]:
         param = apply_config_defaults(param, self.get_llm_config())
-        messages = convert_history_to_input(param.input, param.system, param.model)
+        messages = convert_history_to_input(
+            param.input, param.system, param.model, self._input_caches.get(param.session_id)
+        )
         tools = convert_tool_schema(param.tools)
+        cache_analysis = self.analyze_prefix(param, param.system, tools, messages[1:] if param.system else messages)
 
-        request_start_time = time.time()
-        first_token_time: float | None = None
-        last_token_time: float | None = None
+        timer = StreamTimer()
+        coalescer = DeltaCoalescer()
 
         extra_body = {}
         extra_headers = {"extra": json.dumps({"session_id": param.session_id})}
@@ -86,19 +102,21 @@ class OpenAICompatibleClient(LLMClientABC):
 
             log_debug("➡️ llm [Complete Payload]", json.dumps(payload, ensure_ascii=False), style="yellow")
 
-        stream = self.client.chat.completions.create(
-            model=str(param.model),
-            tool_choice="auto",
-            parallel_tool_calls=True,
-            stream=True,
-            messages=messages,
-            temperature=param.temperature,
-            max_tokens=param.max_tokens,
-            tools=tools,
-            reasoning_effort=param.thinking.reasoning_effort if param.thinking else None,
-            verbosity=param.verbosity,
-            extra_body=extra_body,  # pyright: ignore[reportUnknownArgumentType]
-            extra_headers=extra_headers,
+        stream = self.send(
+            lambda: self.client.chat.completions.create(
+                model=str(param.model),
+                tool_choice="auto",
+                parallel_tool_calls=True,
+                stream=True,
+                messages=messages,
+                temperature=param.temperature,
+                max_tokens=param.max_tokens,
+                tools=tools,
+                reasoning_effort=param.thinking.reasoning_effort if param.thinking else None,
+                verbosity=param.verbosity,
+                extra_body=extra_body,  # pyright: ignore[reportUnknownArgumentType]
+                extra_headers=extra_headers,
+            )
         )
 
         stage: Literal["waiting", "reasoning", "assistant", "tool", "done"] = "waiting"
@@ -106,7 +124,7 @@ class OpenAICompatibleClient(LLMClientABC):
         accumulated_content: list[str] = []
         accumulated_tool_calls: ToolCallAccumulatorABC = BasicToolCallAccumulator()
         response_id: str | None = None
-        metadata_item = model.ResponseMetadataItem()
+        metadata_item = model.ResponseMetadataItem(cache_analysis=cache_analysis)
 
         def flush_reasoning_items() -> list[model.ConversationItem]:
             nonlocal accumulated_reasoning
@@ -123,23 +141,25 @@ class OpenAICompatibleClient(LLMClientABC):
             nonlocal accumulated_content
             if len(accumulated_content) == 0:
                 return []
-            item = model.AssistantMessageItem(
-                content="".join(accumulated_content),
-                response_id=response_id,
+            items: list[model.ConversationItem] = []
+            if (chunk := coalescer.flush()) is not None:
+                items.append(model.AssistantMessageDelta(content=chunk, response_id=response_id))
+            items.append(
+                model.AssistantMessageItem(
+                    content="".join(accumulated_content),
+                    response_id=response_id,
+                )
             )
             accumulated_content = []
-            return [item]
+            return items
 
         def flush_tool_call_items() -> list[model.ToolCallItem]:
-            nonlocal accumulated_tool_calls
-            items: list[model.ToolCallItem] = accumulated_tool_calls.get()
-            if items:
-                accumulated_tool_calls.chunks_by_step = []  # pyright: ignore[reportAttributeAccessIssue]
-            return items
+            return accumulated_tool_calls.flush()
 
+        debug = self.is_debug_mode()
         try:
             async for event in await stream:
-                if self.is_debug_mode():
+                if debug:
                     log_debug("📥 stream [SSE]", str(event), style="blue")
                 if not response_id and event.id:
                     response_id = event.id
@@ -170,9 +190,7 @@ class OpenAICompatibleClient(LLMClientABC):
                 if hasattr(delta, "reasoning_content") and getattr(delta, "reasoning_content"):
                     reasoning_content = getattr(delta, "reasoning_content")
                 if reasoning_content:
-                    if first_token_time is None:
-                        first_token_time = time.time()
-                    last_token_time = time.time()
+                    timer.mark()
                     stage = "reasoning"
                     accumulated_reasoning.append(reasoning_content)
 
@@ -180,9 +198,7 @@ class OpenAICompatibleClient(LLMClientABC):
                 if delta.content and (
                     stage == "assistant" or delta.content.strip()
                 ):  # Process all content in assistant stage, filter empty content in reasoning stage
-                    if first_token_time is None:
-                        first_token_time = time.time()
-                    last_token_time = time.time()
+                    now = timer.mark()
                     if stage == "reasoning":
                         for item in flush_reasoning_items():
                             yield item
@@ -191,16 +207,12 @@ class OpenAICompatibleClient(LLMClientABC):
                             yield item
                     stage = "assistant"
                     accumulated_content.append(delta.content)
-                    yield model.AssistantMessageDelta(
-                        content=delta.content,
-                        response_id=response_id,
-                    )
+                    if (chunk := coalescer.add(delta.content, now)) is not None:
+                        yield model.AssistantMessageDelta(content=chunk, response_id=response_id)
 
                 # Tool
                 if delta.tool_calls and len(delta.tool_calls) > 0:
-                    if first_token_time is None:
-                        first_token_time = time.time()
-                    last_token_time = time.time()
+                    timer.mark()
                     if stage == "reasoning":
                         for item in flush_reasoning_items():
                             yield item
@@ -208,9 +220,11 @@ class OpenAICompatibleClient(LLMClientABC):
                         for item in flush_assistant_items():
                             yield item
                     stage = "tool"
-                    accumulated_tool_calls.add(delta.tool_calls)
-        except (RateLimitError, APIError) as e:
-            yield StreamErrorItem(error=f"{e.__class__.__name__} {str(e)}")
+                    # Each call is yielded once the next one starts, so it can be dispatched early
+                    for item in accumulated_tool_calls.add(delta.tool_calls):
+                        yield item
+        except (openai.OpenAIError, httpx.HTTPError) as e:
+            yield stream_error_item(e)
 
         # Finalize
         for item in flush_reasoning_items():
@@ -226,13 +240,9 @@ class OpenAICompatibleClient(LLMClientABC):
         metadata_item.response_id = response_id
 
         # Calculate performance metrics if we have timing data
-        if metadata_item.usage and first_token_time is not None:
-            metadata_item.usage.first_token_latency_ms = (first_token_time - request_start_time) * 1000
-
-            if last_token_time is not None and metadata_item.usage.output_tokens > 0:
-                time_duration = last_token_time - first_token_time
-                if time_duration >= 0.15:
-                    metadata_item.usage.throughput_tps = metadata_item.usage.output_tokens / time_duration
+        if metadata_item.usage:
+            metadata_item.usage.first_token_latency_ms = timer.first_token_latency_ms
+            metadata_item.usage.throughput_tps = timer.throughput_tps(metadata_item.usage.output_tokens)
 
         yield metadata_item
 
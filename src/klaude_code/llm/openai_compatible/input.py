@@ -6,6 +6,7 @@
 from openai.types import chat
 from openai.types.chat import ChatCompletionContentPartParam
 
+from klaude_code.llm.input_cache import ConvertedPrefix, GroupKind, convert_groups_incrementally
 from klaude_code.protocol.llm_parameter import ToolSchema
 from klaude_code.protocol.model import (
     AssistantMessageItem,
@@ -16,8 +17,8 @@ from klaude_code.protocol.model import (
     ToolCallItem,
     ToolResultItem,
     UserMessageItem,
-    group_response_items_gen,
 )
+from klaude_code.session.blobs import missing_image_text, resolve_image_url
 
 
 def build_user_content_parts(group: list[ConversationItem]) -> list[ChatCompletionContentPartParam]:
@@ -27,16 +28,81 @@ def build_user_content_parts(group: list[ConversationItem]) -> list[ChatCompleti
             if item.content is not None:
                 parts.append({"type": "text", "text": item.content + "\n"})
             for image in item.images or []:
-                parts.append({"type": "image_url", "image_url": {"url": image.image_url.url}})
+                url = resolve_image_url(image.image_url.url)
+                if url is None:
+                    parts.append({"type": "text", "text": missing_image_text(image.image_url.url)})
+                else:
+                    parts.append({"type": "image_url", "image_url": {"url": url}})
     if not parts:
         parts.append({"type": "text", "text": ""})
     return parts
 
 
+def _convert_group(group_kind: GroupKind, group: list[ConversationItem]) -> chat.ChatCompletionMessageParam | None:
+    match group_kind:
+        case "user":
+            return {"role": "user", "content": build_user_content_parts(group)}
+        case "tool":
+            if len(group) == 0 or not isinstance(group[0], ToolResultItem):
+                return None
+            tool_result = group[0]
+            reminders: list[DeveloperMessageItem] = [i for i in group if isinstance(i, DeveloperMessageItem)]
+            reminders_str = "\n" + "\n".join(i.content for i in reminders if i.content)
+            return {
+                "role": "tool",
+                "content": [
+                    {
+                        "type": "text",
+                        "text": (
+                            tool_result.output or "<system-reminder>Tool ran without output or errors</system-reminder>"
+                        )
+                        + reminders_str,
+                    }
+                ],
+                "tool_call_id": tool_result.call_id,
+            }
+        case "assistant":
+            # Merge all items into a single assistant message
+            assistant_message = {
+                "role": "assistant",
+            }
+
+            for item in group:
+                match item:
+                    case AssistantMessageItem() as a:
+                        if a.content:
+                            if "content" not in assistant_message:
+                                assistant_message["content"] = a.content
+                            else:
+                                assistant_message["content"] += a.content
+                    case ToolCallItem() as t:
+                        if "tool_calls" not in assistant_message:
+                            assistant_message["tool_calls"] = []
+                        assistant_message["tool_calls"].append(
+                            {
+                                "id": t.call_id,
+                                "type": "function",
+                                "function": {
+                                    "name": t.name,
+                                    "arguments": t.arguments,
+                                },
+                            }
+                        )
+                    case ReasoningTextItem() | ReasoningEncryptedItem():
+                        continue  # Skip reasoning items in OpenAICompatible assistant message
+                    case _:
+                        pass
+
+            return assistant_message
+        case "other":
+            return None
+
+
 def convert_history_to_input(
     history: list[ConversationItem],
     system: str | None = None,
     model_name: str | None = None,
+    cache: ConvertedPrefix[chat.ChatCompletionMessageParam] | None = None,
 ) -> list[chat.ChatCompletionMessageParam]:
     """
     Convert a list of conversation items to a list of chat completion message params.
@@ -45,80 +111,16 @@ def convert_history_to_input(
         history: List of conversation items.
         system: System message.
         model_name: Model name. Used to verify that signatures are valid for the same model.
+        cache: Per-session cache of the converted history prefix, only new items are converted
     """
-    messages: list[chat.ChatCompletionMessageParam] = (
-        [
-            {
-                "role": "system",
-                "content": system,
-            }
-        ]
-        if system
-        else []
+    messages = convert_groups_incrementally(
+        history,
+        lambda group_kind, group: _convert_group(group_kind, group),
+        cache,
+        key=model_name,
     )
-
-    for group_kind, group in group_response_items_gen(history):
-        match group_kind:
-            case "user":
-                messages.append({"role": "user", "content": build_user_content_parts(group)})
-            case "tool":
-                if len(group) == 0 or not isinstance(group[0], ToolResultItem):
-                    continue
-                tool_result = group[0]
-                reminders: list[DeveloperMessageItem] = [i for i in group if isinstance(i, DeveloperMessageItem)]
-                reminders_str = "\n" + "\n".join(i.content for i in reminders if i.content)
-                messages.append(
-                    {
-                        "role": "tool",
-                        "content": [
-                            {
-                                "type": "text",
-                                "text": (
-                                    tool_result.output
-                                    or "<system-reminder>Tool ran without output or errors</system-reminder>"
-                                )
-                                + reminders_str,
-                            }
-                        ],
-                        "tool_call_id": tool_result.call_id,
-                    }
-                )
-            case "assistant":
-                # Merge all items into a single assistant message
-                assistant_message = {
-                    "role": "assistant",
-                }
-
-                for item in group:
-                    match item:
-                        case AssistantMessageItem() as a:
-                            if a.content:
-                                if "content" not in assistant_message:
-                                    assistant_message["content"] = a.content
-                                else:
-                                    assistant_message["content"] += a.content
-                        case ToolCallItem() as t:
-                            if "tool_calls" not in assistant_message:
-                                assistant_message["tool_calls"] = []
-                            assistant_message["tool_calls"].append(
-                                {
-                                    "id": t.call_id,
-                                    "type": "function",
-                                    "function": {
-                                        "name": t.name,
-                                        "arguments": t.arguments,
-                                    },
-                                }
-                            )
-                        case ReasoningTextItem() | ReasoningEncryptedItem():
-                            continue  # Skip reasoning items in OpenAICompatible assistant message
-                        case _:
-                            pass
-
-                messages.append(assistant_message)
-            case "other":
-                pass
-
+    if system:
+        messages.insert(0, {"role": "system", "content": system})
     return messages
 
 
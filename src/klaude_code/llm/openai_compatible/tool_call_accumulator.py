@@ -1,26 +1,52 @@
+import json
 from abc import ABC, abstractmethod
+from typing import override
 
 from openai.types.chat.chat_completion_chunk import ChoiceDeltaToolCall
-from pydantic import BaseModel, Field
 
+from klaude_code.llm.partial_json import PartialJSONFields
 from klaude_code.protocol import model
 
 
 class ToolCallAccumulatorABC(ABC):
     @abstractmethod
-    def add(self, chunks: list[ChoiceDeltaToolCall]):
-        pass
+    def add(self, chunks: list[ChoiceDeltaToolCall]) -> list[model.ToolCallStartItem | model.ToolCallItem]:
+        """Add the tool-call chunks of one stream event, return the items they completed."""
 
     @abstractmethod
-    def get(self) -> list[model.ToolCallItem]:
-        pass
+    def flush(self) -> list[model.ToolCallItem]:
+        """Complete and return the tool calls not returned yet, e.g. at the end of the stream."""
 
 
-class BasicToolCallAccumulator(ToolCallAccumulatorABC, BaseModel):
+class _ToolCallBuilder:
+    __slots__ = ("index", "call_id", "name", "fragments", "partial", "started")
+
+    def __init__(self, index: int, call_id: str | None):
+        self.index = index
+        self.call_id = call_id
+        self.name = ""
+        self.fragments: list[str] = []
+        self.partial = PartialJSONFields()
+        self.started = False
+
+    def build(self, response_id: str | None) -> model.ToolCallItem:
+        return model.ToolCallItem(
+            id=self.call_id,
+            name=self.name,
+            arguments="".join(self.fragments),
+            call_id=self.call_id or "",
+            response_id=response_id,
+        )
+
+
+class BasicToolCallAccumulator(ToolCallAccumulatorABC):
     """
-    Support for API:
-    - returns multiple tool calls within a single response in a serial manner.
-    - Each step contains exactly one chunk.
+    Builds the tool calls of a response as their chunks stream in, one builder per index.
+
+    Supports APIs that return multiple tool calls within a single response in a serial manner,
+    so a call is complete, and returned by `add`, as soon as a chunk of the next index arrives.
+    The arguments of a call are kept as a list of fragments and joined once, and its top-level
+    string arguments are reported by a `ToolCallStartItem` as soon as the first one is complete.
 
     e.g.:
     Claude, GPT series
@@ -47,34 +73,42 @@ class BasicToolCallAccumulator(ToolCallAccumulatorABC, BaseModel):
     [ChoiceDeltaToolCall(index=1, id='call_88931225', function=ChoiceDeltaToolCallFunction(arguments='{"command":"ls"}', name='Bash'), type='function')]
     """
 
-    chunks_by_step: list[list[ChoiceDeltaToolCall]] = Field(default_factory=list)  # pyright: ignore[reportUnknownVariableType]
-    response_id: str | None = None
-
-    def add(self, chunks: list[ChoiceDeltaToolCall]):
-        self.chunks_by_step.append(chunks)
+    def __init__(self, response_id: str | None = None):
+        self.response_id = response_id
+        self._current: _ToolCallBuilder | None = None
 
-    def get(self) -> list[model.ToolCallItem]:
-        result: list[model.ToolCallItem] = []
-        current_index = -1
-        for current_step in self.chunks_by_step:
-            if len(current_step) == 0:
+    @override
+    def add(self, chunks: list[ChoiceDeltaToolCall]) -> list[model.ToolCallStartItem | model.ToolCallItem]:
+        items: list[model.ToolCallStartItem | model.ToolCallItem] = []
+        for chunk in chunks:
+            builder = self._current
+            if builder is None or chunk.index != builder.index:
+                if builder is not None:
+                    items.append(builder.build(self.response_id))
+                builder = self._current = _ToolCallBuilder(chunk.index, chunk.id)
+            if chunk.function is None:
                 continue
-            first_chunk = current_step[0]
-            if first_chunk.index != current_index:
-                current_index = first_chunk.index
-                result.append(
-                    model.ToolCallItem(
-                        id=first_chunk.id,
-                        name="",
-                        arguments="",
-                        call_id=first_chunk.id or "",
-                        response_id=self.response_id,
+            if chunk.function.name:
+                builder.name = chunk.function.name
+            if chunk.function.arguments:
+                builder.fragments.append(chunk.function.arguments)
+                # Only parsed until the first field is known, that is all the preview shows
+                if not builder.started and builder.partial.feed(chunk.function.arguments):
+                    builder.started = True
+                    items.append(
+                        model.ToolCallStartItem(
+                            response_id=self.response_id,
+                            call_id=builder.call_id or "",
+                            name=builder.name,
+                            arguments=json.dumps(builder.partial.fields, ensure_ascii=False),
+                        )
                     )
-                )
-            if first_chunk.function is None:
-                continue
-            if first_chunk.function.name:
-                result[-1].name = first_chunk.function.name
-            if first_chunk.function.arguments:
-                result[-1].arguments += first_chunk.function.arguments
-        return result
+        return items
+
+    @override
+    def flush(self) -> list[model.ToolCallItem]:
+        if self._current is None:
+            return []
+        item = self._current.build(self.response_id)
+        self._current = None
+        return [item]
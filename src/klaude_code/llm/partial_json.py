@@ -0,0 +1,118 @@
+"""
+Incremental extraction of fields from streamed tool-call arguments.
+
+Tool-call arguments arrive as fragments of a JSON object. `PartialJSONFields` scans each fragment
+once and makes a top-level string field (e.g. `file_path` or `command`) available as soon as its
+closing quote arrives, long before the arguments of e.g. a large `apply_patch` call are complete.
+Nested values and other scalars are skipped, string contents are skipped with a regex search
+rather than character by character.
+"""
+
+import json
+import re
+
+# Longer strings (file contents, patches) are not worth keeping for a preview
+MAX_FIELD_CHARS = 4096
+
+_STRING_SPECIAL = re.compile(r'["\\]')
+_WHITESPACE = " \t\r\n"
+
+
+class PartialJSONFields:
+    """Top-level string fields of a JSON object fed in fragments."""
+
+    __slots__ = ("fields", "_depth", "_in_string", "_escape", "_capture", "_raw", "_raw_chars", "_key", "_in_value")
+
+    def __init__(self) -> None:
+        self.fields: dict[str, str] = {}
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        # Whether the current string is a top-level key or value, kept in `_raw` undecoded
+        self._capture = False
+        self._raw: list[str] = []
+        self._raw_chars = 0
+        self._key: str | None = None
+        # After the colon of a top-level field
+        self._in_value = False
+
+    def feed(self, fragment: str) -> list[str]:
+        """Scan the next fragment, return the names of the fields it completed."""
+        completed: list[str] = []
+        i, n = 0, len(fragment)
+        while i < n:
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                    self._keep(fragment[i])
+                    i += 1
+                    continue
+                match = _STRING_SPECIAL.search(fragment, i)
+                if match is None:
+                    self._keep(fragment[i:])
+                    break
+                j = match.start()
+                self._keep(fragment[i:j])
+                if fragment[j] == "\\":
+                    self._keep("\\")
+                    self._escape = True
+                else:
+                    self._in_string = False
+                    name = self._end_string()
+                    if name is not None:
+                        completed.append(name)
+                i = j + 1
+                continue
+
+            char = fragment[i]
+            if char == '"':
+                self._in_string = True
+                self._capture = self._depth == 1 and (not self._in_value or self._key is not None)
+                self._raw.clear()
+                self._raw_chars = 0
+            elif char in "{[":
+                self._depth += 1
+                if self._depth == 2:
+                    # A nested value is skipped
+                    self._key, self._in_value = None, False
+            elif char in "}]":
+                self._depth -= 1
+            elif self._depth == 1 and char == ":":
+                self._in_value = True
+            elif self._depth == 1 and char == ",":
+                self._key, self._in_value = None, False
+            elif self._depth == 1 and self._in_value and char not in _WHITESPACE:
+                # A number, boolean or null value is skipped
+                self._key, self._in_value = None, False
+            i += 1
+        return completed
+
+    def _keep(self, text: str) -> None:
+        if not self._capture:
+            return
+        self._raw_chars += len(text)
+        if self._raw_chars > MAX_FIELD_CHARS:
+            self._capture = False
+            self._raw.clear()
+            if self._in_value:
+                self._key = None
+            return
+        self._raw.append(text)
+
+    def _end_string(self) -> str | None:
+        if not self._capture:
+            return None
+        self._capture = False
+        try:
+            value: str = json.loads(f'"{"".join(self._raw)}"')
+        except json.JSONDecodeError:
+            value = "".join(self._raw)
+        self._raw.clear()
+        if not self._in_value:
+            self._key = value
+            return None
+        key, self._key, self._in_value = self._key, None, False
+        if key is None:
+            return None
+        self.fields[key] = value
+        return key
@@ -0,0 +1,120 @@
+"""
+Prompt-cache instrumentation: hash the serialized request prefix block by block and find where
+it diverged from the previous request of the same session.
+
+Providers only reuse a cached prefix up to the first changed byte, so the first differing block
+explains a drop of `cached_tokens`.
+"""
+
+import hashlib
+import json
+from collections import OrderedDict
+from collections.abc import Sequence
+from dataclasses import dataclass
+from typing import Any
+
+from klaude_code.protocol.model import PrefixCacheAnalysis
+
+DEFAULT_MAX_ANALYZED_SESSIONS = 32
+
+_REMINDER_MARKER = "<system-reminder>"
+_IMAGE_MARKERS = ('"image"', '"image_url"', '"input_image"')
+_REASONING_MARKERS = ('"thinking"', '"reasoning"', '"reasoning_details"', '"reasoning.encrypted"')
+
+
+@dataclass(frozen=True)
+class _Block:
+    label: str
+    digest: str
+    has_reminder: bool
+    has_image: bool
+    has_reasoning: bool
+
+
+def _block(label: str, payload: Any) -> _Block:
+    serialized = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+    return _Block(
+        label=label,
+        digest=hashlib.sha256(serialized.encode()).hexdigest(),
+        has_reminder=_REMINDER_MARKER in serialized,
+        has_image=any(marker in serialized for marker in _IMAGE_MARKERS),
+        has_reasoning=any(marker in serialized for marker in _REASONING_MARKERS),
+    )
+
+
+def _message_cause(previous: _Block, current: _Block, previous_count: int, current_count: int) -> str:
+    if previous.has_reasoning and not current.has_reasoning:
+        return "reasoning drop"
+    if previous.has_reminder or current.has_reminder:
+        return "reminder"
+    if previous.has_image or current.has_image:
+        return "image"
+    if current_count < previous_count:
+        return "history rewrite"
+    return "changed message"
+
+
+@dataclass
+class _Request:
+    model_name: str
+    blocks: list[_Block]
+    message_count: int
+
+
+class PrefixHashAnalyzer:
+    """Compares each request with the previous request of its session.
+
+    Payloads must be hashed before cache breakpoints are placed, the markers move every request.
+    """
+
+    def __init__(self, max_sessions: int = DEFAULT_MAX_ANALYZED_SESSIONS):
+        self._max_sessions = max_sessions
+        self._previous: OrderedDict[str | None, _Request] = OrderedDict()
+
+    def analyze(
+        self,
+        session_id: str | None,
+        model_name: str,
+        system: Any,
+        tools: Any,
+        messages: Sequence[Any],
+    ) -> PrefixCacheAnalysis:
+        blocks = [_block("system", system), _block("tools", tools)]
+        blocks.extend(_block(f"message {index}", message) for index, message in enumerate(messages))
+        current = _Request(model_name=model_name, blocks=blocks, message_count=len(messages))
+
+        previous = self._previous.pop(session_id, None)
+        self._previous[session_id] = current
+        if len(self._previous) > self._max_sessions:
+            self._previous.popitem(last=False)
+
+        analysis = PrefixCacheAnalysis(model_name=model_name, block_count=len(blocks))
+        if previous is None:
+            analysis.cause = "first request"
+            return analysis
+        if previous.model_name != model_name:
+            analysis.break_at = blocks[0].label
+            analysis.cause = "model switch"
+            return analysis
+
+        shared = 0
+        for previous_block, block in zip(previous.blocks, blocks):
+            if previous_block.digest != block.digest:
+                break
+            shared += 1
+        analysis.shared_blocks = shared
+        if shared == len(previous.blocks) or shared == len(blocks):
+            # One request is a prefix of the other, nothing was invalidated
+            return analysis
+
+        analysis.break_at = blocks[shared].label
+        match blocks[shared].label:
+            case "system":
+                analysis.cause = "system prompt"
+            case "tools":
+                analysis.cause = "tools"
+            case _:
+                analysis.cause = _message_cause(
+                    previous.blocks[shared], blocks[shared], previous.message_count, current.message_count
+                )
+        return analysis
@@ -1,15 +1,24 @@
 import json
-import time
 from collections.abc import AsyncGenerator
 from typing import override
 
 import httpx
-from openai import AsyncAzureOpenAI, AsyncOpenAI, RateLimitError
+import openai
+from openai import AsyncAzureOpenAI, AsyncOpenAI, AsyncStream, NotFoundError
 from openai.types import responses
 
 from klaude_code.llm.client import LLMClientABC
+from klaude_code.llm.input_cache import SessionInputCaches
 from klaude_code.llm.registry import register
-from klaude_code.llm.responses.input import convert_history_to_input, convert_tool_schema
+from klaude_code.llm.responses.input import (
+    ResponseChain,
+    ResponsesInputCache,
+    convert_history_to_input,
+    convert_tool_schema,
+)
+from klaude_code.llm.retry import stream_error_item
+from klaude_code.llm.streaming import DeltaCoalescer, StreamTimer
+from klaude_code.llm.transport import get_http_client
 from klaude_code.protocol.llm_parameter import (
     LLMCallParameter,
     LLMClientProtocol,
@@ -43,31 +52,37 @@ class ResponsesClient(LLMClientABC):
                 azure_endpoint=str(config.base_url),
                 api_version=config.azure_api_version,
                 timeout=httpx.Timeout(300.0, connect=15.0, read=285.0),
+                max_retries=0,
+                http_client=get_http_client(),
             )
         else:
             client = AsyncOpenAI(
                 api_key=config.api_key,
                 base_url=config.base_url,
                 timeout=httpx.Timeout(300.0, connect=15.0, read=285.0),
+                max_retries=0,
+                http_client=get_http_client(),
             )
         self.client: AsyncAzureOpenAI | AsyncOpenAI = client
+        self._input_caches: SessionInputCaches[ResponsesInputCache] = SessionInputCaches(ResponsesInputCache)
 
     @classmethod
     @override
     def create(cls, config: LLMConfigParameter) -> "LLMClientABC":
         return cls(config)
 
+    @property
     @override
-    async def call(self, param: LLMCallParameter) -> AsyncGenerator[ConversationItem, None]:
-        param = apply_config_defaults(param, self.get_llm_config())
-
-        request_start_time = time.time()
-        first_token_time: float | None = None
-        last_token_time: float | None = None
-        response_id: str | None = None
-
-        inputs = convert_history_to_input(param.input, param.model)
+    def endpoints(self) -> list[str]:
+        return [str(self.client.base_url)]
 
+    async def _create_stream(
+        self,
+        param: LLMCallParameter,
+        inputs: responses.ResponseInputParam,
+        store: bool,
+        previous_response_id: str | None,
+    ) -> AsyncStream[responses.ResponseStreamEvent]:
         parallel_tool_calls = True
 
         if self.is_debug_mode():
@@ -78,8 +93,8 @@ class ResponsesClient(LLMClientABC):
                 "include": [
                     "reasoning.encrypted_content",
                 ],
-                "store": param.store,
-                "previous_response_id": param.previous_response_id,
+                "store": store,
+                "previous_response_id": previous_response_id,
                 "stream": True,
                 "temperature": param.temperature,
                 "max_output_tokens": param.max_tokens,
@@ -101,15 +116,15 @@ class ResponsesClient(LLMClientABC):
 
             log_debug("➡️ llm [Complete Payload]", json.dumps(payload, ensure_ascii=False), style="yellow")
 
-        stream = self.client.responses.create(
+        return await self.client.responses.create(
             model=str(param.model),
             tool_choice="auto",
             parallel_tool_calls=parallel_tool_calls,  # OpenAI's Codex is always False, we try to enable it here. It seems gpt-5-codex has bugs when parallel_tool_calls is True.
             include=[
                 "reasoning.encrypted_content",
             ],
-            store=param.store,
-            previous_response_id=param.previous_response_id,
+            store=store,
+            previous_response_id=previous_response_id,
             stream=True,
             temperature=param.temperature,
             max_output_tokens=param.max_tokens,
@@ -128,9 +143,62 @@ class ResponsesClient(LLMClientABC):
             extra_headers={"extra": json.dumps({"session_id": param.session_id})},
         )
 
+    async def _send_with_fallback(
+        self,
+        param: LLMCallParameter,
+        inputs: responses.ResponseInputParam,
+        store: bool,
+        previous_response_id: str | None,
+        cache: ResponsesInputCache | None,
+    ) -> AsyncStream[responses.ResponseStreamEvent]:
         try:
-            async for event in await stream:
-                if self.is_debug_mode():
+            return await self.send(lambda: self._create_stream(param, inputs, store, previous_response_id))
+        except NotFoundError:
+            if previous_response_id is None:
+                raise
+            # The stored response expired or was deleted, resend the full history
+            if self.is_debug_mode():
+                log_debug("📥 stream [Previous Response Not Found]", previous_response_id, style="red")
+            full_inputs = convert_history_to_input(param.input, param.model, cache)
+            return await self.send(lambda: self._create_stream(param, full_inputs, store, None))
+
+    @override
+    async def call(self, param: LLMCallParameter) -> AsyncGenerator[ConversationItem, None]:
+        param = apply_config_defaults(param, self.get_llm_config())
+
+        timer = StreamTimer()
+        coalescer = DeltaCoalescer()
+        response_id: str | None = None
+
+        cache = self._input_caches.get(param.session_id)
+        # Chain onto the previous stored response and only send what was appended since
+        chaining = cache is not None and self.get_llm_config().use_previous_response_id
+        store = True if chaining else param.store
+        previous_response_id: str | None = None
+        inputs: responses.ResponseInputParam | None = None
+        if chaining and cache is not None and cache.chain is not None:
+            new_items = cache.chain.new_items(param.input, param.previous_response_id, param.model)
+            if new_items is not None:
+                previous_response_id = cache.chain.response_id
+                inputs = convert_history_to_input(new_items, param.model)
+        if inputs is None:
+            inputs = convert_history_to_input(param.input, param.model, cache)
+        cache_analysis = None
+        if self.prefix_analyzer is not None:
+            # Analyze the full history, a delta request is served from the stored chain
+            full_inputs = inputs
+            if previous_response_id is not None:
+                full_inputs = convert_history_to_input(param.input, param.model, cache)
+            cache_analysis = self.analyze_prefix(param, param.system, convert_tool_schema(param.tools), full_inputs)
+        if cache is not None:
+            # Only a response that completes can be chained onto
+            cache.chain = None
+
+        debug = self.is_debug_mode()
+        try:
+            stream = await self._send_with_fallback(param, inputs, store, previous_response_id, cache)
+            async for event in stream:
+                if debug:
                     log_debug(f"📥 stream [SSE {event.type}]", str(event), style="blue")
                 match event:
                     case responses.ResponseCreatedEvent() as event:
@@ -143,11 +211,17 @@ class ResponsesClient(LLMClientABC):
                                 response_id=response_id,
                             )
                     case responses.ResponseTextDeltaEvent() as event:
-                        if first_token_time is None:
-                            first_token_time = time.time()
-                        last_token_time = time.time()
-                        yield AssistantMessageDelta(content=event.delta, response_id=response_id)
+                        if (chunk := coalescer.add(event.delta, timer.mark())) is not None:
+                            yield AssistantMessageDelta(content=chunk, response_id=response_id)
+                    case (
+                        responses.ResponseReasoningSummaryTextDeltaEvent()
+                        | responses.ResponseFunctionCallArgumentsDeltaEvent()
+                    ):
+                        # Shown once done, but they are output tokens
+                        timer.mark()
                     case responses.ResponseOutputItemDoneEvent() as event:
+                        if (chunk := coalescer.flush()) is not None:
+                            yield AssistantMessageDelta(content=chunk, response_id=response_id)
                         match event.item:
                             case responses.ResponseReasoningItem() as item:
                                 if item.encrypted_content:
@@ -170,9 +244,7 @@ class ResponsesClient(LLMClientABC):
                                     response_id=response_id,
                                 )
                             case responses.ResponseFunctionToolCall() as item:
-                                if first_token_time is None:
-                                    first_token_time = time.time()
-                                last_token_time = time.time()
+                                timer.mark()
                                 yield ToolCallItem(
                                     name=item.name,
                                     arguments=item.arguments.strip(),
@@ -193,21 +265,6 @@ class ResponsesClient(LLMClientABC):
                                 (total_tokens / param.context_limit) * 100 if param.context_limit else None
                             )
 
-                            throughput_tps: float | None = None
-                            first_token_latency_ms: float | None = None
-
-                            if first_token_time is not None:
-                                first_token_latency_ms = (first_token_time - request_start_time) * 1000
-
-                            if (
-                                first_token_time is not None
-                                and last_token_time is not None
-                                and event.response.usage.output_tokens > 0
-                            ):
-                                time_duration = last_token_time - first_token_time
-                                if time_duration >= 0.15:
-                                    throughput_tps = event.response.usage.output_tokens / time_duration
-
                             usage = Usage(
                                 input_tokens=event.response.usage.input_tokens,
                                 cached_tokens=event.response.usage.input_tokens_details.cached_tokens,
@@ -215,8 +272,8 @@ class ResponsesClient(LLMClientABC):
                                 output_tokens=event.response.usage.output_tokens,
                                 total_tokens=total_tokens,
                                 context_usage_percent=context_usage_percent,
-                                throughput_tps=throughput_tps,
-                                first_token_latency_ms=first_token_latency_ms,
+                                throughput_tps=timer.throughput_tps(event.response.usage.output_tokens),
+                                first_token_latency_ms=timer.first_token_latency_ms,
                             )
                         yield ResponseMetadataItem(
                             usage=usage,
@@ -224,16 +281,26 @@ class ResponsesClient(LLMClientABC):
                             model_name=str(param.model),
                             status=event.response.status,
                             error_reason=error_reason,
+                            cache_analysis=cache_analysis,
                         )
+                        if chaining and cache is not None and event.response.status == "completed":
+                            cache.chain = ResponseChain(
+                                response_id=event.response.id,
+                                model=param.model,
+                                input_end=len(param.input),
+                                last_input=param.input[-1] if param.input else None,
+                            )
                         if event.response.status != "completed":
                             error_message = f"LLM response finished with status '{event.response.status}'"
                             if error_reason:
                                 error_message = f"{error_message}: {error_reason}"
-                            if self.is_debug_mode():
+                            if debug:
                                 log_debug("📥 stream [LLM Status Warning]", error_message, style="red")
                             yield StreamErrorItem(error=error_message)
                     case _:
-                        if self.is_debug_mode():
+                        if debug:
                             log_debug("📥 stream [Unhandled Event]", str(event), style="red")
-        except RateLimitError as e:
-            yield StreamErrorItem(error=f"{e.__class__.__name__} {str(e)}")
+        except (openai.OpenAIError, httpx.HTTPError) as e:
+            if (chunk := coalescer.flush()) is not None:
+                yield AssistantMessageDelta(content=chunk, response_id=response_id)
+            yield stream_error_item(e)
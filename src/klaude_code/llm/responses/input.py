@@ -1,21 +1,32 @@
 # pyright: reportReturnType=false
 # pyright: reportArgumentType=false
 
+from dataclasses import dataclass, field
 from typing import Any
 
 from openai.types import responses
 
+from klaude_code.llm.input_cache import ConvertedPrefix
 from klaude_code.protocol.llm_parameter import ToolSchema
 from klaude_code.protocol.model import (
     AssistantMessageItem,
     ConversationItem,
     DeveloperMessageItem,
+    ImageURLPart,
     ReasoningEncryptedItem,
     ReasoningTextItem,
     ToolCallItem,
     ToolResultItem,
     UserMessageItem,
 )
+from klaude_code.session.blobs import missing_image_text, resolve_image_url
+
+
+def _image_part(image: ImageURLPart) -> responses.ResponseInputContentParam:
+    url = resolve_image_url(image.image_url.url)
+    if url is None:
+        return {"type": "input_text", "text": missing_image_text(image.image_url.url)}
+    return {"type": "input_image", "detail": "auto", "image_url": url}
 
 
 def _build_user_content_parts(user: UserMessageItem) -> list[responses.ResponseInputContentParam]:
@@ -23,7 +34,7 @@ def _build_user_content_parts(user: UserMessageItem) -> list[responses.ResponseI
     if user.content is not None:
         parts.append({"type": "input_text", "text": user.content})
     for image in user.images or []:
-        parts.append({"type": "input_image", "detail": "auto", "image_url": image.image_url.url})
+        parts.append(_image_part(image))
     if not parts:
         parts.append({"type": "input_text", "text": ""})
     return parts
@@ -35,7 +46,7 @@ def _build_tool_result_item(tool: ToolResultItem) -> responses.ResponseInputItem
     if text_output:
         content_parts.append({"type": "input_text", "text": text_output})
     for image in tool.images or []:
-        content_parts.append({"type": "input_image", "detail": "auto", "image_url": image.image_url.url})
+        content_parts.append(_image_part(image))
 
     item: dict[str, Any] = {
         "type": "function_call_output",
@@ -45,41 +56,126 @@ def _build_tool_result_item(tool: ToolResultItem) -> responses.ResponseInputItem
     return item  # type: ignore[return-value]
 
 
-def convert_history_to_input(
-    history: list[ConversationItem],
-    model_name: str | None = None,
-) -> responses.ResponseInputParam:
-    """
-    Convert a list of conversation items to a list of response input params.
+_RESPONSE_OUTPUT_ITEM_TYPES = (ReasoningTextItem, ReasoningEncryptedItem, AssistantMessageItem, ToolCallItem)
 
-    Args:
-        history: List of conversation items.
-        model_name: Model name. Used to verify that signatures are valid for the same model.
-    """
-    items: list[responses.ResponseInputItemParam] = []
-    last_user_index: int | None = None
-    # Preserve reasoning only from the most recent user turn to keep tool chains compact.
 
-    for idx in range(len(history) - 1, -1, -1):
-        if isinstance(history[idx], UserMessageItem):
-            last_user_index = idx
-            break
+@dataclass
+class ResponseChain:
+    """A response stored server-side, and the end of the history it was created from."""
+
+    response_id: str
+    model: str | None
+    input_end: int
+    last_input: ConversationItem | None
+
+    def new_items(
+        self, history: list[ConversationItem], previous_response_id: str | None, model_name: str | None
+    ) -> list[ConversationItem] | None:
+        """Items appended since this response, or None if `history` no longer continues it."""
+        if previous_response_id != self.response_id or model_name != self.model or len(history) < self.input_end:
+            return None
+        if self.input_end > 0 and history[self.input_end - 1] is not self.last_input:
+            return None
+        # The output of the response itself is already part of the stored chain
+        return [
+            item
+            for item in history[self.input_end :]
+            if not (isinstance(item, _RESPONSE_OUTPUT_ITEM_TYPES) and item.response_id == self.response_id)
+        ]
+
+
+@dataclass
+class ResponsesInputCache:
+    """Converted history before the last user message (reasoning dropped) and from it on."""
+
+    earlier: ConvertedPrefix[responses.ResponseInputItemParam] = field(default_factory=lambda: ConvertedPrefix())
+    recent: ConvertedPrefix[responses.ResponseInputItemParam] = field(default_factory=lambda: ConvertedPrefix())
+    # Last completed response of the session, only tracked when chaining with previous_response_id
+    chain: ResponseChain | None = None
+
+
+def _convert_message_item(item: ConversationItem) -> responses.ResponseInputItemParam | None:
+    match item:
+        case ToolCallItem() as t:
+            return {
+                "type": "function_call",
+                "name": t.name,
+                "arguments": t.arguments,
+                "call_id": t.call_id,
+                "id": t.id,
+            }
+        case ToolResultItem() as t:
+            return _build_tool_result_item(t)
+        case AssistantMessageItem() as a:
+            return {
+                "type": "message",
+                "role": "assistant",
+                "id": a.id,
+                "content": [
+                    {
+                        "type": "output_text",
+                        "text": a.content,
+                    }
+                ],
+            }
+        case UserMessageItem() as u:
+            return {
+                "type": "message",
+                "role": "user",
+                "id": u.id,
+                "content": _build_user_content_parts(u),
+            }
+        case DeveloperMessageItem() as d:
+            dev_parts: list[responses.ResponseInputContentParam] = []
+            if d.content is not None:
+                dev_parts.append({"type": "input_text", "text": d.content})
+            for image in d.images or []:
+                dev_parts.append(_image_part(image))
+            if not dev_parts:
+                dev_parts.append({"type": "input_text", "text": ""})
+            return {
+                "type": "message",
+                "role": "user",  # GPT-5 series do not support image in "developer" role, so we set it to "user"
+                "id": d.id,
+                "content": dev_parts,
+            }
+        case _:
+            # Other items may be Metadata
+            return None
 
+
+def _convert_range(
+    history: list[ConversationItem],
+    start: int,
+    end: int,
+    model_name: str | None,
+    keep_reasoning: bool,
+    cache: ConvertedPrefix[responses.ResponseInputItemParam] | None,
+) -> list[responses.ResponseInputItemParam]:
+    items: list[responses.ResponseInputItemParam] = []
     pending_reasoning_text: str | None = None
+    begin = start
+    if cache is not None:
+        begin = cache.reusable_end(history, model_name, start)
+        if begin > end:
+            cache.reset(model_name, start)
+            begin = start
+        items = list(cache.outputs)
+        pending_reasoning_text = cache.state
 
-    for index, item in enumerate(history):
+    for item in history[begin:end]:
         match item:
             case ReasoningTextItem() as item:
                 # For now, we only store the text. We wait for the encrypted item to output both.
                 # If no encrypted item follows (e.g. incomplete stream?), this text might be lost
                 # or we can choose to output it if the next item is NOT reasoning?
                 # For now, based on instructions, we pair them.
-                if last_user_index is None or index >= last_user_index:
+                if keep_reasoning:
                     pending_reasoning_text = item.content
 
             case ReasoningEncryptedItem() as item:
                 if (
-                    (last_user_index is None or index >= last_user_index)
+                    keep_reasoning
                     and item.encrypted_content
                     and len(item.encrypted_content) > 0
                     and model_name == item.model
@@ -87,65 +183,46 @@ def convert_history_to_input(
                     items.append(convert_reasoning_inputs(pending_reasoning_text, item))
                 # Reset pending text after consumption
                 pending_reasoning_text = None
-
-            case ToolCallItem() as t:
-                items.append(
-                    {
-                        "type": "function_call",
-                        "name": t.name,
-                        "arguments": t.arguments,
-                        "call_id": t.call_id,
-                        "id": t.id,
-                    }
-                )
-            case ToolResultItem() as t:
-                items.append(_build_tool_result_item(t))
-            case AssistantMessageItem() as a:
-                items.append(
-                    {
-                        "type": "message",
-                        "role": "assistant",
-                        "id": a.id,
-                        "content": [
-                            {
-                                "type": "output_text",
-                                "text": a.content,
-                            }
-                        ],
-                    }
-                )
-            case UserMessageItem() as u:
-                items.append(
-                    {
-                        "type": "message",
-                        "role": "user",
-                        "id": u.id,
-                        "content": _build_user_content_parts(u),
-                    }
-                )
-            case DeveloperMessageItem() as d:
-                dev_parts: list[responses.ResponseInputContentParam] = []
-                if d.content is not None:
-                    dev_parts.append({"type": "input_text", "text": d.content})
-                for image in d.images or []:
-                    dev_parts.append({"type": "input_image", "detail": "auto", "image_url": image.image_url.url})
-                if not dev_parts:
-                    dev_parts.append({"type": "input_text", "text": ""})
-                items.append(
-                    {
-                        "type": "message",
-                        "role": "user",  # GPT-5 series do not support image in "developer" role, so we set it to "user"
-                        "id": d.id,
-                        "content": dev_parts,
-                    }
-                )
             case _:
-                # Other items may be Metadata
-                continue
+                converted = _convert_message_item(item)
+                if converted is not None:
+                    items.append(converted)
 
+    if cache is not None:
+        cache.store(history, end, items, pending_reasoning_text)
     return items
 
 
+def convert_history_to_input(
+    history: list[ConversationItem],
+    model_name: str | None = None,
+    cache: ResponsesInputCache | None = None,
+) -> responses.ResponseInputParam:
+    """
+    Convert a list of conversation items to a list of response input params.
+
+    Args:
+        history: List of conversation items.
+        model_name: Model name. Used to verify that signatures are valid for the same model.
+        cache: Per-session cache of the converted history prefix, only new items are converted
+    """
+    last_user_index = 0
+    # Preserve reasoning only from the most recent user turn to keep tool chains compact.
+
+    for idx in range(len(history) - 1, -1, -1):
+        if isinstance(history[idx], UserMessageItem):
+            last_user_index = idx
+            break
+
+    earlier = _convert_range(
+        history, 0, last_user_index, model_name, False, cache.earlier if cache is not None else None
+    )
+    recent = _convert_range(
+        history, last_user_index, len(history), model_name, True, cache.recent if cache is not None else None
+    )
+    return earlier + recent
+
+
 def convert_reasoning_inputs(
     text_content: str | None, encrypted_item: ReasoningEncryptedItem
 ) -> responses.ResponseInputItemParam:
@@ -0,0 +1,278 @@
+"""
+Retry layer shared by all LLM clients.
+
+Errors are classified into `LLMErrorKind`. Rate-limit, overload and network errors are retried
+with full-jitter backoff, or after the delay the provider asked for in `Retry-After` /
+`anthropic-ratelimit-*-reset`. Context overflow and other client errors are not retried, a second
+identical request would fail the same way.
+
+Retries are paid from a `RetryBudget` shared by every client of a provider, so the main agent and
+concurrently running sub agents back off together: a 429 puts the whole provider in cooldown
+instead of every agent retrying on its own schedule.
+"""
+
+import asyncio
+import random
+import time
+from collections.abc import Awaitable, Callable, Mapping
+from dataclasses import dataclass
+from datetime import datetime
+from email.utils import parsedate_to_datetime
+from typing import Any, TypeVar
+
+import anthropic
+import httpx
+import openai
+
+from klaude_code.protocol.model import LLMErrorKind, StreamErrorItem
+
+RETRYABLE_KINDS: frozenset[LLMErrorKind] = frozenset({"rate_limit", "overloaded", "network"})
+
+# Retry-After values beyond this are not worth waiting for in an interactive session
+MAX_RETRY_AFTER_S = 120.0
+
+_CONTEXT_OVERFLOW_MARKERS = (
+    "context_length_exceeded",
+    "prompt is too long",
+    "maximum context length",
+    "context window",
+    "too many tokens",
+    "input is too long",
+)
+_OVERLOADED_MARKERS = ("overloaded",)
+_FATAL_RATE_LIMIT_MARKERS = ("insufficient_quota",)
+_RATE_LIMIT_HEADER_PREFIX = "anthropic-ratelimit-"
+
+T = TypeVar("T")
+
+
+@dataclass(frozen=True)
+class ClassifiedError:
+    kind: LLMErrorKind
+    # Delay requested by the provider, if any
+    retry_after_s: float | None = None
+
+    @property
+    def retryable(self) -> bool:
+        return self.kind in RETRYABLE_KINDS
+
+
+def _parse_retry_after(value: str, now: float) -> float | None:
+    """Parse a Retry-After value, either seconds or an HTTP date."""
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - now)
+    except (TypeError, ValueError):
+        return None
+
+
+def _parse_reset(value: str, now: float) -> float | None:
+    """Parse an `anthropic-ratelimit-*-reset` RFC 3339 timestamp into seconds from now."""
+    try:
+        return max(0.0, datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp() - now)
+    except ValueError:
+        return None
+
+
+def retry_after_from_headers(headers: Mapping[str, str], now: float | None = None) -> float | None:
+    """Seconds the provider asked to wait before the next request, or None.
+
+    `retry-after-ms` and `retry-after` win; otherwise the latest reset among the exhausted
+    `anthropic-ratelimit-*` limits is used.
+    """
+    now = time.time() if now is None else now
+    lowered = {key.lower(): value for key, value in headers.items()}
+    if "retry-after-ms" in lowered:
+        try:
+            return max(0.0, float(lowered["retry-after-ms"]) / 1000)
+        except ValueError:
+            pass
+    if "retry-after" in lowered:
+        delay = _parse_retry_after(lowered["retry-after"], now)
+        if delay is not None:
+            return delay
+
+    delays: list[float] = []
+    for key, value in lowered.items():
+        if not (key.startswith(_RATE_LIMIT_HEADER_PREFIX) and key.endswith("-remaining")):
+            continue
+        if value.strip() != "0":
+            continue
+        reset = lowered.get(key.removesuffix("-remaining") + "-reset")
+        delay = _parse_reset(reset, now) if reset is not None else None
+        if delay is not None:
+            delays.append(delay)
+    return max(delays) if delays else None
+
+
+def _status_code(error: BaseException) -> int | None:
+    if isinstance(error, (anthropic.APIStatusError, openai.APIStatusError)):
+        return error.status_code
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code
+    return None
+
+
+def _headers(error: BaseException) -> Mapping[str, str]:
+    response: httpx.Response | None = getattr(error, "response", None)
+    if isinstance(response, httpx.Response):
+        return response.headers
+    return {}
+
+
+def classify_error(error: BaseException) -> ClassifiedError:
+    """Classify an exception raised by an LLM SDK or httpx."""
+    if isinstance(
+        error,
+        (anthropic.APIConnectionError, openai.APIConnectionError, httpx.TransportError, asyncio.TimeoutError),
+    ):
+        return ClassifiedError("network")
+
+    message = str(error).lower()
+    body: Any = getattr(error, "body", None)
+    if body is not None:
+        message = f"{message} {str(body).lower()}"
+    status = _status_code(error)
+    retry_after = retry_after_from_headers(_headers(error))
+
+    if any(marker in message for marker in _CONTEXT_OVERFLOW_MARKERS) and status in (None, 400, 413):
+        return ClassifiedError("context_overflow")
+    if status == 429:
+        if any(marker in message for marker in _FATAL_RATE_LIMIT_MARKERS):
+            # Quota exhausted, waiting does not help
+            return ClassifiedError("fatal")
+        return ClassifiedError("rate_limit", retry_after)
+    if status in (503, 529) or any(marker in message for marker in _OVERLOADED_MARKERS):
+        return ClassifiedError("overloaded", retry_after)
+    if status in (408, 409) or (status is not None and status >= 500):
+        return ClassifiedError("network", retry_after)
+    if status is None and isinstance(error, (anthropic.APIError, openai.APIError)):
+        # Error event in the middle of a stream, e.g. Anthropic `api_error`
+        return ClassifiedError("network")
+    return ClassifiedError("fatal")
+
+
+def stream_error_item(error: BaseException) -> StreamErrorItem:
+    classified = classify_error(error)
+    return StreamErrorItem(
+        error=f"{error.__class__.__name__} {str(error)}",
+        kind=classified.kind,
+        retry_after_s=classified.retry_after_s,
+    )
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    max_attempts: int = 4
+    initial_delay_s: float = 1.0
+    max_delay_s: float = 30.0
+
+    def delay(self, attempt: int, retry_after_s: float | None = None) -> float:
+        """Delay before retry number `attempt` (1-based).
+
+        Full jitter: a uniform draw below the exponential cap, so clients that failed together
+        do not retry together. A provider-requested delay is honored with a small jitter on top.
+        """
+        if retry_after_s is not None:
+            retry_after_s = min(retry_after_s, MAX_RETRY_AFTER_S)
+            return retry_after_s + random.uniform(0, min(self.initial_delay_s, retry_after_s / 10 + 0.1))
+        cap = min(self.max_delay_s, self.initial_delay_s * (2 ** (max(1, attempt) - 1)))
+        return random.uniform(0, cap)
+
+
+DEFAULT_RETRY_POLICY = RetryPolicy()
+
+
+class RetryBudget:
+    """Retry tokens and rate-limit cooldown shared by every client of one provider.
+
+    Each retry costs a token and each successful request refunds a fraction of one, so retries
+    stop once most requests to the provider are failing and resume as it recovers.
+    """
+
+    def __init__(self, capacity: float = 20.0, retry_cost: float = 1.0, success_refund: float = 0.1):
+        self.capacity = capacity
+        self.retry_cost = retry_cost
+        self.success_refund = success_refund
+        self.tokens = capacity
+        self._cooldown_until = 0.0
+
+    def try_spend(self) -> bool:
+        if self.tokens < self.retry_cost:
+            return False
+        self.tokens -= self.retry_cost
+        return True
+
+    @property
+    def exhausted(self) -> bool:
+        """Whether a failed request can no longer be retried."""
+        return self.tokens < self.retry_cost
+
+    def record_success(self) -> None:
+        self.tokens = min(self.capacity, self.tokens + self.success_refund)
+
+    def cooldown(self, seconds: float) -> None:
+        """Hold back every request to the provider for `seconds`."""
+        self._cooldown_until = max(self._cooldown_until, time.monotonic() + min(seconds, MAX_RETRY_AFTER_S))
+
+    def cooldown_remaining(self) -> float:
+        return max(0.0, self._cooldown_until - time.monotonic())
+
+    async def wait_ready(self) -> None:
+        remaining = self.cooldown_remaining()
+        if remaining > 0:
+            # Spread the requests that waited on the same cooldown
+            await asyncio.sleep(remaining + random.uniform(0, min(1.0, remaining / 10 + 0.1)))
+
+
+_budgets: dict[str, RetryBudget] = {}
+
+
+def get_retry_budget(provider_key: str) -> RetryBudget:
+    """The process-wide budget of a provider, see `SubAgentScheduler.provider_key`."""
+    budget = _budgets.get(provider_key)
+    if budget is None:
+        budget = _budgets[provider_key] = RetryBudget()
+    return budget
+
+
+async def send_with_retry(
+    send: Callable[[], Awaitable[T]],
+    budget: RetryBudget,
+    policy: RetryPolicy = DEFAULT_RETRY_POLICY,
+    on_retry: Callable[[int, ClassifiedError, float, BaseException], None] | None = None,
+) -> T:
+    """Send a request, retrying retryable errors raised before the response starts streaming.
+
+    Errors in the middle of a stream are not retried here: items were already yielded, the
+    agent retries the whole turn.
+    """
+    attempt = 0
+    while True:
+        await budget.wait_ready()
+        try:
+            result = await send()
+        except Exception as e:
+            classified = classify_error(e)
+            attempt += 1
+            if classified.kind in ("rate_limit", "overloaded"):
+                budget.cooldown(classified.retry_after_s or policy.delay(attempt))
+            if not classified.retryable or attempt >= policy.max_attempts or not budget.try_spend():
+                raise
+            delay = policy.delay(attempt, classified.retry_after_s)
+            if on_retry is not None:
+                on_retry(attempt, classified, delay, e)
+            await asyncio.sleep(delay)
+            continue
+
+        budget.record_success()
+        response: httpx.Response | None = getattr(result, "response", None)
+        if isinstance(response, httpx.Response):
+            # Exhausted limits on a successful response: hold back the next requests up front
+            retry_after = retry_after_from_headers(response.headers)
+            if retry_after:
+                budget.cooldown(retry_after)
+        return result
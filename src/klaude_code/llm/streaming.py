@@ -0,0 +1,88 @@
+"""
+Per-delta bookkeeping shared by the streaming loops of the LLM clients.
+
+Providers send a delta for every token or two. Rather than yielding an `AssistantMessageDelta`,
+which the agent wraps into an event for the UI queue, for each of them, `DeltaCoalescer` merges
+the text deltas that arrive in a burst: a chunk is emitted once `COALESCE_INTERVAL_S` passed since
+the previous chunk or `COALESCE_MAX_CHARS` are pending. A delta after a quiet period is emitted at
+once, so the first delta is never held back and a slow stream passes through unchanged; text held
+back during a burst goes out with the next delta or with `flush()` at the end of the block.
+
+`StreamTimer` takes a single `time.monotonic()` reading per delta, which the coalescer reuses, and
+derives first-token latency and throughput from the raw deltas, not from the coalesced chunks.
+"""
+
+import time
+
+COALESCE_INTERVAL_S = 0.016
+COALESCE_MAX_CHARS = 256
+# Throughput over a shorter generation is mostly noise
+MIN_THROUGHPUT_DURATION_S = 0.15
+
+
+class StreamTimer:
+    """First and last token times of a request, started when created."""
+
+    __slots__ = ("request_start", "first_token", "last_token")
+
+    def __init__(self) -> None:
+        self.request_start = time.monotonic()
+        self.first_token: float | None = None
+        self.last_token: float | None = None
+
+    def mark(self) -> float:
+        """Record a token arriving now and return the time."""
+        now = time.monotonic()
+        if self.first_token is None:
+            self.first_token = now
+        self.last_token = now
+        return now
+
+    @property
+    def first_token_latency_ms(self) -> float | None:
+        if self.first_token is None:
+            return None
+        return (self.first_token - self.request_start) * 1000
+
+    def throughput_tps(self, output_tokens: int) -> float | None:
+        if self.first_token is None or self.last_token is None or output_tokens <= 0:
+            return None
+        duration = self.last_token - self.first_token
+        if duration < MIN_THROUGHPUT_DURATION_S:
+            return None
+        return output_tokens / duration
+
+
+class DeltaCoalescer:
+    """Merges the text deltas of one stream into time- and size-bounded chunks."""
+
+    __slots__ = ("max_interval_s", "max_chars", "_pending", "_pending_chars", "_last_emit")
+
+    def __init__(self, max_interval_s: float = COALESCE_INTERVAL_S, max_chars: int = COALESCE_MAX_CHARS):
+        self.max_interval_s = max_interval_s
+        self.max_chars = max_chars
+        self._pending: list[str] = []
+        self._pending_chars = 0
+        self._last_emit: float | None = None
+
+    def add(self, text: str, now: float) -> str | None:
+        """Queue `text` received at `now`, return the chunk to emit if one is due."""
+        self._pending.append(text)
+        self._pending_chars += len(text)
+        if (
+            self._last_emit is None
+            or now - self._last_emit >= self.max_interval_s
+            or self._pending_chars >= self.max_chars
+        ):
+            self._last_emit = now
+            return self.flush()
+        return None
+
+    def flush(self) -> str | None:
+        """Return the pending text, if any."""
+        if not self._pending:
+            return None
+        text = self._pending[0] if len(self._pending) == 1 else "".join(self._pending)
+        self._pending.clear()
+        self._pending_chars = 0
+        return text
@@ -0,0 +1,148 @@
+"""
+Process-wide HTTP transport shared by the LLM clients.
+
+Every SDK client is created with the `httpx.AsyncClient` of `get_http_client`, so all clients of
+an endpoint (main and sub-agent models, clients created by `/model`, failover chains) share one
+keep-alive pool per origin instead of opening their own. With the `h2` package installed,
+requests to an origin are multiplexed over HTTP/2 connections.
+
+`preconnect` opens the connections of the given endpoints ahead of the first request; the
+interactive CLI runs it in the background while the prompt waits for input, so the first turn
+does not pay for DNS, TCP and TLS setup.
+"""
+
+import asyncio
+import importlib.util
+import urllib.request
+from collections.abc import Iterable
+from dataclasses import dataclass
+
+import httpcore
+import httpx
+
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+# httpx closes idle connections after 5s by default, long before the user is done typing
+KEEPALIVE_EXPIRY_S = 90.0
+MAX_CONNECTIONS_PER_ORIGIN = 64
+PRECONNECT_TIMEOUT_S = 10.0
+
+
+@dataclass(frozen=True)
+class PoolStats:
+    origin: str
+    connections: int
+    idle: int
+    http2: int
+    requests: int
+
+
+def _origin(url: httpx.URL) -> str:
+    port = f":{url.port}" if url.port is not None else ""
+    return f"{url.scheme}://{url.host}{port}"
+
+
+def _proxy_for(url: httpx.URL) -> str | None:
+    # A custom transport opts out of httpx's own environment proxy support
+    if urllib.request.proxy_bypass(url.host):
+        return None
+    proxies = urllib.request.getproxies()
+    return proxies.get(url.scheme) or proxies.get("all")
+
+
+class _OriginPool:
+    def __init__(self, url: httpx.URL, loop: asyncio.AbstractEventLoop):
+        self.transport = httpx.AsyncHTTPTransport(
+            http2=HTTP2_AVAILABLE,
+            proxy=_proxy_for(url),
+            limits=httpx.Limits(
+                max_connections=MAX_CONNECTIONS_PER_ORIGIN,
+                max_keepalive_connections=MAX_CONNECTIONS_PER_ORIGIN,
+                keepalive_expiry=KEEPALIVE_EXPIRY_S,
+            ),
+        )
+        self.loop = loop
+        self.requests = 0
+
+    def connections(self) -> list[httpcore.AsyncConnectionInterface]:
+        return list(self.transport._pool.connections)  # pyright: ignore[reportPrivateUsage]
+
+
+class SharedTransport(httpx.AsyncBaseTransport):
+    """Routes each request to the keep-alive pool of its origin."""
+
+    def __init__(self) -> None:
+        self._pools: dict[str, _OriginPool] = {}
+
+    def _pool(self, url: httpx.URL) -> _OriginPool:
+        origin = _origin(url)
+        loop = asyncio.get_running_loop()
+        pool = self._pools.get(origin)
+        if pool is None or pool.loop is not loop:
+            # Connections belong to the event loop that opened them
+            pool = self._pools[origin] = _OriginPool(url, loop)
+        return pool
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        pool = self._pool(request.url)
+        pool.requests += 1
+        return await pool.transport.handle_async_request(request)
+
+    def has_idle_connection(self, url: httpx.URL) -> bool:
+        pool = self._pools.get(_origin(url))
+        if pool is None or pool.loop is not asyncio.get_running_loop():
+            return False
+        return any(connection.is_available() and not connection.has_expired() for connection in pool.connections())
+
+    def stats(self) -> list[PoolStats]:
+        stats: list[PoolStats] = []
+        for origin, pool in self._pools.items():
+            connections = pool.connections()
+            stats.append(
+                PoolStats(
+                    origin=origin,
+                    connections=len(connections),
+                    idle=sum(connection.is_idle() for connection in connections),
+                    # httpcore describes a connection as e.g. "'https://host:443', HTTP/2, IDLE, Request Count: 3"
+                    http2=sum(", HTTP/2," in connection.info() for connection in connections),
+                    requests=pool.requests,
+                )
+            )
+        return stats
+
+    async def aclose(self) -> None:
+        pools = list(self._pools.values())
+        self._pools.clear()
+        for pool in pools:
+            await pool.transport.aclose()
+
+
+_transport = SharedTransport()
+_http_client: httpx.AsyncClient | None = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """The HTTP client every LLM SDK client is created with."""
+    global _http_client
+    if _http_client is None:
+        # Timeouts are set by each SDK client on its requests
+        _http_client = httpx.AsyncClient(transport=_transport, follow_redirects=True)
+    return _http_client
+
+
+async def _preconnect(url: httpx.URL) -> None:
+    try:
+        # Any response leaves a warm connection in the pool
+        await get_http_client().head(_origin(url), timeout=PRECONNECT_TIMEOUT_S)
+    except httpx.HTTPError:
+        # The first real request reports the problem
+        pass
+
+
+async def preconnect(endpoints: Iterable[str]) -> None:
+    """Open a connection to each origin of `endpoints` that has none to reuse."""
+    urls = {_origin(url): url for url in (httpx.URL(endpoint) for endpoint in endpoints) if url.host}
+    await asyncio.gather(*(_preconnect(url) for url in urls.values() if not _transport.has_idle_connection(url)))
+
+
+def http_pool_stats() -> list[PoolStats]:
+    return _transport.stats()
@@ -11,6 +11,10 @@ class CommandName(str, Enum):
     CLEAR = "clear"
     TERMINAL_SETUP = "terminal-setup"
     EXPORT = "export"
+    FORK = "fork"
+    EXPAND = "expand"
+    HISTORY = "history"
+    CONTINUE = "continue"
     # PLAN and DOC are dynamically registered now, but kept here if needed for reference
     # or we can remove them if no code explicitly imports them.
     # PLAN = "plan"
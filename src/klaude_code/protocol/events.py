@@ -16,12 +16,16 @@ class EndEvent(BaseModel):
 
 class ErrorEvent(BaseModel):
     error_message: str
+    error_kind: model.LLMErrorKind | None = None
+    retry_after_s: float | None = None
 
 
 class TaskStartEvent(BaseModel):
     session_id: str
     is_sub_agent: bool = False
     sub_agent_type: SubAgentType | None = None
+    # For sub agents, the tool call in the parent session that spawned this task
+    parent_tool_call_id: str | None = None
 
 
 class TaskFinishEvent(BaseModel):
@@ -113,6 +117,16 @@ class InterruptEvent(BaseModel):
     session_id: str
 
 
+class SubAgentCollapsedEvent(BaseModel):
+    """Placeholder for the history of a sub-agent run, loaded only when it is expanded."""
+
+    session_id: str
+    child_session_id: str
+    tool_name: str
+    # 1-based position in the parent's `child_session_ids`, what `/expand` takes
+    index: int | None = None
+
+
 class TodoChangeEvent(BaseModel):
     session_id: str
     todos: list[model.TodoItem]
@@ -128,6 +142,7 @@ HistoryItemEvent = (
     | ResponseMetadataEvent
     | InterruptEvent
     | DeveloperMessageEvent
+    | SubAgentCollapsedEvent
 )
 
 
@@ -136,6 +151,14 @@ class ReplayHistoryEvent(BaseModel):
     events: list[HistoryItemEvent]
     updated_at: float
     is_load: bool = True
+    # Set for the expanded history of a sub-agent run, rendered quoted like a live one
+    sub_agent_type: SubAgentType | None = None
+    # What comes before `events` in the session, when only a page of it is replayed
+    earlier_turns: int = 0
+    earlier_items: int = 0
+    earlier_tool_calls: int = 0
+    # Identifies the page, the UI keeps its rendered output
+    cache_key: str | None = None
 
 
 Event = (
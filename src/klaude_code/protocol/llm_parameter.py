@@ -86,6 +86,8 @@ class LLMConfigProviderParameter(BaseModel):
     api_key: str | None = None
     is_azure: bool = False
     azure_api_version: str | None = None
+    # OpenAI Responses: store responses server-side and only send items appended since the previous response
+    use_previous_response_id: bool = False
 
 
 class LLMConfigModelParameter(BaseModel):
@@ -7,6 +7,8 @@ from klaude_code.protocol.commands import CommandName
 
 RoleType = Literal["system", "developer", "user", "assistant", "tool"]
 TodoStatusType = Literal["pending", "in_progress", "completed"]
+# How an LLM request failed, see llm/retry.py#classify_error
+LLMErrorKind = Literal["rate_limit", "overloaded", "network", "context_overflow", "fatal"]
 
 
 class Usage(BaseModel):
@@ -54,7 +56,7 @@ A typical sequence of response items is:
 - [ReasoningTextItem | ReasoningEncryptedItem]
 - [AssistantMessageDelta] × n
 - [AssistantMessageItem]
-- [ToolCallItem] × n
+- [ToolCallStartItem | ToolCallItem] × n
 - [ResponseMetadataItem]
 - Done
 
@@ -66,6 +68,7 @@ A conversation history input contains:
 - [ToolResultItem]
 - [InterruptItem]
 - [DeveloperMessageItem]
+- [CompactionItem]
 
 When adding a new item, please also modify the following:
 - session.py#_TypeMap
@@ -116,6 +119,17 @@ class UserMessageItem(BaseModel):
     images: list[ImageURLPart] | None = None
 
 
+class CompactionItem(UserMessageItem):
+    """Summary of earlier conversation that replaces it in the history.
+
+    It is sent to the LLM as a user message carrying the summary. When persisted it also
+    marks a compaction point: on load, everything before it except the last `kept_items`
+    items is dropped from the history.
+    """
+
+    kept_items: int = 0
+
+
 class AssistantMessageItem(BaseModel):
     id: str | None = None
     role: RoleType = "assistant"
@@ -159,8 +173,31 @@ class AssistantMessageDelta(BaseModel):
     content: str
 
 
+class ToolCallStartItem(BaseModel):
+    """A tool call still streaming, with the top-level string arguments received so far (JSON)."""
+
+    response_id: str | None = None
+    call_id: str
+    name: str
+    arguments: str
+
+
 class StreamErrorItem(BaseModel):
     error: str
+    kind: LLMErrorKind | None = None
+    retry_after_s: float | None = None
+
+
+class PrefixCacheAnalysis(BaseModel):
+    """How much of a request's serialized prefix matched the previous request of the session."""
+
+    model_name: str = ""
+    block_count: int = 0  # system, tools and each input message
+    shared_blocks: int = 0
+    break_at: str | None = None  # First block that differs, e.g. "system" or "message 12"
+    cause: str | None = None  # e.g. "reminder", "image", "reasoning drop", "model switch"
+    input_tokens: int = 0  # All prompt tokens, cached ones included
+    cached_tokens: int = 0
 
 
 class ResponseMetadataItem(BaseModel):
@@ -171,6 +208,7 @@ class ResponseMetadataItem(BaseModel):
     task_duration_s: float | None = None
     status: str | None = None
     error_reason: str | None = None
+    cache_analysis: list[PrefixCacheAnalysis] | None = None  # One per request, only in cache analysis mode
 
 
 MessageItem = (
@@ -185,7 +223,7 @@ MessageItem = (
 )
 
 
-StreamItem = AssistantMessageDelta
+StreamItem = AssistantMessageDelta | ToolCallStartItem
 
 ConversationItem = StartItem | InterruptItem | StreamErrorItem | StreamItem | MessageItem | ResponseMetadataItem
 
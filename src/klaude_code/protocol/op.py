@@ -22,6 +22,7 @@ class OperationType(Enum):
     USER_INPUT = "user_input"
     INTERRUPT = "interrupt"
     INIT_AGENT = "init_agent"
+    WARM_CACHE = "warm_cache"
     END = "end"
 
 
@@ -65,11 +66,23 @@ class InitAgentOperation(Operation):
 
     type: OperationType = OperationType.INIT_AGENT
     session_id: str | None = None
+    # User turns of the history to replay, e.g. from a search hit to the end
+    replay_turns: int | None = None
 
     async def execute(self, context: "ExecutorContext") -> None:
         await context.handle_init_agent(self)
 
 
+class WarmCacheOperation(Operation):
+    """Operation for priming the prompt cache of an idle session, e.g. when the user starts typing."""
+
+    type: OperationType = OperationType.WARM_CACHE
+    session_id: str | None = None
+
+    async def execute(self, context: "ExecutorContext") -> None:
+        await context.handle_warm_cache(self)
+
+
 class EndOperation(Operation):
     """Operation for gracefully stopping the executor."""
 
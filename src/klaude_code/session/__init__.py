@@ -1,4 +1,4 @@
-from .selector import resume_select_session
+from .selector import SessionSelection, resume_select_session, search_select_session
 from .session import Session
 
-__all__ = ["Session", "resume_select_session"]
+__all__ = ["Session", "SessionSelection", "resume_select_session", "search_select_session"]
@@ -0,0 +1,99 @@
+"""
+Compressed archival tier of the sessions of a project.
+
+An archived session is a single gzip file under `archive/`, named after its session file: the
+metadata JSON on the first line, then the messages JSONL lines unchanged. Archives are indexed
+by the catalog like the session files, and `Session.load` restores an archived session to
+`sessions/` and `messages/` before reading it, so resuming it works as before. The history a fork
+shares with an archived parent is read straight from the archive, which stays where it is.
+"""
+
+import gzip
+import json
+import os
+import shutil
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Any
+
+ARCHIVE_DIRNAME = "archive"
+ARCHIVE_SUFFIX = ".jsonl.gz"
+
+
+def archive_stem(archive_file: Path) -> str:
+    return archive_file.name.removesuffix(ARCHIVE_SUFFIX)
+
+
+def archive_session(base_dir: Path, session_file: Path) -> Path:
+    """Compress a session and its messages into `archive/`, then remove the originals."""
+    stem = session_file.stem
+    messages_file = base_dir / "messages" / f"{stem}.jsonl"
+    archive_file = base_dir / ARCHIVE_DIRNAME / f"{stem}{ARCHIVE_SUFFIX}"
+    archive_file.parent.mkdir(parents=True, exist_ok=True)
+    # Older versions pretty-printed the metadata, it must fit on the first line
+    metadata = json.dumps(json.loads(session_file.read_text()), ensure_ascii=False)
+    tmp_file = archive_file.with_name(f".{archive_file.name}.tmp")
+    with gzip.open(tmp_file, "wb") as out:
+        out.write(metadata.encode() + b"\n")
+        if messages_file.exists():
+            with messages_file.open("rb") as f:
+                shutil.copyfileobj(f, out)
+    # The archive keeps the time of the last update, quota eviction goes by it
+    stat = session_file.stat()
+    os.utime(tmp_file, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    os.replace(tmp_file, archive_file)
+    session_file.unlink()
+    messages_file.unlink(missing_ok=True)
+    return archive_file
+
+
+def find_archived_session(base_dir: Path, session_id: str) -> Path | None:
+    candidates = sorted((base_dir / ARCHIVE_DIRNAME).glob(f"*-{session_id}{ARCHIVE_SUFFIX}"))
+    return candidates[-1] if candidates else None
+
+
+def restore_session(base_dir: Path, session_id: str) -> bool:
+    """Move archived session `session_id` back to `sessions/` and `messages/`, False if not archived."""
+    archive_file = find_archived_session(base_dir, session_id)
+    if archive_file is None:
+        return False
+    stem = archive_stem(archive_file)
+    sessions_dir = base_dir / "sessions"
+    messages_dir = base_dir / "messages"
+    sessions_dir.mkdir(parents=True, exist_ok=True)
+    messages_dir.mkdir(parents=True, exist_ok=True)
+    messages_tmp = messages_dir / f".{stem}.jsonl.tmp"
+    with gzip.open(archive_file, "rb") as f:
+        metadata = f.readline()
+        with messages_tmp.open("wb") as out:
+            shutil.copyfileobj(f, out)
+    session_tmp = sessions_dir / f".{stem}.json.tmp"
+    session_tmp.write_bytes(metadata.rstrip(b"\n"))
+    # Messages first: a session file is never visible without its history
+    os.replace(messages_tmp, messages_dir / f"{stem}.jsonl")
+    os.replace(session_tmp, sessions_dir / f"{stem}.json")
+    archive_file.unlink()
+    return True
+
+
+def read_archived_metadata(archive_file: Path) -> dict[str, Any] | None:
+    try:
+        with gzip.open(archive_file, "rt", encoding="utf-8") as f:
+            data = json.loads(f.readline())
+    except (OSError, EOFError, ValueError):
+        return None
+    return data if isinstance(data, dict) else None  # pyright: ignore[reportUnknownVariableType]
+
+
+def read_archived_messages(archive_file: Path, limit: int | None = None) -> bytes:
+    """The messages JSONL stored in `archive_file`, only its first `limit` bytes if given."""
+    with gzip.open(archive_file, "rb") as f:
+        f.readline()
+        return f.read() if limit is None else f.read(limit)
+
+
+def iter_archived_messages(archive_file: Path) -> Iterator[str]:
+    """Lines of the messages JSONL stored in `archive_file`."""
+    with gzip.open(archive_file, "rt", encoding="utf-8") as f:
+        f.readline()
+        yield from f
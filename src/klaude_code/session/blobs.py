@@ -0,0 +1,163 @@
+"""
+Per-project content-addressed store for the large payloads of session history.
+
+Inline images (`data:` URLs from the Read tool, clipboard pastes, `@file` reminders) are moved
+into the store when they are appended to a session; the item keeps a `blob:` URL naming the
+SHA-256 of the image, so the history in memory and the messages JSONL only hold the reference.
+The LLM input converters turn it back into a `data:` URL with `resolve_image_url`, an image whose
+blob is missing is sent as a `missing_image_text` placeholder instead.
+
+Tool outputs larger than `LARGE_OUTPUT_CHARS` stay in memory but are written to the store
+instead of the JSONL line, see `journal.serialize_item`.
+
+Identical payloads are stored once. Blobs are written by the session journal before the lines
+referring to them.
+"""
+
+import base64
+import binascii
+import hashlib
+import os
+import threading
+from collections.abc import Iterable
+from functools import lru_cache
+from pathlib import Path
+
+from klaude_code.protocol.model import ConversationItem, DeveloperMessageItem, ToolResultItem, UserMessageItem
+from klaude_code.trace import log_debug
+
+BLOB_URL_SCHEME = "blob:"
+LARGE_OUTPUT_CHARS = 16 * 1024
+
+
+def _digest(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+class BlobStore:
+    def __init__(self, root: Path):
+        self.root = root
+        # Payloads not on disk yet, the journal writes them on its next flush
+        self._pending: dict[str, bytes] = {}
+        # Payloads a flush is writing right now, still served from memory
+        self._writing: dict[str, bytes] = {}
+        # Guards `_pending` and `_writing` only, `put` runs on the event loop and never waits for disk I/O
+        self._lock = threading.Lock()
+        self._unsynced: set[Path] = set()
+        self._sync_lock = threading.Lock()
+
+    def path(self, digest: str) -> Path:
+        return self.root / digest[:2] / digest
+
+    def _in_memory(self, digest: str) -> bytes | None:
+        with self._lock:
+            data = self._pending.get(digest)
+            return data if data is not None else self._writing.get(digest)
+
+    def put(self, data: bytes) -> str:
+        digest = _digest(data)
+        if self._in_memory(digest) is None and not self.path(digest).exists():
+            with self._lock:
+                self._pending[digest] = data
+        return digest
+
+    def get(self, digest: str) -> bytes:
+        """Payload of `digest`, raises `FileNotFoundError` if it is not stored."""
+        data = self._in_memory(digest)
+        if data is not None:
+            return data
+        return self.path(digest).read_bytes()
+
+    def contains(self, digest: str) -> bool:
+        return self._in_memory(digest) is not None or self.path(digest).exists()
+
+    def flush(self, fsync: bool = False) -> None:
+        """Write the pending payloads, each to a temp file renamed into place."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._writing.update(pending)
+        written: dict[str, Path] = {}
+        try:
+            for digest, data in pending.items():
+                path = self.path(digest)
+                path.parent.mkdir(parents=True, exist_ok=True)
+                tmp_path = path.with_name(f".{digest}.tmp")
+                tmp_path.write_bytes(data)
+                os.replace(tmp_path, path)
+                written[digest] = path
+        finally:
+            with self._lock:
+                for digest, data in pending.items():
+                    del self._writing[digest]
+                    if digest not in written:
+                        # Retried on the next flush
+                        self._pending.setdefault(digest, data)
+        with self._sync_lock:
+            self._unsynced.update(written.values())
+            if fsync:
+                for path in sorted(self._unsynced):
+                    fd = os.open(path, os.O_RDONLY)
+                    try:
+                        os.fsync(fd)
+                    finally:
+                        os.close(fd)
+                self._unsynced.clear()
+
+    def externalize_images(self, items: Iterable[ConversationItem]) -> None:
+        """Move the inline images of `items` into the store, in place."""
+        for item in items:
+            if isinstance(item, UserMessageItem | DeveloperMessageItem | ToolResultItem):
+                for image in item.images or []:
+                    image.image_url.url = self._image_ref(image.image_url.url)
+
+    def _image_ref(self, url: str) -> str:
+        if not url.startswith("data:"):
+            return url
+        header, sep, payload = url.partition(",")
+        if not sep or not header.endswith(";base64"):
+            return url
+        try:
+            data = base64.b64decode(payload, validate=True)
+        except (binascii.Error, ValueError):
+            # Left inline, the provider reports it
+            return url
+        media_type = header[len("data:") : -len(";base64")]
+        return f"{BLOB_URL_SCHEME}{media_type};sha256,{self.put(data)}"
+
+
+_stores: dict[Path, BlobStore] = {}
+
+
+def get_blob_store(base_dir: Path) -> BlobStore:
+    """The blob store of a project directory."""
+    store = _stores.get(base_dir)
+    if store is None:
+        store = _stores[base_dir] = BlobStore(base_dir / "blobs")
+    return store
+
+
+# Images are resent every turn, keep the recent ones encoded
+@lru_cache(maxsize=16)
+def _data_url(media_type: str, digest: str) -> str:
+    for store in list(_stores.values()):
+        if store.contains(digest):
+            return f"data:{media_type};base64,{base64.b64encode(store.get(digest)).decode()}"
+    raise FileNotFoundError(f"Image blob {digest} not found")
+
+
+def resolve_image_url(url: str) -> str | None:
+    """The `data:` URL of an image stored as a `blob:` URL, other URLs unchanged, None if the blob is missing."""
+    if not url.startswith(BLOB_URL_SCHEME):
+        return url
+    media_type, _, digest = url[len(BLOB_URL_SCHEME) :].partition(";sha256,")
+    try:
+        return _data_url(media_type, digest)
+    except FileNotFoundError:
+        # E.g. evicted with an archive another session still refers to
+        log_debug(f"Image blob {digest} not found, sending a placeholder", style="red")
+        return None
+
+
+def missing_image_text(url: str) -> str:
+    """Text sent in place of an image `resolve_image_url` did not find."""
+    return f"[image not found in the blob store: {url.rpartition(',')[2]}]"
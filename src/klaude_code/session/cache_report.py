@@ -0,0 +1,62 @@
+from collections.abc import Iterator
+
+from rich.console import Console
+from rich.table import Table
+from rich.text import Text
+
+from klaude_code.protocol import model
+
+from .session import Session
+
+
+def iter_cache_analyses(history: list[model.ConversationItem]) -> Iterator[model.PrefixCacheAnalysis]:
+    """Per-request cache analyses recorded in the session, oldest first."""
+    for item in history:
+        if isinstance(item, model.ResponseMetadataItem) and item.cache_analysis:
+            yield from item.cache_analysis
+
+
+def cache_hit_ratio(analysis: model.PrefixCacheAnalysis) -> float | None:
+    if analysis.input_tokens <= 0:
+        return None
+    return analysis.cached_tokens / analysis.input_tokens
+
+
+def display_cache_report(session: Session) -> None:
+    """Print the cache-hit ratio of each request and what broke the cached prefix."""
+    console = Console()
+    analyses = list(iter_cache_analyses(session.conversation_history))
+    if not analyses:
+        console.print(
+            f"No cache analysis recorded in session {session.id}, run klaude with --cache-analysis to record it."
+        )
+        return
+
+    table = Table(title=f"Prompt cache report for session {session.id}", title_justify="left", expand=True)
+    table.add_column("#", justify="right", no_wrap=True)
+    table.add_column("Model", overflow="fold")
+    table.add_column("Input", justify="right", no_wrap=True)
+    table.add_column("Cached", justify="right", no_wrap=True)
+    table.add_column("Hit", justify="right", no_wrap=True)
+    table.add_column("Shared blocks", justify="right", no_wrap=True)
+    table.add_column("Break at", no_wrap=True)
+    table.add_column("Cause", overflow="fold")
+
+    total_input = total_cached = 0
+    for index, analysis in enumerate(analyses, 1):
+        total_input += analysis.input_tokens
+        total_cached += analysis.cached_tokens
+        ratio = cache_hit_ratio(analysis)
+        table.add_row(
+            str(index),
+            analysis.model_name,
+            str(analysis.input_tokens),
+            str(analysis.cached_tokens),
+            f"{ratio:.0%}" if ratio is not None else "-",
+            f"{analysis.shared_blocks}/{analysis.block_count}",
+            analysis.break_at or "",
+            Text(analysis.cause or "", style="yellow" if analysis.break_at else "dim"),
+        )
+    console.print(table)
+    if total_input > 0:
+        console.print(f"Overall: {total_cached}/{total_input} input tokens cached ({total_cached / total_input:.0%})")
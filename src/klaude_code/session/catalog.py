@@ -0,0 +1,483 @@
+"""
+Per-project SQLite index of the session files.
+
+Every write of a session file upserts its row, so listing sessions and finding the most recent one are index
+queries instead of parsing every `sessions/*.json` and scanning every `messages/*.jsonl`.
+
+The JSON/JSONL files and the archives stay the source of truth. The catalog records the
+`sessions/` and `archive/` directory mtimes it last saw; when a directory changed behind its back
+(a session written by an older version, a deleted file, a gc pass) or the database is missing or
+corrupt, it re-indexes the files whose mtime differs from the indexed one.
+
+It also holds the full-text index of the session contents, see `search`.
+"""
+
+import gzip
+import json
+import os
+import sqlite3
+import threading
+from collections.abc import Iterable
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, cast
+
+from .archive import ARCHIVE_DIRNAME, ARCHIVE_SUFFIX, archive_stem, iter_archived_messages, read_archived_metadata
+from .search import SearchHit, extract_documents, match_expression, message_text
+
+CATALOG_FILENAME = "catalog.sqlite3"
+SCHEMA_VERSION = 3
+FIRST_MESSAGE_PREVIEW_CHARS = 500
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id TEXT PRIMARY KEY,
+    path TEXT NOT NULL,
+    file_mtime_ns INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    work_dir TEXT NOT NULL,
+    model_name TEXT,
+    messages_count INTEGER NOT NULL,
+    first_user_message TEXT,
+    is_root_session INTEGER NOT NULL,
+    sub_agent_type TEXT,
+    forked_from TEXT
+);
+CREATE INDEX IF NOT EXISTS sessions_root_updated ON sessions (is_root_session, updated_at DESC);
+CREATE TABLE IF NOT EXISTS catalog_meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+"""
+# Separate, SQLite may be built without FTS5: sessions are then listed but not searchable
+_SEARCH_SCHEMA = """
+CREATE TABLE IF NOT EXISTS search_progress (
+    session_id TEXT PRIMARY KEY,
+    indexed_bytes INTEGER NOT NULL,
+    turns INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS search_docs (
+    id INTEGER PRIMARY KEY,
+    session_id TEXT NOT NULL,
+    turn INTEGER NOT NULL,
+    kind TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS search_docs_session ON search_docs (session_id);
+CREATE VIRTUAL TABLE IF NOT EXISTS search_fts USING fts5(
+    text, tokenize = 'unicode61 remove_diacritics 2', prefix = '3'
+);
+"""
+_DROP_ALL = """
+DROP TABLE IF EXISTS sessions;
+DROP TABLE IF EXISTS catalog_meta;
+DROP TABLE IF EXISTS search_progress;
+DROP TABLE IF EXISTS search_docs;
+DROP TABLE IF EXISTS search_fts;
+"""
+_SEARCH_QUERY = """
+SELECT d.session_id, s.work_dir, s.updated_at, s.first_user_message, d.turn, p.turns, d.kind,
+    snippet(search_fts, 0, '[', ']', '…', 16), bm25(search_fts) AS score
+FROM search_fts
+JOIN search_docs d ON d.id = search_fts.rowid
+JOIN sessions s ON s.id = d.session_id
+JOIN search_progress p ON p.session_id = d.session_id
+WHERE search_fts MATCH ? AND s.is_root_session = 1
+ORDER BY score, s.updated_at DESC
+LIMIT ?
+"""
+# Matching items fetched per session returned, the best one of each session is kept
+_HITS_PER_SESSION = 10
+
+_COLUMNS = (
+    "id",
+    "path",
+    "file_mtime_ns",
+    "created_at",
+    "updated_at",
+    "work_dir",
+    "model_name",
+    "messages_count",
+    "first_user_message",
+    "is_root_session",
+    "sub_agent_type",
+    "forked_from",
+)
+# A first user message already indexed is kept, a compacted history no longer starts with it
+_UPSERT = (
+    f"INSERT INTO sessions ({', '.join(_COLUMNS)}) VALUES ({', '.join('?' for _ in _COLUMNS)}) "
+    "ON CONFLICT(id) DO UPDATE SET "
+    + ", ".join(f"{column} = excluded.{column}" for column in _COLUMNS[1:] if column != "first_user_message")
+    + ", first_user_message = COALESCE(sessions.first_user_message, excluded.first_user_message)"
+)
+
+
+@dataclass(frozen=True)
+class CatalogEntry:
+    id: str
+    path: str
+    file_mtime_ns: int
+    created_at: float
+    updated_at: float
+    work_dir: str
+    model_name: str | None
+    messages_count: int
+    first_user_message: str | None
+    is_root_session: bool
+    sub_agent_type: str | None
+    forked_from: str | None = None
+
+
+def message_preview(content: Any) -> str | None:
+    """Text of a user message `content`, plain or structured, truncated for listings."""
+    text = message_text(content)
+    return text[:FIRST_MESSAGE_PREVIEW_CHARS] if text is not None else None
+
+
+def _first_user_message(lines: Iterable[str]) -> str | None:
+    for line in lines:
+        if '"UserMessageItem"' not in line:
+            continue
+        obj = json.loads(line)
+        if obj.get("type") == "UserMessageItem":
+            return message_preview(obj.get("data", {}).get("content"))
+    return None
+
+
+def _fork_parent(forked_from: Any) -> str | None:
+    session_id = cast(dict[str, Any], forked_from).get("session_id") if isinstance(forked_from, dict) else None
+    return session_id if isinstance(session_id, str) else None
+
+
+def read_first_user_message(messages_file: Path) -> str | None:
+    """Read `messages_file` line by line up to its first user message."""
+    try:
+        with messages_file.open(encoding="utf-8") as f:
+            return _first_user_message(f)
+    except (OSError, ValueError):
+        return None
+
+
+class SessionCatalog:
+    def __init__(self, base_dir: Path):
+        self.base_dir = base_dir
+        self.sessions_dir = base_dir / "sessions"
+        self.messages_dir = base_dir / "messages"
+        self.archive_dir = base_dir / ARCHIVE_DIRNAME
+        self.db_path = base_dir / CATALOG_FILENAME
+        self._conn: sqlite3.Connection | None = None
+        self._search_enabled = False
+        # Session journals record from worker threads
+        self._lock = threading.RLock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is not None:
+            return self._conn
+        self.base_dir.mkdir(parents=True, exist_ok=True)
+        try:
+            conn = self._open()
+        except sqlite3.DatabaseError:
+            # Corrupt or from an incompatible version: it is only an index, rebuild it
+            for suffix in ("", "-wal", "-shm"):
+                Path(f"{self.db_path}{suffix}").unlink(missing_ok=True)
+            conn = self._open()
+        self._conn = conn
+        return conn
+
+    def _open(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=5.0, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        # The files are the source of truth, losing the last commits on power loss is fine
+        conn.execute("PRAGMA synchronous=NORMAL")
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        if version != SCHEMA_VERSION:
+            conn.executescript(_DROP_ALL)
+            conn.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+        conn.executescript(_SCHEMA)
+        try:
+            conn.executescript(_SEARCH_SCHEMA)
+            self._search_enabled = True
+        except sqlite3.OperationalError:
+            self._search_enabled = False
+        return conn
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def _dir_mtime_ns(self, directory: Path | None = None) -> int | None:
+        try:
+            return (directory or self.sessions_dir).stat().st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    @staticmethod
+    def _recorded_dir_mtime_ns(conn: sqlite3.Connection, key: str = "sessions_dir_mtime_ns") -> int | None:
+        row = conn.execute("SELECT value FROM catalog_meta WHERE key = ?", (key,)).fetchone()
+        return int(row[0]) if row else None
+
+    @staticmethod
+    def _record_dir_mtime_ns(conn: sqlite3.Connection, mtime_ns: int, key: str = "sessions_dir_mtime_ns") -> None:
+        conn.execute("INSERT OR REPLACE INTO catalog_meta (key, value) VALUES (?, ?)", (key, str(mtime_ns)))
+
+    def record(self, entry: CatalogEntry, dir_mtime_before_ns: int | None) -> None:
+        """Upsert the row of a session file that was just written.
+
+        `dir_mtime_before_ns` is the `sessions/` mtime before the write: the catalog only stays
+        marked in sync if it was in sync before, otherwise another writer's file is still missing.
+        """
+        with self._lock:
+            try:
+                conn = self._connect()
+                with conn:
+                    conn.execute(_UPSERT, _row(entry))
+                    dir_mtime = self._dir_mtime_ns()
+                    if dir_mtime is not None and self._recorded_dir_mtime_ns(conn) == dir_mtime_before_ns:
+                        self._record_dir_mtime_ns(conn, dir_mtime)
+            except sqlite3.Error:
+                # Best effort, `sync` re-indexes from the files
+                self.close()
+
+    def sync(self) -> None:
+        """Re-index the session files changed since the catalog last saw `sessions/`."""
+        with self._lock:
+            self._sync()
+
+    def _sync(self) -> None:
+        conn = self._connect()
+        dir_mtime = self._dir_mtime_ns()
+        # 0 for no archive directory yet
+        archive_mtime = self._dir_mtime_ns(self.archive_dir) or 0
+        if (
+            dir_mtime is not None
+            and self._recorded_dir_mtime_ns(conn) == dir_mtime
+            and self._recorded_dir_mtime_ns(conn, "archive_dir_mtime_ns") == archive_mtime
+        ):
+            return
+
+        indexed: dict[str, tuple[str, int]] = {
+            path: (session_id, mtime)
+            for session_id, path, mtime in conn.execute("SELECT id, path, file_mtime_ns FROM sessions")
+        }
+        seen: set[str] = set()
+        entries: list[CatalogEntry] = []
+        for directory, suffix in ((self.sessions_dir, ".json"), (self.archive_dir, ARCHIVE_SUFFIX)):
+            if not directory.is_dir():
+                continue
+            with os.scandir(directory) as it:
+                for dir_entry in it:
+                    if not dir_entry.name.endswith(suffix) or dir_entry.name.startswith("."):
+                        continue
+                    seen.add(dir_entry.path)
+                    try:
+                        mtime = dir_entry.stat().st_mtime_ns
+                    except FileNotFoundError:
+                        continue
+                    known = indexed.get(dir_entry.path)
+                    if known is not None and known[1] == mtime:
+                        continue
+                    entry = self._read_entry(Path(dir_entry.path), mtime, first_message_known=known is not None)
+                    if entry is not None:
+                        entries.append(entry)
+
+        with conn:
+            removed = [(session_id, path) for path, (session_id, _) in indexed.items() if path not in seen]
+            for session_id, path in removed:
+                conn.execute("DELETE FROM sessions WHERE id = ? AND path = ?", (session_id, path))
+            for entry in entries:
+                conn.execute(_UPSERT, _row(entry))
+                # Written behind the catalog's back, its contents may not be indexed either
+                self._index_session_file(conn, entry.id, Path(entry.path))
+            if removed and self._search_enabled:
+                self._drop_orphan_documents(conn)
+            if dir_mtime is not None:
+                self._record_dir_mtime_ns(conn, dir_mtime)
+            self._record_dir_mtime_ns(conn, archive_mtime, "archive_dir_mtime_ns")
+
+    def _read_entry(self, path: Path, mtime_ns: int, first_message_known: bool) -> CatalogEntry | None:
+        archived = path.name.endswith(ARCHIVE_SUFFIX)
+        if archived:
+            data = read_archived_metadata(path)
+            if data is None:
+                return None
+        else:
+            try:
+                data = json.loads(path.read_text())
+            except (OSError, ValueError):
+                return None
+        session_id = str(data.get("id", archive_stem(path) if archived else path.stem))
+        first_user_message = None
+        if not first_message_known and archived:
+            try:
+                first_user_message = _first_user_message(iter_archived_messages(path))
+            except (OSError, EOFError, ValueError):
+                first_user_message = None
+        elif not first_message_known:
+            first_user_message = read_first_user_message(self.messages_dir / f"{path.stem}.jsonl")
+        created_at = float(data.get("created_at", mtime_ns / 1e9))
+        return CatalogEntry(
+            id=session_id,
+            path=str(path),
+            file_mtime_ns=mtime_ns,
+            created_at=created_at,
+            updated_at=float(data.get("updated_at", created_at)),
+            work_dir=str(data.get("work_dir", "")),
+            model_name=data.get("model_name"),
+            messages_count=int(data.get("messages_count", -1)),
+            first_user_message=first_user_message,
+            is_root_session=bool(data.get("is_root_session", True)),
+            sub_agent_type=data.get("sub_agent_type"),
+            forked_from=_fork_parent(data.get("forked_from")),
+        )
+
+    def index_messages(self, session_id: str, messages_file: Path) -> None:
+        """Add the lines appended to `messages_file` since it was last indexed to the search index."""
+        with self._lock:
+            try:
+                conn = self._connect()
+                if not self._search_enabled:
+                    return
+                with conn:
+                    self._index_lines(conn, session_id, messages_file)
+            except sqlite3.Error:
+                # Best effort, the next write indexes from the same offset
+                self.close()
+
+    def _index_session_file(self, conn: sqlite3.Connection, session_id: str, path: Path) -> None:
+        if not self._search_enabled:
+            return
+        if path.name.endswith(ARCHIVE_SUFFIX):
+            self._index_archive(conn, session_id, path)
+        else:
+            self._index_lines(conn, session_id, self.messages_dir / f"{path.stem}.jsonl")
+
+    def _search_progress(self, conn: sqlite3.Connection, session_id: str) -> tuple[int, int] | None:
+        row = conn.execute(
+            "SELECT indexed_bytes, turns FROM search_progress WHERE session_id = ?", (session_id,)
+        ).fetchone()
+        return (int(row[0]), int(row[1])) if row else None
+
+    def _index_lines(self, conn: sqlite3.Connection, session_id: str, messages_file: Path) -> None:
+        offset, turns = self._search_progress(conn, session_id) or (0, 0)
+        try:
+            with messages_file.open("rb") as f:
+                if os.fstat(f.fileno()).st_size < offset:
+                    # Not the file that was indexed, start over
+                    self._drop_documents(conn, session_id)
+                    offset, turns = 0, 0
+                f.seek(offset)
+                data = f.read()
+        except FileNotFoundError:
+            return
+        # A last line without its newline is still being written
+        end = data.rfind(b"\n") + 1
+        if end:
+            turns = self._add_documents(conn, session_id, data[:end].splitlines(), turns)
+        self._record_search_progress(conn, session_id, offset + end, turns)
+
+    def _index_archive(self, conn: sqlite3.Connection, session_id: str, archive_file: Path) -> None:
+        # The lines of a session archived after it was indexed are already in
+        if self._search_progress(conn, session_id) is not None:
+            return
+        try:
+            with gzip.open(archive_file, "rb") as f:
+                f.readline()
+                lines = f.read().splitlines(keepends=True)
+        except (OSError, EOFError):
+            return
+        turns = self._add_documents(conn, session_id, lines, 0)
+        self._record_search_progress(conn, session_id, sum(len(line) for line in lines), turns)
+
+    @staticmethod
+    def _add_documents(conn: sqlite3.Connection, session_id: str, lines: Iterable[bytes], turns: int) -> int:
+        documents, turns = extract_documents(lines, turns)
+        for turn, kind, text in documents:
+            cursor = conn.execute(
+                "INSERT INTO search_docs (session_id, turn, kind) VALUES (?, ?, ?)", (session_id, turn, kind)
+            )
+            conn.execute("INSERT INTO search_fts (rowid, text) VALUES (?, ?)", (cursor.lastrowid, text))
+        return turns
+
+    @staticmethod
+    def _record_search_progress(conn: sqlite3.Connection, session_id: str, indexed_bytes: int, turns: int) -> None:
+        conn.execute(
+            "INSERT OR REPLACE INTO search_progress (session_id, indexed_bytes, turns) VALUES (?, ?, ?)",
+            (session_id, indexed_bytes, turns),
+        )
+
+    @staticmethod
+    def _drop_documents(conn: sqlite3.Connection, session_id: str) -> None:
+        conn.execute(
+            "DELETE FROM search_fts WHERE rowid IN (SELECT id FROM search_docs WHERE session_id = ?)", (session_id,)
+        )
+        conn.execute("DELETE FROM search_docs WHERE session_id = ?", (session_id,))
+        conn.execute("DELETE FROM search_progress WHERE session_id = ?", (session_id,))
+
+    @staticmethod
+    def _drop_orphan_documents(conn: sqlite3.Connection) -> None:
+        orphan = "session_id NOT IN (SELECT id FROM sessions)"
+        conn.execute(f"DELETE FROM search_fts WHERE rowid IN (SELECT id FROM search_docs WHERE {orphan})")
+        conn.execute(f"DELETE FROM search_docs WHERE {orphan}")
+        conn.execute(f"DELETE FROM search_progress WHERE {orphan}")
+
+    def search(self, query: str, limit: int = 20) -> list[SearchHit]:
+        """Root sessions matching every word of `query`, best match first, with their best matching item."""
+        expression = match_expression(query)
+        if expression is None:
+            return []
+        with self._lock:
+            self._sync()
+            if not self._search_enabled:
+                return []
+            rows = self._connect().execute(_SEARCH_QUERY, (expression, limit * _HITS_PER_SESSION)).fetchall()
+        best: dict[str, SearchHit] = {}
+        for row in rows:
+            hit = SearchHit(*row)
+            best.setdefault(hit.session_id, hit)
+        return list(best.values())[:limit]
+
+    def list_root_sessions(self) -> list[CatalogEntry]:
+        """Root sessions, most recently updated first."""
+        with self._lock:
+            self._sync()
+            rows = self._connect().execute(
+                f"SELECT {', '.join(_COLUMNS)} FROM sessions WHERE is_root_session = 1 ORDER BY updated_at DESC"
+            )
+            return [_entry(row) for row in rows]
+
+    def most_recent_root_session_id(self) -> str | None:
+        with self._lock:
+            self._sync()
+            row = (
+                self._connect()
+                .execute("SELECT id FROM sessions WHERE is_root_session = 1 ORDER BY updated_at DESC LIMIT 1")
+                .fetchone()
+            )
+            return row[0] if row else None
+
+    def fork_parent_ids(self) -> set[str]:
+        """Ids of the sessions other sessions were forked from."""
+        with self._lock:
+            self._sync()
+            rows = self._connect().execute("SELECT DISTINCT forked_from FROM sessions WHERE forked_from IS NOT NULL")
+            return {row[0] for row in rows}
+
+
+def _row(entry: CatalogEntry) -> tuple[Any, ...]:
+    return tuple(getattr(entry, column) for column in _COLUMNS)
+
+
+def _entry(row: tuple[Any, ...]) -> CatalogEntry:
+    values = dict(zip(_COLUMNS, row))
+    values["is_root_session"] = bool(values["is_root_session"])
+    return CatalogEntry(**values)
+
+
+_catalogs: dict[Path, SessionCatalog] = {}
+
+
+def get_catalog(base_dir: Path) -> SessionCatalog:
+    """The catalog of a project directory, kept open for the life of the process."""
+    catalog = _catalogs.get(base_dir)
+    if catalog is None:
+        catalog = _catalogs[base_dir] = SessionCatalog(base_dir)
+    return catalog
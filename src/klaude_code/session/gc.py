@@ -0,0 +1,163 @@
+"""
+Garbage collection of the session storage of a project.
+
+Run by `klaude sessions gc`, and at most once every `GC_INTERVAL_S` in the background of the
+interactive CLI:
+
+1. sessions whose files were not written for `archive_after_days` move to the archive tier;
+2. blobs no session refers to any more are removed;
+3. over `quota_mb`, the least recently updated archived sessions are deleted until it fits, except
+   the ones other sessions were forked from.
+"""
+
+import gzip
+import re
+import time
+from collections import Counter
+from collections.abc import Container
+from dataclasses import dataclass
+from pathlib import Path
+
+from .archive import ARCHIVE_DIRNAME, ARCHIVE_SUFFIX, archive_session, archive_stem
+from .catalog import get_catalog
+
+DEFAULT_ARCHIVE_AFTER_DAYS = 30.0
+GC_INTERVAL_S = 24 * 3600
+LAST_GC_FILENAME = ".last_gc"
+# A blob this recent may belong to a line still queued in a session journal
+_BLOB_GRACE_S = 3600
+_BLOB_REF = re.compile(rb'(?:sha256,|"blobs": \{"\w+": ")([0-9a-f]{64})')
+# What the quota counts, the catalog is an index rebuilt from these
+_DATA_DIRS = ("sessions", "messages", ARCHIVE_DIRNAME, "blobs")
+
+
+@dataclass
+class GCReport:
+    archived: int = 0
+    evicted: int = 0
+    blobs_removed: int = 0
+    bytes_before: int = 0
+    bytes_after: int = 0
+
+
+def project_size(base_dir: Path) -> int:
+    """Bytes of session data stored for the project in `base_dir`."""
+    return sum(path.stat().st_size for name in _DATA_DIRS for path in (base_dir / name).rglob("*") if path.is_file())
+
+
+def _archive_stale_sessions(base_dir: Path, cutoff: float, exclude: Container[str]) -> int:
+    archived = 0
+    for session_file in sorted((base_dir / "sessions").glob("*.json")):
+        try:
+            stale = session_file.stat().st_mtime < cutoff
+        except FileNotFoundError:
+            continue
+        session_id = session_file.stem.rsplit("-", 1)[-1]
+        if stale and session_id not in exclude:
+            archive_session(base_dir, session_file)
+            archived += 1
+    return archived
+
+
+def _blob_refs(base_dir: Path) -> dict[Path, set[bytes]]:
+    """Blob digests referred to by each messages file and archive."""
+    refs: dict[Path, set[bytes]] = {}
+    for messages_file in (base_dir / "messages").glob("*.jsonl"):
+        refs[messages_file] = set(_BLOB_REF.findall(messages_file.read_bytes()))
+    for archive_file in (base_dir / ARCHIVE_DIRNAME).glob(f"*{ARCHIVE_SUFFIX}"):
+        with gzip.open(archive_file, "rb") as f:
+            refs[archive_file] = set(_BLOB_REF.findall(f.read()))
+    return refs
+
+
+def _collectable_blobs(base_dir: Path, now: float) -> dict[bytes, Path]:
+    collectable: dict[bytes, Path] = {}
+    for blob in (base_dir / "blobs").glob("*/*"):
+        if not blob.name.startswith(".") and now - blob.stat().st_mtime >= _BLOB_GRACE_S:
+            collectable[blob.name.encode()] = blob
+    return collectable
+
+
+def _remove_unreferenced_blobs(base_dir: Path, now: float) -> int:
+    collectable = _collectable_blobs(base_dir, now)
+    if not collectable:
+        return 0
+    referenced = set[bytes]().union(*_blob_refs(base_dir).values())
+    removed = 0
+    for digest, blob in collectable.items():
+        if digest not in referenced:
+            blob.unlink(missing_ok=True)
+            removed += 1
+    return removed
+
+
+def _evict_archives(base_dir: Path, quota_bytes: float, now: float) -> int:
+    size = project_size(base_dir)
+    if size <= quota_bytes:
+        return 0
+    refs = _blob_refs(base_dir)
+    ref_counts = Counter(digest for digests in refs.values() for digest in digests)
+    collectable = _collectable_blobs(base_dir, now)
+    # Forks read the history they share with their parent from the parent's files
+    fork_parents = get_catalog(base_dir).fork_parent_ids()
+    # Archives keep the mtime of the session file, the least recently updated go first
+    archives = sorted((base_dir / ARCHIVE_DIRNAME).glob(f"*{ARCHIVE_SUFFIX}"), key=lambda p: p.stat().st_mtime)
+    evicted = 0
+    for archive_file in archives:
+        if size <= quota_bytes:
+            break
+        if archive_stem(archive_file).rsplit("-", 1)[-1] in fork_parents:
+            continue
+        size -= archive_file.stat().st_size
+        archive_file.unlink()
+        evicted += 1
+        # Blobs only this archive referred to are freed as well
+        for digest in refs.get(archive_file, set()):
+            ref_counts[digest] -= 1
+            if ref_counts[digest] == 0 and digest in collectable:
+                size -= collectable[digest].stat().st_size
+    return evicted
+
+
+def collect_garbage(
+    base_dir: Path,
+    archive_after_days: float | None,
+    quota_mb: float | None = None,
+    exclude: Container[str] = (),
+) -> GCReport:
+    """Archive the stale sessions of the project in `base_dir`, then enforce its quota.
+
+    Sessions in `exclude` (ids) are never archived.
+    """
+    now = time.time()
+    report = GCReport(bytes_before=project_size(base_dir))
+    if archive_after_days is not None:
+        report.archived = _archive_stale_sessions(base_dir, now - archive_after_days * 24 * 3600, exclude)
+    report.blobs_removed = _remove_unreferenced_blobs(base_dir, now)
+    if quota_mb is not None:
+        report.evicted = _evict_archives(base_dir, quota_mb * 1024 * 1024, now)
+        if report.evicted:
+            report.blobs_removed += _remove_unreferenced_blobs(base_dir, now)
+    get_catalog(base_dir).sync()
+    report.bytes_after = project_size(base_dir)
+    return report
+
+
+def run_scheduled_gc(
+    base_dir: Path,
+    archive_after_days: float | None,
+    quota_mb: float | None = None,
+    exclude: Container[str] = (),
+) -> GCReport | None:
+    """`collect_garbage`, unless a pass already ran in the last `GC_INTERVAL_S`."""
+    if not base_dir.is_dir():
+        return None
+    marker = base_dir / LAST_GC_FILENAME
+    try:
+        if time.time() - marker.stat().st_mtime < GC_INTERVAL_S:
+            return None
+    except FileNotFoundError:
+        pass
+    # Touched first, so other processes starting now skip their pass
+    marker.touch()
+    return collect_garbage(base_dir, archive_after_days, quota_mb, exclude)
@@ -0,0 +1,149 @@
+"""
+Incremental reader of a session's messages JSONL.
+
+The file is scanned through mmap, looking only at the type tag at the start of each line. Lines
+hidden by a later compaction marker are never parsed nor copied; the others are returned as raw
+lines for `Session` to turn into items only when they are needed.
+
+A forked session reads the history it shares with its parent from the parent's file, up to the
+byte offset recorded when it was forked, then applies its own lines on top, see `Session.fork`.
+"""
+
+import json
+import mmap
+import os
+import re
+from collections.abc import Container, Generator, Sequence
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, NamedTuple, cast
+
+# `journal.serialize_item` writes the type tag first, a short prefix of the line is enough
+_TYPE_TAG = re.compile(rb'\s*\{\s*"type"\s*:\s*"(\w+)"')
+_TAG_WINDOW = 96
+_TRAILING_WHITESPACE = b" \t\r"
+_CLOSING_BRACE = ord("}")
+
+COMPACTION_TYPE = "CompactionItem"
+USER_MESSAGE_TYPE = "UserMessageItem"
+
+
+class RawItem(NamedTuple):
+    type: str
+    line: bytes
+
+
+def _line_type(line: bytes) -> str | None:
+    try:
+        obj: Any = json.loads(line)
+    except ValueError:
+        return None
+    item_type = cast(dict[str, Any], obj).get("type") if isinstance(obj, dict) else None
+    return item_type if isinstance(item_type, str) else None
+
+
+def _kept_items(line: bytes) -> int | None:
+    try:
+        data = json.loads(line).get("data", {})
+        return max(0, int(data.get("kept_items", 0)))
+    except (ValueError, TypeError, AttributeError):
+        return None
+
+
+def _scan(
+    mm: mmap.mmap | bytes, size: int, known_types: Container[str], prefix: Sequence[RawItem]
+) -> list[tuple[str, int, int]]:
+    # Entries are (type, start, end) of a line, or (type, -1, index) of an item of `prefix`
+    view: list[tuple[str, int, int]] = [(item.type, -1, index) for index, item in enumerate(prefix)]
+    pos = 0
+    while pos < size:
+        end = mm.find(b"\n", pos, size)
+        if end == -1:
+            end = size
+        start, pos = pos, end + 1
+        while end > start and mm[end - 1] in _TRAILING_WHITESPACE:
+            end -= 1
+        # Blank, or cut short by a crash mid-write
+        if end == start or mm[end - 1] != _CLOSING_BRACE:
+            continue
+        match = _TYPE_TAG.match(mm[start : min(end, start + _TAG_WINDOW)])
+        item_type = match.group(1).decode() if match else _line_type(mm[start:end])
+        if item_type is None or item_type not in known_types:
+            continue
+        if item_type == COMPACTION_TYPE:
+            kept = _kept_items(mm[start:end])
+            if kept is None:
+                continue
+            view = [(item_type, start, end), *(view[len(view) - kept :] if kept > 0 else [])]
+            continue
+        view.append((item_type, start, end))
+    return view
+
+
+@contextmanager
+def _mapped(path: Path | None, limit: int | None) -> Generator[tuple[mmap.mmap | None, int]]:
+    try:
+        f = path.open("rb") if path is not None else None
+    except FileNotFoundError:
+        f = None
+    if f is None:
+        yield None, 0
+        return
+    with f:
+        size = os.fstat(f.fileno()).st_size
+        if limit is not None:
+            size = min(size, limit)
+        if size == 0:
+            yield None, 0
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            yield mm, size
+
+
+def read_history_view(
+    path: Path | None,
+    known_types: Container[str],
+    prefix: Sequence[RawItem] = (),
+    limit: int | None = None,
+) -> list[RawItem]:
+    """Raw lines of the history view stored in `path`: compaction markers applied, unknown types dropped.
+
+    `prefix` is the history inherited from a parent session, it comes before the first line and
+    compaction markers in `path` apply to it. Only the first `limit` bytes of `path` are read.
+    """
+    with _mapped(path, limit) as (mm, size):
+        if mm is None:
+            return list(prefix)
+        return _view(mm, size, known_types, prefix)
+
+
+def read_history_bytes(data: bytes, known_types: Container[str], prefix: Sequence[RawItem] = ()) -> list[RawItem]:
+    """Like `read_history_view`, for a messages JSONL already in memory (e.g. read from an archive)."""
+    return _view(data, len(data), known_types, prefix)
+
+
+def _view(mm: mmap.mmap | bytes, size: int, known_types: Container[str], prefix: Sequence[RawItem]) -> list[RawItem]:
+    return [
+        prefix[end] if start < 0 else RawItem(item_type, mm[start:end])
+        for item_type, start, end in _scan(mm, size, known_types, prefix)
+    ]
+
+
+def fork_offset(path: Path | None, known_types: Container[str], prefix: Sequence[RawItem], items: int) -> int:
+    """Bytes of `path` to read so that the first `items` items of its history view are all available."""
+    with _mapped(path, None) as (mm, size):
+        if mm is None:
+            return 0
+        view = _scan(mm, size, known_types, prefix)[:items]
+        return max((end for _, start, end in view if start >= 0), default=0)
+
+
+def tail_start(raw: list[RawItem], turns: int) -> int:
+    """Index of the first raw item of the last `turns` user turns."""
+    seen = 0
+    for index in range(len(raw) - 1, -1, -1):
+        if raw[index].type == USER_MESSAGE_TYPE:
+            seen += 1
+            if seen == turns:
+                return index
+    return 0
@@ -0,0 +1,240 @@
+"""
+Write-behind persistence of sessions.
+
+`Session.append_history` and `Session.save` only queue the change on the session's journal.
+Queued changes are written off the event loop in one batch when the agent reaches a tool call,
+turn or task boundary, or `FLUSH_DELAY_S` after the first change; without a running event loop
+(scripts, tests) they are written right away.
+
+- History items are appended to the messages JSONL file in the order they were queued.
+- Metadata updates coalesce: only the latest snapshot is written, to a temp file renamed over
+  the session file, so a crash leaves either the previous or the new metadata, never half of it.
+
+The durability policy decides when writes are fsynced: at the end of each task (default), at
+the end of each turn and tool call, or never, leaving it to the OS.
+"""
+
+import asyncio
+import atexit
+import dataclasses
+import json
+import os
+import threading
+from collections.abc import Callable, Sequence
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Literal
+
+from klaude_code.protocol.model import ConversationItem, ToolResultItem
+
+from .archive import restore_session
+from .blobs import LARGE_OUTPUT_CHARS, BlobStore
+from .catalog import CatalogEntry, get_catalog
+
+DurabilityPolicy = Literal["task", "turn", "never"]
+FlushBoundary = Literal["tool", "turn", "task"]
+
+# Queued changes are written at the latest this long after the first one
+FLUSH_DELAY_S = 1.0
+
+_durability_policy: DurabilityPolicy = "task"
+
+
+def set_durability_policy(policy: DurabilityPolicy) -> None:
+    global _durability_policy
+    _durability_policy = policy
+
+
+def get_durability_policy() -> DurabilityPolicy:
+    return _durability_policy
+
+
+def _should_fsync(boundary: FlushBoundary | None) -> bool:
+    if boundary is None or _durability_policy == "never":
+        return False
+    return _durability_policy == "turn" or boundary == "task"
+
+
+@dataclass(frozen=True)
+class MetadataSnapshot:
+    """Session metadata taken on the event loop, written later by the journal."""
+
+    seq: int
+    payload: dict[str, Any]
+    # `file_mtime_ns` is filled in once the file is written
+    catalog_entry: CatalogEntry
+
+
+def serialize_item(item: ConversationItem, blobs: BlobStore | None = None) -> str:
+    # Explicit type tag for reliable load
+    data = item.model_dump()
+    record: dict[str, Any] = {"type": item.__class__.__name__, "data": data}
+    if blobs is not None and isinstance(item, ToolResultItem) and len(item.output or "") > LARGE_OUTPUT_CHARS:
+        # Large outputs go to the blob store, `Session.load` puts them back
+        data["output"] = None
+        record["blobs"] = {"output": blobs.put((item.output or "").encode())}
+    return json.dumps(record, ensure_ascii=False)
+
+
+def _fsync_path(path: Path) -> None:
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class SessionJournal:
+    """Queue of the unwritten history items and metadata of one session."""
+
+    def __init__(
+        self,
+        session_id: str,
+        base_dir: Path,
+        session_file: Path,
+        messages_file: Path,
+        blobs: BlobStore,
+        snapshot: Callable[[int], MetadataSnapshot],
+    ):
+        self.session_id = session_id
+        self.base_dir = base_dir
+        self.session_file = session_file
+        self.messages_file = messages_file
+        self.blobs = blobs
+        self._snapshot = snapshot
+        self._items: list[ConversationItem] = []
+        self._metadata_dirty = False
+        self._metadata_seq = 0
+        self._written_seq = 0
+        self._unsynced: set[Path] = set()
+        # Writes run on worker threads and, without an event loop, on the caller's thread
+        self._io_lock = threading.Lock()
+        self._timer: asyncio.TimerHandle | None = None
+        self._timer_loop: asyncio.AbstractEventLoop | None = None
+
+    def record(self, items: Sequence[ConversationItem] = ()) -> None:
+        """Queue `items` for the messages file and mark the metadata as changed."""
+        self._items.extend(items)
+        self._metadata_dirty = True
+        _pending_journals.add(self)
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.flush_sync()
+            return
+        if self._timer is None or self._timer_loop is not loop or loop.is_closed():
+            self._timer = loop.call_later(FLUSH_DELAY_S, self._flush_later)
+            self._timer_loop = loop
+
+    @property
+    def has_pending(self) -> bool:
+        return bool(self._items) or self._metadata_dirty
+
+    def _flush_later(self) -> None:
+        self._timer = None
+        task = asyncio.create_task(self.flush())
+        _background_flushes.add(task)
+        task.add_done_callback(_background_flushes.discard)
+
+    def _take_snapshot(self) -> MetadataSnapshot | None:
+        if not self._metadata_dirty:
+            return None
+        self._metadata_dirty = False
+        self._metadata_seq += 1
+        return self._snapshot(self._metadata_seq)
+
+    async def flush(self, boundary: FlushBoundary | None = None) -> None:
+        """Write the queued changes on a worker thread, fsynced as the durability policy asks at `boundary`."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        fsync = _should_fsync(boundary)
+        if not self.has_pending and not (fsync and self._unsynced):
+            return
+        # The snapshot reads the session, it must be taken on the event loop
+        snapshot = self._take_snapshot()
+        await asyncio.to_thread(self._write, snapshot, fsync)
+        self._settle()
+
+    def flush_sync(self, boundary: FlushBoundary | None = None) -> None:
+        """Write the queued changes on the calling thread."""
+        fsync = _should_fsync(boundary)
+        if not self.has_pending and not (fsync and self._unsynced):
+            return
+        self._write(self._take_snapshot(), fsync)
+        self._settle()
+
+    def _settle(self) -> None:
+        if not self.has_pending:
+            _pending_journals.discard(self)
+
+    def _write(self, snapshot: MetadataSnapshot | None, fsync: bool) -> None:
+        with self._io_lock:
+            # Taken under the lock so concurrent flushes write the items in queue order
+            items, self._items = self._items, []
+            if items:
+                self._append_items(items)
+            # An older snapshot may arrive after a newer one was already written
+            if snapshot is not None and snapshot.seq > self._written_seq:
+                self._replace_metadata(snapshot, fsync)
+                self._written_seq = snapshot.seq
+            if items:
+                get_catalog(self.base_dir).index_messages(self.session_id, self.messages_file)
+            if fsync:
+                self.blobs.flush(fsync=True)
+                for path in sorted(self._unsynced):
+                    _fsync_path(path)
+                self._unsynced.clear()
+
+    def _append_items(self, items: list[ConversationItem]) -> None:
+        lines = "".join(f"{serialize_item(item, self.blobs)}\n" for item in items)
+        # Blobs first, a line never refers to a missing blob
+        self.blobs.flush()
+        if not self.messages_file.exists():
+            # Archived by a gc pass since it was loaded
+            restore_session(self.base_dir, self.session_id)
+        self.messages_file.parent.mkdir(parents=True, exist_ok=True)
+        with self.messages_file.open("a", encoding="utf-8") as f:
+            f.write(lines)
+        self._unsynced.add(self.messages_file)
+
+    def _replace_metadata(self, snapshot: MetadataSnapshot, fsync: bool) -> None:
+        if not self.session_file.exists():
+            # Archived by a gc pass since it was loaded, a new session file would orphan the archive
+            restore_session(self.base_dir, self.session_id)
+        sessions_dir = self.session_file.parent
+        sessions_dir.mkdir(parents=True, exist_ok=True)
+        dir_mtime_before_ns = sessions_dir.stat().st_mtime_ns
+        # Not a `.json` file, the catalog never indexes a leftover of a crash
+        tmp_file = sessions_dir / f".{self.session_file.name}.tmp"
+        with tmp_file.open("w", encoding="utf-8") as f:
+            f.write(json.dumps(snapshot.payload, ensure_ascii=False))
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp_file, self.session_file)
+        # The rename itself is only durable once the directory is synced
+        self._unsynced.add(sessions_dir)
+        entry = dataclasses.replace(snapshot.catalog_entry, file_mtime_ns=self.session_file.stat().st_mtime_ns)
+        get_catalog(self.base_dir).record(entry, dir_mtime_before_ns)
+
+
+_pending_journals: set[SessionJournal] = set()
+_background_flushes: set[asyncio.Task[None]] = set()
+
+
+async def flush_journals(boundary: FlushBoundary | None = "task") -> None:
+    """Write the queued changes of every session."""
+    for journal in list(_pending_journals):
+        await journal.flush(boundary)
+
+
+def flush_journals_sync(session_id: str | None = None) -> None:
+    """Write the queued changes of session `session_id`, or of every session, on the calling thread."""
+    for journal in list(_pending_journals):
+        if session_id is None or journal.session_id == session_id:
+            journal.flush_sync("task")
+
+
+# Last resort for changes still queued when the process exits
+atexit.register(flush_journals_sync)
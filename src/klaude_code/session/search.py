@@ -0,0 +1,102 @@
+"""
+Full-text search over the sessions of a project.
+
+The catalog keeps an FTS5 index of the user messages, assistant messages and tool calls of every
+session. It is fed incrementally: each journal write indexes the lines appended to the messages
+JSONL since the byte offset indexed last, so a search is an index query and never reads the
+session files. A hit points at the user turn of the matching item, counted in the session's own
+messages file, so it can be opened at that turn with `Session.load(tail_turns=...)`.
+"""
+
+import json
+import re
+from collections.abc import Iterable
+from dataclasses import dataclass
+from typing import Any, cast
+
+# Longer texts (tool call arguments with whole files) are only indexed up to this
+DOCUMENT_CHARS = 8 * 1024
+PREFIX_MIN_CHARS = 3
+_TOKEN = re.compile(r"\w+")
+
+
+@dataclass(frozen=True)
+class SearchHit:
+    session_id: str
+    work_dir: str
+    updated_at: float
+    first_user_message: str | None
+    # 1-based user turn of the matching item, and user turns of the session
+    turn: int
+    turns: int
+    kind: str
+    snippet: str
+    # bm25, lower is better
+    score: float
+
+    @property
+    def replay_turns(self) -> int:
+        """Turns to replay for the history to start at the matching one."""
+        return max(1, self.turns - self.turn + 1)
+
+
+def message_text(content: Any) -> str | None:
+    """Text of a message `content`, plain or structured."""
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        text_parts: list[str] = []
+        for part in cast(list[Any], content):
+            if isinstance(part, dict) and cast(dict[str, Any], part).get("type") == "text":
+                text = cast(dict[str, Any], part).get("text", "")
+                if isinstance(text, str):
+                    text_parts.append(text)
+        return " ".join(text_parts) if text_parts else None
+    return None
+
+
+def _document_text(item_type: str, data: dict[str, Any]) -> str | None:
+    match item_type:
+        case "UserMessageItem" | "AssistantMessageItem":
+            return message_text(data.get("content"))
+        case "ToolCallItem":
+            return f"{data.get('name', '')} {data.get('arguments', '')}"
+        case _:
+            return None
+
+
+def extract_documents(lines: Iterable[bytes], turns: int) -> tuple[list[tuple[int, str, str]], int]:
+    """(turn, type, text) of the searchable items of messages JSONL `lines`, and the turns after them.
+
+    `turns` is the number of user turns before the first line.
+    """
+    documents: list[tuple[int, str, str]] = []
+    for line in lines:
+        try:
+            obj = json.loads(line)
+        except ValueError:
+            continue
+        if not isinstance(obj, dict):
+            continue
+        item = cast(dict[str, Any], obj)
+        item_type = item.get("type")
+        data = item.get("data")
+        if not isinstance(item_type, str) or not isinstance(data, dict):
+            continue
+        if item_type == "UserMessageItem":
+            turns += 1
+        text = _document_text(item_type, cast(dict[str, Any], data))
+        if text and text.strip():
+            documents.append((turns, item_type, text[:DOCUMENT_CHARS]))
+    return documents, turns
+
+
+def match_expression(query: str) -> str | None:
+    """FTS5 query matching every word of `query`, the last one also as a prefix."""
+    tokens = _TOKEN.findall(query)
+    if not tokens:
+        return None
+    *words, last = tokens
+    # A shorter prefix matches so many terms that ranking the hits gets slow
+    last_term = f'"{last}"*' if len(last) >= PREFIX_MIN_CHARS else f'"{last}"'
+    return " ".join([*(f'"{word}"' for word in words), last_term])
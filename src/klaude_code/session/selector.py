@@ -1,32 +1,49 @@
 import time
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, NamedTuple
 
 from klaude_code.trace import log, log_debug
 
 if TYPE_CHECKING:
     from questionary import Choice
 
+from .search import SearchHit
 from .session import Session
 
+# Value of the picker entry opening the search prompt
+_SEARCH_CHOICE = "\0search"
 
-def resume_select_session() -> str | None:
+
+class SessionSelection(NamedTuple):
+    session_id: str
+    # Turns to replay for a search hit, the history then starts at the matching turn
+    replay_turns: int | None = None
+
+
+def _fmt(ts: float) -> str:
+    try:
+        return time.strftime("%m-%d %H:%M:%S", time.localtime(ts))
+    except Exception:
+        return str(ts)
+
+
+def _one_line(text: str) -> str:
+    return text.strip().replace("\n", " ↩ ")
+
+
+def resume_select_session() -> SessionSelection | None:
     sessions = Session.list_sessions()
     if not sessions:
         log("No sessions found for this project.")
         return None
 
-    def _fmt(ts: float) -> str:
-        try:
-            return time.strftime("%m-%d %H:%M:%S", time.localtime(ts))
-        except Exception:
-            return str(ts)
-
     try:
         import questionary
 
         choices: list[Choice] = []
         for s in sessions:
             first_user_message = s.first_user_message or "N/A"
+            if s.forked_from:
+                first_user_message = f"(fork) {first_user_message}"
             msg_count_display = "N/A" if s.messages_count == -1 else str(s.messages_count)
             model_display = s.model_name or "N/A"
 
@@ -40,11 +57,14 @@ def resume_select_session() -> str | None:
                 ),
                 (
                     "class:t",
-                    f"{first_user_message.strip().replace('\n', ' ↩ '):<50}",
+                    f"{_one_line(first_user_message):<50}",
                 ),
             ]
             choices.append(questionary.Choice(title=title, value=s.id))
-        return questionary.select(
+        choices.append(
+            questionary.Choice(title=[("class:d", "/ Search the messages of all sessions…")], value=_SEARCH_CHOICE)
+        )
+        selected = questionary.select(
             message=f"{' Created at':<17} {'Updated at':<16} {'Msg':>3}  {'Model':<15}  {'First message':<50}",
             choices=choices,
             pointer="→",
@@ -57,6 +77,13 @@ def resume_select_session() -> str | None:
                 ]
             ),
         ).ask()
+        if selected != _SEARCH_CHOICE:
+            return SessionSelection(selected) if selected else None
+        query = questionary.text("Search:").ask()
+        if not query:
+            return None
+        hit = search_select_session(query)
+        return SessionSelection(hit.session_id, hit.replay_turns) if hit else None
     except Exception as e:
         log_debug(f"Failed to use questionary for session select, {e}")
 
@@ -71,7 +98,51 @@ def resume_select_session() -> str | None:
             raw = input("Select a session number: ").strip()
             idx = int(raw)
             if 1 <= idx <= len(sessions):
-                return str(sessions[idx - 1].id)
+                return SessionSelection(str(sessions[idx - 1].id))
+        except Exception:
+            return None
+    return None
+
+
+def search_select_session(query: str, all_projects: bool = False, limit: int = 20) -> SearchHit | None:
+    """Pick one of the sessions matching `query`."""
+    hits = Session.search(query, limit=limit, all_projects=all_projects)
+    if not hits:
+        log(f"No sessions match {query!r}.")
+        return None
+
+    def _where(hit: SearchHit) -> str:
+        where = f"{_fmt(hit.updated_at)}  turn {hit.turn}/{hit.turns}"
+        return f"{where}  {hit.work_dir}" if all_projects else where
+
+    try:
+        import questionary
+
+        choices: list[Choice] = [
+            questionary.Choice(
+                title=[("class:d", f"{_where(hit)}  "), ("class:t", _one_line(hit.snippet))],
+                value=index,
+            )
+            for index, hit in enumerate(hits)
+        ]
+        selected: int | None = questionary.select(
+            message=f"Sessions matching {query!r}, opened at the matching turn",
+            choices=choices,
+            pointer="→",
+            instruction="↑↓ to move",
+            style=questionary.Style([("t", ""), ("d", "dim")]),
+        ).ask()
+        return hits[selected] if selected is not None else None
+    except Exception as e:
+        log_debug(f"Failed to use questionary for session search, {e}")
+
+        for i, hit in enumerate(hits, 1):
+            print(f"{i}. {_where(hit)}  {hit.session_id}  {_one_line(hit.snippet)}")
+        try:
+            raw = input("Select a session number: ").strip()
+            idx = int(raw)
+            if 1 <= idx <= len(hits):
+                return hits[idx - 1]
         except Exception:
             return None
     return None
@@ -1,16 +1,60 @@
+import asyncio
 import json
 import time
 import uuid
 from collections.abc import Iterable, Sequence
 from pathlib import Path
-from typing import ClassVar
+from typing import ClassVar, Literal
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, PrivateAttr
 
 from klaude_code.protocol import events, model
+from klaude_code.protocol.commands import CommandName
 from klaude_code.protocol.model import ConversationItem, TodoItem
 from klaude_code.protocol.tools import SubAgentType
 
+from .archive import find_archived_session, read_archived_messages, read_archived_metadata, restore_session
+from .blobs import get_blob_store
+from .catalog import CatalogEntry, get_catalog, message_preview
+from .history_reader import (
+    USER_MESSAGE_TYPE,
+    RawItem,
+    fork_offset,
+    read_history_bytes,
+    read_history_view,
+    tail_start,
+)
+from .journal import FlushBoundary, MetadataSnapshot, SessionJournal, flush_journals_sync
+from .search import SearchHit
+
+# Parent sessions followed when reading the history of a fork, guards against cycles
+MAX_FORK_DEPTH = 64
+# Sessions read at once by `load_sessions`
+LOAD_CONCURRENCY = 8
+# User turns replayed at once when resuming a session and by `/history more`
+REPLAY_PAGE_TURNS = 20
+
+ToolCallState = Literal["pending", "in_progress"]
+
+
+class ForkPoint(BaseModel):
+    """Where a forked session branched off its parent."""
+
+    session_id: str
+    # Bytes of the parent's messages JSONL shared with the fork
+    offset: int
+    # Items of the parent's history view at that offset shared with the fork
+    items: int
+
+
+class InterruptedTask(BaseModel):
+    """The task a session was running when its process died."""
+
+    # Tool calls of the task that have a result
+    completed_tool_calls: int
+    # Tool calls without a result, in the model's order
+    unfinished_tool_calls: list[tuple[model.ToolCallItem, ToolCallState]]
+
 
 class Session(BaseModel):
     id: str = Field(default_factory=lambda: uuid.uuid4().hex)
@@ -28,6 +72,12 @@ class Session(BaseModel):
     todos: list[TodoItem] = Field(default_factory=list)  # pyright: ignore[reportUnknownVariableType]
     # Messages count, redundant state for performance optimization to avoid reading entire jsonl file
     messages_count: int = Field(default=0)
+    # Parent of a session created by `fork`, the shared history stays in the parent's files
+    forked_from: ForkPoint | None = None
+    # Set while a task runs: a session loaded with it set was interrupted mid-task
+    task_running: bool = False
+    # Tool calls of the running turn without a result yet, by call id
+    inflight_tool_calls: dict[str, ToolCallState] = Field(default_factory=dict)
     # Model name used for this session
     # Used in list method SessionMetaBrief
     model_name: str | None = None
@@ -40,12 +90,23 @@ class Session(BaseModel):
     need_todo_empty_cooldown_counter: int = Field(exclude=True, default=0)
     need_todo_not_used_cooldown_counter: int = Field(exclude=True, default=0)
 
+    # Write-behind queue of the changes not on disk yet
+    _journal: SessionJournal | None = PrivateAttr(default=None)
+    # Older history items not materialized yet, see `load(tail_turns=...)`
+    _history_prefix: list[RawItem] = PrivateAttr(default_factory=lambda: list[RawItem]())
+    _history_task: asyncio.Task[None] | None = PrivateAttr(default=None)
+    # First user turn replayed to the UI so far, see `replay_page`
+    _replay_start_turn: int | None = PrivateAttr(default=None)
+    # Bumped when compaction rewrites the history, history positions are stable otherwise
+    _history_generation: int = PrivateAttr(default=0)
+
     # Internal: mapping for (de)serialization of conversation items
     _TypeMap: ClassVar[dict[str, type[BaseModel]]] = {
         # Messages
         "SystemMessageItem": model.SystemMessageItem,
         "DeveloperMessageItem": model.DeveloperMessageItem,
         "UserMessageItem": model.UserMessageItem,
+        "CompactionItem": model.CompactionItem,
         "AssistantMessageItem": model.AssistantMessageItem,
         # Reasoning/Thinking
         "ReasoningTextItem": model.ReasoningTextItem,
@@ -66,9 +127,18 @@ class Session(BaseModel):
         # Derive a stable per-project key from current working directory
         return str(Path.cwd()).strip("/").replace("/", "-")
 
+    @staticmethod
+    def _projects_dir() -> Path:
+        return Path.home() / ".klaude" / "project"
+
     @classmethod
     def _base_dir(cls) -> Path:
-        return Path.home() / ".klaude" / "project" / cls._project_key()
+        return cls._projects_dir() / cls._project_key()
+
+    @classmethod
+    def storage_dir(cls) -> Path:
+        """Directory holding the sessions of the current project."""
+        return cls._base_dir()
 
     @classmethod
     def _sessions_dir(cls) -> Path:
@@ -87,14 +157,63 @@ class Session(BaseModel):
         return self._messages_dir() / f"{prefix}-{self.id}.jsonl"
 
     @classmethod
-    def load(cls, id: str) -> "Session":
+    def _find_session_file(cls, id: str) -> Path | None:
+        """The session file of `id`, restored from the archive first if it is archived."""
+        session_file = cls._find_live_session_file(id)
+        if session_file is None and restore_session(cls._base_dir(), id):
+            session_file = cls._find_live_session_file(id)
+        return session_file
+
+    @classmethod
+    def _find_live_session_file(cls, id: str) -> Path | None:
+        # Changes of this session still queued in this process
+        flush_journals_sync(id)
+        candidates = sorted(cls._sessions_dir().glob(f"*-{id}.json"), key=lambda p: p.stat().st_mtime, reverse=True)
+        return candidates[0] if candidates else None
+
+    @classmethod
+    def _find_messages_file(cls, id: str) -> Path | None:
+        # Expect a single messages file per session (prefixed filenames only)
+        candidates = sorted(cls._messages_dir().glob(f"*-{id}.jsonl"), key=lambda p: p.stat().st_mtime, reverse=True)
+        return candidates[0] if candidates else None
+
+    @classmethod
+    def _inherited_history(cls, fork: ForkPoint | None, depth: int = 0) -> list[RawItem]:
+        """Raw history a fork shares with its parent, read from the parent's files or archive."""
+        if fork is None:
+            return []
+        if depth >= MAX_FORK_DEPTH:
+            raise ValueError(f"Fork chain of session {fork.session_id} is too deep")
+        session_file = cls._find_live_session_file(fork.session_id)
+        # An archived parent is read in place, only resuming it restores it
+        archive_file = None if session_file is not None else find_archived_session(cls._base_dir(), fork.session_id)
+        if session_file is not None:
+            metadata = json.loads(session_file.read_text())
+        elif archive_file is not None:
+            metadata = read_archived_metadata(archive_file) or {}
+        else:
+            # The parent was deleted, the fork keeps only its own history
+            return []
+        parent_fork = metadata.get("forked_from")
+        prefix = cls._inherited_history(ForkPoint(**parent_fork) if parent_fork else None, depth + 1)
+        if archive_file is not None:
+            raw = read_history_bytes(read_archived_messages(archive_file, fork.offset), cls._TypeMap, prefix)
+        else:
+            raw = read_history_view(cls._find_messages_file(fork.session_id), cls._TypeMap, prefix, limit=fork.offset)
+        return raw[: fork.items]
+
+    @classmethod
+    def load(cls, id: str, tail_turns: int | None = None) -> "Session":
+        """Load session `id`, or a new session if it does not exist.
+
+        With `tail_turns`, only the last `tail_turns` user turns are turned into items, the older
+        ones are kept raw until `load_full_history` is awaited.
+        """
         # Load session metadata
-        sessions_dir = cls._sessions_dir()
-        session_candidates = sorted(sessions_dir.glob(f"*-{id}.json"), key=lambda p: p.stat().st_mtime, reverse=True)
-        if not session_candidates:
+        session_path = cls._find_session_file(id)
+        if session_path is None:
             # No existing session; create a new one
             return Session(id=id, work_dir=Path.cwd())
-        session_path = session_candidates[0]
 
         raw = json.loads(session_path.read_text())
 
@@ -111,6 +230,9 @@ class Session(BaseModel):
         updated_at = float(raw.get("updated_at", created_at))
         messages_count = int(raw.get("messages_count", 0))
         model_name = raw.get("model_name")
+        forked_from = ForkPoint(**raw["forked_from"]) if raw.get("forked_from") else None
+        task_running = bool(raw.get("task_running", False))
+        inflight_tool_calls = dict(raw.get("inflight_tool_calls", {}))
 
         sess = Session(
             id=id,
@@ -125,112 +247,271 @@ class Session(BaseModel):
             created_at=created_at,
             updated_at=updated_at,
             messages_count=messages_count,
+            forked_from=forked_from,
+            task_running=task_running,
+            inflight_tool_calls=inflight_tool_calls,
             model_name=model_name,
         )
 
-        # Load conversation history from messages JSONL
-        messages_dir = cls._messages_dir()
-        # Expect a single messages file per session (prefixed filenames only)
-        msg_candidates = sorted(messages_dir.glob(f"*-{id}.jsonl"), key=lambda p: p.stat().st_mtime, reverse=True)
-        if msg_candidates:
-            messages_path = msg_candidates[0]
-            history: list[ConversationItem] = []
-            for line in messages_path.read_text().splitlines():
-                line = line.strip()
-                if not line:
-                    continue
-                try:
-                    obj = json.loads(line)
-                    t = obj.get("type")
-                    data = obj.get("data", {})
-                    cls_type = cls._TypeMap.get(t or "")
-                    if cls_type is None:
-                        continue
-                    item = cls_type(**data)
-                    # pyright: ignore[reportAssignmentType]
-                    history.append(item)  # type: ignore[arg-type]
-                except Exception:
-                    # Best-effort load; skip malformed lines
-                    continue
-            sess.conversation_history = history
-            # Update messages count based on loaded history
-            sess.messages_count = len(history)
+        # Load conversation history from messages JSONL, after the history shared with the parent of a fork
+        messages_file = cls._find_messages_file(id)
+        if messages_file is not None or forked_from is not None:
+            raw_items = read_history_view(messages_file, cls._TypeMap, cls._inherited_history(forked_from))
+            split = tail_start(raw_items, tail_turns) if tail_turns is not None else 0
+            # Older turns stay raw until `load_full_history`
+            sess._history_prefix = raw_items[:split]
+            sess.conversation_history = cls._materialize(raw_items[split:])
+            sess.messages_count = len(sess._history_prefix) + len(sess.conversation_history)
 
         return sess
 
+    def fork(self, items: int | None = None) -> "Session":
+        """A new session sharing the first `items` items of this history (all by default).
+
+        The fork only records this session's id and the size of its messages JSONL at that point,
+        the shared items are never copied; a later compaction of either side does not affect the other.
+        """
+        total = self.messages_count
+        if items is None:
+            items = total
+        elif items < 0:
+            items += total
+        if not 0 <= items <= total:
+            raise ValueError(f"Cannot fork at item {items}, the session has {total} history items")
+        # The fork point is found in the file, it must have every item
+        self.flush_sync()
+        prefix = self._inherited_history(self.forked_from)
+        offset = fork_offset(self._find_messages_file(self.id), self._TypeMap, prefix, items)
+        history = self._materialize(self._history_prefix) + self.conversation_history
+        forked = Session(
+            work_dir=self.work_dir,
+            system_prompt=self.system_prompt,
+            model_name=self.model_name,
+            # The shared history refers to the sub-agent runs of the parent
+            child_session_ids=list(self.child_session_ids),
+            forked_from=ForkPoint(session_id=self.id, offset=offset, items=items),
+            conversation_history=history[:items],
+            messages_count=items,
+        )
+        forked.save()
+        return forked
+
+    @classmethod
+    async def load_sessions(cls, ids: Sequence[str]) -> list["Session"]:
+        """Load sessions `ids` concurrently off the event loop, in the order of `ids`."""
+        semaphore = asyncio.Semaphore(LOAD_CONCURRENCY)
+
+        async def _load(id: str) -> "Session":
+            async with semaphore:
+                return await asyncio.to_thread(cls.load, id)
+
+        return list(await asyncio.gather(*(_load(id) for id in ids)))
+
     def save(self):
-        # Ensure directories exist
-        sessions_dir = self._sessions_dir()
-        messages_dir = self._messages_dir()
-        sessions_dir.mkdir(parents=True, exist_ok=True)
-        messages_dir.mkdir(parents=True, exist_ok=True)
-
-        # Persist session metadata (excluding conversation history)
-        # Update timestamps
+        """Queue a write of the session metadata (excluding conversation history)."""
+        self._touch()
+        self._get_journal().record()
+
+    def _touch(self) -> None:
         if self.created_at <= 0:
             self.created_at = time.time()
         self.updated_at = time.time()
+
+    async def flush(self, boundary: FlushBoundary | None = None) -> None:
+        """Write the queued history and metadata off the event loop, see `journal`."""
+        if self._journal is not None:
+            await self._journal.flush(boundary)
+
+    def flush_sync(self) -> None:
+        if self._journal is not None:
+            self._journal.flush_sync("task")
+
+    def _get_journal(self) -> SessionJournal:
+        if self._journal is None:
+            self._journal = SessionJournal(
+                session_id=self.id,
+                base_dir=self._base_dir(),
+                session_file=self._session_file(),
+                messages_file=self._messages_file(),
+                blobs=get_blob_store(self._base_dir()),
+                snapshot=self._metadata_snapshot,
+            )
+        return self._journal
+
+    def _metadata_snapshot(self, seq: int) -> MetadataSnapshot:
         payload = {
             "id": self.id,
             "work_dir": str(self.work_dir),
             "is_root_session": self.is_root_session,
             "sub_agent_type": self.sub_agent_type,
-            "child_session_ids": self.child_session_ids,
+            "child_session_ids": list(self.child_session_ids),
             "last_response_id": self.last_response_id,
-            "file_tracker": self.file_tracker,
+            "file_tracker": dict(self.file_tracker),
             "todos": [todo.model_dump() for todo in self.todos],
-            "loaded_memory": self.loaded_memory,
+            "loaded_memory": list(self.loaded_memory),
             "created_at": self.created_at,
             "updated_at": self.updated_at,
             "messages_count": self.messages_count,
+            "forked_from": self.forked_from.model_dump() if self.forked_from else None,
+            "task_running": self.task_running,
+            "inflight_tool_calls": dict(self.inflight_tool_calls),
             "model_name": self.model_name,
         }
-        self._session_file().write_text(json.dumps(payload, ensure_ascii=False, indent=2))
+        return MetadataSnapshot(seq=seq, payload=payload, catalog_entry=self._catalog_entry(self._session_file()))
+
+    def _catalog_entry(self, session_file: Path) -> CatalogEntry:
+        # Only the tail is loaded, the catalog keeps the first message it already indexed
+        history = self.conversation_history if self.has_full_history else []
+        first_user_message = next(
+            (
+                message_preview(item.content)
+                for item in history
+                if isinstance(item, model.UserMessageItem) and not isinstance(item, model.CompactionItem)
+            ),
+            None,
+        )
+        return CatalogEntry(
+            id=self.id,
+            path=str(session_file),
+            file_mtime_ns=0,
+            created_at=self.created_at,
+            updated_at=self.updated_at,
+            work_dir=str(self.work_dir),
+            model_name=self.model_name,
+            messages_count=self.messages_count,
+            first_user_message=first_user_message,
+            is_root_session=self.is_root_session,
+            sub_agent_type=self.sub_agent_type.value if self.sub_agent_type else None,
+            forked_from=self.forked_from.session_id if self.forked_from else None,
+        )
 
     def append_history(self, items: Sequence[ConversationItem]):
+        # Images are kept once in the blob store, the history only refers to them
+        get_blob_store(self._base_dir()).externalize_images(items)
         # Append to in-memory history
         self.conversation_history.extend(items)
         # Update messages count
-        self.messages_count = len(self.conversation_history)
+        self.messages_count = len(self._history_prefix) + len(self.conversation_history)
+        self._persist_history(items)
 
-        # Incrementally persist to JSONL under messages directory
-        messages_dir = self._messages_dir()
-        messages_dir.mkdir(parents=True, exist_ok=True)
-        mpath = self._messages_file()
-
-        with mpath.open("a", encoding="utf-8") as f:
-            for it in items:
-                # Serialize with explicit type tag for reliable load
-                t = it.__class__.__name__
-                data = it.model_dump()
-                f.write(json.dumps({"type": t, "data": data}, ensure_ascii=False))
-                f.write("\n")
-        # Refresh metadata timestamp after history change
+    def set_task_running(self, running: bool) -> None:
+        self.task_running = running
+        if not running:
+            self.inflight_tool_calls.clear()
         self.save()
 
-    @classmethod
-    def most_recent_session_id(cls) -> str | None:
-        sessions_dir = cls._sessions_dir()
-        if not sessions_dir.exists():
+    def set_tool_call_state(self, call_id: str, state: ToolCallState | None) -> None:
+        """Record the state of a tool call of the running turn, None once it has a result."""
+        if state is None:
+            self.inflight_tool_calls.pop(call_id, None)
+        else:
+            self.inflight_tool_calls[call_id] = state
+        self.save()
+
+    def interrupted_task(self) -> InterruptedTask | None:
+        """The task that was still running when the session was last written, None if it ended."""
+        if not self.task_running:
             return None
-        latest_id: str | None = None
-        latest_ts: float = -1.0
-        for p in sessions_dir.glob("*.json"):
+        task_items: list[ConversationItem] = []
+        for item in reversed(self.conversation_history):
+            if isinstance(item, model.UserMessageItem):
+                break
+            task_items.append(item)
+        results = {item.call_id for item in task_items if isinstance(item, model.ToolResultItem)}
+        calls = [item for item in reversed(task_items) if isinstance(item, model.ToolCallItem)]
+        # A call the metadata does not know about was written with it, before it could start
+        return InterruptedTask(
+            completed_tool_calls=sum(call.call_id in results for call in calls),
+            unfinished_tool_calls=[
+                (call, self.inflight_tool_calls.get(call.call_id, "pending"))
+                for call in calls
+                if call.call_id not in results
+            ],
+        )
+
+    def apply_compaction(self, item: model.CompactionItem) -> None:
+        """Replace older history with a compaction summary, keeping the last `item.kept_items` items."""
+        self.conversation_history = self._compacted_view(self.conversation_history, item)
+        self.messages_count = len(self.conversation_history)
+        self._history_generation += 1
+        self._replay_start_turn = None
+        # The compacted prefix is gone, so a stored response chain no longer matches the history
+        self.last_response_id = None
+        # The JSONL file stays append-only; the marker tells `load` how to rebuild this view
+        self._persist_history([item])
+
+    @classmethod
+    def _materialize(cls, raw: Sequence[RawItem]) -> list[ConversationItem]:
+        blobs = get_blob_store(cls._base_dir())
+        items: list[ConversationItem] = []
+        for entry in raw:
             try:
-                data = json.loads(p.read_text())
-                # Filter out non-root sessions
-                if not data.get("is_root_session", True):
-                    continue
-                sid = str(data.get("id", p.stem))
-                ts = float(data.get("updated_at", 0.0))
-                if ts <= 0:
-                    ts = p.stat().st_mtime
-                if ts > latest_ts:
-                    latest_ts = ts
-                    latest_id = sid
+                obj = json.loads(entry.line)
+                data = obj.get("data", {})
+                for field, digest in obj.get("blobs", {}).items():
+                    try:
+                        data[field] = blobs.get(digest).decode()
+                    except FileNotFoundError:
+                        data[field] = f"[{field} not found in the blob store: {digest}]"
+                items.append(cls._TypeMap[entry.type](**data))  # type: ignore[arg-type]
             except Exception:
+                # Best-effort load; skip malformed lines
                 continue
-        return latest_id
+        return items
+
+    @property
+    def has_full_history(self) -> bool:
+        return not self._history_prefix
+
+    def start_full_history_load(self) -> None:
+        """Start turning the older turns into items in the background."""
+        if self._history_prefix and self._history_task is None:
+            self._history_task = asyncio.create_task(self._load_history_prefix())
+
+    async def load_full_history(self) -> None:
+        """Make `conversation_history` complete after a `load` with `tail_turns`."""
+        if not self._history_prefix:
+            return
+        self.start_full_history_load()
+        assert self._history_task is not None
+        await asyncio.shield(self._history_task)
+
+    async def _load_history_prefix(self) -> None:
+        items = await asyncio.to_thread(self._materialize, self._history_prefix)
+        self.conversation_history[:0] = items
+        self._history_prefix = []
+        self.messages_count = len(self.conversation_history)
+
+    @staticmethod
+    def _compacted_view(history: list[ConversationItem], item: model.CompactionItem) -> list[ConversationItem]:
+        kept = history[len(history) - item.kept_items :] if item.kept_items > 0 else []
+        return [item, *kept]
+
+    def _persist_history(self, items: Sequence[ConversationItem]) -> None:
+        # Queued for the JSONL under messages directory, with a metadata refresh
+        self._touch()
+        self._get_journal().record(items)
+
+    @classmethod
+    def search(cls, query: str, limit: int = 20, all_projects: bool = False) -> list[SearchHit]:
+        """Root sessions of the current project, or of every project, matching `query`, best first."""
+        if not all_projects:
+            if not cls._sessions_dir().exists():
+                return []
+            return get_catalog(cls._base_dir()).search(query, limit)
+        hits: list[SearchHit] = []
+        projects_dir = cls._projects_dir()
+        if projects_dir.is_dir():
+            for base_dir in sorted(projects_dir.iterdir()):
+                if (base_dir / "sessions").is_dir():
+                    hits.extend(get_catalog(base_dir).search(query, limit))
+        return sorted(hits, key=lambda hit: hit.score)[:limit]
+
+    @classmethod
+    def most_recent_session_id(cls) -> str | None:
+        if not cls._sessions_dir().exists():
+            return None
+        return get_catalog(cls._base_dir()).most_recent_root_session_id()
 
     def need_turn_start(self, prev_item: model.ConversationItem | None, item: model.ConversationItem) -> bool:
         # Emit TurnStartEvent when a new turn starts to show an empty line in replay history
@@ -245,9 +526,54 @@ class Session(BaseModel):
             return True
         return False
 
-    def get_history_item(self) -> Iterable[events.HistoryItemEvent]:
+    def _history_types(self) -> list[str]:
+        # Item types of the whole history, without materializing the older turns
+        return [raw.type for raw in self._history_prefix] + [type(item).__name__ for item in self.conversation_history]
+
+    def _history_slice(self, start: int, end: int) -> list[ConversationItem]:
+        split = len(self._history_prefix)
+        items = self._materialize(self._history_prefix[start:end]) if start < split else []
+        return items + self.conversation_history[max(start - split, 0) : max(end - split, 0)]
+
+    @property
+    def replay_start_turn(self) -> int | None:
+        """Index of the first user turn replayed so far, None before any replay."""
+        return self._replay_start_turn
+
+    def replay_page(
+        self, turns: int, before_turn: int | None = None, is_load: bool = True
+    ) -> events.ReplayHistoryEvent | None:
+        """Replay of the `turns` user turns before turn `before_turn` (0-based, default: the end).
+
+        None once the start of the history is reached. Only the items of the page are turned into
+        events, the older ones are only counted.
+        """
+        types = self._history_types()
+        turn_starts = [index for index, item_type in enumerate(types) if item_type == USER_MESSAGE_TYPE]
+        end_turn = len(turn_starts) if before_turn is None else min(before_turn, len(turn_starts))
+        if not types or (end_turn == 0 and before_turn is not None):
+            return None
+        start_turn = max(end_turn - turns, 0)
+        # Items before the first turn (a compaction summary) go with it
+        start = turn_starts[start_turn] if start_turn > 0 else 0
+        end = turn_starts[end_turn] if end_turn < len(turn_starts) else len(types)
+        self._replay_start_turn = start_turn
+        earlier = types[:start]
+        return events.ReplayHistoryEvent(
+            session_id=self.id,
+            events=list(self.get_history_item(self._history_slice(start, end))),
+            updated_at=self.updated_at,
+            is_load=is_load,
+            earlier_turns=start_turn,
+            earlier_items=len(earlier),
+            earlier_tool_calls=earlier.count("ToolCallItem"),
+            cache_key=f"{self.id}:{self._history_generation}:{start}:{end}",
+        )
+
+    def get_history_item(self, items: Sequence[ConversationItem] | None = None) -> Iterable[events.HistoryItemEvent]:
         prev_item: model.ConversationItem | None = None
-        for it in self.conversation_history:
+        child_index = {child_id: index for index, child_id in enumerate(self.child_session_ids, 1)}
+        for it in self.conversation_history if items is None else items:
             if self.need_turn_start(prev_item, it):
                 yield events.TurnStartEvent(
                     session_id=self.id,
@@ -277,7 +603,22 @@ class Session(BaseModel):
                         session_id=self.id,
                         status=tr.status,
                     )
-                    # TODO: Replay Sub-Agent Events
+                    # Sub-agent tools keep the id of the child session, its history is loaded on `/expand`
+                    if tr.ui_extra is not None and tr.ui_extra in child_index:
+                        yield events.SubAgentCollapsedEvent(
+                            session_id=self.id,
+                            child_session_id=tr.ui_extra,
+                            tool_name=str(tr.tool_name),
+                            index=child_index[tr.ui_extra],
+                        )
+                case model.CompactionItem() as ci:
+                    yield events.DeveloperMessageEvent(
+                        session_id=self.id,
+                        item=model.DeveloperMessageItem(
+                            content=ci.content,
+                            command_output=model.CommandOutput(command_name=CommandName.COMPACT),
+                        ),
+                    )
                 case model.UserMessageItem() as um:
                     yield events.UserMessageEvent(
                         content=um.content or "",
@@ -315,98 +656,27 @@ class Session(BaseModel):
         first_user_message: str | None = None
         messages_count: int = -1  # -1 indicates N/A
         model_name: str | None = None
+        forked_from: str | None = None
 
     @classmethod
     def list_sessions(cls) -> list[SessionMetaBrief]:
-        """List all sessions for the current project.
+        """List the root sessions of the current project from the session catalog.
 
-        Returns a list of dicts with keys: id, created_at, updated_at, work_dir, path.
         Sorted by updated_at descending.
         """
-        sessions_dir = cls._sessions_dir()
-        if not sessions_dir.exists():
+        if not cls._sessions_dir().exists():
             return []
-
-        def _get_first_user_message(session_id: str, created_at: float) -> str | None:
-            """Get the first user message from the session's jsonl file."""
-            messages_dir = cls._messages_dir()
-            if not messages_dir.exists():
-                return None
-
-            # Find the messages file for this session
-            prefix = time.strftime("%Y-%m-%d-%H-%M-%S", time.localtime(created_at))
-            msg_file = messages_dir / f"{prefix}-{session_id}.jsonl"
-
-            if not msg_file.exists():
-                # Try to find by pattern if exact file doesn't exist
-                msg_candidates = sorted(
-                    messages_dir.glob(f"*-{session_id}.jsonl"), key=lambda p: p.stat().st_mtime, reverse=True
-                )
-                if not msg_candidates:
-                    return None
-                msg_file = msg_candidates[0]
-
-            try:
-                for line in msg_file.read_text().splitlines():
-                    line = line.strip()
-                    if not line:
-                        continue
-                    obj = json.loads(line)
-                    if obj.get("type") == "UserMessageItem":
-                        data = obj.get("data", {})
-                        content = data.get("content", "")
-                        if isinstance(content, str):
-                            return content
-                        elif isinstance(content, list) and content:
-                            # Handle structured content - extract text
-                            text_parts: list[str] = []
-                            for part in content:  # pyright: ignore[reportUnknownVariableType]
-                                if isinstance(part, dict) and part.get("type") == "text":  # pyright: ignore[reportUnknownMemberType]
-                                    text = part.get("text", "")  # pyright: ignore[reportUnknownVariableType, reportUnknownMemberType]
-                                    if isinstance(text, str):
-                                        text_parts.append(text)
-                            return " ".join(text_parts) if text_parts else None
-                        return None
-            except Exception:
-                return None
-            return None
-
-        items: list[Session.SessionMetaBrief] = []
-        for p in sessions_dir.glob("*.json"):
-            try:
-                data = json.loads(p.read_text())
-            except Exception:
-                # Skip unreadable files
-                continue
-            # Filter out non-root sessions
-            if not data.get("is_root_session", True):
-                continue
-            sid = str(data.get("id", p.stem))
-            created = float(data.get("created_at", p.stat().st_mtime))
-            updated = float(data.get("updated_at", p.stat().st_mtime))
-            work_dir = str(data.get("work_dir", ""))
-
-            # Get first user message
-            first_user_message = _get_first_user_message(sid, created)
-
-            # Get messages count from session data, no fallback
-            messages_count = int(data.get("messages_count", -1))  # -1 indicates N/A
-
-            # Get model name from session data
-            model_name = data.get("model_name")
-
-            items.append(
-                Session.SessionMetaBrief(
-                    id=sid,
-                    created_at=created,
-                    updated_at=updated,
-                    work_dir=work_dir,
-                    path=str(p),
-                    first_user_message=first_user_message,
-                    messages_count=messages_count,
-                    model_name=model_name,
-                )
+        return [
+            Session.SessionMetaBrief(
+                id=entry.id,
+                created_at=entry.created_at,
+                updated_at=entry.updated_at,
+                work_dir=entry.work_dir,
+                path=entry.path,
+                first_user_message=entry.first_user_message,
+                messages_count=entry.messages_count,
+                model_name=entry.model_name,
+                forked_from=entry.forked_from,
             )
-        # Sort by updated_at desc
-        items.sort(key=lambda d: d.updated_at, reverse=True)
-        return items
+            for entry in get_catalog(cls._base_dir()).list_root_sessions()
+        ]
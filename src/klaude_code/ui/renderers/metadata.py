@@ -167,3 +167,16 @@ def render_resume_loaded(updated_at: float) -> RenderableType:
         Text(" LOADED ", style=ThemeKey.RESUME_FLAG),
         Text(f" ◷ {strftime('%Y-%m-%d %H:%M:%S', localtime(updated_at))}", style=ThemeKey.RESUME_INFO),
     )
+
+
+def render_replay_summary(e: events.ReplayHistoryEvent) -> RenderableType:
+    """Header of a replayed page, counting what is not shown."""
+    return Text.assemble(
+        ("⋯ ", ThemeKey.METADATA_DIM),
+        (f"{format_number(e.earlier_turns)} earlier turns", ThemeKey.METADATA),
+        (
+            f" ({format_number(e.earlier_items)} items, {format_number(e.earlier_tool_calls)} tool calls)"
+            " not shown, /history more to show older turns",
+            ThemeKey.METADATA_DIM,
+        ),
+    )
@@ -249,6 +249,17 @@ def render_task_result(e: events.ToolResultEvent, *, quote_style: Style, code_th
     return Quote(NoInsetMarkdown(e.result, code_theme=code_theme), style=quote_style)
 
 
+def render_sub_agent_collapsed(e: events.SubAgentCollapsedEvent) -> RenderableType:
+    """One line standing for the history of a sub-agent run, until it is expanded."""
+    expand_hint = f"/expand {e.index}" if e.index is not None else "/expand"
+    return Padding.indent(
+        Text.assemble(
+            ("▸ ", ThemeKey.TOOL_MARK), (f"{e.tool_name} history collapsed, {expand_hint}", ThemeKey.TOOL_RESULT)
+        ),
+        level=2,
+    )
+
+
 def render_generic_tool_result(result: str, *, is_error: bool = False) -> RenderableType:
     """Render a generic tool result as indented, truncated text."""
     style = ThemeKey.ERROR if is_error else ThemeKey.TOOL_RESULT
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import json
 from typing import Awaitable, Callable
 
 from klaude_code.protocol import events
@@ -17,6 +18,9 @@ from klaude_code.ui.renderers.common import truncate_display
 from klaude_code.ui.repl.renderer import REPLRenderer, SessionStatus
 from klaude_code.ui.rich_ext.markdown import MarkdownStream, NoInsetMarkdown
 
+DEFAULT_STATUS_TEXT = "Thinking …"
+TOOL_CALL_PREVIEW_CHARS = 60
+
 
 class StreamState:
     def __init__(self, interval: float, flush_handler: Callable[["StreamState"], Awaitable[None]]):
@@ -42,6 +46,8 @@ class DisplayEventHandler:
         self.renderer = renderer
         self.notifier = notifier
         self.assistant_stream = StreamState(interval=1 / 20, flush_handler=self._flush_assistant_buffer)
+        # Spinner status between tool call previews
+        self.status_text = DEFAULT_STATUS_TEXT
 
         self.stage_manager = StageManager(
             finish_assistant=self.finish_assistant_stream,
@@ -63,7 +69,7 @@ class DisplayEventHandler:
                     task_event.session_id,
                     SessionStatus(
                         is_subagent=task_event.is_sub_agent,
-                        color=self.renderer.get_sub_agent_color()
+                        color=self.renderer.get_sub_agent_color_for_tool_call(task_event.parent_tool_call_id)
                         if task_event.is_sub_agent
                         else None,  # sub agent color should be advanced in tool call display, not here
                         sub_agent_type=task_event.sub_agent_type,
@@ -122,9 +128,19 @@ class DisplayEventHandler:
                 self.assistant_stream.mdstream = None
                 await self.stage_manager.transition_to(Stage.WAITING)
                 self.renderer.spinner.start()
-            case events.TurnToolCallStartEvent():
-                pass
+            case events.TurnToolCallStartEvent() as tool_call_start_event:
+                if self.renderer.is_sub_agent_session(tool_call_start_event.session_id):
+                    return
+                self.renderer.spinner.update(
+                    r_status.render_status_text(
+                        self._tool_call_preview_text(tool_call_start_event), ThemeKey.SPINNER_STATUS_BOLD
+                    )
+                )
             case events.ToolCallEvent() as tool_call_event:
+                if not self.renderer.is_sub_agent_session(tool_call_event.session_id):
+                    self.renderer.spinner.update(
+                        r_status.render_status_text(self.status_text, ThemeKey.SPINNER_STATUS_BOLD)
+                    )
                 await self.stage_manager.transition_to(Stage.TOOL_CALL)
                 with self.renderer.session_print_context(tool_call_event.session_id):
                     self.renderer.display_tool_call(tool_call_event)
@@ -140,15 +156,10 @@ class DisplayEventHandler:
                     self.renderer.print(r_metadata.render_response_metadata(metadata_event))
                     self.renderer.print()
             case events.TodoChangeEvent() as todo_event:
-                active_form_status_text = self._extract_active_form_text(todo_event)
-                if len(active_form_status_text) > 0:
-                    self.renderer.spinner.update(
-                        r_status.render_status_text(active_form_status_text, ThemeKey.SPINNER_STATUS_BOLD)
-                    )
-                else:
-                    self.renderer.spinner.update(
-                        r_status.render_status_text("Thinking …", ThemeKey.SPINNER_STATUS_BOLD)
-                    )
+                self.status_text = self._extract_active_form_text(todo_event) or DEFAULT_STATUS_TEXT
+                self.renderer.spinner.update(
+                    r_status.render_status_text(self.status_text, ThemeKey.SPINNER_STATUS_BOLD)
+                )
             case events.TurnEndEvent():
                 pass
             case events.TaskFinishEvent() as task_finish_event:
@@ -222,6 +233,18 @@ class DisplayEventHandler:
     def _should_suppress_subagent_thinking(self, session_id: str) -> bool:
         return self.renderer.is_sub_agent_session(session_id)
 
+    def _tool_call_preview_text(self, event: events.TurnToolCallStartEvent) -> str:
+        """The tool name and its first argument, e.g. "Bash git status", while the call streams in."""
+        try:
+            arguments = json.loads(event.arguments)
+        except json.JSONDecodeError:
+            return event.tool_name
+        first = next((value for value in arguments.values() if isinstance(value, str)), "")
+        first = " ".join(first.split())
+        if len(first) > TOOL_CALL_PREVIEW_CHARS:
+            first = first[: TOOL_CALL_PREVIEW_CHARS - 1] + "…"
+        return f"{event.tool_name} {first}".strip()
+
     def _extract_active_form_text(self, todo_event: events.TodoChangeEvent) -> str:
         for todo in todo_event.todos:
             if todo.status == "in_progress":
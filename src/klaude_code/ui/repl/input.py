@@ -13,6 +13,7 @@ from typing import NamedTuple, cast, override
 
 from PIL import Image, ImageGrab
 from prompt_toolkit import PromptSession
+from prompt_toolkit.buffer import Buffer
 from prompt_toolkit.completion import Completer, Completion, ThreadedCompleter
 from prompt_toolkit.document import Document
 from prompt_toolkit.formatted_text import HTML, FormattedText
@@ -188,8 +189,16 @@ def _(event):  # type: ignore
 
 
 class PromptToolkitInput(InputProviderABC):
-    def __init__(self, prompt: str = "▌ ", status_provider: Callable[[], REPLStatusSnapshot] | None = None):
+    def __init__(
+        self,
+        prompt: str = "▌ ",
+        status_provider: Callable[[], REPLStatusSnapshot] | None = None,
+        on_first_keystroke: Callable[[], None] | None = None,
+    ):
         self._status_provider = status_provider
+        # Called once per prompt, when the input box is first edited
+        self._on_first_keystroke = on_first_keystroke
+        self._edited = False
 
         project = str(Path.cwd()).strip("/").replace("/", "-")
         history_path = Path.home() / ".klaude" / "project" / f"{project}" / "input_history.txt"
@@ -222,6 +231,14 @@ class PromptToolkitInput(InputProviderABC):
                 }
             ),
         )
+        self._session.default_buffer.on_text_changed += self._handle_text_changed
+
+    def _handle_text_changed(self, buffer: Buffer) -> None:
+        if self._edited or not buffer.text:
+            return
+        self._edited = True
+        if self._on_first_keystroke is not None:
+            self._on_first_keystroke()
 
     def _render_bottom_toolbar(self) -> FormattedText:
         """Render bottom toolbar with working directory, git branch on left, model name and context usage on right."""
@@ -272,6 +289,7 @@ class PromptToolkitInput(InputProviderABC):
     @override
     async def iter_inputs(self) -> AsyncIterator[str]:
         while True:
+            self._edited = False
             with patch_stdout():
                 line: str = await self._session.prompt_async()
             yield line
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+from collections import OrderedDict
 from contextlib import contextmanager
 from dataclasses import dataclass
 from typing import Any, Iterator
@@ -25,6 +26,9 @@ from klaude_code.ui.renderers.common import truncate_display
 from klaude_code.ui.rich_ext.markdown import NoInsetMarkdown
 from klaude_code.ui.rich_ext.quote import Quote
 
+# Rendered replay pages kept, paging back to one of them prints it without rendering again
+REPLAY_CACHE_PAGES = 16
+
 
 @dataclass
 class SessionStatus:
@@ -49,6 +53,10 @@ class REPLRenderer:
         self.session_map: dict[str, SessionStatus] = {}
         self.current_session_status: SessionStatus | None = None
         self.subagent_color_index = 0
+        # Colour picked for each sub-agent tool call, so concurrent sub agents keep their own colour
+        self.sub_agent_tool_call_colors: dict[str, Style] = {}
+        # (page cache key, console width) -> rendered output
+        self._replay_cache: OrderedDict[tuple[str, int], str] = OrderedDict()
 
     def register_session(self, session_id: str, status: SessionStatus) -> None:
         self.session_map[session_id] = status
@@ -73,6 +81,11 @@ class REPLRenderer:
             return Style()
         return palette[self.subagent_color_index]
 
+    def get_sub_agent_color_for_tool_call(self, tool_call_id: str | None) -> Style:
+        if tool_call_id is not None and tool_call_id in self.sub_agent_tool_call_colors:
+            return self.sub_agent_tool_call_colors[tool_call_id]
+        return self.get_sub_agent_color()
+
     def box_style(self) -> Box:
         return box.ROUNDED
 
@@ -127,6 +140,7 @@ class REPLRenderer:
                 self.print(r_tools.render_generic_tool_call(e.tool_name, e.arguments, "◈"))
             case _ if r_tools.is_sub_agent_tool(e.tool_name):
                 style = self.pick_sub_agent_color()  # advance sub agent color index here
+                self.sub_agent_tool_call_colors[e.tool_call_id] = style
                 self.print(r_tools.render_task_call(e, style.color))
             case _:
                 self.print(r_tools.render_generic_tool_call(e.tool_name, e.arguments))
@@ -147,7 +161,9 @@ class REPLRenderer:
                 self.print(
                     r_tools.render_task_result(
                         e,
-                        quote_style=self._session_color(e.session_id),
+                        quote_style=self.sub_agent_tool_call_colors.pop(
+                            e.tool_call_id, self._session_color(e.session_id)
+                        ),
                         code_theme=self.themes.code_theme,
                     )
                 )
@@ -176,8 +192,39 @@ class REPLRenderer:
             self.print()
 
     async def replay_history(self, history_events: events.ReplayHistoryEvent) -> None:
+        if history_events.sub_agent_type is not None:
+            # The expanded history of a sub-agent run, quoted like the live one
+            self.register_session(
+                history_events.session_id,
+                SessionStatus(
+                    is_subagent=True,
+                    color=self.pick_sub_agent_color(),
+                    sub_agent_type=history_events.sub_agent_type,
+                ),
+            )
+        if history_events.earlier_turns or history_events.earlier_items:
+            self.print(r_metadata.render_replay_summary(history_events))
+        if history_events.cache_key is None:
+            with self.session_print_context(history_events.session_id):
+                self._replay_events(history_events.events)
+            return
+
+        key = (history_events.cache_key, self.console.width)
+        output = self._replay_cache.get(key)
+        if output is None:
+            with self.session_print_context(history_events.session_id), self.console.capture() as capture:
+                self._replay_events(history_events.events)
+            output = self._replay_cache[key] = capture.get()
+            if len(self._replay_cache) > REPLAY_CACHE_PAGES:
+                self._replay_cache.popitem(last=False)
+        else:
+            self._replay_cache.move_to_end(key)
+        self.console.file.write(output)
+        self.console.file.flush()
+
+    def _replay_events(self, history_events: list[events.HistoryItemEvent]) -> None:
         tool_call_dict: dict[str, events.ToolCallEvent] = {}
-        for event in history_events.events:
+        for event in history_events:
             match event:
                 case events.TurnStartEvent():
                     self.print()
@@ -211,6 +258,9 @@ class REPLRenderer:
                 case events.InterruptEvent():
                     self.print()
                     self.print(r_user_input.render_interrupt())
+                case events.SubAgentCollapsedEvent() as collapsed_event:
+                    self.print(r_tools.render_sub_agent_collapsed(collapsed_event))
+                    self.print()
 
     def display_developer_message(self, e: events.DeveloperMessageEvent) -> None:
         if not r_developer.need_render_developer_message(e):
@@ -0,0 +1,46 @@
+"""A scripted LLM client for tests that drive an agent without a provider."""
+
+from collections.abc import AsyncGenerator
+
+from klaude_code.llm.client import LLMClientABC
+from klaude_code.protocol import llm_parameter, model
+
+
+def fake_config(model_name: str = "claude-fake", provider_name: str = "") -> llm_parameter.LLMConfigParameter:
+    return llm_parameter.LLMConfigParameter(
+        protocol=llm_parameter.LLMClientProtocol.ANTHROPIC, provider_name=provider_name, model=model_name
+    )
+
+
+def is_summary_request(param: llm_parameter.LLMCallParameter) -> bool:
+    last = param.input[-1]
+    return isinstance(last, model.UserMessageItem) and "create a detailed summary" in (last.content or "")
+
+
+class ScriptedLLMClient(LLMClientABC):
+    """Records its calls and answers each with the next queued response, then with `done`.
+
+    Subclasses override `respond` to answer based on the request.
+    """
+
+    def __init__(
+        self,
+        responses: list[list[model.ConversationItem]] | None = None,
+        config: llm_parameter.LLMConfigParameter | None = None,
+    ):
+        super().__init__(config or fake_config())
+        self.responses = list(responses or [])
+        self.calls: list[llm_parameter.LLMCallParameter] = []
+
+    @classmethod
+    def create(cls, config: llm_parameter.LLMConfigParameter) -> "LLMClientABC":
+        return cls(config=config)
+
+    async def respond(self, param: llm_parameter.LLMCallParameter) -> list[model.ConversationItem]:
+        answer = self.responses.pop(0) if self.responses else [model.AssistantMessageItem(content="done")]
+        return [*answer, model.ResponseMetadataItem()]
+
+    async def call(self, param: llm_parameter.LLMCallParameter) -> AsyncGenerator[model.ConversationItem, None]:
+        self.calls.append(param)
+        for item in await self.respond(param):
+            yield item
@@ -0,0 +1,80 @@
+import unittest
+from typing import Any
+
+from klaude_code.llm.anthropic.cache_plan import AnthropicInputCache, plan_cache_breakpoints
+from klaude_code.llm.anthropic.input import convert_history_to_input, convert_system_to_input, convert_tool_schema
+from klaude_code.protocol import llm_parameter, model
+
+_MODEL = "claude-fake"
+_TOOLS = [llm_parameter.ToolSchema(name="Read", type="function", description="read", parameters={})]
+
+
+def _tool_turn(i: int) -> list[model.ConversationItem]:
+    return [
+        model.AssistantMessageItem(content=f"reading {i}"),
+        model.ToolCallItem(call_id=f"c{i}", name="Read", arguments="{}"),
+        model.ToolResultItem(call_id=f"c{i}", output="contents", status="success"),
+        model.DeveloperMessageItem(content=f"reminder {i}"),
+    ]
+
+
+def _breakpoints(request: dict[str, Any]) -> list[str]:
+    marked: list[str] = []
+    for name in ("tools", "system"):
+        marked.extend(name for block in request[name] if "cache_control" in block)
+    for index, message in enumerate(request["messages"]):
+        marked.extend(f"message {index}" for block in message["content"] if "cache_control" in block)
+    return marked
+
+
+class TestCachePlan(unittest.TestCase):
+    def setUp(self) -> None:
+        self.cache = AnthropicInputCache()
+        self.history: list[model.ConversationItem] = [model.UserMessageItem(content="hello")]
+
+    def _request(self, system: str = "system") -> tuple[dict[str, Any], Any]:
+        messages = convert_history_to_input(self.history, _MODEL, self.cache.messages)
+        request: dict[str, Any] = {
+            "messages": messages,
+            "system": convert_system_to_input(system),
+            "tools": convert_tool_schema(_TOOLS),
+        }
+        plan = plan_cache_breakpoints(messages, request["system"], request["tools"], self.cache.breakpoints)
+        return request, plan
+
+    def test_anchor_follows_the_previous_tail(self):
+        request, plan = self._request()
+        self.assertEqual(_breakpoints(request), ["tools", "system", "message 0"])
+        self.assertEqual(plan.expected_hit_messages, 0)
+
+        for i in range(3):
+            previous_tail = len(request["messages"]) - 1
+            self.history.extend(_tool_turn(i))
+            request, plan = self._request()
+            tail = len(request["messages"]) - 1
+            self.assertEqual(_breakpoints(request), ["tools", "system", f"message {previous_tail}", f"message {tail}"])
+            self.assertTrue(plan.tools_cached and plan.system_cached)
+            self.assertEqual(plan.anchor_index, previous_tail)
+            self.assertEqual(plan.expected_hit_messages, previous_tail + 1)
+
+        # Breakpoints are set on copies, the cached conversion stays unmarked
+        unmarked = convert_history_to_input(self.history, _MODEL, self.cache.messages)
+        self.assertEqual(_breakpoints({"tools": [], "system": [], "messages": unmarked}), [])
+
+    def test_changed_tail_falls_back_to_the_last_stable_message(self):
+        self.history.extend(_tool_turn(0))
+        self._request()
+        # A retried turn whose reminder was merged into the tail
+        self.history.append(model.DeveloperMessageItem(content="another reminder"))
+        request, plan = self._request()
+        tail = len(request["messages"]) - 1
+        self.assertEqual(plan.anchor_index, tail - 1)
+        self.assertEqual(plan.expected_hit_messages, 0)
+
+    def test_system_change_invalidates_message_hits(self):
+        self._request()
+        self.history.extend(_tool_turn(0))
+        _, plan = self._request(system="another system")
+        self.assertTrue(plan.tools_cached)
+        self.assertFalse(plan.system_cached)
+        self.assertEqual(plan.expected_hit_messages, 0)
@@ -0,0 +1,96 @@
+import asyncio
+import unittest
+from collections.abc import AsyncIterator
+from typing import Any
+from unittest import mock
+
+from anthropic.types.beta.beta_raw_message_start_event import BetaRawMessageStartEvent
+
+from klaude_code.llm.anthropic.client import CACHE_WARM_PROMPT, AnthropicClient
+from klaude_code.protocol import llm_parameter, model
+
+_TOOLS = [llm_parameter.ToolSchema(name="Read", type="function", description="read", parameters={})]
+
+
+class _Stream:
+    def __init__(self, cache_read: int, cache_write: int):
+        self.closed = False
+        self._event = BetaRawMessageStartEvent.model_validate(
+            {
+                "type": "message_start",
+                "message": {
+                    "id": "msg_1",
+                    "type": "message",
+                    "role": "assistant",
+                    "model": "claude-fake",
+                    "content": [],
+                    "stop_reason": None,
+                    "stop_sequence": None,
+                    "usage": {
+                        "input_tokens": 3,
+                        "output_tokens": 0,
+                        "cache_read_input_tokens": cache_read,
+                        "cache_creation_input_tokens": cache_write,
+                    },
+                },
+            }
+        )
+
+    async def __aiter__(self) -> AsyncIterator[Any]:
+        yield self._event
+        raise AssertionError("the warm-up reads past message_start")
+
+    async def close(self) -> None:
+        self.closed = True
+
+
+class TestCacheWarming(unittest.TestCase):
+    def setUp(self) -> None:
+        self.client = AnthropicClient(
+            llm_parameter.LLMConfigParameter(
+                protocol=llm_parameter.LLMClientProtocol.ANTHROPIC, model="claude-fake", api_key="key"
+            )
+        )
+        self.stream = _Stream(cache_read=1200, cache_write=40)
+        self.create = mock.AsyncMock(return_value=self.stream)
+        self.client.client.beta.messages.create = self.create  # type: ignore[method-assign]
+        self.history: list[model.ConversationItem] = [
+            model.UserMessageItem(content="hello"),
+            model.AssistantMessageItem(content="hi"),
+        ]
+
+    def _warm(self, thinking: llm_parameter.Thinking | None = None) -> Any:
+        param = llm_parameter.LLMCallParameter(
+            input=self.history, system="system", tools=_TOOLS, session_id="s1", thinking=thinking
+        )
+        return asyncio.run(self.client.warm_cache(param))
+
+    def test_warm_up_primes_the_prefix_and_reports_the_hit(self):
+        result = self._warm()
+        assert result is not None
+        self.assertTrue(result.hit)
+        self.assertEqual((result.cached_tokens, result.written_tokens), (1200, 40))
+        self.assertTrue(self.stream.closed)
+
+        request = self.create.call_args.kwargs
+        self.assertEqual(request["max_tokens"], 1)
+        messages = request["messages"]
+        self.assertEqual(messages[-1]["content"][0]["text"], CACHE_WARM_PROMPT)
+        # The history tail carries the breakpoint the next request reads from
+        self.assertIn("cache_control", messages[-2]["content"][-1])
+        self.assertIn("cache_control", request["tools"][-1])
+        breakpoints = self.client._input_caches.get("s1").breakpoints  # pyright: ignore[reportPrivateUsage, reportOptionalMemberAccess]
+        self.assertEqual(breakpoints.tail_index, len(self.history) - 1)
+
+    def test_warm_ups_are_rate_limited_per_session(self):
+        self.assertIsNotNone(self._warm())
+        self.assertIsNone(self._warm())
+        self.assertEqual(self.create.await_count, 1)
+
+    def test_thinking_settings_are_kept(self):
+        thinking = llm_parameter.Thinking(type="enabled", budget_tokens=2048)
+        self.assertIsNotNone(self._warm(thinking))
+        request = self.create.call_args.kwargs
+        # Changing the thinking settings would invalidate the cached messages
+        self.assertEqual(request["thinking"], {"type": "enabled", "budget_tokens": 2048})
+        self.assertGreater(request["max_tokens"], 2048)
@@ -15,6 +15,7 @@ from klaude_code.core.tool.command_safety import (  # noqa: E402
     _find_unquoted_token,
     _split_bash_lc_relaxed,
     _split_script_tail,
+    is_read_only_command,
     is_safe_command,
     strip_bash_lc,
     strip_bash_lc_argv,
@@ -271,5 +272,47 @@ class TestCommandSafety(unittest.TestCase):
         self.assert_unsafe("awk 'print | \"cat\"'", "piping output")
 
 
+class TestReadOnlyCommand(unittest.TestCase):
+    def test_read_only(self):
+        for command in [
+            "fd -e py",
+            "rg -n foo",
+            "rg --pre-glob '*.gz' foo",
+            "git diff HEAD~1",
+            "git log --oneline -5",
+            "tree -L 2",
+            "date +%s",
+            "sort -n a.txt",
+        ]:
+            self.assertTrue(is_read_only_command(command), command)
+
+    def test_line_breaks_are_not_read_only(self):
+        for command in ["cat a\nrm -rf b", "ls\ntouch x", "ls\r\ntouch x", "bash -lc 'ls\ntouch x'"]:
+            self.assertFalse(is_read_only_command(command), command)
+
+    def test_options_that_write_or_execute(self):
+        for command in [
+            "fd . -x rm",
+            "fd . -X rm",
+            "fd . --exec rm",
+            "fd . --exec-batch rm",
+            "rg --pre rm foo",
+            "rg --pre=rm foo",
+            "git diff --output=x",
+            "git log --output x",
+            "git show --output=x HEAD",
+            "git grep -O foo",
+            "tree -o out",
+            "date -s 2020-01-01",
+            "sort -o out a.txt",
+            "sort -no out a.txt",
+            "sort --output=out a.txt",
+            "sort --out=x y",
+            "sort --compress-program=sh x",
+            "fd . --exe rm",
+        ]:
+            self.assertFalse(is_read_only_command(command), command)
+
+
 if __name__ == "__main__":
     unittest.main()
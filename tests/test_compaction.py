@@ -0,0 +1,117 @@
+import asyncio
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from fake_llm import ScriptedLLMClient, is_summary_request
+
+from klaude_code.core.agent import Agent, AgentLLMClients
+from klaude_code.core.compaction import CompactionError, CompactionPolicy, compact_session, find_compaction_boundary
+from klaude_code.protocol import events, llm_parameter, model
+from klaude_code.session.session import Session
+
+
+class _SummaryClient(ScriptedLLMClient):
+    """Answers summary requests with a fixed summary and everything else with `done`."""
+
+    def __init__(self, context_usage_percent: float | None = None):
+        super().__init__()
+        self.context_usage_percent = context_usage_percent
+
+    async def respond(self, param: llm_parameter.LLMCallParameter) -> list[model.ConversationItem]:
+        content = "the summary" if is_summary_request(param) else "done"
+        usage = model.Usage(context_usage_percent=self.context_usage_percent)
+        return [model.AssistantMessageItem(content=content), model.ResponseMetadataItem(usage=usage)]
+
+
+def _turns(count: int) -> list[model.ConversationItem]:
+    history: list[model.ConversationItem] = []
+    for i in range(count):
+        history.extend(
+            [
+                model.UserMessageItem(content=f"question {i}"),
+                model.ToolCallItem(call_id=f"c{i}", name="Read", arguments="{}"),
+                model.ToolResultItem(call_id=f"c{i}", output="x", status="success"),
+                model.AssistantMessageItem(content=f"answer {i}"),
+            ]
+        )
+    return history
+
+
+class TestCompactionBoundary(unittest.TestCase):
+    def test_boundary_falls_on_turn_start(self):
+        history = _turns(3)
+        # Turn starts: user 0, tool call 1, assistant 3, user 4, ...; keep the last two turns
+        boundary = find_compaction_boundary(history, keep_recent_turns=2)
+        self.assertEqual(boundary, 9)
+        self.assertIsInstance(history[boundary], model.ToolCallItem)
+
+    def test_nothing_to_compact(self):
+        self.assertIsNone(find_compaction_boundary(_turns(1), keep_recent_turns=3))
+        summary_only = [model.CompactionItem(content="s"), *_turns(1)]
+        self.assertIsNone(find_compaction_boundary(summary_only, keep_recent_turns=3))
+
+
+class TestCompactSession(unittest.TestCase):
+    def setUp(self) -> None:
+        self._orig_cwd = os.getcwd()
+        self._tmp = tempfile.TemporaryDirectory()
+        os.chdir(self._tmp.name)
+        self._env = mock.patch.dict(os.environ, {"HOME": self._tmp.name})
+        self._env.start()
+
+    def tearDown(self) -> None:
+        self._env.stop()
+        os.chdir(self._orig_cwd)
+        self._tmp.cleanup()
+
+    def test_compaction_keeps_recent_turns_and_todos_and_survives_reload(self):
+        session = Session(work_dir=Path.cwd())
+        session.todos = [model.TodoItem(content="finish the port", status="in_progress")]
+        session.append_history(_turns(4))
+        # Keeping three turns keeps the whole last user exchange
+        kept_tail = session.conversation_history[-4:]
+
+        item = asyncio.run(compact_session(session, _SummaryClient(), tools=None, keep_recent_turns=3))
+
+        self.assertIn("the summary", item.content or "")
+        self.assertIn("- [in_progress] finish the port", item.content or "")
+        self.assertEqual(session.conversation_history, [item, *kept_tail])
+
+        session.append_history([model.UserMessageItem(content="after")])
+        loaded = Session.load(session.id)
+        self.assertEqual(loaded.conversation_history, session.conversation_history)
+        self.assertIsInstance(loaded.conversation_history[0], model.CompactionItem)
+
+    def test_compaction_requires_history(self):
+        session = Session(work_dir=Path.cwd())
+        with self.assertRaises(CompactionError):
+            asyncio.run(compact_session(session, _SummaryClient(), tools=None))
+
+    def test_agent_compacts_automatically_over_threshold(self):
+        session = Session(work_dir=Path.cwd())
+        session.append_history(_turns(6))
+        client = _SummaryClient(context_usage_percent=90.0)
+        agent = Agent(
+            AgentLLMClients(main=client),
+            session,
+            vanilla=True,
+            compaction_policy=CompactionPolicy(auto_threshold_percent=85.0, keep_recent_turns=2),
+        )
+
+        async def _run() -> list[events.Event]:
+            first = [e async for e in agent.run_task("first")]
+            second = [e async for e in agent.run_task("second")]
+            return first + second
+
+        emitted = asyncio.run(_run())
+
+        compactions = [
+            e for e in emitted if isinstance(e, events.DeveloperMessageEvent) and e.item.command_output is not None
+        ]
+        # The first task starts without usage information; the second sees 90% from the first
+        self.assertEqual(len(compactions), 1)
+        self.assertIsInstance(session.conversation_history[0], model.CompactionItem)
+        self.assertEqual(client.calls[-1].input[0], session.conversation_history[0])
@@ -0,0 +1,183 @@
+import asyncio
+import os
+import tempfile
+import unittest
+from collections.abc import AsyncGenerator
+from pathlib import Path
+from unittest import mock
+
+from fake_llm import ScriptedLLMClient, fake_config
+
+from klaude_code.config.config import Config, ModelConfig
+from klaude_code.core.agent import Agent, AgentLLMClients
+from klaude_code.llm import failover
+from klaude_code.llm.client import LLMClientABC
+from klaude_code.llm.failover import FailoverClient, latency_percentile
+from klaude_code.protocol import events, llm_parameter, model
+from klaude_code.session.session import Session
+
+
+class _ScriptedClient(ScriptedLLMClient):
+    """Waits `delay` seconds, then yields `error` or an answer naming the model."""
+
+    def __init__(self, name: str, delay: float = 0.0, error: model.StreamErrorItem | None = None):
+        super().__init__(config=fake_config(name, provider_name=name))
+        self.delay = delay
+        self.error = error
+        self.closed = 0
+
+    async def call(self, param: llm_parameter.LLMCallParameter) -> AsyncGenerator[model.ConversationItem, None]:
+        param = llm_parameter.apply_config_defaults(param, self.get_llm_config())
+        self.calls.append(param)
+        try:
+            yield model.StartItem(response_id=f"{self.model_name}-response")
+            await asyncio.sleep(self.delay)
+            if self.error is not None:
+                yield self.error
+                return
+            yield model.AssistantMessageItem(content=f"answer from {param.model}")
+            yield model.ResponseMetadataItem(model_name=str(param.model))
+        finally:
+            self.closed += 1
+
+
+def _collect(client: LLMClientABC) -> list[model.ConversationItem]:
+    async def _run() -> list[model.ConversationItem]:
+        param = llm_parameter.LLMCallParameter(input=[model.UserMessageItem(content="hi")], session_id="session")
+        return [item async for item in client.call(param)]
+
+    return asyncio.run(_run())
+
+
+def _answers(items: list[model.ConversationItem]) -> list[str | None]:
+    return [item.content for item in items if isinstance(item, model.AssistantMessageItem)]
+
+
+class TestFailoverClient(unittest.TestCase):
+    def test_fails_over_on_server_errors_only(self):
+        primary = _ScriptedClient("primary", error=model.StreamErrorItem(error="502", kind="network"))
+        fallback = _ScriptedClient("fallback")
+        items = _collect(FailoverClient([primary, fallback]))
+        self.assertEqual(_answers(items), ["answer from fallback"])
+        self.assertFalse(any(isinstance(item, model.StreamErrorItem) for item in items))
+        # The fallback got its own model, not the primary's defaults
+        self.assertEqual(fallback.calls[0].model, "fallback")
+
+        primary = _ScriptedClient("primary", error=model.StreamErrorItem(error="400", kind="fatal"))
+        fallback = _ScriptedClient("fallback")
+        items = _collect(FailoverClient([primary, fallback]))
+        self.assertIsInstance(items[-1], model.StreamErrorItem)
+        self.assertEqual(fallback.calls, [])
+
+    def test_first_token_timeout_reissues_on_the_next_model(self):
+        primary = _ScriptedClient("primary", delay=10.0)
+        fallback = _ScriptedClient("fallback")
+        items = _collect(FailoverClient([primary, fallback], first_token_timeout_s=0.05))
+        self.assertEqual(_answers(items), ["answer from fallback"])
+        self.assertEqual(
+            [item.response_id for item in items if isinstance(item, model.StartItem)], ["fallback-response"]
+        )
+        self.assertEqual(primary.closed, 1)
+
+    def test_hedged_request_first_answer_wins(self):
+        with mock.patch.object(failover, "MIN_HEDGE_DELAY_S", 0.0):
+            primary = _ScriptedClient("primary", delay=0.5)
+            fallback = _ScriptedClient("fallback")
+            client = FailoverClient([primary, fallback], hedge_percentile=95)
+            self.assertIsNone(client.hedge_delay(primary))
+            for _ in range(failover.MIN_HEDGE_SAMPLES):
+                client._latencies[id(primary)].append(0.02)  # pyright: ignore[reportPrivateUsage]
+
+            self.assertEqual(_answers(_collect(client)), ["answer from fallback"])
+            self.assertEqual(primary.closed, 1)
+
+            # The primary answers first after the hedge was sent, the hedge is cancelled
+            primary.delay, fallback.delay = 0.1, 10.0
+            self.assertEqual(_answers(_collect(client)), ["answer from primary"])
+            self.assertEqual(len(fallback.calls), 2)
+            self.assertEqual(fallback.closed, 2)
+
+    def test_exhausted_providers_are_left_out_of_the_chain(self):
+        cooling, spent, ready = (_ScriptedClient(name) for name in ("cooling", "spent", "ready"))
+        cooling.retry_budget.cooldown(30.0)
+        spent.retry_budget.tokens = 0.0
+        try:
+            chain = FailoverClient([ready, cooling, spent])
+            self.assertEqual(chain._ordered_clients(), [ready])  # pyright: ignore[reportPrivateUsage]
+            self.assertEqual(_answers(_collect(FailoverClient([cooling, ready]))), ["answer from ready"])
+            self.assertEqual(cooling.calls, [])
+            # With nothing else left, the provider ready again soonest goes first
+            only_exhausted = FailoverClient([cooling, spent])
+            self.assertEqual(only_exhausted._ordered_clients(), [spent, cooling])  # pyright: ignore[reportPrivateUsage]
+        finally:
+            cooling.retry_budget._cooldown_until = 0.0  # pyright: ignore[reportPrivateUsage]
+            spent.retry_budget.tokens = spent.retry_budget.capacity
+
+    def test_latency_percentile(self):
+        samples = [float(i) for i in range(1, 101)]
+        self.assertEqual(latency_percentile(samples, 95), 95.0)
+        self.assertEqual(latency_percentile(samples[:1], 95), 1.0)
+        self.assertIsNone(latency_percentile([], 95))
+
+
+class TestFailoverConfig(unittest.TestCase):
+    def test_model_chain(self):
+        config = Config(
+            main_model="main",
+            provider_list=[
+                llm_parameter.LLMConfigProviderParameter(
+                    provider_name="a", protocol=llm_parameter.LLMClientProtocol.ANTHROPIC, api_key="k"
+                ),
+                llm_parameter.LLMConfigProviderParameter(
+                    provider_name="b", protocol=llm_parameter.LLMClientProtocol.OPENAI, api_key="k"
+                ),
+            ],
+            model_list=[
+                ModelConfig(
+                    model_name="main",
+                    provider="a",
+                    model_params=llm_parameter.LLMConfigModelParameter(model="m1"),
+                    fallback_models=["backup", "main"],
+                ),
+                ModelConfig(
+                    model_name="backup", provider="b", model_params=llm_parameter.LLMConfigModelParameter(model="m2")
+                ),
+            ],
+        )
+        self.assertEqual([c.model for c in config.get_model_chain("main")], ["m1", "m2"])
+        client = config.create_llm_client("main")
+        self.assertIsInstance(client, FailoverClient)
+        self.assertEqual(client.model_name, "m1")
+        self.assertNotIsInstance(config.create_llm_client("backup"), FailoverClient)
+
+
+class TestAgentCommitsOnce(unittest.TestCase):
+    def setUp(self) -> None:
+        self._orig_cwd = os.getcwd()
+        self._tmp = tempfile.TemporaryDirectory()
+        os.chdir(self._tmp.name)
+        self._env = mock.patch.dict(os.environ, {"HOME": self._tmp.name})
+        self._env.start()
+
+    def tearDown(self) -> None:
+        self._env.stop()
+        os.chdir(self._orig_cwd)
+        self._tmp.cleanup()
+
+    def test_only_the_winning_response_is_recorded(self):
+        primary = _ScriptedClient("primary", delay=10.0)
+        fallback = _ScriptedClient("fallback")
+        session = Session(work_dir=Path.cwd())
+        agent = Agent(
+            AgentLLMClients(main=FailoverClient([primary, fallback], first_token_timeout_s=0.05)),
+            session,
+            vanilla=True,
+        )
+
+        async def _run() -> list[events.Event]:
+            return [e async for e in agent.run_task("go")]
+
+        emitted = asyncio.run(_run())
+        self.assertFalse(any(isinstance(e, events.ErrorEvent) for e in emitted))
+        assistant = [item for item in session.conversation_history if isinstance(item, model.AssistantMessageItem)]
+        self.assertEqual([item.content for item in assistant], ["answer from fallback"])
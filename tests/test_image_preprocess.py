@@ -0,0 +1,73 @@
+import io
+import unittest
+
+from PIL import Image
+
+from klaude_code.core.tool import image_preprocess
+from klaude_code.core.tool.image_preprocess import PROVIDER_IMAGE_LIMITS, ImageLimits, prepare_image, target_size
+from klaude_code.protocol.llm_parameter import LLMClientProtocol
+
+
+def _image_bytes(image: Image.Image, format: str) -> bytes:
+    buffer = io.BytesIO()
+    image.save(buffer, format)
+    return buffer.getvalue()
+
+
+def _photo(size: tuple[int, int]) -> Image.Image:
+    return Image.effect_noise(size, 48).convert("RGB")
+
+
+class TestTargetSize(unittest.TestCase):
+    def test_provider_limits(self):
+        anthropic = PROVIDER_IMAGE_LIMITS[LLMClientProtocol.ANTHROPIC]
+        openai = PROVIDER_IMAGE_LIMITS[LLMClientProtocol.OPENAI]
+        self.assertEqual(target_size(800, 600, anthropic), (800, 600))
+        # 1568 px on the long edge would exceed 1.15 megapixels
+        self.assertEqual(target_size(4000, 3000, anthropic), (1238, 928))
+        self.assertEqual(target_size(4000, 1000, anthropic), (1568, 392))
+        self.assertEqual(target_size(4000, 3000, openai), (1024, 768))
+        self.assertEqual(target_size(8000, 1000, openai), (2048, 256))
+
+
+class TestPrepareImage(unittest.TestCase):
+    def setUp(self) -> None:
+        image_preprocess._cache.clear()
+
+    def test_large_png_is_scaled_and_recompressed(self):
+        data = _image_bytes(_photo((3000, 2000)), "PNG")
+        prepared = prepare_image(data, "image/png", PROVIDER_IMAGE_LIMITS[LLMClientProtocol.ANTHROPIC])
+        self.assertTrue(prepared.resized)
+        self.assertEqual((prepared.original_width, prepared.original_height), (3000, 2000))
+        # Noise compresses far better as JPEG
+        self.assertEqual(prepared.mime_type, "image/jpeg")
+        self.assertLess(len(prepared.data), len(data) / 10)
+        with Image.open(io.BytesIO(prepared.data)) as image:
+            self.assertEqual(image.size, (prepared.width, prepared.height))
+
+    def test_small_image_is_kept_as_is(self):
+        data = _image_bytes(_photo((64, 64)), "JPEG")
+        prepared = prepare_image(data, "image/jpeg")
+        self.assertFalse(prepared.resized)
+        self.assertEqual(prepared.data, data)
+        self.assertEqual(prepared.mime_type, "image/jpeg")
+
+    def test_transparency_is_kept(self):
+        image = _photo((2000, 1000)).convert("RGBA")
+        image.putalpha(128)
+        prepared = prepare_image(_image_bytes(image, "PNG"), "image/png")
+        self.assertEqual(prepared.mime_type, "image/png")
+        with Image.open(io.BytesIO(prepared.data)) as result:
+            self.assertEqual(result.mode, "RGBA")
+            self.assertEqual(result.size, (1516, 758))
+
+    def test_results_are_cached_per_limits(self):
+        data = _image_bytes(_photo((2000, 2000)), "PNG")
+        small = ImageLimits(max_long_edge=100)
+        first = prepare_image(data, "image/png", small)
+        self.assertIs(prepare_image(data, "image/png", small), first)
+        self.assertEqual(prepare_image(data, "image/png", ImageLimits(max_long_edge=200)).width, 200)
+
+    def test_undecodable_data_raises(self):
+        with self.assertRaises(OSError):
+            prepare_image(b"not an image", "image/png")
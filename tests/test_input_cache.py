@@ -0,0 +1,115 @@
+import time
+import unittest
+from collections.abc import Callable
+from typing import Any
+
+from klaude_code.llm.anthropic import input as anthropic_input
+from klaude_code.llm.input_cache import ConvertedPrefix, SessionInputCaches
+from klaude_code.llm.openai_compatible import input as openai_compatible_input
+from klaude_code.llm.openrouter import input as openrouter_input
+from klaude_code.llm.responses import input as responses_input
+from klaude_code.protocol import model
+
+_MODEL = "fake-model"
+
+
+def _turn(i: int) -> list[model.ConversationItem]:
+    return [
+        model.UserMessageItem(content=f"question {i}"),
+        model.ReasoningTextItem(content=f"thinking {i}"),
+        model.ReasoningEncryptedItem(encrypted_content=f"sig {i}", model=_MODEL),
+        model.ToolCallItem(call_id=f"c{i}", name="Read", arguments='{"file_path": "a.py"}'),
+        model.ResponseMetadataItem(),
+        model.ToolResultItem(call_id=f"c{i}", output="contents", status="success"),
+        model.DeveloperMessageItem(content=f"reminder {i}"),
+        model.ReasoningTextItem(content=f"more thinking {i}"),
+        model.ReasoningEncryptedItem(encrypted_content=f"sig {i}b", model=_MODEL),
+        model.AssistantMessageItem(content=f"answer {i}"),
+        model.ResponseMetadataItem(),
+    ]
+
+
+def _history(turns: int) -> list[model.ConversationItem]:
+    return [item for i in range(turns) for item in _turn(i)]
+
+
+_Convert = Callable[[list[model.ConversationItem], Any], list[Any]]
+
+_CONVERTERS: dict[str, tuple[_Convert, Callable[[], Any]]] = {
+    "anthropic": (lambda h, c: anthropic_input.convert_history_to_input(h, _MODEL, c), ConvertedPrefix),
+    "openai_compatible": (
+        lambda h, c: openai_compatible_input.convert_history_to_input(h, "system", _MODEL, c),
+        ConvertedPrefix,
+    ),
+    "openrouter": (lambda h, c: openrouter_input.convert_history_to_input(h, "system", _MODEL, c), ConvertedPrefix),
+    "responses": (
+        lambda h, c: responses_input.convert_history_to_input(h, _MODEL, c),
+        responses_input.ResponsesInputCache,
+    ),
+}
+
+
+class TestIncrementalConversion(unittest.TestCase):
+    def test_cached_conversion_matches_full_conversion_after_every_append(self):
+        items = _history(3)
+        for name, (convert, factory) in _CONVERTERS.items():
+            with self.subTest(provider=name):
+                cache = factory()
+                history: list[model.ConversationItem] = []
+                for item in items:
+                    history.append(item)
+                    self.assertEqual(convert(list(history), cache), convert(list(history), None))
+
+    def test_cache_is_reset_when_history_is_replaced(self):
+        history = _history(4)
+        compacted: list[model.ConversationItem] = [model.CompactionItem(content="summary"), *history[-5:]]
+        for name, (convert, factory) in _CONVERTERS.items():
+            with self.subTest(provider=name):
+                cache = factory()
+                convert(history, cache)
+                self.assertEqual(convert(compacted, cache), convert(compacted, None))
+                self.assertEqual(convert(history[:7], cache), convert(history[:7], None))
+
+    def test_responses_keeps_reasoning_of_the_last_user_turn_only(self):
+        cache = responses_input.ResponsesInputCache()
+        history = _history(2)
+        responses_input.convert_history_to_input(history, _MODEL, cache)
+        history.extend(_turn(2))
+        converted = responses_input.convert_history_to_input(history, _MODEL, cache)
+        reasoning = [item for item in converted if item["type"] == "reasoning"]
+        self.assertEqual([item["encrypted_content"] for item in reasoning], ["sig 2", "sig 2b"])
+        self.assertEqual(reasoning[0]["summary"][0]["text"], "thinking 2")
+
+
+class TestSessionInputCaches(unittest.TestCase):
+    def test_least_recently_used_session_is_evicted(self):
+        caches: SessionInputCaches[ConvertedPrefix[Any]] = SessionInputCaches(ConvertedPrefix, max_sessions=2)
+        first = caches.get("a")
+        second = caches.get("b")
+        self.assertIs(caches.get("a"), first)
+        caches.get("c")
+        self.assertIs(caches.get("a"), first)
+        self.assertIsNot(caches.get("b"), second)
+        self.assertIsNone(caches.get(None))
+
+
+class TestConversionBenchmark(unittest.TestCase):
+    def test_per_turn_conversion_time_stays_flat(self):
+        """Convert one more turn of a synthetic 2,000-item session, with and without the cache."""
+        history = _history(2000 // len(_turn(0)))
+        self.assertGreaterEqual(len(history), 1980)
+        for name, (convert, factory) in _CONVERTERS.items():
+            with self.subTest(provider=name):
+                cache = factory()
+                convert(history, cache)
+                full_s = cached_s = 0.0
+                grown = list(history)
+                for i in range(5):
+                    grown = [*grown, *_turn(1000 + i)]
+                    started = time.perf_counter()
+                    convert(grown, cache)
+                    cached_s += time.perf_counter() - started
+                    started = time.perf_counter()
+                    convert(grown, None)
+                    full_s += time.perf_counter() - started
+                self.assertLess(cached_s * 5, full_s, f"{name}: cached {cached_s:.4f}s vs full {full_s:.4f}s")
@@ -0,0 +1,79 @@
+import unittest
+from typing import Any
+
+from klaude_code.llm.anthropic.input import convert_history_to_input as convert_anthropic
+from klaude_code.llm.prefix_analysis import PrefixHashAnalyzer
+from klaude_code.llm.responses.input import convert_history_to_input as convert_responses
+from klaude_code.protocol import model
+from klaude_code.session.cache_report import cache_hit_ratio, iter_cache_analyses
+
+_MODEL = "fake-model"
+
+
+def _turn(i: int) -> list[model.ConversationItem]:
+    return [
+        model.UserMessageItem(content=f"question {i}"),
+        model.ReasoningTextItem(content=f"thinking {i}"),
+        model.ReasoningEncryptedItem(encrypted_content=f"sig {i}", model=_MODEL),
+        model.AssistantMessageItem(content=f"answer {i}"),
+    ]
+
+
+class TestPrefixHashAnalyzer(unittest.TestCase):
+    def setUp(self) -> None:
+        self.analyzer = PrefixHashAnalyzer()
+
+    def _analyze(self, messages: list[Any], system: str = "system", model_name: str = _MODEL):
+        return self.analyzer.analyze("session", model_name, system, [{"name": "Read"}], messages)
+
+    def test_appending_keeps_the_whole_prefix(self):
+        history = _turn(0)
+        first = self._analyze(convert_anthropic(history, _MODEL))
+        self.assertEqual(first.cause, "first request")
+
+        history.append(model.UserMessageItem(content="next"))
+        second = self._analyze(convert_anthropic(history, _MODEL))
+        self.assertIsNone(second.break_at)
+        self.assertEqual(second.shared_blocks, first.block_count)
+
+    def test_reminder_merged_into_the_tail(self):
+        history: list[model.ConversationItem] = [model.UserMessageItem(content="question")]
+        self._analyze(convert_anthropic(history, _MODEL))
+        history.append(model.DeveloperMessageItem(content="<system-reminder>todo list is empty</system-reminder>"))
+        analysis = self._analyze(convert_anthropic(history, _MODEL))
+        self.assertEqual(analysis.break_at, "message 0")
+        self.assertEqual(analysis.cause, "reminder")
+        self.assertEqual(analysis.shared_blocks, 2)
+
+    def test_reasoning_dropped_after_a_new_user_message(self):
+        history = _turn(0)
+        self._analyze(convert_responses(history, _MODEL))
+        history.append(model.UserMessageItem(content="next"))
+        analysis = self._analyze(convert_responses(history, _MODEL))
+        self.assertEqual(analysis.break_at, "message 1")
+        self.assertEqual(analysis.cause, "reasoning drop")
+
+    def test_system_and_model_changes(self):
+        messages = convert_anthropic(_turn(0), _MODEL)
+        self._analyze(messages)
+        analysis = self._analyze(messages, system="another system")
+        self.assertEqual((analysis.break_at, analysis.cause), ("system", "system prompt"))
+        analysis = self._analyze(messages, system="another system", model_name="other-model")
+        self.assertEqual(analysis.cause, "model switch")
+        self.assertEqual(analysis.shared_blocks, 0)
+
+
+class TestCacheReport(unittest.TestCase):
+    def test_analyses_are_read_from_task_metadata(self):
+        history: list[model.ConversationItem] = [
+            model.UserMessageItem(content="question"),
+            model.ResponseMetadataItem(
+                cache_analysis=[
+                    model.PrefixCacheAnalysis(cause="first request", input_tokens=1000, cached_tokens=0),
+                    model.PrefixCacheAnalysis(input_tokens=1200, cached_tokens=900),
+                ]
+            ),
+            model.ResponseMetadataItem(),
+        ]
+        analyses = list(iter_cache_analyses(history))
+        self.assertEqual([cache_hit_ratio(a) for a in analyses], [0.0, 0.75])
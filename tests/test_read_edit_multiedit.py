@@ -1,5 +1,6 @@
 import asyncio
 import base64
+import io
 import json
 import os
 import tempfile
@@ -14,12 +15,16 @@ SRC_DIR = ROOT / "src"
 if SRC_DIR.is_dir() and str(SRC_DIR) not in os.sys.path:  # type: ignore
     os.sys.path.insert(0, str(SRC_DIR))  # type: ignore
 
+from PIL import Image
+
 from klaude_code.core.reminders import at_file_reader_reminder  # noqa: E402
 from klaude_code.core.tool.edit_tool import EditTool  # noqa: E402
+from klaude_code.core.tool.image_preprocess import PROVIDER_IMAGE_LIMITS
 from klaude_code.core.tool.multi_edit_tool import MultiEditTool  # noqa: E402
-from klaude_code.core.tool.read_tool import ReadTool  # noqa: E402
-from klaude_code.core.tool.tool_context import current_session_var  # noqa: E402
+from klaude_code.core.tool.read_tool import MAX_SOURCE_IMAGE_BYTES, ReadTool  # noqa: E402
+from klaude_code.core.tool.tool_context import current_image_limits_var, current_session_var  # noqa: E402
 from klaude_code.protocol import model  # noqa: E402
+from klaude_code.protocol.llm_parameter import LLMClientProtocol
 from klaude_code.session.session import Session  # noqa: E402
 
 _TINY_PNG_BASE64 = "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAQAAAC1HAwCAAAAC0lEQVR4nGNgYAAAAAMAASsJTYQAAAAASUVORK5CYII="
@@ -117,13 +122,28 @@ class TestReadTool(BaseTempDirTest):
 
     def test_read_image_too_large_error(self):
         file_path = os.path.abspath("large.png")
-        oversized = 4 * 1024 * 1024 + 1
         with open(file_path, "wb") as image_file:
-            image_file.write(b"0" * oversized)
+            image_file.truncate(MAX_SOURCE_IMAGE_BYTES + 1)
 
         res = arun(ReadTool.call(json.dumps({"file_path": file_path})))
         self.assertEqual(res.status, "error")
-        self.assertIn("maximum supported size (4.00MB)", res.output or "")
+        self.assertIn("maximum supported size (32.00MB)", res.output or "")
+
+    def test_read_large_image_is_scaled_to_provider_limits(self):
+        file_path = os.path.abspath("screenshot.png")
+        Image.effect_noise((3000, 2000), 64).convert("RGB").save(file_path)
+
+        token = current_image_limits_var.set(PROVIDER_IMAGE_LIMITS[LLMClientProtocol.OPENAI])
+        try:
+            res = arun(ReadTool.call(json.dumps({"file_path": file_path})))
+        finally:
+            current_image_limits_var.reset(token)
+        self.assertEqual(res.status, "success")
+        self.assertIn("scaled from 3000x2000 to 1152x768", res.output or "")
+        assert res.images is not None
+        _, encoded = res.images[0].image_url.url.split(",", 1)
+        with Image.open(io.BytesIO(base64.b64decode(encoded))) as image:
+            self.assertEqual(image.size, (1152, 768))
 
 
 class TestReminders(BaseTempDirTest):
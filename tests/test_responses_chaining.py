@@ -0,0 +1,160 @@
+import asyncio
+import json
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+
+from klaude_code.llm.responses.client import ResponsesClient
+from klaude_code.protocol import llm_parameter, model
+
+
+class _StandInServer(ThreadingHTTPServer):
+    """Local stand-in for the Responses API that records request bodies."""
+
+    def __init__(self) -> None:
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.requests: list[dict[str, Any]] = []
+        self.expired_response_ids: set[str] = set()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: _StandInServer
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+    def do_POST(self) -> None:
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        self.server.requests.append(body)
+        if body.get("previous_response_id") in self.server.expired_response_ids:
+            payload = json.dumps({"error": {"message": "Previous response not found", "type": "invalid_request_error"}})
+            self.send_response(404)
+            self.send_header("Content-Type", "application/json")
+            self.end_headers()
+            self.wfile.write(payload.encode())
+            return
+
+        response_id = f"resp_{len(self.server.requests)}"
+        response = {
+            "id": response_id,
+            "object": "response",
+            "created_at": 0,
+            "model": body["model"],
+            "status": "in_progress",
+            "output": [],
+            "parallel_tool_calls": True,
+            "tool_choice": "auto",
+            "tools": [],
+        }
+        message = {
+            "type": "message",
+            "id": f"msg_{len(self.server.requests)}",
+            "role": "assistant",
+            "status": "completed",
+            "content": [{"type": "output_text", "text": "ok", "annotations": []}],
+        }
+        sse_events = [
+            {"type": "response.created", "sequence_number": 0, "response": response},
+            {"type": "response.output_item.done", "sequence_number": 1, "output_index": 0, "item": message},
+            {"type": "response.completed", "sequence_number": 2, "response": {**response, "status": "completed"}},
+        ]
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.end_headers()
+        for event in sse_events:
+            self.wfile.write(f"event: {event['type']}\ndata: {json.dumps(event)}\n\n".encode())
+
+
+class TestResponsesChaining(unittest.TestCase):
+    def setUp(self) -> None:
+        self.server = _StandInServer()
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        self.history: list[model.ConversationItem] = []
+        self.last_response_id: str | None = None
+
+    def tearDown(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _client(self, use_previous_response_id: bool = True, model_name: str = "gpt-fake") -> ResponsesClient:
+        return ResponsesClient(
+            llm_parameter.LLMConfigParameter(
+                protocol=llm_parameter.LLMClientProtocol.RESPONSES,
+                base_url=f"http://127.0.0.1:{self.server.server_port}/v1",
+                api_key="test",
+                model=model_name,
+                use_previous_response_id=use_previous_response_id,
+            )
+        )
+
+    def _turn(self, client: ResponsesClient, user_input: str) -> dict[str, Any]:
+        """Run one turn the way the agent does and return the request the server received."""
+        self.history.append(model.UserMessageItem(content=user_input))
+
+        async def _call() -> list[model.ConversationItem]:
+            param = llm_parameter.LLMCallParameter(
+                input=self.history,
+                store=False,
+                previous_response_id=self.last_response_id,
+                session_id="session",
+            )
+            return [item async for item in client.call(param)]
+
+        for item in asyncio.run(_call()):
+            match item:
+                case model.StartItem():
+                    self.last_response_id = item.response_id
+                case model.AssistantMessageItem():
+                    self.history.append(item)
+                case model.StreamErrorItem():
+                    self.fail(item.error)
+                case _:
+                    pass
+        return self.server.requests[-1]
+
+    def test_only_new_items_are_sent(self):
+        client = self._client()
+        first = self._turn(client, "one")
+        self.assertTrue(first["store"])
+        self.assertIsNone(first.get("previous_response_id"))
+
+        second = self._turn(client, "two")
+        self.assertEqual(second["previous_response_id"], "resp_1")
+        self.assertEqual([item["content"][0]["text"] for item in second["input"]], ["two"])
+
+    def test_disabled_by_default(self):
+        client = self._client(use_previous_response_id=False)
+        self._turn(client, "one")
+        second = self._turn(client, "two")
+        self.assertFalse(second["store"])
+        self.assertIsNone(second.get("previous_response_id"))
+        self.assertEqual(len(second["input"]), 3)
+
+    def test_full_resend_when_chain_is_broken(self):
+        client = self._client()
+        self._turn(client, "one")
+        # Compaction replaces the history and resets the session's last response id
+        self.history = [model.CompactionItem(content="summary")]
+        self.last_response_id = None
+        request = self._turn(client, "two")
+        self.assertIsNone(request.get("previous_response_id"))
+        self.assertEqual(len(request["input"]), 2)
+
+        # Another model cannot continue the stored chain
+        request = self._turn(self._client(model_name="gpt-other"), "three")
+        self.assertIsNone(request.get("previous_response_id"))
+
+    def test_full_resend_when_previous_response_is_gone(self):
+        client = self._client()
+        self._turn(client, "one")
+        self.server.expired_response_ids.add("resp_1")
+        request = self._turn(client, "two")
+        self.assertEqual(self.server.requests[-2]["previous_response_id"], "resp_1")
+        self.assertIsNone(request.get("previous_response_id"))
+        self.assertEqual(len(request["input"]), 3)
+
+        # The chain continues from the resent response
+        request = self._turn(client, "three")
+        self.assertEqual(request["previous_response_id"], "resp_3")
@@ -0,0 +1,187 @@
+import asyncio
+import os
+import tempfile
+import time
+import unittest
+from datetime import datetime, timezone
+from pathlib import Path
+from unittest import mock
+
+import anthropic
+import httpx
+import openai
+from fake_llm import ScriptedLLMClient, fake_config, is_summary_request
+
+from klaude_code.core.agent import Agent, AgentLLMClients
+from klaude_code.llm.retry import (
+    RetryBudget,
+    RetryPolicy,
+    classify_error,
+    retry_after_from_headers,
+    send_with_retry,
+)
+from klaude_code.protocol import events, llm_parameter, model
+from klaude_code.session.session import Session
+
+_REQUEST = httpx.Request("POST", "https://api.example.com/v1/messages")
+
+
+def _response(status: int, headers: dict[str, str] | None = None) -> httpx.Response:
+    return httpx.Response(status, headers=headers, request=_REQUEST)
+
+
+def _openai_error(status: int, message: str, headers: dict[str, str] | None = None) -> openai.APIStatusError:
+    return openai.APIStatusError(message, response=_response(status, headers), body=None)
+
+
+class TestClassifyError(unittest.TestCase):
+    def test_status_codes_and_messages(self):
+        cases = [
+            (openai.RateLimitError("slow down", response=_response(429), body=None), "rate_limit"),
+            (_openai_error(429, "You exceeded your current quota: insufficient_quota"), "fatal"),
+            (anthropic.APIStatusError("Overloaded", response=_response(529), body=None), "overloaded"),
+            (_openai_error(502, "bad gateway"), "network"),
+            (anthropic.APIConnectionError(request=_REQUEST), "network"),
+            (httpx.ReadError("connection reset"), "network"),
+            (_openai_error(400, "This model's maximum context length is 128000 tokens"), "context_overflow"),
+            (
+                anthropic.BadRequestError("prompt is too long: 210000 tokens", response=_response(400), body=None),
+                "context_overflow",
+            ),
+            (_openai_error(401, "invalid api key"), "fatal"),
+        ]
+        for error, kind in cases:
+            with self.subTest(error=str(error)):
+                self.assertEqual(classify_error(error).kind, kind)
+
+    def test_retry_after_headers(self):
+        now = 1_000.0
+        self.assertEqual(retry_after_from_headers({"retry-after-ms": "1500", "retry-after": "9"}, now), 1.5)
+        self.assertEqual(retry_after_from_headers({"Retry-After": "7"}, now), 7.0)
+
+        reset = datetime.fromtimestamp(now + 12, tz=timezone.utc).isoformat().replace("+00:00", "Z")
+        headers = {
+            "anthropic-ratelimit-requests-remaining": "40",
+            "anthropic-ratelimit-requests-reset": datetime.fromtimestamp(now + 50, tz=timezone.utc).isoformat(),
+            "anthropic-ratelimit-input-tokens-remaining": "0",
+            "anthropic-ratelimit-input-tokens-reset": reset,
+        }
+        # Only the exhausted limit counts
+        self.assertAlmostEqual(retry_after_from_headers(headers, now) or 0.0, 12.0)
+        self.assertIsNone(retry_after_from_headers({}, now))
+
+    def test_jitter_stays_below_the_cap(self):
+        policy = RetryPolicy(initial_delay_s=1.0, max_delay_s=8.0)
+        delays = [policy.delay(6) for _ in range(200)]
+        self.assertTrue(all(0 <= d <= 8.0 for d in delays))
+        self.assertGreater(len(set(delays)), 1)
+        self.assertGreaterEqual(policy.delay(1, retry_after_s=3.0), 3.0)
+
+
+class TestSendWithRetry(unittest.TestCase):
+    def test_rate_limit_cools_down_the_whole_provider(self):
+        budget = RetryBudget()
+        calls: list[float] = []
+
+        async def send() -> str:
+            calls.append(time.monotonic())
+            if len(calls) == 1:
+                raise openai.RateLimitError("slow down", response=_response(429, {"retry-after-ms": "200"}), body=None)
+            return "ok"
+
+        async def other_agent() -> None:
+            # Starts while the first request is being rate limited
+            await asyncio.sleep(0.05)
+            started = time.monotonic()
+            await budget.wait_ready()
+            self.assertGreaterEqual(time.monotonic() - started, 0.1)
+
+        async def _run() -> str:
+            result, _ = await asyncio.gather(send_with_retry(send, budget), other_agent())
+            return result
+
+        self.assertEqual(asyncio.run(_run()), "ok")
+        self.assertEqual(len(calls), 2)
+        self.assertGreaterEqual(calls[1] - calls[0], 0.2)
+        self.assertEqual(budget.tokens, budget.capacity - 1 + budget.success_refund)
+
+    def test_fatal_errors_and_empty_budget_are_not_retried(self):
+        calls = 0
+
+        async def invalid() -> str:
+            nonlocal calls
+            calls += 1
+            raise _openai_error(400, "invalid tool schema")
+
+        with self.assertRaises(openai.APIStatusError):
+            asyncio.run(send_with_retry(invalid, RetryBudget()))
+        self.assertEqual(calls, 1)
+
+        calls = 0
+
+        async def unavailable() -> str:
+            nonlocal calls
+            calls += 1
+            raise _openai_error(502, "bad gateway")
+
+        with self.assertRaises(openai.APIStatusError):
+            asyncio.run(send_with_retry(unavailable, RetryBudget(capacity=0)))
+        self.assertEqual(calls, 1)
+
+
+class _FailingClient(ScriptedLLMClient):
+    """Fails the first request with `error`, answers summaries and everything else normally."""
+
+    def __init__(self, error: model.StreamErrorItem):
+        super().__init__(config=fake_config(provider_name="failing"))
+        self.error = error
+
+    async def respond(self, param: llm_parameter.LLMCallParameter) -> list[model.ConversationItem]:
+        if is_summary_request(param):
+            return [model.AssistantMessageItem(content="the summary")]
+        if len(self.calls) == 1:
+            return [self.error]
+        return [model.AssistantMessageItem(content="done")]
+
+
+class TestAgentRetry(unittest.TestCase):
+    def setUp(self) -> None:
+        self._orig_cwd = os.getcwd()
+        self._tmp = tempfile.TemporaryDirectory()
+        os.chdir(self._tmp.name)
+        self._env = mock.patch.dict(os.environ, {"HOME": self._tmp.name})
+        self._env.start()
+
+    def tearDown(self) -> None:
+        self._env.stop()
+        os.chdir(self._orig_cwd)
+        self._tmp.cleanup()
+
+    def _run(self, client: _FailingClient, history: list[model.ConversationItem]) -> list[events.Event]:
+        session = Session(work_dir=Path.cwd())
+        session.append_history(history)
+        agent = Agent(AgentLLMClients(main=client), session, vanilla=True)
+
+        async def _run() -> list[events.Event]:
+            return [e async for e in agent.run_task("go")]
+
+        return asyncio.run(_run())
+
+    def test_fatal_error_is_not_retried(self):
+        client = _FailingClient(model.StreamErrorItem(error="BadRequestError invalid tool schema", kind="fatal"))
+        emitted = self._run(client, [])
+        self.assertEqual(len(client.calls), 1)
+        errors = [e for e in emitted if isinstance(e, events.ErrorEvent)]
+        self.assertEqual([e.error_message for e in errors], ["BadRequestError invalid tool schema"])
+
+    def test_context_overflow_compacts_and_retries(self):
+        history: list[model.ConversationItem] = []
+        for i in range(6):
+            history.extend([model.UserMessageItem(content=f"q{i}"), model.AssistantMessageItem(content=f"a{i}")])
+        client = _FailingClient(model.StreamErrorItem(error="prompt is too long", kind="context_overflow"))
+        emitted = self._run(client, history)
+
+        self.assertFalse(any(isinstance(e, events.ErrorEvent) for e in emitted))
+        retried = client.calls[-1]
+        self.assertIsInstance(retried.input[0], model.CompactionItem)
+        self.assertEqual(len(client.calls), 3)
@@ -0,0 +1,95 @@
+import base64
+import os
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from klaude_code.protocol import model
+from klaude_code.session.archive import ARCHIVE_SUFFIX
+from klaude_code.session.blobs import get_blob_store
+from klaude_code.session.catalog import get_catalog
+from klaude_code.session.gc import collect_garbage, run_scheduled_gc
+from klaude_code.session.session import Session
+
+_DAY = 24 * 3600
+
+
+class TestSessionArchive(unittest.TestCase):
+    def setUp(self) -> None:
+        self._orig_cwd = os.getcwd()
+        self._tmp = tempfile.TemporaryDirectory()
+        os.chdir(self._tmp.name)
+        self._env = mock.patch.dict(os.environ, {"HOME": self._tmp.name})
+        self._env.start()
+
+    def tearDown(self) -> None:
+        get_catalog(Session.storage_dir()).close()
+        self._env.stop()
+        os.chdir(self._orig_cwd)
+        self._tmp.cleanup()
+
+    def _session(self, question: str, age_days: float = 0, images: list[model.ImageURLPart] | None = None) -> Session:
+        session = Session(work_dir=Path.cwd())
+        session.append_history(
+            [model.UserMessageItem(content=question, images=images), model.AssistantMessageItem(content="answer")]
+        )
+        if age_days:
+            past = time.time() - age_days * _DAY
+            os.utime(session._session_file(), (past, past))  # pyright: ignore[reportPrivateUsage]
+        return session
+
+    def test_stale_sessions_are_archived_and_read_transparently(self):
+        old = self._session("old question", age_days=40)
+        recent = self._session("recent question")
+
+        report = collect_garbage(Session.storage_dir(), archive_after_days=30)
+        self.assertEqual(report.archived, 1)
+        self.assertFalse(old._session_file().exists())  # pyright: ignore[reportPrivateUsage]
+        self.assertFalse(old._messages_file().exists())  # pyright: ignore[reportPrivateUsage]
+
+        listed = {s.id: s for s in Session.list_sessions()}
+        self.assertEqual(set(listed), {old.id, recent.id})
+        self.assertTrue(listed[old.id].path.endswith(ARCHIVE_SUFFIX))
+        self.assertEqual(listed[old.id].first_user_message, "old question")
+
+        loaded = Session.load(old.id)
+        self.assertEqual([item.content for item in loaded.conversation_history], ["old question", "answer"])  # type: ignore[attr-defined]
+        self.assertTrue(old._session_file().exists())  # pyright: ignore[reportPrivateUsage]
+        self.assertEqual(list((Session.storage_dir() / "archive").iterdir()), [])
+
+    def test_metadata_write_restores_a_session_archived_while_open(self):
+        session = self._session("still open", age_days=40)
+        # Another process archives it while this one still has it open
+        self.assertEqual(collect_garbage(Session.storage_dir(), archive_after_days=30).archived, 1)
+
+        session.todos = [model.TodoItem(content="next step", status="pending")]
+        session.save()
+        session.flush_sync()
+
+        self.assertEqual(list((Session.storage_dir() / "archive").iterdir()), [])
+        loaded = Session.load(session.id)
+        self.assertEqual([item.content for item in loaded.conversation_history], ["still open", "answer"])  # type: ignore[attr-defined]
+        self.assertEqual([todo.content for todo in loaded.todos], ["next step"])
+
+    def test_quota_evicts_the_oldest_archives_and_their_blobs(self):
+        png = base64.b64encode(os.urandom(64 * 1024)).decode()
+        image = model.ImageURLPart(image_url=model.ImageURLPart.ImageURL(url=f"data:image/png;base64,{png}"))
+        oldest = self._session("oldest", age_days=60, images=[image])
+        older = self._session("older", age_days=50)
+        current = self._session("current", age_days=45)
+        blob = next(p for p in get_blob_store(Session.storage_dir()).root.rglob("*") if p.is_file())
+        os.utime(blob, (time.time() - _DAY, time.time() - _DAY))
+
+        report = collect_garbage(Session.storage_dir(), archive_after_days=30, quota_mb=32 / 1024, exclude={current.id})
+        self.assertEqual(report.archived, 2)
+        self.assertEqual(report.evicted, 1)
+        self.assertEqual(report.blobs_removed, 1)
+        self.assertFalse(blob.exists())
+        self.assertEqual({s.id for s in Session.list_sessions()}, {older.id, current.id})
+        self.assertNotIn(oldest.id, {s.id for s in Session.list_sessions()})
+
+        # The scheduled pass runs once a day
+        self.assertIsNotNone(run_scheduled_gc(Session.storage_dir(), archive_after_days=30))
+        self.assertIsNone(run_scheduled_gc(Session.storage_dir(), archive_after_days=30))
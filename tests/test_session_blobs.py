@@ -0,0 +1,107 @@
+import base64
+import os
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from klaude_code.llm.anthropic import input as anthropic_input
+from klaude_code.llm.openai_compatible import input as openai_input
+from klaude_code.llm.responses import input as responses_input
+from klaude_code.protocol import model
+from klaude_code.session.blobs import LARGE_OUTPUT_CHARS, BlobStore, get_blob_store, resolve_image_url
+from klaude_code.session.catalog import get_catalog
+from klaude_code.session.session import Session
+
+_PNG = base64.b64encode(b"\x89PNG\r\n\x1a\n" + bytes(range(256)) * 40).decode()
+_DATA_URL = f"data:image/png;base64,{_PNG}"
+
+
+def _image() -> model.ImageURLPart:
+    return model.ImageURLPart(image_url=model.ImageURLPart.ImageURL(url=_DATA_URL))
+
+
+class TestBlobStore(unittest.TestCase):
+    def setUp(self) -> None:
+        self._orig_cwd = os.getcwd()
+        self._tmp = tempfile.TemporaryDirectory()
+        os.chdir(self._tmp.name)
+        self._env = mock.patch.dict(os.environ, {"HOME": self._tmp.name})
+        self._env.start()
+
+    def tearDown(self) -> None:
+        get_catalog(Session._base_dir()).close()  # pyright: ignore[reportPrivateUsage]
+        self._env.stop()
+        os.chdir(self._orig_cwd)
+        self._tmp.cleanup()
+
+    def test_images_are_stored_once_and_resolved_for_the_provider(self):
+        session = Session(work_dir=Path.cwd())
+        read_result = model.ToolResultItem(status="success", output="[image] a.png", images=[_image()])
+        pasted = model.UserMessageItem(content="same picture", images=[_image()])
+        session.append_history([read_result, pasted])
+
+        url = pasted.images[0].image_url.url  # type: ignore[index]
+        self.assertTrue(url.startswith("blob:image/png;sha256,"))
+        self.assertEqual(read_result.images[0].image_url.url, url)  # type: ignore[index]
+        self.assertEqual(resolve_image_url(url), _DATA_URL)
+        self.assertEqual(resolve_image_url("https://example.com/a.png"), "https://example.com/a.png")
+
+        messages = session._messages_file().read_text()  # pyright: ignore[reportPrivateUsage]
+        self.assertNotIn(_PNG[:100], messages)
+        blobs_root = get_blob_store(Session._base_dir()).root  # pyright: ignore[reportPrivateUsage]
+        self.assertEqual(len([p for p in blobs_root.rglob("*") if p.is_file()]), 1)
+
+        loaded = Session.load(session.id)
+        self.assertEqual(resolve_image_url(loaded.conversation_history[1].images[0].image_url.url), _DATA_URL)  # type: ignore[union-attr, index]
+
+    def test_missing_image_blob_is_sent_as_a_placeholder(self):
+        png = base64.b64encode(b"\x89PNG\r\n\x1a\n" + os.urandom(1024)).decode()
+        image = model.ImageURLPart(image_url=model.ImageURLPart.ImageURL(url=f"data:image/png;base64,{png}"))
+        session = Session(work_dir=Path.cwd())
+        session.append_history([model.UserMessageItem(content="look", images=[image])])
+        session.flush_sync()
+        digest = image.image_url.url.rpartition(",")[2]
+        get_blob_store(Session._base_dir()).path(digest).unlink()  # pyright: ignore[reportPrivateUsage]
+
+        placeholder = f"[image not found in the blob store: {digest}]"
+        history = Session.load(session.id).conversation_history
+        self.assertIn(placeholder, str(anthropic_input.convert_history_to_input(history, "claude-fake")))
+        self.assertIn(placeholder, str(openai_input.convert_history_to_input(history)))
+        self.assertIn(placeholder, str(responses_input.convert_history_to_input(history)))
+
+    def test_put_does_not_wait_for_a_flush_writing_to_disk(self):
+        store = BlobStore(Path(self._tmp.name) / "blobs")
+        digest = store.put(b"first")
+        writing, release = threading.Event(), threading.Event()
+        replace = os.replace
+
+        def slow_replace(src: str, dst: str) -> None:
+            writing.set()
+            release.wait(5)
+            replace(src, dst)
+
+        with mock.patch("klaude_code.session.blobs.os.replace", slow_replace):
+            flusher = threading.Thread(target=store.flush, kwargs={"fsync": True})
+            flusher.start()
+            self.assertTrue(writing.wait(5))
+            # The payload being written is still served from memory
+            self.assertEqual(store.get(digest), b"first")
+            second = store.put(b"second")
+            self.assertTrue(store.contains(second))
+            release.set()
+            flusher.join(5)
+        self.assertTrue(store.path(digest).exists())
+        store.flush()
+        self.assertEqual(store.path(second).read_bytes(), b"second")
+
+    def test_large_tool_outputs_are_kept_out_of_the_jsonl(self):
+        session = Session(work_dir=Path.cwd())
+        output = "line of output\n" * (LARGE_OUTPUT_CHARS // 10)
+        session.append_history([model.ToolResultItem(call_id="c1", status="success", output=output)])
+
+        messages_file = session._messages_file()  # pyright: ignore[reportPrivateUsage]
+        self.assertLess(messages_file.stat().st_size, 1024)
+        loaded = Session.load(session.id)
+        self.assertEqual(loaded.conversation_history[0].output, output)  # type: ignore[union-attr]
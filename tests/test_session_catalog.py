@@ -0,0 +1,86 @@
+import json
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from klaude_code.protocol import model
+from klaude_code.protocol.tools import SubAgentType
+from klaude_code.session.catalog import CATALOG_FILENAME, get_catalog
+from klaude_code.session.session import Session
+
+
+class TestSessionCatalog(unittest.TestCase):
+    def setUp(self) -> None:
+        self._orig_cwd = os.getcwd()
+        self._tmp = tempfile.TemporaryDirectory()
+        os.chdir(self._tmp.name)
+        self._env = mock.patch.dict(os.environ, {"HOME": self._tmp.name})
+        self._env.start()
+
+    def tearDown(self) -> None:
+        get_catalog(Session._base_dir()).close()  # pyright: ignore[reportPrivateUsage]
+        self._env.stop()
+        os.chdir(self._orig_cwd)
+        self._tmp.cleanup()
+
+    def _session(self, first_message: str, **kwargs: object) -> Session:
+        session = Session(work_dir=Path.cwd(), model_name="fake-model", **kwargs)  # type: ignore[arg-type]
+        session.append_history(
+            [model.UserMessageItem(content=first_message), model.AssistantMessageItem(content="answer")]
+        )
+        return session
+
+    def test_listing_reads_the_catalog_only(self):
+        older = self._session("first question")
+        time.sleep(0.01)
+        newer = self._session("second question")
+        self._session("explore something", is_root_session=False, sub_agent_type=SubAgentType.EXPLORE)
+
+        # Listing must not need the message files
+        shutil.rmtree(Session._messages_dir())  # pyright: ignore[reportPrivateUsage]
+        sessions = Session.list_sessions()
+        self.assertEqual([s.id for s in sessions], [newer.id, older.id])
+        self.assertEqual(sessions[0].first_user_message, "second question")
+        self.assertEqual((sessions[0].messages_count, sessions[0].model_name), (2, "fake-model"))
+        self.assertEqual(Session.most_recent_session_id(), newer.id)
+
+    def test_first_message_survives_compaction(self):
+        session = self._session("original question")
+        session.apply_compaction(model.CompactionItem(content="summary", kept_items=0))
+        self.assertEqual(Session.list_sessions()[0].first_user_message, "original question")
+
+    def test_rebuilds_when_stale_or_missing(self):
+        session = self._session("indexed")
+        self.assertEqual(len(Session.list_sessions()), 1)
+
+        # A session written without the catalog, e.g. by an older version
+        sessions_dir = Session._sessions_dir()  # pyright: ignore[reportPrivateUsage]
+        messages_dir = Session._messages_dir()  # pyright: ignore[reportPrivateUsage]
+        payload = {
+            "id": "legacy",
+            "work_dir": str(Path.cwd()),
+            "created_at": 1.0,
+            "updated_at": 2.0,
+            "messages_count": 1,
+        }
+        (sessions_dir / "1970-01-01-00-00-01-legacy.json").write_text(json.dumps(payload))
+        line = json.dumps({"type": "UserMessageItem", "data": {"content": "from the past"}})
+        (messages_dir / "1970-01-01-00-00-01-legacy.jsonl").write_text(line + "\n")
+        sessions = Session.list_sessions()
+        self.assertEqual([s.id for s in sessions], [session.id, "legacy"])
+        self.assertEqual(sessions[1].first_user_message, "from the past")
+
+        # Deleted session files disappear from the listing
+        session._session_file().unlink()  # pyright: ignore[reportPrivateUsage]
+        self.assertEqual([s.id for s in Session.list_sessions()], ["legacy"])
+
+        # A corrupt catalog is rebuilt from the files
+        catalog = get_catalog(Session._base_dir())  # pyright: ignore[reportPrivateUsage]
+        catalog.close()
+        for path in Session._base_dir().glob(f"{CATALOG_FILENAME}*"):  # pyright: ignore[reportPrivateUsage]
+            path.write_bytes(b"not a database")
+        self.assertEqual(Session.most_recent_session_id(), "legacy")
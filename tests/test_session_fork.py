@@ -0,0 +1,110 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from klaude_code.protocol import model
+from klaude_code.session.archive import archive_session, find_archived_session
+from klaude_code.session.catalog import get_catalog
+from klaude_code.session.session import Session
+
+
+def _turn(question: str) -> list[model.ConversationItem]:
+    return [model.UserMessageItem(content=question), model.AssistantMessageItem(content=f"re: {question}")]
+
+
+def _contents(session: Session) -> list[str | None]:
+    return [item.content for item in session.conversation_history]  # type: ignore[attr-defined]
+
+
+class TestSessionFork(unittest.TestCase):
+    def setUp(self) -> None:
+        self._orig_cwd = os.getcwd()
+        self._tmp = tempfile.TemporaryDirectory()
+        os.chdir(self._tmp.name)
+        self._env = mock.patch.dict(os.environ, {"HOME": self._tmp.name})
+        self._env.start()
+
+    def tearDown(self) -> None:
+        get_catalog(Session.storage_dir()).close()
+        self._env.stop()
+        os.chdir(self._orig_cwd)
+        self._tmp.cleanup()
+
+    def _parent(self) -> Session:
+        session = Session(work_dir=Path.cwd(), model_name="sonnet")
+        for question in ("one", "two", "three"):
+            session.append_history(_turn(question))
+        return session
+
+    def test_fork_shares_the_prefix_without_copying_it(self):
+        parent = self._parent()
+        forked = parent.fork(4)
+        forked.append_history(_turn("four"))
+        forked.flush_sync()
+
+        own_lines = forked._messages_file().read_text().splitlines()  # pyright: ignore[reportPrivateUsage]
+        self.assertEqual(len(own_lines), 2)
+
+        loaded = Session.load(forked.id)
+        self.assertEqual(_contents(loaded), ["one", "re: one", "two", "re: two", "four", "re: four"])
+        self.assertEqual(loaded.messages_count, 6)
+        self.assertEqual(loaded.model_name, "sonnet")
+
+        listed = {s.id: s for s in Session.list_sessions()}
+        self.assertEqual(listed[forked.id].forked_from, parent.id)
+        self.assertEqual(listed[forked.id].first_user_message, "one")
+
+    def test_later_changes_of_the_parent_do_not_leak_into_the_fork(self):
+        parent = self._parent()
+        forked = parent.fork(-2)
+        parent.append_history(_turn("after"))
+        parent.apply_compaction(model.CompactionItem(content="summary", kept_items=2))
+        parent.flush_sync()
+
+        self.assertEqual(_contents(Session.load(forked.id)), ["one", "re: one", "two", "re: two"])
+        self.assertEqual(_contents(Session.load(parent.id)), ["summary", "after", "re: after"])
+
+    def test_fork_of_a_fork_and_compaction_of_inherited_items(self):
+        parent = self._parent()
+        child = parent.fork()
+        child.append_history(_turn("four"))
+        grandchild = child.fork(7)
+        grandchild.apply_compaction(model.CompactionItem(content="summary", kept_items=1))
+        grandchild.flush_sync()
+
+        self.assertEqual(_contents(Session.load(grandchild.id)), ["summary", "four"])
+        tail = Session.load(child.id, tail_turns=1)
+        self.assertEqual(_contents(tail), ["four", "re: four"])
+        self.assertEqual(tail.messages_count, 8)
+
+    def test_archived_parents_are_read_in_place(self):
+        parent = self._parent()
+        child = parent.fork(4)
+        child.append_history(_turn("four"))
+        grandchild = child.fork()
+        grandchild.append_history(_turn("five"))
+        grandchild.flush_sync()
+        archives: dict[str, tuple[Path, int]] = {}
+        for session in (parent, child):
+            session.flush_sync()
+            archive_file = archive_session(Session.storage_dir(), session._session_file())  # pyright: ignore[reportPrivateUsage]
+            archives[session.id] = (archive_file, archive_file.stat().st_mtime_ns)
+
+        loaded = Session.load(grandchild.id)
+        expected = ["one", "re: one", "two", "re: two", "four", "re: four", "five", "re: five"]
+        self.assertEqual(_contents(loaded), expected)
+        self.assertEqual(_contents(Session.load(loaded.fork(-2).id)), expected[:-2])
+
+        for session_id, (archive_file, mtime_ns) in archives.items():
+            self.assertEqual(find_archived_session(Session.storage_dir(), session_id), archive_file)
+            self.assertEqual(archive_file.stat().st_mtime_ns, mtime_ns)
+        self.assertFalse(parent._session_file().exists())  # pyright: ignore[reportPrivateUsage]
+        # Resuming the parent itself still restores it
+        self.assertEqual(_contents(Session.load(parent.id))[-1], "re: three")
+        self.assertTrue(parent._session_file().exists())  # pyright: ignore[reportPrivateUsage]
+
+    def test_fork_index_out_of_range(self):
+        with self.assertRaises(ValueError):
+            self._parent().fork(7)
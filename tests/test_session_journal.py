@@ -0,0 +1,92 @@
+import asyncio
+import json
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from klaude_code.protocol import model
+from klaude_code.session import journal
+from klaude_code.session.catalog import get_catalog
+from klaude_code.session.session import Session
+
+
+class TestSessionJournal(unittest.TestCase):
+    def setUp(self) -> None:
+        self._orig_cwd = os.getcwd()
+        self._tmp = tempfile.TemporaryDirectory()
+        os.chdir(self._tmp.name)
+        self._env = mock.patch.dict(os.environ, {"HOME": self._tmp.name})
+        self._env.start()
+
+    def tearDown(self) -> None:
+        journal.flush_journals_sync()
+        journal.set_durability_policy("task")
+        get_catalog(Session._base_dir()).close()  # pyright: ignore[reportPrivateUsage]
+        self._env.stop()
+        os.chdir(self._orig_cwd)
+        self._tmp.cleanup()
+
+    def _lines(self, session: Session) -> list[str]:
+        path = session._messages_file()  # pyright: ignore[reportPrivateUsage]
+        return path.read_text().splitlines() if path.exists() else []
+
+    def test_writes_are_batched_until_a_boundary(self):
+        session = Session(work_dir=Path.cwd())
+        writes: list[int] = []
+        original = journal.SessionJournal._replace_metadata  # pyright: ignore[reportPrivateUsage]
+
+        def counting(self: journal.SessionJournal, snapshot: journal.MetadataSnapshot, fsync: bool) -> None:
+            writes.append(snapshot.seq)
+            original(self, snapshot, fsync)
+
+        async def _run() -> None:
+            for i in range(5):
+                session.append_history([model.UserMessageItem(content=f"q{i}")])
+                session.todos.append(model.TodoItem(content=f"todo {i}", status="pending"))
+                session.save()
+            self.assertEqual(self._lines(session), [])
+            await session.flush("turn")
+
+        with mock.patch.object(journal.SessionJournal, "_replace_metadata", counting):
+            asyncio.run(_run())
+
+        self.assertEqual(len(self._lines(session)), 5)
+        self.assertEqual(len(writes), 1)
+        session_file = session._session_file()  # pyright: ignore[reportPrivateUsage]
+        raw = session_file.read_text()
+        self.assertNotIn("\n", raw)
+        self.assertEqual(len(json.loads(raw)["todos"]), 5)
+        self.assertEqual([p.name for p in session_file.parent.iterdir()], [session_file.name])
+
+    def test_load_sees_changes_queued_by_a_finished_loop(self):
+        session = Session(work_dir=Path.cwd())
+
+        async def _run() -> None:
+            session.append_history([model.UserMessageItem(content="queued")])
+
+        asyncio.run(_run())
+        loaded = Session.load(session.id)
+        self.assertEqual([item.content for item in loaded.conversation_history], ["queued"])  # type: ignore[attr-defined]
+        self.assertEqual(Session.list_sessions()[0].first_user_message, "queued")
+
+    def test_durability_policy(self):
+        cases = [
+            ("task", "turn", False),
+            ("task", "task", True),
+            ("turn", "turn", True),
+            ("never", "task", False),
+        ]
+        for policy, boundary, synced in cases:
+            with self.subTest(policy=policy, boundary=boundary):
+                journal.set_durability_policy(policy)
+                session = Session(work_dir=Path.cwd())
+
+                async def _run(session: Session, boundary: journal.FlushBoundary) -> None:
+                    session.append_history([model.UserMessageItem(content="hi")])
+                    await session.flush(boundary)
+
+                with mock.patch.object(journal.os, "fsync") as fsync:
+                    asyncio.run(_run(session, boundary))
+                self.assertEqual(fsync.called, synced)
@@ -0,0 +1,69 @@
+import asyncio
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from klaude_code.protocol import model
+from klaude_code.session.catalog import get_catalog
+from klaude_code.session.history_reader import read_history_view
+from klaude_code.session.session import Session
+
+
+class TestSessionLoad(unittest.TestCase):
+    def setUp(self) -> None:
+        self._orig_cwd = os.getcwd()
+        self._tmp = tempfile.TemporaryDirectory()
+        os.chdir(self._tmp.name)
+        self._env = mock.patch.dict(os.environ, {"HOME": self._tmp.name})
+        self._env.start()
+
+    def tearDown(self) -> None:
+        get_catalog(Session._base_dir()).close()  # pyright: ignore[reportPrivateUsage]
+        self._env.stop()
+        os.chdir(self._orig_cwd)
+        self._tmp.cleanup()
+
+    def _session(self, turns: int) -> Session:
+        session = Session(work_dir=Path.cwd())
+        for i in range(turns):
+            session.append_history(
+                [model.UserMessageItem(content=f"q{i}"), model.AssistantMessageItem(content=f"a{i}")]
+            )
+        return session
+
+    def _contents(self, session: Session) -> list[str | None]:
+        return [item.content for item in session.conversation_history]  # type: ignore[attr-defined]
+
+    def test_tail_load_completes_in_the_background(self):
+        session = self._session(30)
+        loaded = Session.load(session.id, tail_turns=5)
+        self.assertEqual(self._contents(loaded)[:2], ["q25", "a25"])
+        self.assertEqual(len(loaded.conversation_history), 10)
+        self.assertEqual(loaded.messages_count, 60)
+        self.assertFalse(loaded.has_full_history)
+
+        async def _run() -> None:
+            loaded.start_full_history_load()
+            await loaded.load_full_history()
+
+        asyncio.run(_run())
+        self.assertTrue(loaded.has_full_history)
+        self.assertEqual(self._contents(loaded), self._contents(session))
+
+    def test_lines_hidden_by_compaction_are_skipped(self):
+        session = self._session(3)
+        messages_file = session._messages_file()  # pyright: ignore[reportPrivateUsage]
+        with messages_file.open("a") as f:
+            f.write('{"type": "UserMessageItem", "data": {"content": "truncated\n')
+            f.write('{"type": "FutureItem", "data": {}}\n\n')
+        session.apply_compaction(model.CompactionItem(content="summary", kept_items=2))
+        session.append_history([model.UserMessageItem(content="after")])
+
+        raw = read_history_view(messages_file, Session._TypeMap)  # pyright: ignore[reportPrivateUsage]
+        self.assertEqual(
+            [item.type for item in raw],
+            ["CompactionItem", "UserMessageItem", "AssistantMessageItem", "UserMessageItem"],
+        )
+        self.assertEqual(self._contents(Session.load(session.id)), ["summary", "q2", "a2", "after"])
@@ -0,0 +1,85 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from klaude_code.protocol import events, model
+from klaude_code.session.catalog import get_catalog
+from klaude_code.session.session import Session
+
+
+class TestSessionReplay(unittest.TestCase):
+    def setUp(self) -> None:
+        self._orig_cwd = os.getcwd()
+        self._tmp = tempfile.TemporaryDirectory()
+        os.chdir(self._tmp.name)
+        self._env = mock.patch.dict(os.environ, {"HOME": self._tmp.name})
+        self._env.start()
+
+    def tearDown(self) -> None:
+        get_catalog(Session.storage_dir()).close()
+        self._env.stop()
+        os.chdir(self._orig_cwd)
+        self._tmp.cleanup()
+
+    def _session(self, turns: int) -> Session:
+        session = Session(work_dir=Path.cwd())
+        for i in range(turns):
+            session.append_history(
+                [
+                    model.UserMessageItem(content=f"question {i}"),
+                    model.ToolCallItem(call_id=f"c{i}", name="Bash", arguments="{}"),
+                    model.ToolResultItem(call_id=f"c{i}", tool_name="Bash", status="success", output="ok"),
+                    model.AssistantMessageItem(content=f"answer {i}"),
+                ]
+            )
+        return session
+
+    @staticmethod
+    def _questions(replay: events.ReplayHistoryEvent) -> list[str]:
+        return [e.content for e in replay.events if isinstance(e, events.UserMessageEvent)]
+
+    def test_pages_go_back_from_the_latest_turns(self):
+        session = self._session(5)
+
+        replay = session.replay_page(2)
+        assert replay is not None
+        self.assertEqual(self._questions(replay), ["question 3", "question 4"])
+        self.assertEqual((replay.earlier_turns, replay.earlier_items, replay.earlier_tool_calls), (3, 12, 3))
+
+        # A command appending a turn in between does not shift the next page
+        session.append_history([model.UserMessageItem(content="/history more")])
+        older = session.replay_page(2, session.replay_start_turn)
+        assert older is not None
+        self.assertEqual(self._questions(older), ["question 1", "question 2"])
+        oldest = session.replay_page(2, session.replay_start_turn)
+        assert oldest is not None
+        self.assertEqual(self._questions(oldest), ["question 0"])
+        self.assertEqual(oldest.earlier_turns, 0)
+        self.assertIsNone(session.replay_page(2, session.replay_start_turn))
+
+    def test_tail_loaded_session_materializes_only_the_page(self):
+        session_id = self._session(6).id
+        session = Session.load(session_id, tail_turns=2)
+
+        with mock.patch.object(Session, "_materialize", wraps=Session._materialize) as materialize:  # pyright: ignore[reportPrivateUsage]
+            latest = session.replay_page(2)
+            materialize.assert_not_called()
+            older = session.replay_page(2, session.replay_start_turn)
+        assert latest is not None and older is not None
+        self.assertEqual(self._questions(older), ["question 2", "question 3"])
+        self.assertEqual(len(materialize.call_args.args[0]), 8)
+        self.assertEqual(len(session.conversation_history), 8)
+
+    def test_compaction_changes_the_cache_key(self):
+        session = self._session(3)
+        replay = session.replay_page(5)
+        assert replay is not None
+        self.assertEqual(replay.cache_key, session.replay_page(5).cache_key)  # type: ignore[union-attr]
+
+        session.apply_compaction(model.CompactionItem(content="summary", kept_items=4))
+        compacted = session.replay_page(5)
+        assert compacted is not None
+        self.assertNotEqual(compacted.cache_key, replay.cache_key)
+        self.assertEqual(self._questions(compacted), ["question 2"])
@@ -0,0 +1,84 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from klaude_code.protocol import model
+from klaude_code.session.catalog import CATALOG_FILENAME, get_catalog
+from klaude_code.session.session import Session
+
+
+def _turn(question: str, answer: str) -> list[model.ConversationItem]:
+    return [model.UserMessageItem(content=question), model.AssistantMessageItem(content=answer)]
+
+
+class TestSessionSearch(unittest.TestCase):
+    def setUp(self) -> None:
+        self._orig_cwd = os.getcwd()
+        self._tmp = tempfile.TemporaryDirectory()
+        self._project = Path(self._tmp.name) / "project"
+        self._project.mkdir()
+        os.chdir(self._project)
+        self._env = mock.patch.dict(os.environ, {"HOME": self._tmp.name})
+        self._env.start()
+
+    def tearDown(self) -> None:
+        for base_dir in (Path(self._tmp.name) / ".klaude" / "project").iterdir():
+            get_catalog(base_dir).close()
+        self._env.stop()
+        os.chdir(self._orig_cwd)
+        self._tmp.cleanup()
+
+    def _session(self, *turns: tuple[str, str]) -> Session:
+        session = Session(work_dir=Path.cwd())
+        for question, answer in turns:
+            session.append_history(_turn(question, answer))
+        return session
+
+    def test_appended_items_are_searchable_and_open_at_the_matching_turn(self):
+        deadlock = self._session(
+            ("set up the project", "done"),
+            ("the worker hangs forever", "there is a deadlock between the two locks"),
+            ("thanks", "you are welcome"),
+        )
+        deadlock.append_history(
+            [model.ToolCallItem(call_id="c1", name="Bash", arguments='{"command": "pytest tests/test_locks.py"}')]
+        )
+        self._session(("add a readme", "added"))
+
+        hits = Session.search("deadl")
+        self.assertEqual([hit.session_id for hit in hits], [deadlock.id])
+        self.assertEqual((hits[0].turn, hits[0].turns), (2, 3))
+        self.assertIn("[deadlock]", hits[0].snippet)
+        self.assertEqual(hits[0].first_user_message, "set up the project")
+
+        loaded = Session.load(deadlock.id, tail_turns=hits[0].replay_turns)
+        self.assertEqual(loaded.conversation_history[0].content, "the worker hangs forever")  # type: ignore[attr-defined]
+
+        self.assertEqual([hit.kind for hit in Session.search("test_locks.py")], ["ToolCallItem"])
+        self.assertEqual(Session.search("deadlock readme"), [])
+        self.assertEqual(Session.search("?!"), [])
+
+    def test_sessions_unknown_to_the_index_are_indexed_on_search(self):
+        session = self._session(("why is the cache cold", "the key changes"))
+        get_catalog(Session.storage_dir()).close()
+        for suffix in ("", "-wal", "-shm"):
+            Path(f"{Session.storage_dir() / CATALOG_FILENAME}{suffix}").unlink(missing_ok=True)
+
+        self.assertEqual([hit.session_id for hit in Session.search("cold cache")], [session.id])
+
+        session._session_file().unlink()  # pyright: ignore[reportPrivateUsage]
+        self.assertEqual(Session.search("cold cache"), [])
+
+    def test_search_across_projects(self):
+        here = self._session(("profile the parser", "it is quadratic"))
+        other_project = Path(self._tmp.name) / "other"
+        other_project.mkdir()
+        os.chdir(other_project)
+        there = self._session(("speed up the parser", "memoized it"))
+
+        self.assertEqual([hit.session_id for hit in Session.search("parser")], [there.id])
+        hits = Session.search("parser", all_projects=True)
+        self.assertEqual({hit.session_id for hit in hits}, {here.id, there.id})
+        self.assertEqual({hit.work_dir for hit in hits}, {str(self._project), str(other_project)})
@@ -0,0 +1,193 @@
+import asyncio
+import functools
+import json
+import time
+import unittest
+from collections.abc import AsyncIterator
+from typing import Any
+from unittest import mock
+
+from anthropic.types.beta import (
+    BetaInputJSONDelta,
+    BetaRawContentBlockDeltaEvent,
+    BetaRawContentBlockStartEvent,
+    BetaRawContentBlockStopEvent,
+    BetaRawMessageDeltaEvent,
+    BetaRawMessageStartEvent,
+    BetaTextDelta,
+    BetaThinkingDelta,
+)
+
+from klaude_code.llm.anthropic.client import AnthropicClient
+from klaude_code.llm.streaming import DeltaCoalescer, StreamTimer
+from klaude_code.protocol import events, llm_parameter, model
+
+
+def _message_start() -> BetaRawMessageStartEvent:
+    return BetaRawMessageStartEvent.model_validate(
+        {
+            "type": "message_start",
+            "message": {
+                "id": "msg_1",
+                "type": "message",
+                "role": "assistant",
+                "model": "claude-fake",
+                "content": [],
+                "stop_reason": None,
+                "stop_sequence": None,
+                "usage": {"input_tokens": 10, "output_tokens": 1},
+            },
+        }
+    )
+
+
+def _block_start(index: int, block: dict[str, Any]) -> BetaRawContentBlockStartEvent:
+    return BetaRawContentBlockStartEvent.model_validate(
+        {"type": "content_block_start", "index": index, "content_block": block}
+    )
+
+
+def _delta(index: int, delta: Any) -> BetaRawContentBlockDeltaEvent:
+    return BetaRawContentBlockDeltaEvent(type="content_block_delta", index=index, delta=delta)
+
+
+def _message_delta(output_tokens: int) -> BetaRawMessageDeltaEvent:
+    return BetaRawMessageDeltaEvent.model_validate(
+        {"type": "message_delta", "delta": {"stop_reason": "tool_use"}, "usage": {"output_tokens": output_tokens}}
+    )
+
+
+def _recorded_stream(tokens: int) -> list[Any]:
+    """A response of `tokens` deltas shaped like a real one: thinking, text, then a tool call."""
+    thinking, tool = tokens // 10, tokens // 10
+    text = tokens - thinking - tool
+    recorded: list[Any] = [_message_start(), _block_start(0, {"type": "thinking", "thinking": "", "signature": ""})]
+    recorded += [_delta(0, BetaThinkingDelta(type="thinking_delta", thinking=f"step {i} ")) for i in range(thinking)]
+    recorded += [BetaRawContentBlockStopEvent(type="content_block_stop", index=0)]
+    recorded += [_block_start(1, {"type": "text", "text": ""})]
+    recorded += [_delta(1, BetaTextDelta(type="text_delta", text=f" word{i % 97}")) for i in range(text)]
+    recorded += [BetaRawContentBlockStopEvent(type="content_block_stop", index=1)]
+    recorded += [_block_start(2, {"type": "tool_use", "id": "toolu_1", "name": "Write", "input": {}})]
+    recorded += [_delta(2, BetaInputJSONDelta(type="input_json_delta", partial_json='{"content": "'))]
+    recorded += [_delta(2, BetaInputJSONDelta(type="input_json_delta", partial_json="x")) for _ in range(tool - 2)]
+    recorded += [_delta(2, BetaInputJSONDelta(type="input_json_delta", partial_json='"}'))]
+    recorded += [BetaRawContentBlockStopEvent(type="content_block_stop", index=2), _message_delta(tokens)]
+    return recorded
+
+
+class _Replay:
+    def __init__(self, recorded: list[Any], pace_s: float = 0.0, first_token_after_s: float = 0.0):
+        self._recorded = recorded
+        self._pace_s = pace_s
+        self._first_token_after_s = first_token_after_s
+
+    async def __aiter__(self) -> AsyncIterator[Any]:
+        for index, event in enumerate(self._recorded):
+            if index == 1 and self._first_token_after_s:
+                await asyncio.sleep(self._first_token_after_s)
+            elif index > 1 and self._pace_s:
+                await asyncio.sleep(self._pace_s)
+            yield event
+
+
+def _client(replay: _Replay) -> AnthropicClient:
+    client = AnthropicClient(
+        llm_parameter.LLMConfigParameter(
+            protocol=llm_parameter.LLMClientProtocol.ANTHROPIC, model="claude-fake", api_key="key"
+        )
+    )
+    client.client.beta.messages.create = mock.AsyncMock(return_value=replay)  # type: ignore[method-assign]
+    return client
+
+
+async def _consume(client: AnthropicClient) -> tuple[list[model.ConversationItem], int]:
+    """Stream a response into the UI queue the way `Agent.run_turn` does, return the items and queued events."""
+    queue: asyncio.Queue[events.Event] = asyncio.Queue()
+    items: list[model.ConversationItem] = []
+    param = llm_parameter.LLMCallParameter(input=[model.UserMessageItem(content="go")], session_id="s1")
+    async for item in client.call(param):
+        items.append(item)
+        if isinstance(item, model.AssistantMessageDelta):
+            queue.put_nowait(
+                events.AssistantMessageDeltaEvent(content=item.content, response_id=item.response_id, session_id="s1")
+            )
+    return items, queue.qsize()
+
+
+class TestDeltaCoalescer(unittest.TestCase):
+    def test_first_delta_and_deltas_after_a_pause_pass_through(self):
+        coalescer = DeltaCoalescer(max_interval_s=0.016, max_chars=256)
+        self.assertEqual(coalescer.add("a", 1.0), "a")
+        self.assertEqual(coalescer.add("b", 1.5), "b")
+
+    def test_bursts_are_merged_until_the_interval_or_size_bound(self):
+        coalescer = DeltaCoalescer(max_interval_s=0.016, max_chars=8)
+        self.assertEqual(coalescer.add("a", 1.0), "a")
+        self.assertIsNone(coalescer.add("b", 1.005))
+        self.assertIsNone(coalescer.add("c", 1.010))
+        self.assertEqual(coalescer.add("d", 1.016), "bcd")
+        self.assertIsNone(coalescer.add("1234", 1.017))
+        self.assertEqual(coalescer.add("5678", 1.018), "12345678")
+        self.assertIsNone(coalescer.add("tail", 1.019))
+        self.assertEqual(coalescer.flush(), "tail")
+        self.assertIsNone(coalescer.flush())
+
+    def test_timer_needs_a_long_enough_generation_for_throughput(self):
+        timer = StreamTimer()
+        self.assertIsNone(timer.first_token_latency_ms)
+        timer.mark()
+        self.assertIsNone(timer.throughput_tps(10))
+        assert timer.first_token is not None
+        timer.last_token = timer.first_token + 0.5
+        self.assertEqual(timer.throughput_tps(10), 20)
+
+
+class TestStreamingFastPath(unittest.TestCase):
+    def test_metrics_come_from_the_raw_deltas(self):
+        recorded = _recorded_stream(60)
+        items, _ = asyncio.run(_consume(_client(_Replay(recorded, pace_s=0.004, first_token_after_s=0.05))))
+        text = "".join(item.content for item in items if isinstance(item, model.AssistantMessageDelta))
+        message = next(item for item in items if isinstance(item, model.AssistantMessageItem))
+        self.assertEqual(text, message.content)
+        # Deltas are emitted before the message they belong to
+        deltas_end = max(i for i, item in enumerate(items) if isinstance(item, model.AssistantMessageDelta))
+        self.assertLess(deltas_end, items.index(message))
+        tool_call = next(item for item in items if isinstance(item, model.ToolCallItem))
+        self.assertEqual(len(json.loads(tool_call.arguments)["content"]), 4)
+
+        usage = next(item for item in items if isinstance(item, model.ResponseMetadataItem)).usage
+        assert usage is not None and usage.first_token_latency_ms is not None and usage.throughput_tps is not None
+        self.assertGreaterEqual(usage.first_token_latency_ms, 45)
+        # 60 tokens over at least 58 paced gaps
+        self.assertLess(usage.throughput_tps, 60 / (58 * 0.004))
+
+
+class TestStreamReplayBenchmark(unittest.TestCase):
+    def test_replay_20k_token_stream(self):
+        """Replay a recorded 20k-token response, with and without coalescing."""
+        tokens = 20_000
+        recorded = _recorded_stream(tokens)
+        results: dict[str, tuple[float, float, int, str]] = {}
+        modes = {
+            "per-delta": functools.partial(DeltaCoalescer, max_interval_s=0.0, max_chars=1),
+            "coalesced": DeltaCoalescer,
+        }
+        for name, coalescer in modes.items():
+            with mock.patch("klaude_code.llm.anthropic.client.DeltaCoalescer", coalescer):
+                client = _client(_Replay(recorded))
+                wall_started, cpu_started = time.perf_counter(), time.process_time()
+                items, queued = asyncio.run(_consume(client))
+                wall_s, cpu_s = time.perf_counter() - wall_started, time.process_time() - cpu_started
+            text = "".join(item.content for item in items if isinstance(item, model.AssistantMessageDelta))
+            results[name] = (wall_s, cpu_s, queued, text)
+            print(
+                f"{name}: {len(recorded) / wall_s:,.0f} stream events/s, {queued} UI events, "
+                f"{cpu_s / tokens * 1e6:.1f} µs CPU per token"
+            )
+
+        per_delta, coalesced = results["per-delta"], results["coalesced"]
+        self.assertEqual(coalesced[3], per_delta[3])
+        self.assertGreater(per_delta[2], tokens * 0.7)
+        # The replay arrives in one burst, only the size bound splits it
+        self.assertLess(coalesced[2], per_delta[2] / 20)
+        self.assertLess(coalesced[1], per_delta[1])
@@ -0,0 +1,64 @@
+import asyncio
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from klaude_code.protocol import events, model
+from klaude_code.protocol.tools import SubAgentType
+from klaude_code.session.catalog import get_catalog
+from klaude_code.session.session import Session
+
+
+class TestSubAgentReplay(unittest.TestCase):
+    def setUp(self) -> None:
+        self._orig_cwd = os.getcwd()
+        self._tmp = tempfile.TemporaryDirectory()
+        os.chdir(self._tmp.name)
+        self._env = mock.patch.dict(os.environ, {"HOME": self._tmp.name})
+        self._env.start()
+
+    def tearDown(self) -> None:
+        get_catalog(Session.storage_dir()).close()
+        self._env.stop()
+        os.chdir(self._orig_cwd)
+        self._tmp.cleanup()
+
+    def _parent_with_runs(self, runs: int) -> Session:
+        parent = Session(work_dir=Path.cwd())
+        parent.append_history([model.UserMessageItem(content="look around")])
+        for i in range(runs):
+            child = Session(work_dir=Path.cwd(), is_root_session=False, sub_agent_type=SubAgentType.EXPLORE)
+            child.append_history(
+                [model.UserMessageItem(content=f"explore {i}"), model.AssistantMessageItem(content=f"found {i}")]
+            )
+            parent.child_session_ids.append(child.id)
+            parent.append_history(
+                [
+                    model.ToolCallItem(call_id=f"c{i}", name="Explore", arguments="{}"),
+                    model.ToolResultItem(
+                        call_id=f"c{i}", tool_name="Explore", status="success", output=f"found {i}", ui_extra=child.id
+                    ),
+                ]
+            )
+        return parent
+
+    def test_replay_collapses_sub_agent_runs_without_loading_them(self):
+        parent = self._parent_with_runs(3)
+        with mock.patch.object(Session, "load", side_effect=AssertionError("child loaded")):
+            replay = list(parent.get_history_item())
+        collapsed = [e for e in replay if isinstance(e, events.SubAgentCollapsedEvent)]
+        self.assertEqual([e.index for e in collapsed], [1, 2, 3])
+        self.assertEqual([e.child_session_id for e in collapsed], parent.child_session_ids)
+        self.assertEqual(collapsed[0].tool_name, "Explore")
+
+    def test_children_load_concurrently_in_order(self):
+        parent = self._parent_with_runs(12)
+
+        children = asyncio.run(Session.load_sessions(parent.child_session_ids))
+        self.assertEqual([child.id for child in children], parent.child_session_ids)
+        self.assertEqual(children[0].sub_agent_type, SubAgentType.EXPLORE)
+        replay = list(children[11].get_history_item())
+        self.assertIsInstance(replay[0], events.UserMessageEvent)
+        self.assertEqual(replay[-1].content, "found 11")  # type: ignore[union-attr]
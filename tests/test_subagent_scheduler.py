@@ -0,0 +1,119 @@
+import asyncio
+import json
+import os
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from fake_llm import ScriptedLLMClient, fake_config
+
+import klaude_code.core.tool as core_tool  # noqa: F401
+from klaude_code import ui  # noqa: F401  # import order matches the CLI (ui before command)
+from klaude_code.core.agent import AgentLLMClients
+from klaude_code.core.executor import ExecutorContext
+from klaude_code.protocol import events, llm_parameter, model, tools
+from klaude_code.protocol.op import InterruptOperation, UserInputOperation
+from klaude_code.session.session import Session
+
+_SUB_AGENT_DELAY_S = 0.2
+
+
+class _ScriptedClient(ScriptedLLMClient):
+    """Main agent fans out to three Explore agents, each of which answers after a delay."""
+
+    async def respond(self, param: llm_parameter.LLMCallParameter) -> list[model.ConversationItem]:
+        is_sub_agent = param.tools is not None and tools.EXPLORE not in {t.name for t in param.tools}
+        has_results = any(isinstance(item, model.ToolResultItem) for item in param.input)
+        if is_sub_agent:
+            await asyncio.sleep(_SUB_AGENT_DELAY_S)
+            return [model.AssistantMessageItem(content="found it"), model.ResponseMetadataItem()]
+        if not has_results:
+            explores: list[model.ConversationItem] = [
+                model.ToolCallItem(
+                    call_id=f"explore-{i}",
+                    name=tools.EXPLORE,
+                    arguments=json.dumps({"description": "look", "prompt": f"look {i}"}),
+                )
+                for i in range(3)
+            ]
+            return [*explores, model.ResponseMetadataItem()]
+        return await super().respond(param)
+
+
+def _make_context(max_concurrent_sub_agents: int) -> tuple[ExecutorContext, asyncio.Queue[events.Event]]:
+    config = fake_config(provider_name="fake")
+    queue: asyncio.Queue[events.Event] = asyncio.Queue()
+    context = ExecutorContext(
+        queue,
+        AgentLLMClients(main=_ScriptedClient(config=config)),
+        config,
+        max_concurrent_sub_agents=max_concurrent_sub_agents,
+    )
+    return context, queue
+
+
+def _drain(queue: asyncio.Queue[events.Event]) -> list[events.Event]:
+    collected: list[events.Event] = []
+    while not queue.empty():
+        collected.append(queue.get_nowait())
+    return collected
+
+
+class TestSubAgentScheduler(unittest.TestCase):
+    def setUp(self) -> None:
+        self._orig_cwd = os.getcwd()
+        self._tmp = tempfile.TemporaryDirectory()
+        os.chdir(self._tmp.name)
+        self._env = mock.patch.dict(os.environ, {"HOME": self._tmp.name})
+        self._env.start()
+
+    def tearDown(self) -> None:
+        self._env.stop()
+        os.chdir(self._orig_cwd)
+        self._tmp.cleanup()
+
+    def _run_fan_out(self, max_concurrent_sub_agents: int) -> tuple[float, list[events.Event]]:
+        async def _run() -> tuple[float, list[events.Event]]:
+            context, queue = _make_context(max_concurrent_sub_agents)
+            session = Session(work_dir=Path.cwd())
+            started = time.perf_counter()
+            await context.handle_user_input(UserInputOperation(id="op", session_id=session.id, content="go"))
+            await context.active_tasks["op"].task
+            return time.perf_counter() - started, _drain(queue)
+
+        return asyncio.run(_run())
+
+    def test_sub_agents_run_concurrently_and_are_tagged(self):
+        elapsed, emitted = self._run_fan_out(max_concurrent_sub_agents=3)
+        self.assertLess(elapsed, _SUB_AGENT_DELAY_S * 2)
+
+        sub_agent_starts = [e for e in emitted if isinstance(e, events.TaskStartEvent) and e.is_sub_agent]
+        self.assertEqual(
+            sorted(e.parent_tool_call_id or "" for e in sub_agent_starts), ["explore-0", "explore-1", "explore-2"]
+        )
+        results = [e for e in emitted if isinstance(e, events.ToolResultEvent) and e.tool_name == tools.EXPLORE]
+        self.assertEqual([e.tool_call_id for e in results], ["explore-0", "explore-1", "explore-2"])
+        self.assertTrue(all(e.status == "success" for e in results))
+
+    def test_per_provider_limit(self):
+        elapsed, _ = self._run_fan_out(max_concurrent_sub_agents=1)
+        self.assertGreaterEqual(elapsed, _SUB_AGENT_DELAY_S * 3)
+
+    def test_interrupt_cancels_running_sub_agents(self):
+        async def _run() -> list[events.Event]:
+            context, queue = _make_context(max_concurrent_sub_agents=3)
+            session = Session(work_dir=Path.cwd())
+            await context.handle_user_input(UserInputOperation(id="op", session_id=session.id, content="go"))
+            task = context.active_tasks["op"].task
+            await asyncio.sleep(_SUB_AGENT_DELAY_S / 2)
+            await context.handle_interrupt(InterruptOperation(id="int", target_session_id=session.id))
+            await asyncio.gather(task, return_exceptions=True)
+            self.assertEqual(context.subagent_scheduler._running, {})  # pyright: ignore[reportPrivateUsage]
+            return _drain(queue)
+
+        emitted = asyncio.run(_run())
+        self.assertFalse(any(isinstance(e, events.AssistantMessageEvent) and e.content == "found it" for e in emitted))
+        cancelled = [e for e in emitted if isinstance(e, events.ToolResultEvent) and e.status == "error"]
+        self.assertEqual(sorted(e.tool_call_id for e in cancelled), ["explore-0", "explore-1", "explore-2"])
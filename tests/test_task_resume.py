@@ -0,0 +1,147 @@
+import asyncio
+import json
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from fake_llm import ScriptedLLMClient
+
+from klaude_code.core.agent import INTERRUPTED_OUTPUT, Agent, AgentLLMClients
+from klaude_code.core.tool.image_preprocess import PROVIDER_IMAGE_LIMITS, ImageLimits
+from klaude_code.core.tool.tool_context import current_image_limits_var
+from klaude_code.protocol import events, llm_parameter, model, tools
+from klaude_code.session.catalog import get_catalog
+from klaude_code.session.session import Session
+
+
+def _call(call_id: str, name: str, **arguments: str) -> model.ToolCallItem:
+    return model.ToolCallItem(call_id=call_id, name=name, arguments=json.dumps(arguments))
+
+
+def _result(tool_call: model.ToolCallItem, output: str = "ok") -> model.ToolResultItem:
+    return model.ToolResultItem(call_id=tool_call.call_id, tool_name=tool_call.name, status="success", output=output)
+
+
+class TestTaskResume(unittest.TestCase):
+    def setUp(self) -> None:
+        self._orig_cwd = os.getcwd()
+        self._tmp = tempfile.TemporaryDirectory()
+        os.chdir(self._tmp.name)
+        self._env = mock.patch.dict(os.environ, {"HOME": self._tmp.name})
+        self._env.start()
+        self.executed: list[str] = []
+
+    def tearDown(self) -> None:
+        get_catalog(Session.storage_dir()).close()
+        self._env.stop()
+        os.chdir(self._orig_cwd)
+        self._tmp.cleanup()
+
+    async def _run_tool(self, tool_call: model.ToolCallItem) -> model.ToolResultItem:
+        self.executed.append(tool_call.call_id)
+        return _result(tool_call, f"ran {tool_call.call_id}")
+
+    def _crashed_session(self, calls: list[tuple[model.ToolCallItem, str]]) -> Session:
+        """A session as a crash leaves it: calls are `done`, `in_progress` or `pending`."""
+        session = Session(work_dir=Path.cwd())
+        session.append_history([model.UserMessageItem(content="build it")])
+        session.set_task_running(True)
+        session.append_history([tool_call for tool_call, _ in calls])
+        for tool_call, state in calls:
+            if state == "done":
+                session.append_history([_result(tool_call)])
+            else:
+                session.set_tool_call_state(tool_call.call_id, state)  # type: ignore[arg-type]
+        return Session.load(session.id)
+
+    def test_resume_reuses_results_and_reruns_only_safe_calls(self):
+        done = _call("a", tools.EDIT, file_path="x")
+        reading = _call("b", tools.READ, file_path="x")
+        not_started = _call("c", tools.EDIT, file_path="y")
+        building = _call("d", tools.BASH, command="make install")
+        after_build = _call("e", tools.READ, file_path="z")
+        session = self._crashed_session(
+            [
+                (done, "done"),
+                (reading, "in_progress"),
+                (not_started, "pending"),
+                (building, "in_progress"),
+                (after_build, "pending"),
+            ]
+        )
+        interrupted = session.interrupted_task()
+        assert interrupted is not None
+        self.assertEqual(interrupted.completed_tool_calls, 1)
+        self.assertEqual([call.call_id for call, _ in interrupted.unfinished_tool_calls], ["b", "c", "d", "e"])
+
+        client = ScriptedLLMClient()
+        agent = Agent(AgentLLMClients(main=client), session, vanilla=True)
+
+        async def _resume() -> list[events.Event]:
+            with mock.patch("klaude_code.core.tool.tool_scheduler.run_tool", self._run_tool):
+                return [e async for e in agent.resume_task()]
+
+        emitted = asyncio.run(_resume())
+        self.assertEqual(self.executed, ["b", "c"])
+        self.assertIsInstance(emitted[-1], events.TaskFinishEvent)
+        # The model continues with a result for every call of the interrupted turn
+        outputs = {
+            item.call_id: item.output for item in client.calls[0].input if isinstance(item, model.ToolResultItem)
+        }
+        self.assertEqual(
+            outputs, {"a": "ok", "b": "ran b", "c": "ran c", "d": INTERRUPTED_OUTPUT, "e": INTERRUPTED_OUTPUT}
+        )
+
+        reloaded = Session.load(session.id)
+        self.assertFalse(reloaded.task_running)
+        self.assertEqual(reloaded.inflight_tool_calls, {})
+        self.assertIsNone(reloaded.interrupted_task())
+
+    def test_tool_call_states_are_on_disk_while_the_call_runs(self):
+        session = Session(work_dir=Path.cwd())
+        build = _call("c1", tools.BASH, command="make")
+        client = ScriptedLLMClient([[build]])
+        agent = Agent(AgentLLMClients(main=client), session, vanilla=True)
+        seen: list[tuple[dict[str, object], str]] = []
+        image_limits: list[ImageLimits | None] = []
+
+        async def _run_tool(tool_call: model.ToolCallItem) -> model.ToolResultItem:
+            image_limits.append(current_image_limits_var.get())
+            # The files as a crash would leave them, `Session.load` would flush the queued changes first
+            metadata = json.loads(session._session_file().read_text())  # pyright: ignore[reportPrivateUsage]
+            seen.append((metadata, session._messages_file().read_text()))  # pyright: ignore[reportPrivateUsage]
+            return _result(tool_call)
+
+        async def _run() -> None:
+            with mock.patch("klaude_code.core.tool.tool_scheduler.run_tool", _run_tool):
+                async for _ in agent.run_task("build it"):
+                    pass
+            # The task's image limits do not outlive it
+            self.assertIsNone(current_image_limits_var.get())
+
+        asyncio.run(_run())
+        self.assertEqual(image_limits, [PROVIDER_IMAGE_LIMITS[llm_parameter.LLMClientProtocol.ANTHROPIC]])
+        metadata, messages = seen[0]
+        self.assertTrue(metadata["task_running"])
+        self.assertEqual(metadata["inflight_tool_calls"], {"c1": "in_progress"})
+        self.assertIn('"call_id": "c1"', messages)
+        self.assertIsNone(Session.load(session.id).interrupted_task())
+
+    def test_new_task_closes_the_interrupted_one(self):
+        building = _call("d", tools.BASH, command="make")
+        session = self._crashed_session([(building, "in_progress")])
+        client = ScriptedLLMClient()
+        agent = Agent(AgentLLMClients(main=client), session, vanilla=True)
+
+        async def _run() -> None:
+            async for _ in agent.run_task("something else"):
+                pass
+
+        asyncio.run(_run())
+        sent = client.calls[0].input
+        result = next(item for item in sent if isinstance(item, model.ToolResultItem))
+        self.assertEqual((result.call_id, result.output), ("d", INTERRUPTED_OUTPUT))
+        self.assertIsInstance(sent[-2], model.InterruptItem)
+        self.assertEqual(self.executed, [])
@@ -0,0 +1,82 @@
+import json
+import unittest
+
+from openai.types.chat.chat_completion_chunk import ChoiceDeltaToolCall, ChoiceDeltaToolCallFunction
+
+from klaude_code.llm.openai_compatible.tool_call_accumulator import BasicToolCallAccumulator
+from klaude_code.llm.partial_json import MAX_FIELD_CHARS, PartialJSONFields
+from klaude_code.protocol import model
+
+
+def _chunk(index: int, arguments: str, call_id: str | None = None, name: str | None = None) -> ChoiceDeltaToolCall:
+    return ChoiceDeltaToolCall(
+        index=index, id=call_id, function=ChoiceDeltaToolCallFunction(arguments=arguments, name=name), type="function"
+    )
+
+
+def _feed_in_pieces(text: str, size: int) -> PartialJSONFields:
+    partial = PartialJSONFields()
+    for start in range(0, len(text), size):
+        partial.feed(text[start : start + size])
+    return partial
+
+
+class TestPartialJSONFields(unittest.TestCase):
+    def test_top_level_strings_at_any_split(self):
+        arguments = {
+            "file_path": '/tmp/a \\"quoted\\" é.py',
+            "options": {"nested": "skipped", "list": ["x", {"y": "z"}]},
+            "limit": 10,
+            "replace_all": True,
+            "command": "echo '}' \"{\"",
+        }
+        text = json.dumps(arguments)
+        for size in (1, 2, 3, 7, len(text)):
+            with self.subTest(size=size):
+                fields = _feed_in_pieces(text, size).fields
+                self.assertEqual(fields, {"file_path": arguments["file_path"], "command": arguments["command"]})
+
+    def test_field_is_reported_when_its_closing_quote_arrives(self):
+        partial = PartialJSONFields()
+        self.assertEqual(partial.feed('{"command": "git st'), [])
+        self.assertEqual(partial.feed('atus", "description": "Show'), ["command"])
+        self.assertEqual(partial.fields, {"command": "git status"})
+
+    def test_long_values_are_not_kept(self):
+        text = json.dumps({"patch": "x" * (MAX_FIELD_CHARS + 1), "path": "a.py"})
+        self.assertEqual(_feed_in_pieces(text, 100).fields, {"path": "a.py"})
+
+
+class TestToolCallAccumulator(unittest.TestCase):
+    def test_call_is_complete_when_the_next_index_starts(self):
+        accumulator = BasicToolCallAccumulator(response_id="r1")
+        self.assertEqual(accumulator.add([_chunk(0, "", "call_a", "Bash")]), [])
+        self.assertEqual(accumulator.add([_chunk(0, '{"comm')]), [])
+        started = accumulator.add([_chunk(0, 'and": "pwd"')])
+        self.assertEqual(
+            started,
+            [model.ToolCallStartItem(response_id="r1", call_id="call_a", name="Bash", arguments='{"command": "pwd"}')],
+        )
+        self.assertEqual(accumulator.add([_chunk(0, "}")]), [])
+
+        completed = accumulator.add([_chunk(1, "", "call_b", "Bash")])
+        self.assertEqual(
+            completed,
+            [
+                model.ToolCallItem(
+                    id="call_a", call_id="call_a", name="Bash", arguments='{"command": "pwd"}', response_id="r1"
+                )
+            ],
+        )
+        accumulator.add([_chunk(1, '{"command": "ls"}')])
+        last = accumulator.flush()
+        self.assertEqual([(item.call_id, item.arguments) for item in last], [("call_b", '{"command": "ls"}')])
+        self.assertEqual(accumulator.flush(), [])
+
+    def test_one_complete_call_per_step(self):
+        accumulator = BasicToolCallAccumulator()
+        first = accumulator.add([_chunk(0, '{"command":"pwd"}', "call_1", "Bash")])
+        self.assertEqual([type(item) for item in first], [model.ToolCallStartItem])
+        second = accumulator.add([_chunk(1, '{"command":"ls"}', "call_2", "Bash")])
+        self.assertEqual([item.call_id for item in second if isinstance(item, model.ToolCallItem)], ["call_1"])
+        self.assertEqual([item.call_id for item in accumulator.flush()], ["call_2"])
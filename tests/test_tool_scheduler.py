@@ -0,0 +1,217 @@
+import asyncio
+import json
+import os
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from typing import Any
+
+import klaude_code.core.tool as core_tool  # noqa: F401
+from klaude_code.core.tool.command_safety import is_read_only_command
+from klaude_code.core.tool.tool_abc import ToolABC
+from klaude_code.core.tool.tool_registry import register
+from klaude_code.core.tool.tool_scheduler import (
+    ToolCallFinished,
+    ToolCallStarted,
+    ToolScheduler,
+    is_prefetchable_tool_call,
+    is_read_only_tool_call,
+    plan_tool_batches,
+)
+from klaude_code.protocol import model, tools
+from klaude_code.protocol.llm_parameter import ToolSchema
+from klaude_code.session.session import Session
+
+_SLEEP_TOOL = "SleepForTest"
+_finish_order: list[str] = []
+
+
+@register(_SLEEP_TOOL)
+class _SleepTool(ToolABC):
+    @classmethod
+    def schema(cls) -> ToolSchema:
+        return ToolSchema(name=_SLEEP_TOOL, type="function", description="", parameters={})
+
+    @classmethod
+    async def call(cls, arguments: str) -> model.ToolResultItem:
+        args = json.loads(arguments)
+        await asyncio.sleep(args["seconds"])
+        _finish_order.append(args["name"])
+        return model.ToolResultItem(status="success", output=args["name"])
+
+
+def _call(call_id: str, name: str, arguments: dict[str, Any]) -> model.ToolCallItem:
+    return model.ToolCallItem(call_id=call_id, name=name, arguments=json.dumps(arguments))
+
+
+class TestReadOnlyClassification(unittest.TestCase):
+    def test_read_only_commands(self):
+        for command in ["ls -la", "rg foo | head -5", "git status && git diff", "sed -n 1,5p a.py"]:
+            self.assertTrue(is_read_only_command(command), command)
+
+    def test_mutating_commands(self):
+        for command in ["rm a", "cat a > b", "git commit -m x", "find . -delete", "echo $(rm a)", "ls; touch a"]:
+            self.assertFalse(is_read_only_command(command), command)
+
+    def test_tool_calls(self):
+        self.assertTrue(is_read_only_tool_call(_call("1", tools.READ, {"file_path": "/a"})))
+        self.assertTrue(is_read_only_tool_call(_call("2", tools.BASH, {"command": "rg foo"})))
+        self.assertTrue(is_read_only_tool_call(_call("3", tools.EXPLORE, {"prompt": "x"})))
+        self.assertFalse(is_read_only_tool_call(_call("4", tools.BASH, {"command": "make test"})))
+        self.assertFalse(is_read_only_tool_call(_call("5", tools.EDIT, {"file_path": "/a"})))
+        self.assertFalse(is_read_only_tool_call(_call("6", tools.TASK, {"prompt": "x"})))
+
+    def test_sub_agents_are_not_prefetched(self):
+        self.assertTrue(is_prefetchable_tool_call(_call("1", tools.READ, {"file_path": "/a"})))
+        self.assertFalse(is_prefetchable_tool_call(_call("2", tools.EXPLORE, {"prompt": "x"})))
+
+    def test_plan_batches_keeps_mutations_isolated(self):
+        calls = [
+            _call("r1", tools.READ, {"file_path": "/a"}),
+            _call("r2", tools.READ, {"file_path": "/b"}),
+            _call("e1", tools.EDIT, {"file_path": "/a"}),
+            _call("r3", tools.READ, {"file_path": "/a"}),
+            _call("b1", tools.BASH, {"command": "ls"}),
+        ]
+        batches = [[c.call_id for c in batch] for batch in plan_tool_batches(calls)]
+        self.assertEqual(batches, [["r1", "r2"], ["e1"], ["r3", "b1"]])
+
+    def test_plan_batches_fans_out_sub_agents(self):
+        calls = [
+            _call("t1", tools.TASK, {"prompt": "x"}),
+            _call("x1", tools.EXPLORE, {"prompt": "y"}),
+            _call("t2", tools.TASK, {"prompt": "z"}),
+            _call("b1", tools.BASH, {"command": "make"}),
+        ]
+        batches = [[c.call_id for c in batch] for batch in plan_tool_batches(calls)]
+        self.assertEqual(batches, [["t1", "x1", "t2"], ["b1"]])
+
+    def test_plan_batches_keeps_mutating_sub_agents_apart_from_reads(self):
+        calls = [
+            _call("r0", tools.READ, {"file_path": "/a"}),
+            _call("t1", tools.TASK, {"prompt": "edit /a"}),
+            _call("r1", tools.READ, {"file_path": "/a"}),
+            _call("b1", tools.BASH, {"command": "git diff"}),
+        ]
+        batches = [[c.call_id for c in batch] for batch in plan_tool_batches(calls)]
+        self.assertEqual(batches, [["r0"], ["t1"], ["r1", "b1"]])
+
+    def test_plan_batches_read_only_sub_agents_join_either_kind(self):
+        calls = [
+            _call("r0", tools.READ, {"file_path": "/a"}),
+            _call("x1", tools.EXPLORE, {"prompt": "y"}),
+            _call("t1", tools.TASK, {"prompt": "z"}),
+            _call("x2", tools.EXPLORE, {"prompt": "y"}),
+            _call("r1", tools.READ, {"file_path": "/a"}),
+        ]
+        batches = [[c.call_id for c in batch] for batch in plan_tool_batches(calls)]
+        self.assertEqual(batches, [["r0", "x1"], ["t1", "x2"], ["r1"]])
+
+
+class TestToolScheduler(unittest.TestCase):
+    def setUp(self) -> None:
+        self._orig_cwd = os.getcwd()
+        self._tmp = tempfile.TemporaryDirectory()
+        os.chdir(self._tmp.name)
+        self.session = Session(work_dir=Path.cwd())
+        _finish_order.clear()
+
+    def tearDown(self) -> None:
+        os.chdir(self._orig_cwd)
+        self._tmp.cleanup()
+
+    def _collect(self, scheduler: ToolScheduler, calls: list[model.ToolCallItem]) -> list[tuple[str, str]]:
+        async def _run() -> list[tuple[str, str]]:
+            collected: list[tuple[str, str]] = []
+            async for event in scheduler.run(calls):
+                match event:
+                    case ToolCallStarted(tool_call=tc):
+                        collected.append(("start", tc.call_id))
+                    case ToolCallFinished(tool_call=tc, result=result):
+                        self.assertEqual(result.call_id, tc.call_id)
+                        collected.append(("finish", tc.call_id))
+            return collected
+
+        return asyncio.run(_run())
+
+    def test_read_only_calls_overlap_and_keep_order(self):
+        for name in ("a.txt", "b.txt"):
+            Path(name).write_text("x\n")
+        calls = [
+            _call("r1", tools.READ, {"file_path": str(Path("a.txt").resolve())}),
+            _call("r2", tools.READ, {"file_path": str(Path("b.txt").resolve())}),
+        ]
+        events = self._collect(ToolScheduler(self.session), calls)
+        self.assertEqual(events, [("start", "r1"), ("start", "r2"), ("finish", "r1"), ("finish", "r2")])
+        self.assertEqual(len(self.session.file_tracker), 2)
+
+    def test_mutating_calls_run_serially_in_model_order(self):
+        calls = [
+            _call("slow", _SLEEP_TOOL, {"seconds": 0.05, "name": "slow"}),
+            _call("fast", _SLEEP_TOOL, {"seconds": 0.0, "name": "fast"}),
+        ]
+        started = time.perf_counter()
+        events = self._collect(ToolScheduler(self.session), calls)
+        self.assertGreaterEqual(time.perf_counter() - started, 0.05)
+        self.assertEqual(_finish_order, ["slow", "fast"])
+        self.assertEqual(events, [("start", "slow"), ("finish", "slow"), ("start", "fast"), ("finish", "fast")])
+
+    def test_prefetch_only_starts_leading_read_only_calls(self):
+        Path("a.txt").write_text("x\n")
+        read = _call("r1", tools.READ, {"file_path": str(Path("a.txt").resolve())})
+        edit = _call("e1", tools.EDIT, {"file_path": str(Path("a.txt").resolve())})
+        read_after_edit = _call("r2", tools.READ, {"file_path": str(Path("a.txt").resolve())})
+
+        async def _run() -> None:
+            scheduler = ToolScheduler(self.session)
+            self.assertTrue(scheduler.prefetch(read))
+            self.assertFalse(scheduler.prefetch(edit))
+            self.assertFalse(scheduler.prefetch(read_after_edit))
+            await asyncio.sleep(0)
+            scheduler.cancel()
+
+        asyncio.run(_run())
+
+    def test_prefetched_calls_are_reused_by_run(self):
+        for name in ("a.txt", "b.txt"):
+            Path(name).write_text("x\n")
+        calls = [
+            _call("r1", tools.READ, {"file_path": str(Path("a.txt").resolve())}),
+            _call("r2", tools.READ, {"file_path": str(Path("b.txt").resolve())}),
+        ]
+
+        async def _run() -> list[tuple[str, str]]:
+            scheduler = ToolScheduler(self.session)
+            for call in calls:
+                self.assertTrue(scheduler.prefetch(call))
+            prefetched = dict(scheduler._tasks)  # pyright: ignore[reportPrivateUsage]
+            collected: list[tuple[str, str]] = []
+            async for event in scheduler.run(calls):
+                match event:
+                    case ToolCallStarted(tool_call=tc):
+                        collected.append(("start", tc.call_id))
+                    case ToolCallFinished(tool_call=tc):
+                        collected.append(("finish", tc.call_id))
+            self.assertTrue(all(task.done() and not task.cancelled() for task in prefetched.values()))
+            return collected
+
+        events = asyncio.run(_run())
+        self.assertEqual(events, [("start", "r1"), ("start", "r2"), ("finish", "r1"), ("finish", "r2")])
+        self.assertEqual(len(self.session.file_tracker), 2)
+
+    def test_discarded_prefetch_does_not_mark_files_as_read(self):
+        Path("a.txt").write_text("x\n")
+        read = _call("r1", tools.READ, {"file_path": str(Path("a.txt").resolve())})
+
+        async def _run() -> None:
+            scheduler = ToolScheduler(self.session)
+            self.assertTrue(scheduler.prefetch(read))
+            task = scheduler._tasks["r1"]  # pyright: ignore[reportPrivateUsage]
+            result = await task
+            self.assertEqual(result.status, "success")
+            # The response failed after the read completed
+            scheduler.cancel()
+
+        asyncio.run(_run())
+        self.assertEqual(self.session.file_tracker, {})
@@ -0,0 +1,72 @@
+import asyncio
+import socket
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from klaude_code.llm.transport import get_http_client, http_pool_stats, preconnect
+
+
+class _KeepAliveHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def _reply(self, body: bytes) -> None:
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_HEAD(self) -> None:
+        self.send_response(404)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def do_GET(self) -> None:
+        self._reply(b"ok")
+
+    def log_message(self, format: str, *args: object) -> None:
+        pass
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self) -> None:
+        super().__init__(("127.0.0.1", 0), _KeepAliveHandler)
+        self.connections = 0
+
+    def process_request(self, request, client_address):  # type: ignore[no-untyped-def]
+        self.connections += 1
+        super().process_request(request, client_address)
+
+
+class TestSharedTransport(unittest.TestCase):
+    def setUp(self) -> None:
+        self.server = _Server()
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        self.base_url = f"http://127.0.0.1:{self.server.server_port}"
+
+    def tearDown(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_preconnected_connection_is_reused_by_every_client(self):
+        async def _run() -> None:
+            await preconnect([f"{self.base_url}/v1", f"{self.base_url}/other"])
+            # Already warm, nothing is sent
+            await preconnect([f"{self.base_url}/v1"])
+            for _ in range(3):
+                response = await get_http_client().get(f"{self.base_url}/v1/models")
+                self.assertEqual(response.text, "ok")
+
+        asyncio.run(_run())
+        self.assertEqual(self.server.connections, 1)
+        stats = next(s for s in http_pool_stats() if s.origin == self.base_url)
+        self.assertEqual((stats.connections, stats.idle, stats.requests), (1, 1, 4))
+
+    def test_unreachable_endpoint_is_ignored(self):
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            closed_port = sock.getsockname()[1]
+        asyncio.run(preconnect([f"http://127.0.0.1:{closed_port}/v1", ""]))